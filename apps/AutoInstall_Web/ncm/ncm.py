@@ -92,6 +92,12 @@ Features:
     - Optimized pagination (default limit 500 vs API default 20)
     - Support for limit='all' to get all records without paging
     - Automatic chunking of "__in" filters beyond 100 item limit
+    - Concurrent fetching of pages and "__in" chunks (max_workers)
+    - iter_routers(), iter_net_devices(), etc. stream large collections
+    - Optional SQLite response cache with per-resource TTLs (cache=True)
+    - bulk_* write methods with bounded concurrency and per-item reports
+    - Optional client-side rate limiter with adaptive concurrency
+      (rate_limit=requests per second, see get_request_metrics())
 
 Full documentation of the Cradlepoint NCM API is available at:
 https://developer.cradlepoint.com
@@ -100,12 +106,20 @@ https://developer.cradlepoint.com
 
 from requests import Session
 from requests.adapters import HTTPAdapter
+from requests.exceptions import RetryError
 from http import HTTPStatus
 from urllib3.util.retry import Retry
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from itertools import product
+from urllib.parse import urlencode
 import sys
 import os
 import json
+import threading
+import time
 import uuid
 from typing import Union, Optional, Dict, Any, Tuple
 
@@ -121,6 +135,286 @@ def __is_json(test_json):
     return True
 
 
+# Placeholder certificate used when storing secrets in certmgmt
+_NCM_API_X509 = "-----BEGIN CERTIFICATE-----\nMIIB0jCCATugAwIBAgIUIF7Bygk4C0l0ikNv00u98unXZ9kwDQYJKoZIhvcNAQEL\nBQAwFzEVMBMGA1UEAwwMTmV0Q2xvdWQgQVBJMB4XDTI1MDYwNDA5MjYzNloXDTM1\nMDYwMzA5MjYzNlowFzEVMBMGA1UEAwwMTmV0Q2xvdWQgQVBJMIGfMA0GCSqGSIb3\nDQEBAQUAA4GNADCBiQKBgQDHWAtI42kixQBU9yZdiTmakxlj1OGfXlYGYDTMr/Q7\neFRZHLxJwIwrfV4UjJSvXkeo9ui1JNXzfQzDwZXdJKEdFM0fBpu9TD/cyetz9lCs\nh5YL1aC0IcH/liZwGt/z2X4snqe3KADHjy8Dl/5ib16vTC/FuRm02Bf8wVJ0c/sr\nhwIDAQABoxswGTAJBgNVHREEAjAAMAwGA1UdEwEB/wQCMAAwDQYJKoZIhvcNAQEL\nBQADgYEAB5UavmWqkT7MXnt2/RE2qdtoTw4PfWIo+I2O7FAwJmHISubp3LW1vCn0\nRIsnyscH+BZmQkZOk3AYhLikgSky64HRHK32HXrLr79ku4as0drJzxuVOOKJn1+6\nDiNWTpAhzT55WU3fZ9H6FRvfEls0ZtLia/yiZ60rH01RO0lo2bs=\n-----END CERTIFICATE-----\n"
+
+
+class NcmCache:
+    """
+    Optional persistent cache for NCM GET results, stored in SQLite.
+    Results are keyed by resource and query params and expire after a
+    per-resource TTL. Records with a "name" are also indexed so by-name
+    lookups can be answered locally.
+    """
+
+    DEFAULT_TTLS = {
+        'accounts': 3600,
+        'firmwares': 86400,
+        'groups': 3600,
+        'products': 86400,
+        'routers': 300
+    }
+
+    def __init__(self, path=None, ttls=None):
+        """
+        :param path: SQLite database file. Defaults to the NCM_CACHE_PATH
+          environment variable or ~/.ncm_cache.sqlite. Optional.
+        :param ttls: dict of resource name to TTL in seconds. Merged over
+          DEFAULT_TTLS; only resources listed here are cached. Optional.
+        """
+        self.path = path or os.environ.get(
+            'NCM_CACHE_PATH', os.path.expanduser('~/.ncm_cache.sqlite'))
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        # Imported here so apps that never enable the cache do not need
+        # sqlite3, which is not available on every router
+        import sqlite3
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, '
+                'resource TEXT, stored_at REAL, body TEXT)')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS names (resource TEXT, name TEXT, '
+                'stored_at REAL, body TEXT, PRIMARY KEY (resource, name))')
+
+    @staticmethod
+    def _key(resource, params):
+        return f'{resource}?{json.dumps(params, sort_keys=True, default=str)}'
+
+    def _fresh(self, resource, stored_at):
+        return time.time() - stored_at < self.ttls.get(resource, 0)
+
+    def caches(self, resource):
+        """
+        Returns True if results for this resource are cached.
+        """
+        return self.ttls.get(resource, 0) > 0
+
+    def get(self, resource, params):
+        """
+        Returns the cached list of records, or None if missing or expired.
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT stored_at, body FROM responses WHERE key = ?',
+                (self._key(resource, params),)).fetchone()
+        if row and self._fresh(resource, row[0]):
+            return json.loads(row[1])
+        return None
+
+    def put(self, resource, params, records):
+        """
+        Stores a list of records and indexes them by name. Partial records
+        (queries using "fields") are not added to the name index.
+        """
+        now = time.time()
+        names = {}
+        if 'fields' not in params:
+            for record in records:
+                if isinstance(record, dict) and record.get('name'):
+                    names.setdefault(record['name'], record)
+        with self._lock, self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)',
+                (self._key(resource, params), resource, now,
+                 json.dumps(records)))
+            self._db.executemany(
+                'INSERT OR REPLACE INTO names VALUES (?, ?, ?, ?)',
+                [(resource, name, now, json.dumps(record))
+                 for name, record in names.items()])
+
+    def get_by_name(self, resource, name):
+        """
+        Returns the cached record with this name, or None.
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT stored_at, body FROM names '
+                'WHERE resource = ? AND name = ?', (resource, name)).fetchone()
+        if row and self._fresh(resource, row[0]):
+            return json.loads(row[1])
+        return None
+
+    def invalidate(self, resource=None):
+        """
+        Drops cached results for one resource, or everything if None.
+        """
+        with self._lock, self._db:
+            if resource is None:
+                self._db.execute('DELETE FROM responses')
+                self._db.execute('DELETE FROM names')
+            else:
+                self._db.execute('DELETE FROM responses WHERE resource = ?',
+                                 (resource,))
+                self._db.execute('DELETE FROM names WHERE resource = ?',
+                                 (resource,))
+
+
+class NcmRateLimiter:
+    """
+    Token bucket rate limiter with AIMD concurrency control, shared by all
+    threads using a client. Throttled responses (429/503, including ones
+    retried by the Retry adapter) halve the request rate and concurrency
+    and pause all requests for any Retry-After. Throttles that arrive
+    within one request interval or Retry-After pause of a decrease are
+    the same congestion event and don't halve again. Successful responses
+    grow the limits back additively.
+    """
+
+    THROTTLE_STATUSES = (HTTPStatus.TOO_MANY_REQUESTS,
+                         HTTPStatus.SERVICE_UNAVAILABLE)
+
+    def __init__(self, rate=10, burst=None, max_concurrency=8, min_rate=0.5):
+        """
+        :param rate: maximum requests per second.
+        :param burst: tokens that can accumulate while idle. Defaults to rate.
+        :param max_concurrency: maximum requests in flight.
+        :param min_rate: floor for the request rate after backing off.
+        """
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.burst = burst or max(1, int(rate))
+        self.max_concurrency = max_concurrency
+        self.concurrency = max_concurrency
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._decrease_until = 0.0
+        self._active = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+        self._started = time.monotonic()
+        self._requests = 0
+        self._retries = 0
+        self._throttled = 0
+        self._wait_time = 0.0
+
+    def acquire(self):
+        """
+        Blocks until a request may be sent. Returns the seconds waited.
+        """
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens
+                                   + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._active >= self.concurrency:
+                    self._cond.wait()
+                    continue
+                delay = max(self._paused_until - now,
+                            (1 - self._tokens) / self.rate)
+                if delay <= 0:
+                    break
+                self._cond.wait(delay)
+            self._tokens -= 1
+            self._active += 1
+            self._requests += 1
+            waited = time.monotonic() - start
+            self._wait_time += waited
+        return waited
+
+    def release(self, status_code=None, retried=(), retry_after=None):
+        """
+        Frees a request slot and adapts rate and concurrency.
+        :param status_code: final status code, or None if the request failed.
+        :param retried: status codes of attempts retried by the adapter.
+        :param retry_after: seconds from a Retry-After header. Optional.
+        """
+        with self._cond:
+            self._active -= 1
+            self._retries += len(retried)
+            throttled = sum(1 for status in (*retried, status_code)
+                            if status in self.THROTTLE_STATUSES)
+            if throttled:
+                now = time.monotonic()
+                self._throttled += throttled
+                self._successes = 0
+                if now >= self._decrease_until:
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    self.concurrency = max(1, self.concurrency // 2)
+                    self._decrease_until = now + max(1 / self.rate,
+                                                     retry_after or 0)
+                if retry_after:
+                    self._paused_until = max(self._paused_until,
+                                             now + retry_after)
+            elif status_code is not None and status_code < 500:
+                self.rate = min(self.max_rate,
+                                self.rate + self.max_rate / 20)
+                self._successes += 1
+                if self._successes >= self.concurrency:
+                    self._successes = 0
+                    self.concurrency = min(self.max_concurrency,
+                                           self.concurrency + 1)
+            self._cond.notify_all()
+
+    def metrics(self):
+        """
+        Returns request counters and the current limits.
+        """
+        with self._cond:
+            elapsed = max(time.monotonic() - self._started, 1e-9)
+            return {
+                'requests': self._requests,
+                'requests_per_sec': self._requests / elapsed,
+                'retries': self._retries,
+                'throttled': self._throttled,
+                'wait_time': self._wait_time,
+                'rate': self.rate,
+                'concurrency': self.concurrency,
+                'active': self._active
+            }
+
+
+class _RateLimitedAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that sends every request through an NcmRateLimiter.
+    """
+
+    def __init__(self, limiter, **kwargs):
+        self.limiter = limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.acquire()
+        try:
+            response = super().send(request, **kwargs)
+        except RetryError:
+            # Retries exhausted on a status in retry_on
+            self.limiter.release(HTTPStatus.SERVICE_UNAVAILABLE)
+            raise
+        except Exception:
+            self.limiter.release()
+            raise
+        retries = getattr(response.raw, 'retries', None)
+        retried = [h.status for h in getattr(retries, 'history', ())
+                   if h.status]
+        self.limiter.release(response.status_code, retried,
+                             _parse_retry_after(
+                                 response.headers.get('Retry-After')))
+        return response
+
+
+def _parse_retry_after(value):
+    """
+    Returns a Retry-After header value in seconds, or None.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
 class BaseNcmClient:
     def __init__(self,
                  log_events=True,
@@ -128,7 +422,9 @@ class BaseNcmClient:
                  retries=5,
                  retry_backoff_factor=2,
                  retry_on=None,
-                 base_url=None):
+                 base_url=None,
+                 max_workers=8,
+                 rate_limit=None):
         """
         Constructor. Sets up and opens request session.
         :param retries: number of retries on failure. Optional.
@@ -138,25 +434,52 @@ class BaseNcmClient:
           Optional.
         :param base_url: # base url for calls. Configurable for testing.
           Optional.
+        :param max_workers: number of concurrent page requests used when
+          paginating. Optional.
+        :param rate_limit: maximum requests per second, or an NcmRateLimiter
+          to share between clients. Optional.
         """
         if retry_on is None:
             retry_on = [
                 HTTPStatus.REQUEST_TIMEOUT,
+                HTTPStatus.TOO_MANY_REQUESTS,
                 HTTPStatus.GATEWAY_TIMEOUT,
                 HTTPStatus.SERVICE_UNAVAILABLE
             ]
         self.log_events = log_events
         self.logger = logger
+        self.max_workers = max_workers
         self.session = Session()
-        self.adapter = HTTPAdapter(
-            max_retries=Retry(total=retries,
-                              backoff_factor=retry_backoff_factor,
-                              status_forcelist=retry_on,
-                              redirect=3
-                              )
-        )
+        max_retries = Retry(total=retries,
+                            backoff_factor=retry_backoff_factor,
+                            status_forcelist=retry_on,
+                            redirect=3
+                            )
+        if isinstance(rate_limit, (int, float)):
+            rate_limit = NcmRateLimiter(rate=rate_limit,
+                                        max_concurrency=max_workers)
+        self.rate_limiter = rate_limit or None
+        if self.rate_limiter:
+            # Size the pool so every allowed request has a connection
+            pool_size = max(max_workers, self.rate_limiter.max_concurrency)
+            self.adapter = _RateLimitedAdapter(self.rate_limiter,
+                                               pool_maxsize=pool_size,
+                                               max_retries=max_retries)
+        else:
+            self.adapter = HTTPAdapter(pool_maxsize=max(max_workers, 10),
+                                       max_retries=max_retries)
         self.base_url = base_url
         self.session.mount(self.base_url, self.adapter)
+
+    def get_request_metrics(self):
+        """
+        Returns rate limiter metrics (requests, requests_per_sec, retries,
+        throttled, wait_time, rate, concurrency), or None if no rate_limit
+        was set.
+        """
+        if self.rate_limiter:
+            return self.rate_limiter.metrics()
+        return None
     
     def log(self, level, message):
         """
@@ -208,10 +531,24 @@ class NcmClientv2(BaseNcmClient):
                  retries=5,
                  retry_backoff_factor=2,
                  retry_on=None,
-                 base_url=None):
+                 base_url=None,
+                 max_workers=8,
+                 cache=None,
+                 rate_limit=None):
+        """
+        :param cache: NcmCache instance, a path to a cache database, or True
+          for the default path. Caches accounts, groups, products, firmwares
+          and routers. Optional, disabled by default.
+        """
         self.v2 = self # for backwards compatibility
         base_url = base_url or os.environ.get("CP_BASE_URL", "https://www.cradlepointecm.com/api/v2")
-        super().__init__(log_events=log_events, logger=logger, retries=retries, retry_backoff_factor=retry_backoff_factor, retry_on=retry_on, base_url=base_url)
+        super().__init__(log_events=log_events, logger=logger, retries=retries, retry_backoff_factor=retry_backoff_factor, retry_on=retry_on, base_url=base_url, max_workers=max_workers, rate_limit=rate_limit)
+        if cache is True:
+            cache = NcmCache()
+        elif isinstance(cache, str):
+            cache = NcmCache(cache)
+        self.cache = cache or None
+        self.session.hooks['response'].append(self.__invalidate_on_write)
         if api_keys:
             if self.__validate_api_keys(api_keys):
                 self.session.headers.update(api_keys)
@@ -240,69 +577,177 @@ class NcmClientv2(BaseNcmClient):
         Returns full paginated results, and handles chunking "__in" params
         in groups of 100.
         """
-        results = []
-        __in_keys = 0
-        if params['limit'] == 'all':
+        return list(self.__iter_json(get_url, call_type, params=params))
+
+    def __iter_json(self, get_url, call_type, params=None):
+        """
+        Returns a generator over the paginated results. Each "__in" param
+        is chunked in groups of 100 and the chunks are fetched concurrently.
+        Validation happens here so bad params raise before iteration starts.
+        """
+        params = dict(params or {})
+        if params.get('limit') == 'all':
             params['limit'] = 1000000
-        limit = int(params['limit'])
+        limit = int(params.get('limit', 500))
+
+        # Ensures that order_by is passed as a comma separated string
+        if 'order_by' in params.keys():
+            if type(params['order_by']) is list:
+                params['order_by'] = ','.join(
+                    str(x) for x in params['order_by'])
+            elif type(params['order_by']) is not str:
+                raise TypeError(
+                    "Invalid 'order_by' parameter. "
+                    "Must be 'list' or 'str'.")
+
+        # Handles multiple filters using __in fields. Cradlepoint limit of
+        # 100 values, so each __in field is split into chunks and one query
+        # is made for every combination of chunks.
+        in_keys = [key for key in params if '__in' in key]
+        in_chunks = [[','.join(map(str, chunk))
+                      for chunk in self.__chunk_param(params[key])]
+                     for key in in_keys]
+        queries = []
+        for combo in product(*in_chunks):
+            query = dict(params)
+            query.update(zip(in_keys, combo))
+            queries.append(query)
+
+        resource = self.__resource(get_url)
+        if self.cache and self.cache.caches(resource):
+            cached = self.cache.get(resource, params)
+            if cached is not None:
+                return iter(cached[:limit])
+            return self.__iter_cached(resource, params,
+                                      self.__iter_pages(get_url, queries,
+                                                        limit))
+
+        return self.__iter_pages(get_url, queries, limit)
+
+    def __iter_cached(self, resource, params, records):
+        """
+        Passes records through and stores them once fully consumed.
+        """
+        results = []
+        for record in records:
+            results.append(record)
+            yield record
+        self.cache.put(resource, params, results)
 
-        if params is not None:
-            # Ensures that order_by is passed as a comma separated string
-            if 'order_by' in params.keys():
-                if type(params['order_by']) is list:
-                    params['order_by'] = ','.join(
-                        str(x) for x in params['order_by'])
-                elif type(params['order_by']) is not list and type(
-                        params['order_by']) is not str:
-                    raise TypeError(
-                        "Invalid 'order_by' parameter. "
-                        "Must be 'list' or 'str'.")
-
-            for key, val in params.items():
-                # Handles multiple filters using __in fields.
-                if '__in' in key:
-                    __in_keys += 1
-                    # Cradlepoint limit of 100 values.
-                    # If more than 100 values, break into chunks
-                    chunks = self.__chunk_param(val)
-                    # For each chunk, get the full results list and
-                    # filter by __in parameter
-                    for chunk in chunks:
-                        # Handles a list of int or list of str
-                        chunk_str = ','.join(map(str, chunk))
-                        params.update({key: chunk_str})
-                        url = get_url
-                        if params is not None:
-                            from urllib.parse import urlencode
-                            query_string = urlencode(params)
-                            url = f'{url}?{query_string}'
-                        while url and (len(results) < limit):
-                            ncm = self.session.get(url)
-                            if not (200 <= ncm.status_code < 300):
-                                break
-                            self._return_handler(ncm.status_code,
-                                                  ncm.json()['data'],
-                                                  call_type)
-                            url = ncm.json()['meta']['next']
-                            for d in ncm.json()['data']:
-                                results.append(d)
-
-        if __in_keys == 0:
-            url = get_url
-            if params is not None:
-                from urllib.parse import urlencode
-                query_string = urlencode(params)
-                url = f'{url}?{query_string}'
-            while url and (len(results) < limit):
-                ncm = self.session.get(url)
-                if not (200 <= ncm.status_code < 300):
+    def __resource(self, url):
+        """
+        Returns the resource name of an API url, e.g. "routers".
+        """
+        path = url.split('?')[0][len(self.base_url):]
+        return path.strip('/').split('/')[0]
+
+    def __invalidate_on_write(self, response, *args, **kwargs):
+        """
+        Session response hook. Any write drops the cached results for the
+        resource it touched.
+        """
+        if self.cache and response.request.method != 'GET':
+            self.cache.invalidate(self.__resource(response.request.url))
+
+    def __get_by_name(self, resource, name):
+        """
+        Returns a record from the cache name index, or None.
+        """
+        if self.cache and self.cache.caches(resource):
+            return self.cache.get_by_name(resource, name)
+        return None
+
+    def invalidate_cache(self, resource=None):
+        """
+        Drops cached results.
+        :param resource: Resource to drop, e.g. "routers". All if None.
+        """
+        if self.cache:
+            self.cache.invalidate(resource)
+
+    def __iter_pages(self, get_url, queries, limit):
+        """
+        Fetches the pages of every query on a thread pool and yields the
+        records in query and page order. When the API reports a total_count
+        the remaining pages are requested by offset in parallel, otherwise
+        meta.next is followed. At most max_workers * 2 pages are buffered.
+        """
+        sep = '&' if '?' in get_url else '?'
+        slots = deque({'url': f'{get_url}{sep}{urlencode(query)}',
+                       'query': query, 'kind': 'first', 'future': None}
+                      for query in queries)
+        window = self.max_workers * 2
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        def fill():
+            in_flight = 0
+            for slot in slots:
+                if in_flight >= window:
                     break
-                self._return_handler(ncm.status_code, ncm.json()['data'],
-                                      call_type)
-                url = ncm.json()['meta']['next']
-                for d in ncm.json()['data']:
-                    results.append(d)
-        return results
+                if slot['future'] is None:
+                    slot['future'] = executor.submit(self.__get_page,
+                                                     slot['url'])
+                in_flight += 1
+
+        count = 0
+        try:
+            fill()
+            while slots and count < limit:
+                slot = slots.popleft()
+                status, body = slot['future'].result()
+                if body is None:
+                    if slot['kind'] != 'first':
+                        # The session already retried it; skipping the
+                        # page would leave a gap in the results
+                        raise Exception(f"Failed to fetch page: HTTP {status} - {slot['url']}")
+                    fill()
+                    continue
+                data = body.get('data') or []
+                meta = body.get('meta') or {}
+
+                if slot['kind'] == 'first' and data and meta.get('next') \
+                        and meta.get('total_count') is not None:
+                    # Fan out the rest of this query by offset. The new
+                    # slots go to the front, ahead of any later queries.
+                    page_size = len(data)
+                    offset = int(meta.get('offset') or 0)
+                    end = min(int(meta['total_count']), offset + limit - count)
+                    for page_offset in reversed(range(offset + page_size,
+                                                      end, page_size)):
+                        query = {**slot['query'], 'limit': page_size,
+                                 'offset': page_offset}
+                        slots.appendleft({
+                            'url': f'{get_url}{sep}{urlencode(query)}',
+                            'query': query, 'kind': 'offset',
+                            'future': None})
+                elif slot['kind'] != 'offset' and meta.get('next'):
+                    slots.appendleft({'url': meta['next'],
+                                      'query': slot['query'], 'kind': 'next',
+                                      'future': None})
+                fill()
+
+                for d in data:
+                    if count >= limit:
+                        break
+                    count += 1
+                    yield d
+        finally:
+            # cancel_futures needs Python 3.9; the router runs 3.8
+            for slot in slots:
+                if slot['future']:
+                    slot['future'].cancel()
+            executor.shutdown(wait=False)
+
+    def __get_page(self, url):
+        """
+        Fetches and decodes a single page. Returns (status code, body), the
+        body being None on a non-2xx status.
+        """
+        ncm = self.session.get(url)
+        if not (200 <= ncm.status_code < 300):
+            self.log('error', f'HTTP {ncm.status_code} fetching {url}: {ncm.text}')
+            return ncm.status_code, None
+        return ncm.status_code, ncm.json()
 
     def __parse_kwargs(self, kwargs, allowed_params):
         """
@@ -357,6 +802,16 @@ class NcmClientv2(BaseNcmClient):
           in the allowed_params list.
         :return: A list of accounts based on API Key.
         """
+        return list(self.iter_accounts(**kwargs))
+
+    def iter_accounts(self, **kwargs):
+        """
+        Same as get_accounts(), but returns a generator that yields each
+        record as its page arrives instead of building the full list.
+        :param kwargs: A set of zero or more allowed parameters
+          in the allowed_params list.
+        :return: generator of accounts
+        """
         call_type = 'Accounts'
         get_url = '{0}/accounts/'.format(self.base_url)
 
@@ -364,7 +819,7 @@ class NcmClientv2(BaseNcmClient):
                           'name', 'name__in', 'expand', 'limit', 'offset']
         params = self.__parse_kwargs(kwargs, allowed_params)
 
-        return self.__get_json(get_url, call_type, params=params)
+        return self.__iter_json(get_url, call_type, params=params)
 
     def get_account_by_id(self, account_id):
         """
@@ -380,7 +835,9 @@ class NcmClientv2(BaseNcmClient):
         :param account_name: Name of account to return
         :return:
         """
-
+        cached = self.__get_by_name('accounts', account_name)
+        if cached:
+            return cached
         return self.get_accounts(name=account_name)[0]
 
     def create_subaccount_by_parent_id(self, parent_account_id,
@@ -513,6 +970,16 @@ class NcmClientv2(BaseNcmClient):
           in the allowed_params list.
         :return:
         """
+        return list(self.iter_configuration_managers(**kwargs))
+
+    def iter_configuration_managers(self, **kwargs):
+        """
+        Same as get_configuration_managers(), but returns a generator that yields each
+        record as its page arrives instead of building the full list.
+        :param kwargs: A set of zero or more allowed parameters
+          in the allowed_params list.
+        :return: generator of configuration managers
+        """
         call_type = 'Configuration Managers'
         get_url = '{0}/configuration_managers/'.format(self.base_url)
 
@@ -521,7 +988,7 @@ class NcmClientv2(BaseNcmClient):
                           'suspended', 'expand', 'limit', 'offset']
         params = self.__parse_kwargs(kwargs, allowed_params)
 
-        return self.__get_json(get_url, call_type, params=params)
+        return self.__iter_json(get_url, call_type, params=params)
 
     def get_configuration_manager_id(self, router_id, **kwargs):
         """
@@ -883,6 +1350,16 @@ class NcmClientv2(BaseNcmClient):
           in the allowed_params list.
         :return:
         """
+        return list(self.iter_groups(**kwargs))
+
+    def iter_groups(self, **kwargs):
+        """
+        Same as get_groups(), but returns a generator that yields each
+        record as its page arrives instead of building the full list.
+        :param kwargs: A set of zero or more allowed parameters
+          in the allowed_params list.
+        :return: generator of groups
+        """
         call_type = 'Groups'
         get_url = '{0}/groups/'.format(self.base_url)
 
@@ -890,7 +1367,7 @@ class NcmClientv2(BaseNcmClient):
                           'name__in', 'expand', 'limit', 'offset']
         params = self.__parse_kwargs(kwargs, allowed_params)
 
-        return self.__get_json(get_url, call_type, params=params)
+        return self.__iter_json(get_url, call_type, params=params)
 
     def get_group_by_id(self, group_id):
         """
@@ -906,6 +1383,9 @@ class NcmClientv2(BaseNcmClient):
         :param group_name: The Name of the group.
         :return:
         """
+        cached = self.__get_by_name('groups', group_name)
+        if cached:
+            return cached
         return self.get_groups(name=group_name)[0]
 
     def create_group_by_parent_id(self, parent_account_id, group_name,
@@ -1069,13 +1549,23 @@ class NcmClientv2(BaseNcmClient):
           in the allowed_params list.
         :return:
         """
+        return list(self.iter_locations(**kwargs))
+
+    def iter_locations(self, **kwargs):
+        """
+        Same as get_locations(), but returns a generator that yields each
+        record as its page arrives instead of building the full list.
+        :param kwargs: A set of zero or more allowed parameters
+          in the allowed_params list.
+        :return: generator of locations
+        """
         call_type = 'Locations'
         get_url = '{0}/locations/'.format(self.base_url)
 
         allowed_params = ['id', 'id__in', 'router', 'router__in', 'limit', 'offset']
         params = self.__parse_kwargs(kwargs, allowed_params)
 
-        return self.__get_json(get_url, call_type, params=params)
+        return self.__iter_json(get_url, call_type, params=params)
 
     def create_location(self, account_id, latitude, longitude, router_id):
         """
@@ -1252,6 +1742,16 @@ class NcmClientv2(BaseNcmClient):
           in the allowed_params list.
         :return:
         """
+        return list(self.iter_net_devices(**kwargs))
+
+    def iter_net_devices(self, **kwargs):
+        """
+        Same as get_net_devices(), but returns a generator that yields each
+        record as its page arrives instead of building the full list.
+        :param kwargs: A set of zero or more allowed parameters
+          in the allowed_params list.
+        :return: generator of net devices
+        """
         call_type = 'Net Devices'
         get_url = '{0}/net_devices/'.format(self.base_url)
 
@@ -1263,7 +1763,7 @@ class NcmClientv2(BaseNcmClient):
                           'expand', 'limit', 'offset']
         params = self.__parse_kwargs(kwargs, allowed_params)
 
-        return self.__get_json(get_url, call_type, params=params)
+        return self.__iter_json(get_url, call_type, params=params)
 
     def get_net_devices_for_router(self, router_id, **kwargs):
         """
@@ -1314,6 +1814,9 @@ class NcmClientv2(BaseNcmClient):
         :param product_name: Name of product (e.g. IBR200)
         :return:
         """
+        cached = self.__get_by_name('products', product_name)
+        if cached:
+            return cached
         for p in self.get_products():
             if p['name'] == product_name:
                 return p
@@ -1572,6 +2075,16 @@ class NcmClientv2(BaseNcmClient):
           in the allowed_params list.
         :return:
         """
+        return list(self.iter_routers(**kwargs))
+
+    def iter_routers(self, **kwargs):
+        """
+        Same as get_routers(), but returns a generator that yields each
+        record as its page arrives instead of building the full list.
+        :param kwargs: A set of zero or more allowed parameters
+          in the allowed_params list.
+        :return: generator of routers
+        """
         call_type = 'Routers'
         get_url = '{0}/routers/'.format(self.base_url)
 
@@ -1586,7 +2099,7 @@ class NcmClientv2(BaseNcmClient):
                           'order_by', 'limit', 'offset']
         params = self.__parse_kwargs(kwargs, allowed_params)
 
-        return self.__get_json(get_url, call_type, params=params)
+        return self.__iter_json(get_url, call_type, params=params)
 
     def get_router_by_id(self, router_id, **kwargs):
         """
@@ -1606,6 +2119,9 @@ class NcmClientv2(BaseNcmClient):
           in the allowed_params list.
         :return:
         """
+        cached = None if kwargs else self.__get_by_name('routers', router_name)
+        if cached:
+            return cached
         return self.get_routers(name=router_name, **kwargs)[0]
 
     def get_routers_for_account(self, account_id, **kwargs):
@@ -2199,6 +2715,41 @@ class NcmClientv2(BaseNcmClient):
         return result
     
 
+    def __api_keys_payload(self, x_ecm_api_id, x_ecm_api_key, x_cp_api_id,
+                           x_cp_api_key, bearer_token):
+        """
+        Builds the certmgmt configuration that stores NCM API keys.
+        """
+        certs = {}
+        for i, (name, key) in enumerate((('X-ECM-API-ID', x_ecm_api_id),
+                                         ('X-ECM-API-KEY', x_ecm_api_key),
+                                         ('X-CP-API-ID', x_cp_api_id),
+                                         ('X-CP-API-KEY', x_cp_api_key),
+                                         ('Bearer Token', bearer_token))):
+            cert_id = f"0000000{i}-abcd-1234-abcd-123456789000"
+            certs[cert_id] = {
+                "_id_": cert_id,
+                "key": key,
+                "name": name,
+                "x509": _NCM_API_X509
+            }
+        return {"configuration": [{"certmgmt": {"certs": certs}}, []]}
+
+    def __encrypted_value_payload(self, name, key):
+        """
+        Builds the certmgmt configuration that stores one encrypted value.
+        """
+        # Generate a unique ID for the certificate
+        cert_id = str(uuid.uuid4())
+        cert = {
+            "_id_": cert_id,
+            "key": key,
+            "name": name,
+            "x509": _NCM_API_X509
+        }
+        return {"configuration": [{"certmgmt": {"certs": {cert_id: cert}}},
+                                  []]}
+
     def set_ncm_api_keys_by_router(self, router_id=None, router_name=None, x_ecm_api_id: str = None, x_ecm_api_key: str = None, x_cp_api_id: str = None, x_cp_api_key: str = None, bearer_token: str = ''):
         """
         This method sets NCM API keys using the router's certificate management configuration
@@ -2244,48 +2795,9 @@ class NcmClientv2(BaseNcmClient):
         config_man_id = response_data['data'][0][
             'id']  # get the Configuration Managers ID from response
 
-        x509 = "-----BEGIN CERTIFICATE-----\nMIIB0jCCATugAwIBAgIUIF7Bygk4C0l0ikNv00u98unXZ9kwDQYJKoZIhvcNAQEL\nBQAwFzEVMBMGA1UEAwwMTmV0Q2xvdWQgQVBJMB4XDTI1MDYwNDA5MjYzNloXDTM1\nMDYwMzA5MjYzNlowFzEVMBMGA1UEAwwMTmV0Q2xvdWQgQVBJMIGfMA0GCSqGSIb3\nDQEBAQUAA4GNADCBiQKBgQDHWAtI42kixQBU9yZdiTmakxlj1OGfXlYGYDTMr/Q7\neFRZHLxJwIwrfV4UjJSvXkeo9ui1JNXzfQzDwZXdJKEdFM0fBpu9TD/cyetz9lCs\nh5YL1aC0IcH/liZwGt/z2X4snqe3KADHjy8Dl/5ib16vTC/FuRm02Bf8wVJ0c/sr\nhwIDAQABoxswGTAJBgNVHREEAjAAMAwGA1UdEwEB/wQCMAAwDQYJKoZIhvcNAQEL\nBQADgYEAB5UavmWqkT7MXnt2/RE2qdtoTw4PfWIo+I2O7FAwJmHISubp3LW1vCn0\nRIsnyscH+BZmQkZOk3AYhLikgSky64HRHK32HXrLr79ku4as0drJzxuVOOKJn1+6\nDiNWTpAhzT55WU3fZ9H6FRvfEls0ZtLia/yiZ60rH01RO0lo2bs=\n-----END CERTIFICATE-----\n"
-        payload = {
-            "configuration": [
-                {
-                    "certmgmt": {
-                        "certs": {
-                            "00000000-abcd-1234-abcd-123456789000": {
-                                "_id_": "00000000-abcd-1234-abcd-123456789000",
-                                "key": x_ecm_api_id,
-                                "name": "X-ECM-API-ID",
-                                "x509": x509
-                            },
-                            "00000001-abcd-1234-abcd-123456789000": {
-                                "_id_": "00000001-abcd-1234-abcd-123456789000",
-                                "key": x_ecm_api_key,
-                                "name": "X-ECM-API-KEY",
-                                "x509": x509
-                            },
-                            "00000002-abcd-1234-abcd-123456789000": {
-                                "_id_": "00000002-abcd-1234-abcd-123456789000",
-                                "key": x_cp_api_id,
-                                "name": "X-CP-API-ID",
-                                "x509": x509
-                            },
-                            "00000003-abcd-1234-abcd-123456789000": {
-                                "_id_": "00000003-abcd-1234-abcd-123456789000",
-                                "key": x_cp_api_key,
-                                "name": "X-CP-API-KEY",
-                                "x509": x509
-                            },
-                            "00000004-abcd-1234-abcd-123456789000": {
-                                "_id_": "00000004-abcd-1234-abcd-123456789000",
-                                "key": bearer_token,
-                                "name": "Bearer Token",
-                                "x509": x509
-                            }
-                        }
-                    }
-                },
-                []
-            ]
-        }
+        payload = self.__api_keys_payload(x_ecm_api_id, x_ecm_api_key,
+                                          x_cp_api_id, x_cp_api_key,
+                                          bearer_token)
 
         ncm = self.session.patch(
             '{0}/configuration_managers/{1}/'.format(self.base_url,
@@ -2317,48 +2829,9 @@ class NcmClientv2(BaseNcmClient):
             except Exception as e:
                 raise Exception(f"Group with name '{group_name}' not found: {str(e)}")
 
-        x509 = "-----BEGIN CERTIFICATE-----\nMIIB0jCCATugAwIBAgIUIF7Bygk4C0l0ikNv00u98unXZ9kwDQYJKoZIhvcNAQEL\nBQAwFzEVMBMGA1UEAwwMTmV0Q2xvdWQgQVBJMB4XDTI1MDYwNDA5MjYzNloXDTM1\nMDYwMzA5MjYzNlowFzEVMBMGA1UEAwwMTmV0Q2xvdWQgQVBJMIGfMA0GCSqGSIb3\nDQEBAQUAA4GNADCBiQKBgQDHWAtI42kixQBU9yZdiTmakxlj1OGfXlYGYDTMr/Q7\neFRZHLxJwIwrfV4UjJSvXkeo9ui1JNXzfQzDwZXdJKEdFM0fBpu9TD/cyetz9lCs\nh5YL1aC0IcH/liZwGt/z2X4snqe3KADHjy8Dl/5ib16vTC/FuRm02Bf8wVJ0c/sr\nhwIDAQABoxswGTAJBgNVHREEAjAAMAwGA1UdEwEB/wQCMAAwDQYJKoZIhvcNAQEL\nBQADgYEAB5UavmWqkT7MXnt2/RE2qdtoTw4PfWIo+I2O7FAwJmHISubp3LW1vCn0\nRIsnyscH+BZmQkZOk3AYhLikgSky64HRHK32HXrLr79ku4as0drJzxuVOOKJn1+6\nDiNWTpAhzT55WU3fZ9H6FRvfEls0ZtLia/yiZ60rH01RO0lo2bs=\n-----END CERTIFICATE-----\n"
-        payload = {
-            "configuration": [
-                {
-                    "certmgmt": {
-                        "certs": {
-                            "00000000-abcd-1234-abcd-123456789000": {
-                                "_id_": "00000000-abcd-1234-abcd-123456789000",
-                                "key": x_ecm_api_id,
-                                "name": "X-ECM-API-ID",
-                                "x509": x509
-                            },
-                            "00000001-abcd-1234-abcd-123456789000": {
-                                "_id_": "00000001-abcd-1234-abcd-123456789000",
-                                "key": x_ecm_api_key,
-                                "name": "X-ECM-API-KEY",
-                                "x509": x509
-                            },
-                            "00000002-abcd-1234-abcd-123456789000": {
-                                "_id_": "00000002-abcd-1234-abcd-123456789000",
-                                "key": x_cp_api_id,
-                                "name": "X-CP-API-ID",
-                                "x509": x509
-                            },
-                            "00000003-abcd-1234-abcd-123456789000": {
-                                "_id_": "00000003-abcd-1234-abcd-123456789000",
-                                "key": x_cp_api_key,
-                                "name": "X-CP-API-KEY",
-                                "x509": x509
-                            },
-                            "00000004-abcd-1234-abcd-123456789000": {
-                                "_id_": "00000004-abcd-1234-abcd-123456789000",
-                                "key": bearer_token,
-                                "name": "Bearer Token",
-                                "x509": x509
-                            }
-                        }
-                    }
-                },
-                []
-            ]
-        }
+        payload = self.__api_keys_payload(x_ecm_api_id, x_ecm_api_key,
+                                          x_cp_api_id, x_cp_api_key,
+                                          bearer_token)
 
         ncm = self.session.patch(
             '{0}/groups/{1}/'.format(self.base_url, str(group_id)),
@@ -2398,28 +2871,7 @@ class NcmClientv2(BaseNcmClient):
         config_man_id = response['data'][0][
             'id']  # get the Configuration Managers ID from response
 
-        x509 = "-----BEGIN CERTIFICATE-----\nMIIB0jCCATugAwIBAgIUIF7Bygk4C0l0ikNv00u98unXZ9kwDQYJKoZIhvcNAQEL\nBQAwFzEVMBMGA1UEAwwMTmV0Q2xvdWQgQVBJMB4XDTI1MDYwNDA5MjYzNloXDTM1\nMDYwMzA5MjYzNlowFzEVMBMGA1UEAwwMTmV0Q2xvdWQgQVBJMIGfMA0GCSqGSIb3\nDQEBAQUAA4GNADCBiQKBgQDHWAtI42kixQBU9yZdiTmakxlj1OGfXlYGYDTMr/Q7\neFRZHLxJwIwrfV4UjJSvXkeo9ui1JNXzfQzDwZXdJKEdFM0fBpu9TD/cyetz9lCs\nh5YL1aC0IcH/liZwGt/z2X4snqe3KADHjy8Dl/5ib16vTC/FuRm02Bf8wVJ0c/sr\nhwIDAQABoxswGTAJBgNVHREEAjAAMAwGA1UdEwEB/wQCMAAwDQYJKoZIhvcNAQEL\nBQADgYEAB5UavmWqkT7MXnt2/RE2qdtoTw4PfWIo+I2O7FAwJmHISubp3LW1vCn0\nRIsnyscH+BZmQkZOk3AYhLikgSky64HRHK32HXrLr79ku4as0drJzxuVOOKJn1+6\nDiNWTpAhzT55WU3fZ9H6FRvfEls0ZtLia/yiZ60rH01RO0lo2bs=\n-----END CERTIFICATE-----\n"
-        
-        # Generate a unique ID for the certificate
-        cert_id = str(uuid.uuid4())
-        
-        payload = {
-            "configuration": [
-                {
-                    "certmgmt": {
-                        "certs": {
-                            cert_id: {
-                                "_id_": cert_id,
-                                "key": key,
-                                "name": name,
-                                "x509": x509
-                            }
-                        }
-                    }
-                },
-                []
-            ]
-        }
+        payload = self.__encrypted_value_payload(name, key)
 
         ncm = self.session.patch(
             '{0}/configuration_managers/{1}/'.format(self.base_url,
@@ -2451,28 +2903,7 @@ class NcmClientv2(BaseNcmClient):
             except Exception as e:
                 raise Exception(f"Group with name '{group_name}' not found: {str(e)}")
 
-        x509 = "-----BEGIN CERTIFICATE-----\nMIIB0jCCATugAwIBAgIUIF7Bygk4C0l0ikNv00u98unXZ9kwDQYJKoZIhvcNAQEL\nBQAwFzEVMBMGA1UEAwwMTmV0Q2xvdWQgQVBJMB4XDTI1MDYwNDA5MjYzNloXDTM1\nMDYwMzA5MjYzNlowFzEVMBMGA1UEAwwMTmV0Q2xvdWQgQVBJMIGfMA0GCSqGSIb3\nDQEBAQUAA4GNADCBiQKBgQDHWAtI42kixQBU9yZdiTmakxlj1OGfXlYGYDTMr/Q7\neFRZHLxJwIwrfV4UjJSvXkeo9ui1JNXzfQzDwZXdJKEdFM0fBpu9TD/cyetz9lCs\nh5YL1aC0IcH/liZwGt/z2X4snqe3KADHjy8Dl/5ib16vTC/FuRm02Bf8wVJ0c/sr\nhwIDAQABoxswGTAJBgNVHREEAjAAMAwGA1UdEwEB/wQCMAAwDQYJKoZIhvcNAQEL\nBQADgYEAB5UavmWqkT7MXnt2/RE2qdtoTw4PfWIo+I2O7FAwJmHISubp3LW1vCn0\nRIsnyscH+BZmQkZOk3AYhLikgSky64HRHK32HXrLr79ku4as0drJzxuVOOKJn1+6\nDiNWTpAhzT55WU3fZ9H6FRvfEls0ZtLia/yiZ60rH01RO0lo2bs=\n-----END CERTIFICATE-----\n"
-        
-        # Generate a unique ID for the certificate
-        cert_id = str(uuid.uuid4())
-        
-        payload = {
-            "configuration": [
-                {
-                    "certmgmt": {
-                        "certs": {
-                            cert_id: {
-                                "_id_": cert_id,
-                                "key": key,
-                                "name": name,
-                                "x509": x509
-                            }
-                        }
-                    }
-                },
-                []
-            ]
-        }
+        payload = self.__encrypted_value_payload(name, key)
 
         ncm = self.session.patch(
             '{0}/groups/{1}/'.format(self.base_url, str(group_id)),
@@ -2504,6 +2935,139 @@ class NcmClientv2(BaseNcmClient):
         result = self._return_handler(ncm.status_code, ncm.json(), call_type)
         return result
 
+    def get_configuration_manager_ids(self, router_ids):
+        """
+        Resolves configuration manager IDs for many routers using batched
+        "router__in" queries.
+        :param router_ids: list of router IDs
+        :return: dict of router ID (str) to configuration manager ID
+        """
+        ids = {}
+        for cm in self.iter_configuration_managers(
+                router__in=[str(r) for r in router_ids], fields='id,router',
+                limit='all'):
+            router_id = str(cm['router']).rstrip('/').split('/')[-1]
+            ids[router_id] = cm['id']
+        return ids
+
+    def __run_bulk(self, items, request, max_workers=None):
+        """
+        Runs request(router_id, payload) for every item on a thread pool and
+        returns a per-item report in input order. Retries still happen in
+        the session's Retry adapter, and throttling in the client's
+        rate_limit.
+        """
+        def run(item):
+            router_id, payload = item
+            try:
+                response = request(router_id, payload)
+            except Exception as e:
+                return {'router_id': router_id, 'success': False,
+                        'status_code': None, 'result': str(e)}
+            return {'router_id': router_id,
+                    'success': 200 <= response.status_code < 300,
+                    'status_code': response.status_code,
+                    'result': response.text}
+
+        with ThreadPoolExecutor(
+                max_workers=max_workers or self.max_workers) as executor:
+            return list(executor.map(run, items))
+
+    def __bulk_patch_config(self, items, max_workers=None):
+        """
+        Patches configuration managers for (router_id, payload) items after
+        resolving their IDs in batches.
+        """
+        items = list(items)
+        config_man_ids = self.get_configuration_manager_ids(
+            [router_id for router_id, _ in items])
+
+        def patch(router_id, payload):
+            config_man_id = config_man_ids.get(str(router_id))
+            if config_man_id is None:
+                raise Exception(f"No configuration manager found for router_id: {router_id}")
+            return self.session.patch(
+                '{0}/configuration_managers/{1}/'.format(self.base_url,
+                                                         config_man_id),
+                data=json.dumps(payload))
+
+        return self.__run_bulk(items, patch, max_workers)
+
+    def bulk_set_router_fields(self, items, max_workers=None):
+        """
+        Sets router fields for many routers concurrently.
+        :param items: list of (router_id, fields) where fields is a dict of
+          name, description, asset_id, custom1 and/or custom2.
+        :param max_workers: concurrent requests. Defaults to max_workers.
+        :return: list of dicts with router_id, success, status_code, result
+        """
+        allowed = ('name', 'description', 'asset_id', 'custom1', 'custom2')
+        items = list(items)
+        for _, fields in items:
+            bad_fields = set(fields) - set(allowed)
+            if bad_fields:
+                raise ValueError("Invalid fields: {}".format(bad_fields))
+
+        def put(router_id, fields):
+            return self.session.put(
+                '{0}/routers/{1}/'.format(self.base_url, str(router_id)),
+                data=json.dumps({k: v for k, v in fields.items()
+                                 if v is not None}))
+
+        return self.__run_bulk(items, put, max_workers)
+
+    def bulk_set_custom1(self, items, max_workers=None):
+        """
+        Sets the Custom1 field for many routers concurrently.
+        :param items: list of (router_id, text)
+        :param max_workers: concurrent requests. Defaults to max_workers.
+        :return: list of dicts with router_id, success, status_code, result
+        """
+        return self.bulk_set_router_fields(
+            [(router_id, {'custom1': str(text)}) for router_id, text in items],
+            max_workers)
+
+    def bulk_patch_configuration_managers(self, items, max_workers=None):
+        """
+        Patches the configuration of many routers concurrently.
+        :param items: list of (router_id, config_man_json)
+        :param max_workers: concurrent requests. Defaults to max_workers.
+        :return: list of dicts with router_id, success, status_code, result
+        """
+        return self.__bulk_patch_config(items, max_workers)
+
+    def bulk_set_ncm_api_keys_by_router(self, items, max_workers=None):
+        """
+        Sets NCM API keys on many routers concurrently.
+        :param items: list of (router_id, keys) where keys is a dict with
+          x_ecm_api_id, x_ecm_api_key, x_cp_api_id, x_cp_api_key and
+          optionally bearer_token.
+        :param max_workers: concurrent requests. Defaults to max_workers.
+        :return: list of dicts with router_id, success, status_code, result
+        """
+        return self.__bulk_patch_config(
+            [(router_id, self.__api_keys_payload(
+                keys.get('x_ecm_api_id'), keys.get('x_ecm_api_key'),
+                keys.get('x_cp_api_id'), keys.get('x_cp_api_key'),
+                keys.get('bearer_token', '')))
+             for router_id, keys in items],
+            max_workers)
+
+    def bulk_set_encrypted_value_by_router(self, items, max_workers=None):
+        """
+        Sets an encrypted value on many routers concurrently.
+        :param items: list of (router_id, (name, key))
+        :param max_workers: concurrent requests. Defaults to max_workers.
+        :return: list of dicts with router_id, success, status_code, result
+        """
+        payloads = []
+        for router_id, (name, key) in items:
+            if not name or not key:
+                raise Exception("Both name and key parameters must be provided")
+            payloads.append((router_id,
+                             self.__encrypted_value_payload(name, key)))
+        return self.__bulk_patch_config(payloads, max_workers)
+
     def get_router_appdata(self, router_id_or_name: Union[int, str], **kwargs) -> list:
         """
         Get appdata from router configuration.
@@ -2596,7 +3160,9 @@ class NcmClientv3(BaseNcmClient):
                  retries=5,
                  retry_backoff_factor=2,
                  retry_on=None,
-                 base_url=None):
+                 base_url=None,
+                 max_workers=8,
+                 rate_limit=None):
         """
         Constructor. Sets up and opens request session.
         :param api_key: API Bearer token (without the "Bearer" text).
@@ -2611,10 +3177,13 @@ class NcmClientv3(BaseNcmClient):
           Optional.
         :param base_url: # base url for calls. Configurable for testing.
           Optional.
+        :param max_workers: number of concurrent requests. Optional.
+        :param rate_limit: maximum requests per second, or an NcmRateLimiter.
+          Optional.
         """
         self.v3 = self # For backwards compatibility
         base_url = base_url or os.environ.get("CP_BASE_URL_V3", "https://api.cradlepointecm.com/api/v3")
-        super().__init__(log_events, logger, retries, retry_backoff_factor, retry_on, base_url)
+        super().__init__(log_events, logger, retries, retry_backoff_factor, retry_on, base_url, max_workers, rate_limit)
         if api_key:
             token = {'Authorization': f'Bearer {api_key}'}
             self.session.headers.update(token)
@@ -2642,25 +3211,23 @@ class NcmClientv3(BaseNcmClient):
 
         url = get_url
         if params is not None:
-            from urllib.parse import urlencode
             query_string = urlencode(params)
             url = f'{url}?{query_string}'
 
+        # v3 pages are cursor based (links.next), so they are followed in
+        # order. Each body is decoded once.
         while url and (len(results) < limit):
             ncm = self.session.get(url)
+            body = ncm.json()
             if not (200 <= ncm.status_code < 300):
-                return self._return_handler(ncm.status_code, ncm.json(), call_type)
-            data = ncm.json()['data']
+                return self._return_handler(ncm.status_code, body, call_type)
+            data = body['data']
             if isinstance(data, list):
                 self._return_handler(ncm.status_code, data, call_type)
-                for d in data:
-                    results.append(d)
+                results.extend(data)
             else:
                 results.append(data)
-            if "links" in ncm.json():
-                url = ncm.json()['links']['next']
-            else:
-                url = None
+            url = (body.get('links') or {}).get('next')
 
         if params is not None and "filter[fields]" in params.keys():
             data = []
@@ -4939,7 +5506,10 @@ class NcmClientv2v3:
               retry_backoff_factor=2,
               retry_on=None,
               base_url=None,
-              base_url_v3=None):
+              base_url_v3=None,
+              max_workers=8,
+              cache=None,
+              rate_limit=None):
         """
         :param api_keys: Dictionary of API credentials (apiv2).
             Optional, but must be set before calling functions.
@@ -4962,7 +5532,10 @@ class NcmClientv2v3:
                                         retries=retries, 
                                         retry_backoff_factor=retry_backoff_factor, 
                                         retry_on=retry_on, 
-                                        base_url=base_url)
+                                        base_url=base_url,
+                                        max_workers=max_workers,
+                                        cache=cache,
+                                        rate_limit=rate_limit)
         
         if apiv3_key:
             base_url = base_url_v3 if api_keys else base_url
@@ -4972,7 +5545,9 @@ class NcmClientv2v3:
                                         retries=retries, 
                                         retry_backoff_factor=retry_backoff_factor, 
                                         retry_on=retry_on, 
-                                        base_url=base_url)
+                                        base_url=base_url,
+                                        max_workers=max_workers,
+                                        rate_limit=rate_limit)
         
         # For backwards compatibility
         self.v2 = self._v2_client
@@ -4992,7 +5567,8 @@ class NcmClientv2v3:
         # Router-related methods should use v2 since router IDs are v2-specific
         router_methods = [
             'get_router_appdata', 'get_router_appdata_value',
-            'get_router_by_id', 'get_router_by_name', 'get_routers',
+            'get_router_by_id', 'get_router_by_name', 'get_routers', 'iter_routers',
+            'invalidate_cache',
             'get_router_alerts', 'get_router_logs', 'get_router_state_samples',
             'get_router_stream_usage_samples', 'get_routers_for_account',
             'get_routers_for_group', 'rename_router_by_id', 'rename_router_by_name',
@@ -5002,6 +5578,9 @@ class NcmClientv2v3:
             'set_router_name', 'set_router_description', 'set_router_asset_id',
             'set_ethernet_wan_ip', 'add_custom_apn', 'set_ncm_api_keys_by_router',
             'set_router_fields', 'copy_router_configuration', 'resume_updates_for_router',
+            'get_configuration_manager_ids', 'bulk_set_router_fields', 'bulk_set_custom1',
+            'bulk_patch_configuration_managers', 'bulk_set_ncm_api_keys_by_router',
+            'bulk_set_encrypted_value_by_router',
             'get_net_devices_for_router', 'get_net_devices_for_router_by_mode',
             'get_historical_locations', 'get_historical_locations_for_date',
             'create_location', 'delete_location_for_router', 'create_speed_test_mdm'
@@ -5092,6 +5671,7 @@ class NcmClient:
         if v2 or not (v2 or v3):
             return NcmClientv2(api_keys=api_keys, **kwargs)
         else:
+            kwargs.pop('cache', None)  # v2 only
             return NcmClientv3(api_key=apiv3_key, **kwargs)
 
 
@@ -5326,6 +5906,8 @@ class _NcmModule:
     NcmClientv3 = NcmClientv3
     NcmClientv2v3 = NcmClientv2v3
     BaseNcmClient = BaseNcmClient
+    NcmCache = NcmCache
+    NcmRateLimiter = NcmRateLimiter
     
     # Expose utility functions as static methods to avoid self parameter issues
     @staticmethod
@@ -11,9 +11,17 @@ import json
 import os
 import time
 import datetime
+import calendar
 import configparser
+import threading
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None  # Not included in every NCOS build; results are served from the CSV files
+from urllib.parse import quote
 
 results_dir = 'results'
+results_db = f'{results_dir}/results.db'
 dispatcher = None
 
 
@@ -189,14 +197,308 @@ class ResultsHandler(tornado.web.RequestHandler):
 
     def get(self):
         try:
-            files = os.listdir("./results")
             url = self.request.full_url().replace('http://aoobm-cp-connector', 'https://aoobm-cp-connector').replace('?', '')
-            files_paths = sorted([f"{url}/{f}" for f in files])
+            files_paths = sorted([f"{url}/export/{quote(name)}" for name in dispatcher.store.names()])
             self.render("template.html", items=files_paths)
         except Exception as e:
             cp.log(f'Exception in ResultsHandler: {e}')
 
 
+def get_result_filters(handler):
+    """Read the bbox/start/end/carrier/iccid query arguments of a results request."""
+    filters = {}
+    bbox = handler.get_argument('bbox', None)
+    if bbox:
+        # min_lat,min_long,max_lat,max_long
+        filters['bbox'] = [float(x) for x in bbox.split(',')]
+        if len(filters['bbox']) != 4:
+            raise ValueError('bbox must be min_lat,min_long,max_lat,max_long')
+    for name in ('start', 'end'):
+        value = handler.get_argument(name, None)
+        if value:
+            filters[name] = float(value)
+    for name in ('carrier', 'iccid'):
+        value = handler.get_argument(name, None)
+        if value:
+            filters[name] = value
+    return filters
+
+
+class QueryHandler(tornado.web.RequestHandler):
+    """Handles results/query endpoint requests."""
+
+    def get(self):
+        """Return matching results as JSON columns."""
+        try:
+            filters = get_result_filters(self)
+            limit = int(self.get_argument('limit', 1000))
+        except ValueError as e:
+            self.set_status(400)
+            self.write(json.dumps({"error": str(e)}))
+            return
+        try:
+            self.set_header('Content-Type', 'application/json')
+            self.write(json.dumps(dispatcher.store.query(limit=limit, **filters)))
+        except Exception as e:
+            cp.log(f'Exception in QueryHandler: {e}')
+            self.set_status(500)
+            self.write(json.dumps({"error": str(e)}))
+
+
+class ExportHandler(tornado.web.RequestHandler):
+    """Handles results/export/<name> endpoint requests."""
+
+    async def get(self, name):
+        """Stream a results CSV from the store, optionally filtered."""
+        try:
+            filters = get_result_filters(self)
+        except ValueError as e:
+            self.set_status(400)
+            self.write(str(e))
+            return
+        header = dispatcher.store.header(name)
+        if header is None:
+            raise tornado.web.HTTPError(404)
+        self.set_header('Content-Type', 'text/csv')
+        self.set_header('Content-Disposition', f'attachment; filename="{name}"')
+        self.write(','.join(header) + '\n')
+        for chunk in dispatcher.store.iter_csv(name, **filters):
+            self.write(chunk)
+            await self.flush()
+
+
+class ResultsStore:
+    """SQLite store for survey results.
+
+    Every result row is kept with its time, position and carrier in indexed
+    columns, so the web UI can answer time-range and bounding-box queries
+    without reading the whole dataset. The full CSV row is stored alongside
+    and each export (one per ICCID, as the CSV files used to be) keeps its
+    header, so CSV downloads are streamed straight from the store.
+    """
+
+    columns = ['ts', 'lat', 'long', 'accuracy', 'carrier', 'iccid', 'download', 'upload',
+               'latency', 'jitter', 'packet_loss']
+
+    def __init__(self, path=results_db):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS exports (name TEXT PRIMARY KEY, header TEXT)')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'id INTEGER PRIMARY KEY, name TEXT, ts REAL, lat REAL, long REAL, '
+            'accuracy REAL, carrier TEXT, iccid TEXT, download REAL, upload REAL, '
+            'latency REAL, jitter REAL, packet_loss REAL, row TEXT)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS results_ts ON results (ts)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS results_position ON results (lat, long)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS results_carrier ON results (carrier, ts)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS results_name ON results (name, id)')
+        self.db.commit()
+
+    def append(self, name, header, row, ts, iccid):
+        """Append a CSV row to the named export, creating it with header if new."""
+        self.extend(name, header, [(row, ts)], iccid)
+
+    def extend(self, name, header, rows, iccid):
+        """Append (row, ts) pairs to the named export in one transaction."""
+        records = []
+        for row, ts in rows:
+            records.append([name, ts, _to_float(row[1]), _to_float(row[2]), _to_float(row[3]),
+                            None if row[4] is None else str(row[4]), iccid] +
+                           [_to_float(x) for x in row[5:10]] + [json.dumps(row, default=str)])
+        with self.lock:
+            self.db.execute('INSERT OR IGNORE INTO exports VALUES (?, ?)',
+                            (name, json.dumps(header)))
+            self.db.executemany(
+                'INSERT INTO results (name, ts, lat, long, accuracy, carrier, iccid, download, '
+                'upload, latency, jitter, packet_loss, row) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', records)
+            self.db.commit()
+
+    def names(self):
+        with self.lock:
+            return [r[0] for r in self.db.execute('SELECT name FROM exports')]
+
+    def header(self, name):
+        with self.lock:
+            row = self.db.execute('SELECT header FROM exports WHERE name = ?',
+                                  (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(self, bbox=None, start=None, end=None, carrier=None, iccid=None, limit=1000):
+        """Return the newest matching results as a dict of column lists."""
+        where, args = self._where(None, bbox, start, end, carrier, iccid)
+        with self.lock:
+            rows = self.db.execute(
+                f'SELECT {", ".join(self.columns)} FROM results{where} '
+                f'ORDER BY ts DESC LIMIT ?', args + [limit]).fetchall()
+        result = {column: [r[i] for r in rows] for i, column in enumerate(self.columns)}
+        result['count'] = len(rows)
+        return result
+
+    def iter_csv(self, name, bbox=None, start=None, end=None, carrier=None, iccid=None,
+                 batch=500):
+        """Yield CSV text for the named export in batches of rows.
+
+        The lock is only held while a batch is fetched, so tests can keep
+        appending while a large export is being downloaded.
+        """
+        where, args = self._where(name, bbox, start, end, carrier, iccid)
+        last_id = 0
+        while True:
+            with self.lock:
+                rows = self.db.execute(
+                    f'SELECT id, row FROM results{where} AND id > ? ORDER BY id LIMIT ?',
+                    args + [last_id, batch]).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield ''.join(','.join(str(x) for x in json.loads(r[1])) + '\n' for r in rows)
+
+    @staticmethod
+    def _where(name, bbox, start, end, carrier, iccid):
+        clauses, args = [], []
+        if name is not None:
+            clauses.append('name = ?')
+            args.append(name)
+        if bbox:
+            clauses.append('lat BETWEEN ? AND ? AND long BETWEEN ? AND ?')
+            args += [bbox[0], bbox[2], bbox[1], bbox[3]]
+        if start is not None:
+            clauses.append('ts >= ?')
+            args.append(start)
+        if end is not None:
+            clauses.append('ts <= ?')
+            args.append(end)
+        if carrier:
+            clauses.append('carrier = ?')
+            args.append(carrier)
+        if iccid:
+            clauses.append('iccid = ?')
+            args.append(iccid)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ' WHERE 1'), args
+
+    def import_csv_files(self, directory=results_dir):
+        """Load CSV files written by earlier versions into the store once."""
+        imported = set(self.names())
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith('.csv') or filename in imported:
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as f:
+                    header = f.readline().rstrip('\n').split(',')
+                    rows = [(row, ts) for row, ts, _ in _iter_csv_rows(f)]
+                self.extend(filename, header, rows, _csv_iccid(filename))
+                cp.log(f'Imported {len(rows)} results from {filename}')
+            except Exception as e:
+                cp.log(f'Unable to import {filename}: {e}')
+
+
+class CsvResults:
+    """Serves results queries and exports straight from the CSV files.
+
+    Used when the SQLite store is not available. It answers the same calls
+    as ResultsStore by reading the files in results/ on every request.
+    """
+
+    def __init__(self, directory=results_dir):
+        self.directory = directory
+
+    def append(self, name, header, row, ts, iccid):
+        """Nothing to do; the row was already written to the CSV file."""
+
+    def names(self):
+        return [name for name in os.listdir(self.directory) if name.endswith('.csv')]
+
+    def header(self, name):
+        if name not in self.names():
+            return None
+        with open(os.path.join(self.directory, name)) as f:
+            return f.readline().rstrip('\n').split(',')
+
+    def query(self, bbox=None, start=None, end=None, carrier=None, iccid=None, limit=1000):
+        """Return the newest matching results as a dict of column lists."""
+        records = []
+        for name in self.names():
+            for row, ts, _ in self._rows(name, bbox, start, end, carrier, iccid):
+                row = row + [''] * (10 - len(row))
+                records.append([ts, _to_float(row[1]), _to_float(row[2]), _to_float(row[3]),
+                                row[4], _csv_iccid(name)] + [_to_float(x) for x in row[5:10]])
+        records.sort(key=lambda r: r[0] or 0, reverse=True)
+        records = records[:limit]
+        result = {column: [r[i] for r in records] for i, column in enumerate(ResultsStore.columns)}
+        result['count'] = len(records)
+        return result
+
+    def iter_csv(self, name, bbox=None, start=None, end=None, carrier=None, iccid=None,
+                 batch=500):
+        """Yield CSV text for the named file in batches of rows."""
+        lines = []
+        for _, _, line in self._rows(name, bbox, start, end, carrier, iccid):
+            lines.append(line)
+            if len(lines) >= batch:
+                yield ''.join(lines)
+                lines = []
+        if lines:
+            yield ''.join(lines)
+
+    def _rows(self, name, bbox, start, end, carrier, iccid):
+        if iccid and _csv_iccid(name) != iccid:
+            return
+        with open(os.path.join(self.directory, name)) as f:
+            f.readline()
+            for row, ts, line in _iter_csv_rows(f):
+                if bbox:
+                    lat, long = (_to_float(x) for x in (row[1:3] + ['', ''])[:2])
+                    if lat is None or long is None or not (
+                            bbox[0] <= lat <= bbox[2] and bbox[1] <= long <= bbox[3]):
+                        continue
+                if start is not None and (ts is None or ts < start):
+                    continue
+                if end is not None and (ts is None or ts > end):
+                    continue
+                if carrier and (len(row) < 5 or row[4] != carrier):
+                    continue
+                yield row, ts, line
+
+
+def _csv_iccid(filename):
+    return filename.split(' - ICCID ')[-1][:-4].replace(' Diagnostics', '')
+
+
+def _iter_csv_rows(f):
+    """Yield (row, ts, line) for each data line of an open results CSV."""
+    for line in f:
+        row = line.rstrip('\n').split(',')
+        try:
+            ts = calendar.timegm(time.strptime(row[0], '%Y-%m-%d %H:%M:%S'))
+        except ValueError:
+            ts = None
+        yield row, ts, line if line.endswith('\n') else line + '\n'
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def open_results_store():
+    """Open the SQLite results store, or fall back to serving the CSV files."""
+    if sqlite3 is None:
+        cp.log('sqlite3 not available, serving results from the CSV files')
+        return CsvResults()
+    try:
+        store = ResultsStore()
+        store.import_csv_files()
+        return store
+    except Exception as e:
+        cp.log(f'Unable to open results store, serving results from the CSV files: {e}')
+        return CsvResults()
+
+
 class Dispatcher:
     """Event Handler for tests"""
 
@@ -213,6 +515,7 @@ class Dispatcher:
         self.lat, self.long, self.accuracy = None, None, None
         self.serial_number, self.mac_address, self.router_id = None, None, None
         self.ping_lock = Lock()  # Lock for thread-safe ping counter operations
+        self.store = None
 
         self._initialize_dispatcher()
 
@@ -227,6 +530,9 @@ class Dispatcher:
         patch = package.get('Mobile_Site_Survey', 'version_patch')
         self.version = f'{major}.{minor}.{patch}'
         cp.log(f'Version: {self.version}')
+        if not os.path.exists(results_dir):
+            os.makedirs(results_dir)
+        self.store = open_results_store()
         if self.config.get("dead_reckoning"):
             enable_GPS_send_to_server()
 
@@ -1112,6 +1418,7 @@ def run_tests(modem):
             log_all(msg, logs)
 
     # Log results
+    row = None
     try:
         row = [pretty_timestamp, dispatcher.lat, dispatcher.long, dispatcher.accuracy,
                carrier, download, upload, latency, jitter, packet_loss_percent,
@@ -1185,9 +1492,16 @@ def run_tests(modem):
             diag = ' Diagnostics'
         filename = f'Mobile Site Survey v{dispatcher.version} - ICCID {iccid}{diag}.csv'.replace(':', '')
 
-        # CREATE results_dir if it doesn't exist:
-        if not os.path.exists(results_dir):
-            os.makedirs(results_dir)
+        header = ['Timestamp', 'Lat', 'Long', 'Accuracy', 'Carrier', 'Download', 'Upload',
+                  'Latency', 'Jitter', 'Packet Loss Percent', 'bytes_sent',
+                  'bytes_received', 'Results Image', 'Engine', 'Server']
+        if diagnostics:
+            if wan_type == 'wwan' or (wan_type == 'mdm' and dispatcher.config.get("full_diagnostics")):
+                header = header + [*diagnostics]
+            elif wan_type == 'mdm' and not dispatcher.config.get("full_diagnostics"):
+                header = header + ['DBM', 'SINR', 'RSRP', 'RSRQ', 'SINR_5G', 'RSRP_5G', 'RSRQ_5G', 'Cell ID',
+                                   'PCI', 'CUR_PLMN', 'TAC', 'LAC', 'NR Cell ID', 'Serice Display', 'RF Band',
+                                   'RF Band 5G', 'SCELL0', 'SCELL1', 'SCELL2', 'SCELL3']
 
         # CREATE CSV IF IT DOESN'T EXIST:
         debug_log(' '.join(os.listdir(results_dir)))
@@ -1196,27 +1510,18 @@ def run_tests(modem):
             logs.append(f'{logstamp} {filename} not found.')
             cp.log(f'{filename} not found.')
             with open(f'{results_dir}/{filename}', 'wt') as f:
-                header = ['Timestamp', 'Lat', 'Long', 'Accuracy', 'Carrier', 'Download', 'Upload',
-                          'Latency', 'Jitter', 'Packet Loss Percent', 'bytes_sent',
-                          'bytes_received', 'Results Image', 'Engine', 'Server']
-                if diagnostics:
-                    if wan_type == 'wwan' or (wan_type == 'mdm' and dispatcher.config.get("full_diagnostics")):
-                        header = header + [*diagnostics]
-                    elif wan_type == 'mdm' and not dispatcher.config.get("full_diagnostics"):
-                        header = header + ['DBM', 'SINR', 'RSRP', 'RSRQ', 'SINR_5G', 'RSRP_5G', 'RSRQ_5G', 'Cell ID',
-                                           'PCI', 'CUR_PLMN', 'TAC', 'LAC', 'NR Cell ID', 'Serice Display', 'RF Band',
-                                           'RF Band 5G', 'SCELL0', 'SCELL1', 'SCELL2', 'SCELL3']
-                line = ','.join(header) + '\n'
-                f.write(line)
+                f.write(','.join(header) + '\n')
             logstamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
             logs.append(f'{logstamp} Created new {filename} file.')
             cp.log(f'Created new {filename} file.')
 
-        # APPEND TO CSV:
+        # APPEND TO CSV AND RESULTS STORE:
         try:
             with open(f'{results_dir}/{filename}', 'a') as f:
                 f.write(text)
-                debug_log(f'Successfully wrote to {filename}.')
+            if row:
+                dispatcher.store.append(filename, header, row, dispatcher.timestamp or time.time(), iccid)
+            debug_log(f'Successfully wrote to {filename}.')
         except Exception as e:
             msg = f'Unable to write to {filename}. {e}'
             log_all(msg, logs)
@@ -1252,6 +1557,8 @@ if __name__ == "__main__":
         (r"/config", ConfigHandler),
         (r"/submit", SubmitHandler),
         (r"/results", ResultsHandler),
+        (r"/results/query", QueryHandler),
+        (r"/results/export/(.*)", ExportHandler),
         (r"/test", TestHandler),
         (r"/clear", ClearHandler),
         (r"/(.*)", tornado.web.StaticFileHandler,
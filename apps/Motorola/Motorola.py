@@ -1,17 +1,20 @@
 """Motorola - Broadcast Beacons with WAN and VPN State.
 
-At the configured interval a UDP packet with JSON body containing
-status of WAN interfaces and VPNs is sent to the broadcast IP Address
-of the configured LANs.
+At the configured interval the status of WAN interfaces and VPNs is
+checked, and a UDP packet with JSON body is sent to the broadcast IP
+Address of the configured LANs when it changed, or at least every
+keepalive seconds. WAN primary device and VPN state changes are sent
+right away.
 A Web UI runs on port 8000 for configuration.
 Default Configuration:
     interval = 5
     udp_port = 21010
+    keepalive = 30 (configs saved without a keepalive use the interval)
     networks = first LAN enabled
 """
 
 import cp
-from threading import Thread
+from threading import Event, Thread
 from http.server import HTTPServer, SimpleHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import json
@@ -24,6 +27,13 @@ from datetime import datetime
 APP_DATA_KEY = 'Motorola'
 DEFAULT_INTERVAL = 5
 DEFAULT_UDP_PORT = 21010
+# New configs only; a saved config without a keepalive keeps sending every
+# interval, as it did before unchanged status was suppressed
+DEFAULT_KEEPALIVE = 30
+
+# Re-read the cached config at least this often, in case a change event was
+# missed
+CONFIG_REFRESH = 300
 
 
 def get_default_networks():
@@ -56,6 +66,7 @@ def load_config():
     return {
         "interval": DEFAULT_INTERVAL,
         "udp_port": DEFAULT_UDP_PORT,
+        "keepalive": DEFAULT_KEEPALIVE,
         "networks": get_default_networks()
     }
 
@@ -84,6 +95,7 @@ class AppHandler(SimpleHTTPRequestHandler):
                 params = parse_qs(parsed.query)
                 broadcaster.interval = int(params.get('interval', [DEFAULT_INTERVAL])[0])
                 broadcaster.udp_port = int(params.get('udp_port', [DEFAULT_UDP_PORT])[0])
+                broadcaster.keepalive = int(params.get('keepalive', [broadcaster.interval])[0])
                 networks = params.get('networks', [])
                 lans = []
                 cp_lans = cp.get('config/lan') or []
@@ -98,9 +110,11 @@ class AppHandler(SimpleHTTPRequestHandler):
                 config = {
                     "interval": broadcaster.interval,
                     "udp_port": broadcaster.udp_port,
+                    "keepalive": broadcaster.keepalive,
                     "networks": lans
                 }
                 save_config(config)
+                broadcaster.reload()
                 cp.log("Saved new config: %s" % config)
                 self.send_response(302)
                 self.send_header('Location', '/')
@@ -122,173 +136,249 @@ class AppHandler(SimpleHTTPRequestHandler):
         cp.log(format % args)
 
 
-def get_message():
-    """Collect WAN and VPN States and send UDP Broadcast."""
-    try:
-        datestamp = datetime.utcnow().strftime("%Y%m%d")
-        timestamp = datetime.utcnow().strftime("%H%M%S")
-        model = cp.get('status/product_info/product_name')
-        fw = cp.get('status/fw_info')
-        if fw:
-            NCOS_version = '%s.%s.%s' % (
-                fw.get("major_version", 0),
-                fw.get("minor_version", 0),
-                fw.get("patch_version", 0)
-            )
-        else:
-            NCOS_version = "0.0.0"
-
-        payload = {
-            "TimeStamp": {"Date": datestamp, "Time": timestamp},
-            "ModemInfo": {
-                "ModelNum": model,
-                "SwVer": NCOS_version,
-                "SchemaVer": "01.00.00.00"
-            }
-        }
-
-        wan_conn_status = []
-        wan_devices = None
-        for _ in range(10):
-            wan_devices = cp.get('status/wan/devices')
-            if wan_devices:
-                break
-            time.sleep(0.5)
-        if not wan_devices:
-            wan_devices = {}
-
-        wan_devs = {
-            uid: status for uid, status in wan_devices.items()
-            if 'NOSIM' not in (status.get('status', {}).get('error_text') or '')
-        }
+def get_product_info():
+    """Return (model, NCOS version); these do not change while the app runs."""
+    model = cp.get('status/product_info/product_name')
+    fw = cp.get('status/fw_info')
+    if fw:
+        NCOS_version = '%s.%s.%s' % (
+            fw.get("major_version", 0),
+            fw.get("minor_version", 0),
+            fw.get("patch_version", 0)
+        )
+    else:
+        NCOS_version = "0.0.0"
+    return model, NCOS_version
+
+
+def get_snapshot(previous=None):
+    """Return the status the message is built from, one request per subtree.
+
+    WAN devices fall back to the previous snapshot if the request fails.
+    """
+    wan_devices = cp.get('status/wan/devices')
+    if not wan_devices:
+        wan_devices = (previous or {}).get('wan_devices') or {}
+    tunnels = cp.get('status/vpn/tunnels') or {}
+    if isinstance(tunnels, list):
+        tunnels = {t.get('_id_'): t for t in tunnels if isinstance(t, dict)}
+    return {
+        "wan_devices": wan_devices,
+        "primary_device": cp.get('status/wan/primary_device'),
+        "vpn_states": {uid: (t or {}).get('state') for uid, t in tunnels.items()},
+        "gps_fix": cp.get('status/gps/fix'),
+    }
 
-        for dev, status in wan_devs.items():
-            try:
-                wan_conn = get_wan_connection_info(dev, status)
-                wan_conn_status.append(wan_conn)
-            except Exception as e:
-                cp.get_logger().exception("Exception getting WAN State for %s: %s", dev, e)
-        payload["WANConnStatus"] = wan_conn_status
 
-        vpn_status = []
-        vpns = cp.get('config/vpn/tunnels') or []
-        for vpn in vpns:
-            try:
-                state = cp.get('status/vpn/tunnels/%s/state' % vpn["_id_"])
-                connected = bool(state == 'up')
-                vpn_status.append({
-                    "Name": vpn["name"],
-                    "Status": connected
-                })
-            except Exception as e:
-                cp.get_logger().exception("Exception getting VPN state for %s: %s", vpn["_id_"], e)
-        if vpn_status:
-            payload["VPNStatus"] = vpn_status
-
-        fix = cp.get('status/gps/fix')
-        for _ in range(3):
-            if fix:
-                break
-            fix = cp.get('status/gps/fix')
-        if fix:
-            try:
-                lat_deg = fix['latitude']['degree']
-                lat_min = fix['latitude']['minute']
-                lat_sec = fix['latitude']['second']
-                lon_deg = fix['longitude']['degree']
-                lon_min = fix['longitude']['minute']
-                lon_sec = fix['longitude']['second']
-                lat = dec(lat_deg, lat_min, lat_sec)
-                lon = dec(lon_deg, lon_min, lon_sec)
-                payload["GNSSStatus"] = {
-                    "Lat": lat,
-                    "Lon": lon,
-                    "Accuracy": fix.get('accuracy'),
-                    "Fix": fix.get('lock'),
-                    "NumSatellites": fix.get('satellites')
-                }
-            except Exception as e:
-                cp.get_logger().exception("Exception getting GPS: %s", e)
+def build_payload(model, NCOS_version, vpns, snapshot):
+    """Build the message payload, without the timestamp, from a snapshot."""
+    payload = {
+        "ModemInfo": {
+            "ModelNum": model,
+            "SwVer": NCOS_version,
+            "SchemaVer": "01.00.00.00"
+        }
+    }
 
-        return json.dumps(payload).encode('utf-8')
-    except Exception as e:
-        cp.get_logger().exception("Exception getting message: %s", e)
-        return None
+    wan_devs = {
+        uid: status for uid, status in snapshot["wan_devices"].items()
+        if 'NOSIM' not in (status.get('status', {}).get('error_text') or '')
+    }
+    wan_conn_status = []
+    for dev, status in wan_devs.items():
+        try:
+            wan_conn = get_wan_connection_info(dev, status, snapshot["primary_device"])
+            wan_conn_status.append(wan_conn)
+        except Exception as e:
+            cp.get_logger().exception("Exception getting WAN State for %s: %s", dev, e)
+    payload["WANConnStatus"] = wan_conn_status
+
+    vpn_status = [{
+        "Name": vpn["name"],
+        "Status": bool(snapshot["vpn_states"].get(vpn["_id_"]) == 'up')
+    } for vpn in vpns]
+    if vpn_status:
+        payload["VPNStatus"] = vpn_status
+
+    fix = snapshot["gps_fix"]
+    if fix:
+        try:
+            lat_deg = fix['latitude']['degree']
+            lat_min = fix['latitude']['minute']
+            lat_sec = fix['latitude']['second']
+            lon_deg = fix['longitude']['degree']
+            lon_min = fix['longitude']['minute']
+            lon_sec = fix['longitude']['second']
+            lat = dec(lat_deg, lat_min, lat_sec)
+            lon = dec(lon_deg, lon_min, lon_sec)
+            payload["GNSSStatus"] = {
+                "Lat": lat,
+                "Lon": lon,
+                "Accuracy": fix.get('accuracy'),
+                "Fix": fix.get('lock'),
+                "NumSatellites": fix.get('satellites')
+            }
+        except Exception as e:
+            cp.get_logger().exception("Exception getting GPS: %s", e)
+    return payload
+
+
+def get_message(payload):
+    """Return the encoded message for a payload, stamped with the current time."""
+    now = datetime.utcnow()
+    message = {"TimeStamp": {"Date": now.strftime("%Y%m%d"), "Time": now.strftime("%H%M%S")}}
+    message.update(payload)
+    return json.dumps(message).encode('utf-8')
+
+
+def get_broadcast_targets(lans, networks):
+    """Return (broadcast address, network name) for each enabled LAN."""
+    enabled = {n["_id_"] for n in networks if n.get("enabled")}
+    targets = []
+    for lan in lans:
+        if lan.get("_id_") not in enabled:
+            continue
+        try:
+            lan_ip = lan.get("ip_address")
+            dec_mask = lan.get("netmask")
+            if not lan_ip or not dec_mask:
+                continue
+            interface = '%s/%s' % (lan_ip, cidr(dec_mask))
+            addr = ipaddress.ip_interface(interface)
+            targets.append((str(addr.network.broadcast_address), lan["name"]))
+        except Exception as e:
+            cp.get_logger().exception("Exception getting broadcast address of %s: %s",
+                                     lan.get("name"), e)
+    return targets
 
 
 class Broadcaster:
-    """UDP Beacon Broadcaster."""
+    """UDP Beacon Broadcaster.
+
+    LAN broadcast targets, VPN names and app settings are cached and only
+    re-read when a config change event arrives (or every CONFIG_REFRESH
+    seconds). Every interval one status snapshot is taken and the message
+    is sent if its content changed or the keepalive interval elapsed. A
+    primary device or VPN state change event takes a snapshot right away.
+    """
     interval = DEFAULT_INTERVAL
     udp_port = DEFAULT_UDP_PORT
+    keepalive = DEFAULT_KEEPALIVE
     networks = []
     debug = False
 
+    def __init__(self):
+        self.wake = Event()
+        self.config_stale = True
+        self.events = False
+        self.lans = []
+        self.vpns = []
+        self.targets = []
+        self.triggers = None
+
+    def reload(self):
+        """Re-read the cached config and take a new snapshot now."""
+        self.config_stale = True
+        self.wake.set()
+
+    def on_config_change(self, path, value, args):
+        self.reload()
+
+    def on_status_change(self, path, value, args):
+        self.wake.set()
+
+    def subscribe(self):
+        """Register for config and status changes. Returns False if events
+        are not available."""
+        registrations = [
+            ('config/lan', self.on_config_change),
+            ('config/vpn/tunnels', self.on_config_change),
+            ('config/system/sdk/appdata', self.on_config_change),
+            ('status/wan/primary_device', self.on_status_change),
+            ('status/vpn/tunnels', self.on_status_change),
+        ]
+        for path, callback in registrations:
+            result = cp.register('put', path, callback)
+            if not result or result.get('status') == 'error':
+                return False
+        return True
+
+    def refresh_config(self):
+        """Re-read LANs, VPN names and app settings and recompute broadcast targets."""
+        self.config_stale = False
+        self.lans = cp.get('config/lan') or []
+        self.vpns = cp.get('config/vpn/tunnels') or []
+        get_config(self.lans)
+        try:
+            self.debug = bool(cp.get('config/system/admin/reboot_count/enabled'))
+        except Exception:
+            self.debug = False
+        self.targets = get_broadcast_targets(self.lans, self.networks)
+
+    def get_triggers(self):
+        """Primary device and VPN states, polled when events are not available."""
+        tunnels = cp.get('status/vpn/tunnels') or {}
+        if isinstance(tunnels, list):
+            tunnels = {t.get('_id_'): t for t in tunnels if isinstance(t, dict)}
+        return (cp.get('status/wan/primary_device'),
+                {uid: (t or {}).get('state') for uid, t in tunnels.items()})
+
+    def wait(self, timeout):
+        """Sleep until the next snapshot is due or something changed."""
+        if self.events:
+            self.wake.wait(timeout)
+        else:
+            deadline = time.time() + timeout
+            while not self.wake.is_set() and time.time() < deadline:
+                self.wake.wait(min(1, max(0, deadline - time.time())))
+                if self.get_triggers() != self.triggers:
+                    break
+        self.wake.clear()
+
     def loop(self):
         """Main loop to manage broadcasts."""
-        get_config()
-        primary_device = cp.get('status/wan/primary_device')
-        vpn_state = self.get_vpn_states()
-        message = get_message()
-        if message:
-            self.send_broadcast(message)
-        last_broadcast = time.time()
+        model, NCOS_version = get_product_info()
+        self.events = self.subscribe()
+        if not self.events:
+            cp.log('Change events not available; polling WAN and VPN state every second')
+        snapshot = None
+        last_payload = None
+        last_broadcast = 0
+        last_refresh = 0
 
         while True:
-            get_config()
-            try:
-                self.debug = bool(cp.get('config/system/admin/reboot_count/enabled'))
-            except Exception:
-                self.debug = False
-            temp_vpn_state = self.get_vpn_states()
-            temp_primary_device = cp.get('status/wan/primary_device')
-            if (temp_vpn_state != vpn_state or
-                    temp_primary_device != primary_device or
-                    time.time() - last_broadcast > self.interval):
-                message = get_message()
-                if message:
-                    self.send_broadcast(message)
-                vpn_state = temp_vpn_state
-                primary_device = temp_primary_device
-                last_broadcast = time.time()
-            time.sleep(1)
-
-    def get_vpn_states(self):
-        """Get VPN states."""
-        vpn_state = {}
-        vpns = cp.get('config/vpn/tunnels') or []
-        for vpn in vpns:
             try:
-                state = cp.get('status/vpn/tunnels/%s/state' % vpn["_id_"])
-                vpn_state[vpn["_id_"]] = state
+                if self.config_stale or time.time() - last_refresh >= CONFIG_REFRESH:
+                    self.refresh_config()
+                    last_refresh = time.time()
+                snapshot = get_snapshot(snapshot)
+                self.triggers = (snapshot["primary_device"], snapshot["vpn_states"])
+                payload = build_payload(model, NCOS_version, self.vpns, snapshot)
+                if (payload != last_payload or
+                        time.time() - last_broadcast >= self.keepalive):
+                    self.send_broadcast(get_message(payload))
+                    last_payload = payload
+                    last_broadcast = time.time()
             except Exception as e:
-                cp.get_logger().exception("Error getting VPN state for %s: %s", vpn["_id_"], e)
-        return vpn_state
+                cp.get_logger().exception("Exception in broadcast loop: %s", e)
+            self.wait(self.interval)
 
     def send_broadcast(self, message):
         """Send UDP Broadcasts to configured LANs."""
-        for network in self.networks:
-            if network.get("enabled"):
-                try:
-                    lan_ip = cp.get('config/lan/%s/ip_address' % network["_id_"])
-                    dec_mask = cp.get('config/lan/%s/netmask' % network["_id_"])
-                    if not lan_ip or not dec_mask:
-                        continue
-                    cidr_mask = cidr(dec_mask)
-                    interface = '%s/%s' % (lan_ip, cidr_mask)
-                    addr = ipaddress.ip_interface(interface)
-                    broadcast = str(addr.network.broadcast_address)
-                    udp_socket.sendto(message, (broadcast, self.udp_port))
-                    if self.debug:
-                        cp.log("Broadcast to %s on %s on UDP Port %s" % (
-                            broadcast, network["name"], self.udp_port))
-                except Exception as e:
-                    cp.get_logger().exception("Exception sending broadcast on %s: %s",
-                                             network["name"], e)
-
-
-def get_config():
+        for broadcast, name in self.targets:
+            try:
+                udp_socket.sendto(message, (broadcast, self.udp_port))
+                if self.debug:
+                    cp.log("Broadcast to %s on %s on UDP Port %s" % (
+                        broadcast, name, self.udp_port))
+            except Exception as e:
+                cp.get_logger().exception("Exception sending broadcast on %s: %s", name, e)
+
+
+def get_config(cp_lans=None):
     """Return app config, merging saved config with current LANs."""
-    cp_lans = cp.get('config/lan') or []
+    if cp_lans is None:
+        cp_lans = cp.get('config/lan') or []
     networks = []
     for lan in cp_lans:
         networks.append({
@@ -301,6 +391,8 @@ def get_config():
     try:
         broadcaster.interval = int(config.get("interval", DEFAULT_INTERVAL))
         broadcaster.udp_port = int(config.get("udp_port", DEFAULT_UDP_PORT))
+        broadcaster.keepalive = int(config.get("keepalive") or broadcaster.interval)
+        config["keepalive"] = broadcaster.keepalive
         saved_networks = config.get("networks") or []
         enabled_ids = {n["_id_"] for n in saved_networks if n.get("enabled")}
         for net in networks:
@@ -328,12 +420,11 @@ def dec(deg, min_val, sec):
     return round(deg + (min_val / 60) + (sec / 3600), 6)
 
 
-def get_wan_connection_info(dev, status):
+def get_wan_connection_info(dev, status, primary_device):
     """Get WAN connection information."""
     wan_type = status.get("info", {}).get("type", "")
     nwktype = get_network_type(wan_type, status)
     state = bool(status.get("status", {}).get("connection_state") == "connected")
-    primary_device = cp.get('status/wan/primary_device')
     default_route = bool(dev == primary_device)
 
     wan_conn = {
@@ -2,6 +2,7 @@
     function loadForm(config) {
         document.getElementById('interval').value = config.interval;
         document.getElementById('udp_port').value = config.udp_port;
+        document.getElementById('keepalive').value = config.keepalive;
 
         var networksEl = document.getElementById('networks');
         networksEl.innerHTML = '';
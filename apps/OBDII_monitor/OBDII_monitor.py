@@ -14,11 +14,21 @@
 # "VEHICLE_SPEED": {"condition": ">", "value": 80}
 # Example for alerting if fuel system monitor not complete:
 # "FUEL_SYSTEM_MONITOR": {"condition": "!=", "value": "COMPLETE"}
+#
+# Optionally set "window" in seconds (defaults to the interval).  A PID alerts
+# at most once per window, reporting the worst value seen in the last window
+# seconds (highest for ">", lowest for "<", latest for "=" and "!=").
+#
+# Each PID's history is read incrementally: samples are tracked by timestamp so
+# every sample is evaluated exactly once, whatever the polling interval.
 
 
 import cp
 import time
 import json
+from collections import deque
+
+APP_NAME = 'OBDII_monitor'
 
 defaults = {
     "interval": 30,  # seconds between polls
@@ -29,14 +39,40 @@ defaults = {
     "ENGINE_OIL_PRESSURE": {"condition": "<", "value": 25}  # PSI
 }
 
-def get_config(name):
-    try:
-        appdata = cp.get('config/system/sdk/appdata')
-        return json.loads([x["value"] for x in appdata if x["name"] == name][0])
-    except:
+# Keys in the config that are settings, not PID names
+SETTINGS = ('interval', 'window')
+
+MIN_INTERVAL = 1
+MAX_INTERVAL = 50
+
+# condition: (convert sample, test sample against threshold,
+#             does a new deviation replace an older one in the window)
+CONDITIONS = {
+    '>': (float, lambda v, t: v > t, lambda new, old: new >= old),
+    '<': (float, lambda v, t: v < t, lambda new, old: new <= old),
+    '=': (None, lambda v, t: v == t, lambda new, old: True),
+    '!=': (None, lambda v, t: v != t, lambda new, old: True),
+}
+
+
+def get_config(name, current_raw=None):
+    """Return (raw, config); config is None if appdata is unchanged or unreadable."""
+    appdata = cp.get('config/system/sdk/appdata')
+    if appdata is None:
+        return current_raw, None
+    raw = next((x["value"] for x in appdata if x["name"] == name), None)
+    if raw is None:
         cp.log('No config found - saving defaults.')
-        cp.post('config/system/sdk/appdata', {"name": name, "value": json.dumps(defaults)})
-        return defaults
+        raw = json.dumps(defaults)
+        cp.post('config/system/sdk/appdata', {"name": name, "value": raw})
+    if raw == current_raw:
+        return raw, None
+    try:
+        return raw, json.loads(raw)
+    except ValueError as e:
+        cp.log(f'Invalid config ({e}) - using defaults.')
+        return raw, defaults
+
 
 def get_location():
     """Return latitude and longitude as floats"""
@@ -58,55 +94,149 @@ def dec(deg, min, sec):
         dec = deg + (min / 60) + (sec / 3600)
     return round(dec, 5)
 
-def evaluate(pid, alert, previous_value):
-    deviation = None  # deviation is any value that does not match the given alert criteria
-    for value in pid["values"][-alerts["interval"]:]:
-        if alert["condition"] == ">":
-            if float(value[0]) > float(alert["value"]):
-                if deviation:
-                    if float(value[0]) > float(deviation):
-                        deviation = value[0]
-                else:
-                    deviation = value[0]
-        elif alert["condition"] == "<":
-            if float(value[0]) < float(alert["value"]):
-                if deviation:
-                    if float(value[0]) < float(deviation):
-                        deviation = value[0]
-                else:
-                    deviation = value[0]
-        elif alert["condition"] == "=":
+
+class PidMonitor:
+    """Alert state for one PID.
+
+    The condition is compiled once: the threshold is converted when the
+    config is loaded and each sample is converted once when it arrives.
+    Deviating samples are kept in a monotonic deque (timestamp order, and
+    each entry worse than everything after it) so the worst deviation in
+    the window is always at the front, with O(1) amortized work per sample.
+    """
+
+    def __init__(self, name, alert, window, last_ts=None):
+        self.name = name
+        self.condition = alert.get("condition", "")
+        self.value = alert.get("value", "")
+        self.window = window
+        self.last_ts = last_ts  # timestamp of the newest sample already seen
+        self.last_alert_ts = None
+        self.deviations = deque()  # (timestamp, value, raw value)
+        self.test = None
+        if self.condition in CONDITIONS:
+            self.convert, test, self.replaces = CONDITIONS[self.condition]
             try:
-                if value[0] == alert["value"]:
-                    deviation = value[0]
-            except:
-                pass  # fail open on "="
-        elif alert["condition"] == "!=":
+                threshold = self.convert(self.value) if self.convert else self.value
+            except (TypeError, ValueError):
+                cp.log(f'{name}: value {self.value!r} is not a number - no alerts.')
+                return
+            self.test = lambda v: test(v, threshold)
+        elif self.condition:
+            cp.log(f'{name}: unknown condition {self.condition!r} - no alerts.')
+
+    def new_samples(self, values):
+        """Return the samples newer than last_ts, oldest first."""
+        if self.last_ts is None or (values and values[-1][1] < self.last_ts):
+            # First poll, or the history restarted (e.g. OBD adapter reset)
+            self.deviations.clear()
+            self.last_alert_ts = None
+            return values
+        start = len(values)
+        while start and values[start - 1][1] > self.last_ts:
+            start -= 1
+        return values[start:]
+
+    def update(self, values):
+        """Evaluate new samples from the PID history.
+
+        values is the PID's history window of [value, timestamp] pairs,
+        oldest first, with timestamps in seconds.
+
+        Returns the worst deviation in the window (raw value) when an alert
+        is due, else None.
+        """
+        samples = self.new_samples(values)
+        if not samples:
+            return None
+        self.last_ts = samples[-1][1]
+        if self.test is None:
+            return None
+
+        deviated = False
+        deviations = self.deviations
+        for sample in samples:
+            raw, ts = sample[0], sample[1]
             try:
-                if value[0] != alert["value"]:
-                    deviation = value[0]
-            except:
-                deviation = value[0]  # fail closed on "!="
+                value = self.convert(raw) if self.convert else raw
+            except (TypeError, ValueError):
+                continue
+            if not self.test(value):
+                continue
+            while deviations and self.replaces(value, deviations[-1][1]):
+                deviations.pop()
+            deviations.append((ts, value, raw))
+            deviated = True
+
+        while deviations and deviations[0][0] <= self.last_ts - self.window:
+            deviations.popleft()
+
+        if not deviated or not deviations:
+            return None
+        if self.last_alert_ts is not None and self.last_ts - self.last_alert_ts < self.window:
+            return None
+        self.last_alert_ts = self.last_ts
+        return deviations[0][2]
+
+
+def build_monitors(config, previous):
+    """Compile a PidMonitor per configured PID, keeping each PID's position
+    in its history so a config change does not re-evaluate old samples."""
+    window = config.get("window", config["interval"])
+    monitors = {}
+    for name, alert in config.items():
+        if name in SETTINGS or not isinstance(alert, dict):
+            continue
+        old = previous.get(name)
+        monitors[name] = PidMonitor(name, alert, window, old.last_ts if old else None)
+    return monitors
+
+
+def send_alert(vin, pid, monitor, deviation):
+    lat, lon, accuracy = get_location()
+    msg = f'OBDII_monitor - VIN: {vin} {pid["name"]}: {deviation} {pid["units"]} {monitor.condition} {monitor.value} Location: {lat}, {lon}'
+    cp.log(msg)
+    cp.alert(msg)
 
-    if deviation:
-        lat, lon, accuracy = get_location()
-        msg = f'OBDII_monitor - VIN: {vin} {pid["name"]}: {deviation} {pid["units"]} {alert["condition"]} {alert["value"]} Location: {lat}, {lon}'
-        cp.log(msg)
-        cp.alert(msg)
 
 cp.log('Starting...')
-alerts = get_config('OBDII_monitor')
-previous_value = {}
+raw_config = None
+config = defaults
+monitors = {}
+last_values = {}
+asset_id = None
+next_poll = time.monotonic()
 while True:
-    alerts = get_config('OBDII_monitor')
-    time.sleep(alerts["interval"])
-    vin = cp.get('status/obd/vehicle/vin')
-    pids = cp.get('status/obd/pids')
+    raw_config, new_config = get_config(APP_NAME, raw_config)
+    if new_config is not None:
+        config = new_config
+        monitors = build_monitors(config, monitors)
+        cp.log(f'Config loaded: {len(monitors)} PIDs')
+    interval = min(max(config["interval"], MIN_INTERVAL), MAX_INTERVAL)
+
+    # Sleep to the next poll on a fixed schedule so the interval does not drift
+    next_poll += interval
+    time.sleep(max(0, next_poll - time.monotonic()))
+    next_poll = max(next_poll, time.monotonic() - interval)
+
+    pids = cp.get('status/obd/pids') or []
+    vin = None
     text = ''
     for pid in pids:
-        if pid["name"] in alerts.keys():
-            evaluate(pid, alerts[pid["name"]], previous_value)  # Alerts
+        monitor = monitors.get(pid["name"])
+        if monitor is None:
+            continue
+        deviation = monitor.update(pid.get("values") or [])  # Alerts
+        if deviation is not None:
+            if vin is None:
+                vin = cp.get('status/obd/vehicle/vin')
+            send_alert(vin, pid, monitor, deviation)
+        if last_values.get(pid["name"]) != pid["last_value"]:
+            last_values[pid["name"]] = pid["last_value"]
             cp.log(f'{str(pid["pid"])} - {pid["name"]}: {pid["last_value"]}')
-            text += f'{pid["name"]}: {pid["last_value"]}, '
+        text += f'{pid["name"]}: {pid["last_value"]}, '
     text = text[:-2]
-    cp.put('config/system/asset_id', text)
+    if text != asset_id:
+        # asset_id is a config write; only save it when a value changed
+        asset_id = text
+        cp.put('config/system/asset_id', text)
@@ -10,6 +10,7 @@ import time
 import threading
 import socket
 import signal
+import struct
 from datetime import datetime
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs, unquote
@@ -17,6 +18,9 @@ from urllib.parse import urlparse, parse_qs, unquote
 PORT = 8000
 CAPTURES_DIR = 'captures'
 META_DIR = 'captures/meta'
+CATALOG_PATH = 'captures/meta/catalog.jsonl'
+# Rewrite the catalog once it holds this many records more than it has files
+CATALOG_COMPACT_SLACK = 200
 
 # Global state
 capture_running = False
@@ -184,33 +188,146 @@ def get_interfaces():
     return interfaces
 
 
+class CaptureCatalog(object):
+    """Append-only JSON-lines index of saved captures.
+
+    One entry per pcap file with its size, packet count, first/last packet
+    time, filter and capture options, so listing and oldest-first deletion
+    don't touch the capture directory or the per-file meta JSON. Every
+    change is appended as one line and replayed on load; the file is
+    rewritten once superseded lines pile up.
+    """
+
+    def __init__(self, path=CATALOG_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.rows = {}
+        self.records = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        damaged = False
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    op = record.get('op')
+                    if op == 'update':
+                        self.rows[record['row'][0]] = tuple(record['row'])
+                    elif op == 'remove':
+                        self.rows.pop(record['filename'], None)
+                    elif op == 'rename' and record['old'] in self.rows:
+                        row = self.rows.pop(record['old'])
+                        self.rows[record['new']] = (record['new'],) + row[1:]
+                except (ValueError, KeyError, AttributeError):
+                    damaged = True  # e.g. a line cut short by a reboot
+                    continue
+                self.records += 1
+        if damaged:
+            # Rewrite so new lines don't follow a partial one
+            self._compact()
+
+    def _append(self, record):
+        """Write one change record; called with the lock held."""
+        self.records += 1
+        if self.records > len(self.rows) + CATALOG_COMPACT_SLACK:
+            self._compact()
+            return
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+    def _compact(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            for row in self.rows.values():
+                f.write(json.dumps({'op': 'update', 'row': row}) + '\n')
+        os.replace(tmp_path, self.path)
+        self.records = len(self.rows)
+
+    def update(self, filename, size, mtime, counter=None, options=None):
+        """Insert or update a capture entry."""
+        packets = first_ts = last_ts = None
+        if counter is not None:
+            packets = counter.packets
+            first_ts, last_ts = counter.first_ts, counter.last_ts
+        arguments = options.get('arguments', '') if options else ''
+        row = (filename, size, mtime, packets, first_ts, last_ts,
+               arguments, json.dumps(options) if options else None)
+        with self.lock:
+            self.rows[filename] = row
+            self._append({'op': 'update', 'row': row})
+
+    def remove(self, filename):
+        with self.lock:
+            if self.rows.pop(filename, None) is not None:
+                self._append({'op': 'remove', 'filename': filename})
+
+    def rename(self, old_name, new_name):
+        with self.lock:
+            if old_name in self.rows:
+                row = self.rows.pop(old_name)
+                self.rows[new_name] = (new_name,) + row[1:]
+                self._append({'op': 'rename', 'old': old_name,
+                              'new': new_name})
+
+    def list(self):
+        """Return catalog entries as dicts, newest first."""
+        with self.lock:
+            rows = sorted(self.rows.values(), key=lambda r: r[2],
+                          reverse=True)
+        return [self._row(r) for r in rows]
+
+    def oldest(self):
+        """Return the filename with the oldest mtime, or None."""
+        with self.lock:
+            if not self.rows:
+                return None
+            return min(self.rows.values(), key=lambda r: r[2])[0]
+
+    def filenames(self):
+        with self.lock:
+            return {r[0]: (r[1], r[2], r[3]) for r in self.rows.values()}
+
+    @staticmethod
+    def _row(row):
+        filename, size, mtime, packets, first_ts, last_ts, arguments, \
+            options = row
+        return {
+            'filename': filename,
+            'size': size,
+            'datetime': datetime.fromtimestamp(
+                mtime).strftime('%Y-%m-%d %H:%M:%S'),
+            'timestamp': mtime,
+            'options': json.loads(options) if options else None,
+            'packets': packets,
+            'filter': arguments,
+            'first_packet': first_ts,
+            'last_packet': last_ts
+        }
+
+
+catalog = CaptureCatalog()
+
+
 def get_capture_files():
     """Get list of saved capture files with metadata."""
-    files = []
     try:
-        if not os.path.exists(CAPTURES_DIR):
-            return files
-        for fname in os.listdir(CAPTURES_DIR):
-            fpath = os.path.join(CAPTURES_DIR, fname)
-            if os.path.isfile(fpath) and fname.endswith('.pcap'):
-                stat = os.stat(fpath)
-                meta = load_meta(fname)
-                pkt_count = None
-                if meta and 'packet_count' in meta:
-                    pkt_count = meta.get('packet_count')
-                files.append({
-                    'filename': fname,
-                    'size': stat.st_size,
-                    'datetime': datetime.fromtimestamp(
-                        stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                    'timestamp': stat.st_mtime,
-                    'options': meta,
-                    'packets': pkt_count
-                })
-        files.sort(key=lambda x: x['timestamp'], reverse=True)
+        return catalog.list()
     except Exception as e:
         cp.log('Error listing capture files: ' + str(e))
-    return files
+    return []
+
+
+def catalog_capture(filename, counter=None, options=None):
+    """Record a capture's current size and packet stats in the catalog."""
+    try:
+        stat = os.stat(os.path.join(CAPTURES_DIR, filename))
+        catalog.update(filename, stat.st_size, stat.st_mtime, counter,
+                       options)
+    except Exception as e:
+        cp.log('Error cataloging ' + filename + ': ' + str(e))
 
 
 def save_meta(filename, options):
@@ -235,22 +352,73 @@ def load_meta(filename):
     return None
 
 
-def count_pcap_packets(filepath):
-    """Count packets in a pcap file by reading record headers."""
+class PcapCounter(object):
+    """Count pcap records incrementally as bytes are fed in.
+
+    Handles records split across chunks, so it can run on the stream as
+    it is written instead of rescanning the finished file.
+    """
+
+    MAGIC = {
+        b'\xd4\xc3\xb2\xa1': ('<', 1e6),
+        b'\xa1\xb2\xc3\xd4': ('>', 1e6),
+        b'\x4d\x3c\xb2\xa1': ('<', 1e9),
+        b'\xa1\xb2\x3c\x4d': ('>', 1e9),
+    }
+
+    def __init__(self):
+        self.packets = 0
+        self.first_ts = None
+        self.last_ts = None
+        self._header = b''
+        self._record = None
+        self._pending = b''
+        self._skip = 0
+
+    def feed(self, data):
+        pos = 0
+        if self._record is None:
+            need = 24 - len(self._header)
+            self._header += data[:need]
+            pos = need
+            if len(self._header) < 24:
+                return
+            endian, frac = self.MAGIC.get(self._header[:4], ('<', 1e6))
+            self._record = (struct.Struct(endian + 'IIII'), frac)
+        record, frac = self._record
+        end = len(data)
+        while pos < end:
+            if self._skip:
+                step = min(self._skip, end - pos)
+                self._skip -= step
+                pos += step
+                continue
+            need = 16 - len(self._pending)
+            self._pending += data[pos:pos + need]
+            pos += need
+            if len(self._pending) < 16:
+                break
+            ts_sec, ts_frac, incl_len, _ = record.unpack(self._pending)
+            self._pending = b''
+            self._skip = incl_len
+            ts = ts_sec + ts_frac / frac
+            if self.first_ts is None:
+                self.first_ts = ts
+            self.last_ts = ts
+            self.packets += 1
+
+
+def count_pcap_file(filepath):
+    """Return a PcapCounter fed with an existing pcap file, or None."""
     try:
-        count = 0
+        counter = PcapCounter()
         with open(filepath, 'rb') as f:
-            header = f.read(24)
-            if len(header) < 24:
-                return 0
             while True:
-                rec_hdr = f.read(16)
-                if len(rec_hdr) < 16:
+                chunk = f.read(65536)
+                if not chunk:
                     break
-                incl_len = int.from_bytes(rec_hdr[8:12], 'little')
-                f.seek(incl_len, 1)
-                count += 1
-        return count
+                counter.feed(chunk)
+        return counter
     except Exception as e:
         cp.log('Error counting packets: ' + str(e))
     return None
@@ -280,21 +448,20 @@ def get_disk_usage():
 def delete_oldest_capture():
     """Delete the oldest capture file. Returns filename or None."""
     try:
-        files = []
-        for fname in os.listdir(CAPTURES_DIR):
-            fpath = os.path.join(CAPTURES_DIR, fname)
-            if os.path.isfile(fpath) and fname.endswith('.pcap'):
-                files.append((fpath, os.stat(fpath).st_mtime, fname))
-        if not files:
-            return None
-        files.sort(key=lambda x: x[1])
-        oldest_path, _, oldest_name = files[0]
-        os.remove(oldest_path)
-        meta_path = os.path.join(META_DIR, oldest_name + '.json')
-        if os.path.exists(meta_path):
-            os.remove(meta_path)
-        cp.log('Deleted oldest capture: ' + oldest_name)
-        return oldest_name
+        while True:
+            oldest_name = catalog.oldest()
+            if oldest_name is None:
+                return None
+            catalog.remove(oldest_name)
+            oldest_path = os.path.join(CAPTURES_DIR, oldest_name)
+            if not os.path.exists(oldest_path):
+                continue
+            os.remove(oldest_path)
+            meta_path = os.path.join(META_DIR, oldest_name + '.json')
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
+            cp.log('Deleted oldest capture: ' + oldest_name)
+            return oldest_name
     except Exception as e:
         cp.log('Error deleting oldest capture: ' + str(e))
     return None
@@ -513,6 +680,7 @@ def run_capture(options):
             meta_initial = dict(options)
             meta_initial['stop_reason'] = 'unknown'
             save_meta(final_name, meta_initial)
+            counter = PcapCounter()
 
             try:
                 import requests as req
@@ -566,6 +734,7 @@ def run_capture(options):
                         if chunk:
                             out_f.write(chunk)
                             out_f.flush()
+                            counter.feed(chunk)
                             total_bytes += len(chunk)
                             size_kb = total_bytes / 1024
                             if size_kb < 1024:
@@ -581,6 +750,8 @@ def run_capture(options):
                             disk_check_counter += 1
                             if disk_check_counter >= 25:
                                 disk_check_counter = 0
+                                catalog_capture(final_name, counter,
+                                                meta_initial)
                                 if check_disk_threshold(
                                         threshold_pct,
                                         disk_action,
@@ -612,8 +783,9 @@ def run_capture(options):
                     and os.path.getsize(local_path) > 24):
                 meta = dict(options)
                 meta['stop_reason'] = stop_reason
-                meta['packet_count'] = count_pcap_packets(local_path)
+                meta['packet_count'] = counter.packets
                 save_meta(final_name, meta)
+                catalog_capture(final_name, counter, meta)
                 fsize = os.path.getsize(local_path)
                 reason_text = ''
                 if stop_reason == 'disk_full':
@@ -628,6 +800,7 @@ def run_capture(options):
                        + stop_reason)
             elif os.path.exists(local_path):
                 os.remove(local_path)
+                catalog.remove(final_name)
                 capture_status = 'Stream ended (no data captured)'
             else:
                 capture_status = 'Stream ended (no file)'
@@ -688,12 +861,14 @@ def run_capture(options):
                 req_timeout = timeout_val + 30  # grace period
                 response = opener.open(
                     tcpdump_url, timeout=req_timeout)
+                counter = PcapCounter()
                 with open(local_path, 'wb') as out_f:
                     while True:
                         chunk = response.read(65536)
                         if not chunk:
                             break
                         out_f.write(chunk)
+                        counter.feed(chunk)
                 response.close()
             except urllib.error.HTTPError as e:
                 if capture_stop_requested:
@@ -731,9 +906,9 @@ def run_capture(options):
                                + 's timeout) - interface likely down')
                         break
                     meta_dl = dict(options)
-                    meta_dl['packet_count'] = count_pcap_packets(
-                        local_path)
+                    meta_dl['packet_count'] = counter.packets
                     save_meta(final_name, meta_dl)
+                    catalog_capture(final_name, counter, meta_dl)
                     capture_status = 'Saved: ' + final_name + suffix
                     cp.log('Capture saved: ' + final_name
                            + ' (' + str(file_size) + ' bytes)')
@@ -939,6 +1114,7 @@ class CaptureHandler(BaseHTTPRequestHandler):
             new_meta = os.path.join(META_DIR, new_name + '.json')
             if os.path.exists(old_meta):
                 os.rename(old_meta, new_meta)
+            catalog.rename(old_name, new_name)
             self.send_json({'success': True, 'new_name': new_name})
         except Exception as e:
             self.send_json({'error': str(e)}, 500)
@@ -958,6 +1134,7 @@ class CaptureHandler(BaseHTTPRequestHandler):
             meta_path = os.path.join(META_DIR, filename + '.json')
             if os.path.exists(meta_path):
                 os.remove(meta_path)
+            catalog.remove(filename)
             self.send_json({'success': True})
         except Exception as e:
             self.send_json({'error': str(e)}, 500)
@@ -1028,29 +1205,37 @@ def start_server():
         cp.log('Error starting web server: ' + str(e))
 
 
-def backfill_packet_counts():
-    """Count packets for any pcap files missing packet_count in meta."""
+def sync_catalog():
+    """Bring the catalog in line with the capture directory on startup.
+
+    Files missing from the catalog, or whose size changed (e.g. a stream
+    interrupted by a reboot), are scanned once; rows for files that no
+    longer exist are dropped.
+    """
     try:
-        if not os.path.exists(CAPTURES_DIR):
-            return
+        known = catalog.filenames()
+        present = set()
         for fname in os.listdir(CAPTURES_DIR):
             fpath = os.path.join(CAPTURES_DIR, fname)
             if not os.path.isfile(fpath) or not fname.endswith('.pcap'):
                 continue
-            meta = load_meta(fname)
-            if meta and 'packet_count' in meta:
+            present.add(fname)
+            stat = os.stat(fpath)
+            row = known.get(fname)
+            if row and row[0] == stat.st_size and row[2] is not None:
                 continue
-            # Count packets and update meta
-            count = count_pcap_packets(fpath)
-            if count is not None:
-                if meta is None:
-                    meta = {}
-                meta['packet_count'] = count
+            counter = count_pcap_file(fpath)
+            meta = load_meta(fname) or {}
+            if counter is not None:
+                meta['packet_count'] = counter.packets
                 save_meta(fname, meta)
-                cp.log('Backfill: ' + fname + ' = '
-                       + str(count) + ' packets')
+            catalog.update(fname, stat.st_size, stat.st_mtime, counter, meta)
+            cp.log('Catalog: ' + fname + ' = '
+                   + str(meta.get('packet_count')) + ' packets')
+        for fname in set(known) - present:
+            catalog.remove(fname)
     except Exception as e:
-        cp.log('Error in backfill_packet_counts: ' + str(e))
+        cp.log('Error in sync_catalog: ' + str(e))
 
 
 def main():
@@ -1062,11 +1247,11 @@ def main():
 
     cp.log('Packet_Capture_Web running on port ' + str(PORT))
 
-    # Backfill packet counts for existing files
+    # Catalog existing files (backfills packet counts)
     try:
-        backfill_packet_counts()
+        sync_catalog()
     except Exception as e:
-        cp.log('Backfill error: ' + str(e))
+        cp.log('Catalog sync error: ' + str(e))
 
     # Auto-start capture if enabled in defaults
     try:
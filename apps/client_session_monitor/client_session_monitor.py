@@ -1,4 +1,5 @@
 import cp
+import os
 import socket
 import time
 import json
@@ -11,7 +12,6 @@ sessions = {}
 session_history = []
 monitored_urls = {}
 ip_to_url = {}
-conn_tracker = {}
 mac_to_ip = {}  # {mac: ip}
 lock = threading.Lock()
 
@@ -31,19 +31,147 @@ def resolve_domain(url):
         cp.log(f'DNS resolution failed for {url}: {e}')
         return []
 
-def get_client_info(ip, mac):
-    try:
-        dhcpd = cp.get('status/dhcpd') or {}
-        for lease in dhcpd.get('leases', []):
-            if lease.get('ip_address') == ip or lease.get('mac') == mac:
-                return {
-                    'hostname': lease.get('hostname', 'unknown'),
-                    'network': lease.get('network', 'unknown'),
-                    'ssid': lease.get('ssid', '')
-                }
-    except:
-        pass
-    return {'hostname': 'unknown', 'network': 'unknown', 'ssid': ''}
+CSV_PATH = 'tmp/sessions.csv'
+CSV_HEADER = 'Start,End,Duration,Client IP,MAC,Hostname,Network,SSID,URL,URL TX,URL RX,URL Total\n'
+CLOSING_STATES = {'TIME_WAIT', 'CLOSE_WAIT', 'LAST_ACK', 'CLOSING', 'FIN_WAIT1', 'FIN_WAIT2'}
+
+class ClientIndex:
+    """MAC/IP lookups built once per cycle from the LAN client and DHCP tables."""
+    def __init__(self):
+        self.ip_to_mac = {}
+        self.leases_by_ip = {}
+        self.leases_by_mac = {}
+        try:
+            for client in cp.get('status/lan/clients') or []:
+                if client.get('ip_address') and client.get('mac'):
+                    self.ip_to_mac[client['ip_address']] = client['mac']
+        except Exception as e:
+            cp.log(f'Error reading LAN clients: {e}')
+        try:
+            dhcpd = cp.get('status/dhcpd') or {}
+            for lease in dhcpd.get('leases', []):
+                self.leases_by_ip.setdefault(lease.get('ip_address'), lease)
+                self.leases_by_mac.setdefault(lease.get('mac'), lease)
+        except Exception as e:
+            cp.log(f'Error reading DHCP leases: {e}')
+
+    def find_mac(self, ip):
+        return self.ip_to_mac.get(ip)
+
+    def client_info(self, ip, mac):
+        lease = self.leases_by_ip.get(ip) or self.leases_by_mac.get(mac)
+        if lease:
+            return {
+                'hostname': lease.get('hostname', 'unknown'),
+                'network': lease.get('network', 'unknown'),
+                'ssid': lease.get('ssid', '')
+            }
+        return {'hostname': 'unknown', 'network': 'unknown', 'ssid': ''}
+
+class ConntrackDiff:
+    """Keyed diff of successive conntrack snapshots for monitored destinations.
+
+    update() returns (event, conn_id, entry, delta_tx, delta_rx) tuples where
+    event is 'opened', 'updated' or 'closed'. Connections that drop out of the
+    table are kept for ttl seconds so a missed or partial read doesn't reset
+    their byte counters, then expire with a 'closed' event.
+    """
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self.entries = {}  # {conn_id: {'src', 'url', 'tx', 'rx', 'last_seen'}}
+
+    def update(self, conntrack, ip_to_url, now):
+        events = []
+        seen = set()
+        for conn in conntrack:
+            orig_dst = conn.get('orig_dst')
+            if not orig_dst or orig_dst not in ip_to_url:
+                continue
+            orig_src = conn.get('orig_src')
+            conn_id = conn.get('id')
+            if not orig_src or not conn_id:
+                continue
+
+            entry = self.entries.get(conn_id)
+            if entry is not None and (entry['src'] != orig_src or entry['url'] != ip_to_url[orig_dst]):
+                # conntrack id reused for a different flow
+                del self.entries[conn_id]
+                events.append(('closed', conn_id, entry, 0, 0))
+                entry = None
+            if entry is None:
+                event = 'opened'
+                entry = {'src': orig_src, 'url': ip_to_url[orig_dst], 'tx': 0, 'rx': 0, 'last_seen': now}
+            else:
+                event = 'updated'
+
+            orig_bytes = conn.get('orig_bytes', 0)
+            reply_bytes = conn.get('reply_bytes', 0)
+            delta_tx = max(0, orig_bytes - entry['tx'])
+            delta_rx = max(0, reply_bytes - entry['rx'])
+            entry['tx'] = orig_bytes
+            entry['rx'] = reply_bytes
+            entry['last_seen'] = now
+
+            if conn.get('tcp_state', '') in CLOSING_STATES:
+                if self.entries.pop(conn_id, None) is not None:
+                    events.append(('closed', conn_id, entry, delta_tx, delta_rx))
+                continue
+
+            seen.add(conn_id)
+            self.entries[conn_id] = entry
+            if event == 'opened' or delta_tx or delta_rx:
+                events.append((event, conn_id, entry, delta_tx, delta_rx))
+
+        for conn_id, entry in list(self.entries.items()):
+            if conn_id not in seen and now - entry['last_seen'] > self.ttl:
+                del self.entries[conn_id]
+                events.append(('closed', conn_id, entry, 0, 0))
+        return events
+
+class SessionCsv:
+    """Append-only session CSV that trims its oldest rows past a size limit.
+
+    The file size is tracked in memory after the first stat so appends don't
+    re-stat or re-read the file; a trim keeps only the newest rows up to
+    three quarters of the limit, reading just that tail.
+    """
+    def __init__(self, path=CSV_PATH):
+        self.path = path
+        self.size = None
+
+    def _ensure(self):
+        if self.size is None or not os.path.exists(self.path):
+            if not os.path.exists(self.path):
+                with open(self.path, 'wb') as f:
+                    f.write(CSV_HEADER.encode())
+            self.size = os.path.getsize(self.path)
+
+    def append(self, row, size_limit):
+        data = row.encode()
+        self._ensure()
+        if self.size + len(data) > size_limit:
+            self._trim(max(0, size_limit * 3 // 4 - len(data)))
+        with open(self.path, 'ab') as f:
+            f.write(data)
+        self.size += len(data)
+
+    def _trim(self, keep_bytes):
+        header = CSV_HEADER.encode()
+        with open(self.path, 'rb') as f:
+            start = max(len(header), self.size - keep_bytes)
+            f.seek(start)
+            if start > len(header):
+                f.readline()  # skip the partial row
+            tail = f.read()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(tail)
+        os.replace(tmp_path, self.path)
+        self.size = len(header) + len(tail)
+
+def csv_row(*fields):
+    return ','.join(str(field) for field in fields) + '\n'
 
 def get_client_total_usage(mac):
     try:
@@ -63,19 +191,11 @@ def get_client_total_usage(mac):
         pass
     return None
 
-def find_client_mac(ip):
-    try:
-        clients = cp.get('status/lan/clients') or []
-        for client in clients:
-            if client.get('ip_address') == ip:
-                return client.get('mac')
-    except:
-        pass
-    return None
-
 def monitor_connections():
-    global sessions, session_history, monitored_urls, ip_to_url, conn_tracker, mac_to_ip
+    global sessions, session_history, monitored_urls, ip_to_url, mac_to_ip
     
+    tracker = ConntrackDiff()
+    session_csv = SessionCsv()
     while True:
         try:
             urls_str = get_appdata('monitored_domains', 'example.com')
@@ -93,74 +213,50 @@ def monitor_connections():
             monitored_urls = new_monitored
             ip_to_url = new_ip_to_url
             
-            fw = cp.get('status/firewall') or {}
-            conntrack = fw.get('conntrack', [])
+            fw = cp.get('status/firewall')
+            if fw is None:
+                # Failed read: keep tracked counters rather than diffing against nothing
+                time.sleep(5)
+                continue
+            conntrack = fw.get('conntrack') or []
             now = time.time()
+            tracker.ttl = session_timeout
             
-            client_activity = {}
-            
-            for conn in conntrack:
-                orig_dst = conn.get('orig_dst')
-                if not orig_dst or orig_dst not in ip_to_url:
-                    continue
-                
-                orig_src = conn.get('orig_src')
-                orig_bytes = conn.get('orig_bytes', 0)
-                reply_bytes = conn.get('reply_bytes', 0)
-                conn_id = conn.get('id')
-                tcp_state = conn.get('tcp_state', '')
-                
-                if not orig_src or not conn_id:
+            client_activity = {}  # {(client_ip, url): {'tx', 'rx', 'last_activity'}}
+            for event, conn_id, entry, delta_tx, delta_rx in tracker.update(conntrack, ip_to_url, now):
+                if not delta_tx and not delta_rx:
                     continue
-                
-                if tcp_state in ['TIME_WAIT', 'CLOSE_WAIT', 'LAST_ACK', 'CLOSING', 'FIN_WAIT1', 'FIN_WAIT2']:
-                    continue
-                
-                if orig_src not in client_activity:
-                    client_activity[orig_src] = {'tx': 0, 'rx': 0, 'last_activity': 0, 'url': ip_to_url.get(orig_dst, 'unknown')}
-                
-                if conn_id not in conn_tracker:
-                    conn_tracker[conn_id] = {'tx': 0, 'rx': 0, 'last_seen': now}
-                
-                delta_tx = max(0, orig_bytes - conn_tracker[conn_id]['tx'])
-                delta_rx = max(0, reply_bytes - conn_tracker[conn_id]['rx'])
-                
-                conn_tracker[conn_id]['tx'] = orig_bytes
-                conn_tracker[conn_id]['rx'] = reply_bytes
-                conn_tracker[conn_id]['last_seen'] = now
-                
-                if delta_tx > 0 or delta_rx > 0:
-                    client_activity[orig_src]['last_activity'] = now
-                
-                client_activity[orig_src]['tx'] += delta_tx
-                client_activity[orig_src]['rx'] += delta_rx
+                activity = client_activity.setdefault((entry['src'], entry['url']), {'tx': 0, 'rx': 0, 'last_activity': 0})
+                activity['tx'] += delta_tx
+                activity['rx'] += delta_rx
+                activity['last_activity'] = now
             
             with lock:
-                for client_ip, activity in client_activity.items():
-                    mac = find_client_mac(client_ip)
+                index = ClientIndex() if client_activity else None
+                for (client_ip, url), activity in client_activity.items():
+                    mac = index.find_mac(client_ip)
                     if not mac:
                         continue
                     
                     mac_to_ip[mac] = client_ip
-                    session_key = f"{mac}_{activity['url']}"
+                    session_key = f"{mac}_{url}"
                     
                     if session_key not in sessions:
-                        if activity['last_activity'] > 0:
-                            info = get_client_info(client_ip, mac)
-                            
-                            sessions[session_key] = {
-                                'ip': client_ip,
-                                'mac': mac,
-                                'hostname': info['hostname'],
-                                'network': info['network'],
-                                'ssid': info['ssid'],
-                                'url': activity['url'],
-                                'start_time': activity['last_activity'],
-                                'last_activity': activity['last_activity'],
-                                'tx_bytes': activity['tx'],
-                                'rx_bytes': activity['rx']
-                            }
-                            cp.log(f'Session started: {mac} ({info["hostname"]}) -> {activity["url"]}')
+                        info = index.client_info(client_ip, mac)
+                        
+                        sessions[session_key] = {
+                            'ip': client_ip,
+                            'mac': mac,
+                            'hostname': info['hostname'],
+                            'network': info['network'],
+                            'ssid': info['ssid'],
+                            'url': url,
+                            'start_time': activity['last_activity'],
+                            'last_activity': activity['last_activity'],
+                            'tx_bytes': activity['tx'],
+                            'rx_bytes': activity['rx']
+                        }
+                        cp.log(f'Session started: {mac} ({info["hostname"]}) -> {url}')
                     else:
                         session = sessions[session_key]
                         session['ip'] = client_ip
@@ -203,31 +299,14 @@ def monitor_connections():
                             pass
                         
                         try:
-                            import os
                             log_size_limit = int(get_appdata('log_size_limit', 10485760))
-                            csv_path = 'tmp/sessions.csv'
-                            csv_exists = os.path.exists(csv_path)
-                            
-                            if csv_exists:
-                                file_size = os.path.getsize(csv_path)
-                                if file_size > log_size_limit:
-                                    with open(csv_path, 'r') as f:
-                                        lines = f.readlines()
-                                    header = lines[0] if lines else ''
-                                    rows = lines[1:] if len(lines) > 1 else []
-                                    avg_row_size = file_size // max(len(rows), 1)
-                                    keep_count = max(1, (log_size_limit - len(header)) // avg_row_size)
-                                    with open(csv_path, 'w') as f:
-                                        f.write(header)
-                                        f.writelines(rows[-keep_count:])
-                                    csv_exists = True
-                            
-                            with open(csv_path, 'a') as f:
-                                if not csv_exists:
-                                    f.write('Start,End,Duration,Client IP,MAC,Hostname,Network,SSID,URL,URL TX,URL RX,URL Total\n')
-                                f.write(f"{history_entry['start_time']},{history_entry['end_time']},{int(duration)},{session['ip']},{session['mac']},{session['hostname']},{session['network']},{session['ssid']},{history_entry.get('url','')},{session['tx_bytes']},{session['rx_bytes']},{history_entry['total_session_bytes']}\n")
-                        except:
-                            pass
+                            session_csv.append(csv_row(
+                                history_entry['start_time'], history_entry['end_time'], int(duration),
+                                session['ip'], session['mac'], session['hostname'], session['network'],
+                                session['ssid'], history_entry.get('url', ''), session['tx_bytes'],
+                                session['rx_bytes'], history_entry['total_session_bytes']), log_size_limit)
+                        except Exception as e:
+                            cp.log(f'CSV write error: {e}')
                         
                         ended.append(session_key)
                 
@@ -269,13 +348,12 @@ class DashboardHandler(BaseHTTPRequestHandler):
                 self.wfile.write(json.dumps({'error': str(e)}).encode())
         elif self.path == '/download/sessions.csv':
             try:
-                import os
                 from datetime import datetime
                 os.makedirs('tmp', exist_ok=True)
-                csv_path = 'tmp/sessions.csv'
+                csv_path = CSV_PATH
                 if not os.path.exists(csv_path):
                     with open(csv_path, 'w') as f:
-                        f.write('Start,End,Duration,Client IP,MAC,Hostname,Network,SSID,URL,URL TX,URL RX,URL Total\n')
+                        f.write(CSV_HEADER)
                 with open(csv_path, 'rb') as f:
                     content = f.read()
                 
@@ -479,7 +557,6 @@ def start_web_server():
     server.serve_forever()
 
 if __name__ == '__main__':
-    import os
     os.makedirs('tmp', exist_ok=True)
     
     urls_str = get_appdata('monitored_domains', 'example.com')
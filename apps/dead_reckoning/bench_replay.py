@@ -0,0 +1,179 @@
+"""
+Replay benchmark for the dead_reckoning NMEA pipeline.
+
+Replays a recorded NMEA file (one sentence per line, optionally with the
+router's identifier prefix) through the handler in per-epoch batches and
+fans the result out to local TCP sinks. It compares:
+
+- parsing: the sentence scanner against a pynmeagps parse and re-serialize
+  of every GPRMC/GPGGA sentence, as the app used to do
+- fan-out: the broadcast ring with one persistent subscriber per sink
+  against a new connection and one send per sentence for every batch
+
+Without --file a synthetic 10 Hz recording is generated.
+
+Usage:
+    python bench_replay.py --file drive.nmea --sinks 4
+"""
+
+import argparse
+import socket
+import threading
+import time
+
+from pynmeagps import NMEAReader
+
+import dead_reckoning as dr
+
+
+def synthetic_recording(epochs):
+    lines = []
+    for i in range(epochs):
+        t = '%02d%02d%05.2f' % (i // 36000 % 24, i // 600 % 60, i / 10 % 60)
+        mode = i % 20 < 5  # a quarter of the epochs are dead reckoned
+        for body in (
+                f'$GPRMC,{t},{"V" if mode else "A"},4807.03800,N,01131.00000,E,0.1,84.4,230394,,,{"N" if mode else "A"}',
+                f'$GPGGA,{t},4807.03800,N,01131.00000,E,{0 if mode else 1},08,0.9,545.4,M,46.9,M,,',
+                '$GPVTG,84.4,T,,M,0.1,N,0.2,K,A',
+                '$GNGSA,A,3,01,02,03,04,05,06,07,08,,,,,1.5,0.9,1.2',
+                '$GPGSV,3,1,11,01,45,120,40,02,30,200,35,03,60,300,42,04,10,050,30',
+                f'$PCPTMINR,{t},{48.1173 + i * 1e-6:.6f},{11.516666 + i * 1e-6:.6f},1,2,3'):
+            lines.append('%s*%02X' % (body, dr.nmeachecksum(body.encode())))
+        lines.append('')
+    return lines
+
+
+def load_batches(path, epochs):
+    lines = open(path).read().splitlines() if path else synthetic_recording(epochs)
+    batches, batch = [], []
+    for line in lines + ['']:
+        # A blank line or a new GPRMC starts the next epoch
+        if (not line or '$GPRMC' in line) and batch:
+            batches.append(('\r\n'.join(batch) + '\r\n').encode())
+            batch = []
+        if line:
+            batch.append(line)
+    return batches
+
+
+class FakeRequest:
+    def __init__(self, data):
+        self.data = data
+
+    def recv(self, size):
+        return self.data
+
+
+def legacy_parse(batch):
+    out = []
+    for line in batch.decode().split('\r\n'):
+        if not line:
+            continue
+        sentence = line[line.index('$'):]
+        if sentence.split(',')[0] in dr.handler.fix_sentences:
+            msg = NMEAReader.parse(sentence, validate=0x00)
+            out.append(msg.serialize())
+        else:
+            out.append(f'{sentence}\r\n'.encode())
+    return out
+
+
+def bench_parse(batches, rounds):
+    sentences = sum(b.count(b'\r\n') for b in batches) * rounds
+    results = {}
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for batch in batches:
+            legacy_parse(batch)
+    results['pynmeagps'] = sentences / (time.perf_counter() - start)
+
+    dr.handler.ring = dr.BroadcastRing()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for batch in batches:
+            dr.handler(FakeRequest(batch), ('127.0.0.1', 0), None)
+    results['scanner'] = sentences / (time.perf_counter() - start)
+    return results
+
+
+def start_sink(received):
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(64)
+
+    def serve():
+        while True:
+            conn, _ = listener.accept()
+            threading.Thread(target=drain, args=(conn,), daemon=True).start()
+
+    def drain(conn):
+        while True:
+            data = conn.recv(65536)
+            if not data:
+                return
+            with lock:
+                received[0] += len(data)
+
+    threading.Thread(target=serve, daemon=True).start()
+    return listener.getsockname()[1]
+
+
+lock = threading.Lock()
+
+
+def wait_for(received, total, timeout=60):
+    deadline = time.time() + timeout
+    while received[0] < total and time.time() < deadline:
+        time.sleep(0.001)
+
+
+def bench_fanout(batches, sinks):
+    results = {}
+    payloads = [[line + b'\r\n' for line in b.split(b'\r\n') if line] for b in batches]
+    total = sum(len(s) for p in payloads for s in p) * sinks
+
+    received = [0]
+    ports = [start_sink(received) for _ in range(sinks)]
+    start = time.perf_counter()
+    for payload in payloads:
+        for port in ports:
+            conn = socket.create_connection(('127.0.0.1', port))
+            for sentence in payload:
+                conn.sendall(sentence)
+            conn.close()
+    wait_for(received, total)
+    results['connect per batch'] = len(batches) / (time.perf_counter() - start)
+
+    received[0] = 0
+    ports = [start_sink(received) for _ in range(sinks)]
+    # Size the ring to hold the whole replay so nothing is dropped
+    ring = dr.BroadcastRing(len(payloads))
+    for port in ports:
+        dr.Subscriber({"hostname": "127.0.0.1", "port": port, "protocol": "tcp"}, ring).start()
+    start = time.perf_counter()
+    for payload in payloads:
+        ring.publish(payload)
+    wait_for(received, total)
+    results['broadcast ring'] = len(batches) / (time.perf_counter() - start)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--file', help='recorded NMEA file (default: synthetic)')
+    parser.add_argument('--epochs', type=int, default=6000,
+                        help='synthetic epochs at 10 Hz')
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--sinks', type=int, default=4)
+    args = parser.parse_args()
+
+    batches = load_batches(args.file, args.epochs)
+    print(f'{len(batches)} batches, {sum(b.count(b"$") for b in batches)} sentences')
+    for name, rate in bench_parse(batches, args.rounds).items():
+        print(f'parse   {name:<18} {rate:>10.0f} sentences/s')
+    for name, rate in bench_fanout(batches, args.sinks).items():
+        print(f'fan-out {name:<18} {rate:>10.0f} batches/s to {args.sinks} sinks')
+
+
+if __name__ == '__main__':
+    main()
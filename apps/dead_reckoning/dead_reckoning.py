@@ -7,10 +7,12 @@
 import json
 import socket
 import socketserver
-import serial
+import threading
 import time
+from functools import reduce
+from operator import xor
 import cp
-from pynmeagps import NMEAReader, NMEAMessage
+from pynmeagps.nmeahelpers import ddd2dmm
 
 class handler(socketserver.BaseRequestHandler):
     listen_port = 10000
@@ -19,147 +21,230 @@ class handler(socketserver.BaseRequestHandler):
     fix_sentences = ["$GPRMC", "$GPGGA"]
     DR_LAT, DR_LON = None, None
     debug = False
+    ring = None
     def handle(self):
         try:
-            data = self.request.recv(2048).decode()
+            data = self.request.recv(2048)
             debug_log(f'Received NMEA data:\n{data}')
-            data = data.split('\r\n')
-            PCPTMINR = None
-            for line in data:
-                if '$PCPTMINR' in line:
-                    PCPTMINR = line
-            if PCPTMINR:
-                try:
-                    PCPTMINR = PCPTMINR.split(',')
-                    if PCPTMINR[0][0] != '$':
-                        PCPTMINR.pop(0)
-                    self.DR_LAT, self.DR_LON = float(PCPTMINR[2]), float(PCPTMINR[3])
-                    debug_log(f'DR: lat: {self.DR_LAT} lon: {self.DR_LON}')
-                except Exception as e:
-                    debug_log(f'Exception handling PCPTMINR: {e}')
+            lines = data.split(b'\r\n')
+            for line in lines:
+                if b'$PCPTMINR' in line:
+                    try:
+                        PCPTMINR = line[line.index(b'$PCPTMINR'):].split(b',')
+                        self.DR_LAT, self.DR_LON = float(PCPTMINR[2]), float(PCPTMINR[3])
+                        debug_log(f'DR: lat: {self.DR_LAT} lon: {self.DR_LON}')
+                    except Exception as e:
+                        debug_log(f'Exception handling PCPTMINR: {e}')
             sentences = []
-            identifier = ''
-            for line in data:
-                if line:
-                    line = line.split(',')
-                    # Detect identifier:
-                    if line[0][0] == '$':
-                        identifier = ''
-                        msg_identity = line[0]
-                        sentence = ','.join(line)
-                    else:
-                        identifier = line[0] + ','
-                        msg_identity = line[1]
-                        sentence = ','.join(line[1:])
-
-                    if msg_identity in self.fix_sentences:
-                        fixed_sentence = fix_NMEA(sentence, self.DR_LAT, self.DR_LON)
-                        sentences.append(f'{identifier}{fixed_sentence}')
-                    else:
-                        sentences.append(f'{identifier}{sentence}\r\n')
+            identifier = b''
+            for line in lines:
+                if not line:
+                    continue
+                start = line.find(b'$')
+                if start < 0:
+                    sentences.append(line + b'\r\n')
+                    continue
+                # Anything before the $ is the identifier prepended by the router
+                identifier = line[:start]
+                sentence = line[start:] if start else line
+                if sentence.startswith(FIX_PREFIXES):
+                    sentence = fix_sentence(sentence, self.DR_LAT, self.DR_LON)
+                sentences.append(identifier + sentence + b'\r\n')
             # Add Sentences
-            nmea = cp.get('status/gps/nmea')
-            for sentence in nmea:
-                if sentence.split(',')[0] in self.add_sentences:
-                    sentences.append(f'{identifier}{sentence}\r\n')
-            # Send Sentences to Servers
-            send_sentences(sentences)
+            if self.add_sentences:
+                nmea = cp.get('status/gps/nmea') or []
+                for sentence in nmea:
+                    if sentence.split(',')[0] in self.add_sentences:
+                        sentences.append(identifier + sentence.encode() + b'\r\n')
+            # Hand the batch to the subscriber threads
+            if sentences and self.ring:
+                self.ring.publish(sentences)
         except Exception as e:
             cp.logger.exception(f'Exception in handler: {e}')
 
-def fix_NMEA(data, DR_LAT, DR_LON):
-    msg = NMEAReader.parse(data, validate=0x00)
-    debug_log(f'Before Fix: {msg}')
-    # GPRMC Sentences:
-    if msg.identity == 'GPRMC':
-        status = msg.status
-        posMode = msg.posMode
-        if posMode == 'N' or status == 'V':
-            debug_log(f'FIXING GPRMC SENTENCE!')
+FIX_PREFIXES = tuple(x.encode() + b',' for x in handler.fix_sentences)
+
+def fix_sentence(sentence, DR_LAT, DR_LON):
+    """Fix a GPRMC or GPGGA sentence without parsing the other sentence types.
+
+    Only the fields that change are rewritten and the checksum is updated
+    from the XOR of the old and new field bytes. Time is normalised to
+    hhmmss.ss as before.
+    """
+    star = sentence.rfind(b'*')
+    if star > 0:
+        fields, cksum = sentence[:star].split(b','), sentence[star + 1:star + 3]
+    else:
+        fields, cksum = sentence.split(b','), None
+    changes = {1: _fix_time(fields[1])}
+    if fields[0] == b'$GPRMC' and len(fields) > 6:
+        if len(fields) > 12 and fields[12] == b'N':
+            debug_log('FIXING GPRMC SENTENCE!')
+            changes[12] = b'E'
+        if fields[2] == b'V':
+            debug_log('FIXING GPRMC SENTENCE!')
             debug_log(f'DR_LAT: {DR_LAT} DR_LON: {DR_LON}')
-            if posMode == 'N':
-                posMode = 'E'
-            if status == 'V':
-                status = 'A'
-                if DR_LAT and DR_LON:
-                    lat, lon = DR_LAT, DR_LON
-                else:
-                    debug_log('Dead reckoning detected from GPRMC status=V but no PCPTMINR location available!')
-                    lat, lon = None, None
-                message = NMEAMessage(msg.talker, msg.msgID, 0, time=msg.time, status=status, lat=lat, NS=msg.NS,
-                                      lon=lon, EW=msg.EW, spd=msg.spd, cog=msg.cog, date=msg.date, mv=msg.mv,
-                                      mvEW=msg.mvEW, posMode=posMode)
-        else:  # Status is not 'V' so passthrough msg
-            message = msg
-    # GPGGA Sentences:
-    elif msg.identity == 'GPGGA':
-        lat, lon = msg.lat, msg.lon
-        quality = msg.quality
-        if quality == 0:
-            debug_log(f'FIXING GPGGA SENTENCE!')
-            quality = 6
+            changes[2] = b'A'
+            if not (DR_LAT and DR_LON):
+                debug_log('Dead reckoning detected from GPRMC status=V but no PCPTMINR location available!')
+            changes.update(_position_fields(3, DR_LAT, DR_LON))
+    elif fields[0] == b'$GPGGA' and len(fields) > 6:
+        if fields[6] == b'0':
+            debug_log('FIXING GPGGA SENTENCE!')
+            changes[6] = b'6'
             if DR_LAT and DR_LON:
-                lat, lon = DR_LAT, DR_LON
+                changes.update(_position_fields(2, DR_LAT, DR_LON))
             else:
                 debug_log('Dead reckoning detected from GPGGA quality=6 but no PCPTMINR location available!')
-            message = NMEAMessage(msg.talker, msg.msgID, 0, time=msg.time, lat=lat, NS=msg.NS,
-                              lon=lon, EW=msg.EW, quality=quality,  numSV=msg.numSV, HDOP=msg.HDOP,
-                              alt=msg.alt, altUnit=msg.altUnit, sep=msg.sep, sepUnit=msg.sepUnit, diffAge=msg.diffAge,
-                              diffStation=msg.diffStation)
-        else:  # Quality not 0 so passthrough msg
-            message = msg
-    else:  # Unknown identity - catch all, passthrough
-        message = msg
-    debug_log(f'After Fix: {message}')
-    return fixtimeprecision(message.serialize().decode())
+    return replace_fields(fields, cksum, changes)
 
-def fixtimeprecision(nmea):
-    """Fix the time precision of GGA/RMC messages."""
-    prefix, timestamp, rest = nmea.split(',', 2)
-    return nmeafixchecksum(','.join([prefix, timestamp[:9], rest]))
+def _fix_time(timestamp):
+    """Return an hhmmss.ss time field."""
+    if b'.' not in timestamp:
+        return timestamp + b'.00' if timestamp else timestamp
+    return timestamp[:9].ljust(9, b'0')
 
-def nmeafixchecksum(nmea):
-    nmea = nmea[:-2] + ('%02X' % nmeachecksum(nmea))
-    return nmea
+def _position_fields(index, lat, lon):
+    """Return lat, NS, lon, EW field changes starting at index."""
+    if not (lat and lon):
+        return {index: b'', index + 2: b''}
+    return {
+        index: ddd2dmm(lat, 'LA').encode(),
+        index + 1: b'N' if lat > 0 else b'S',
+        index + 2: ddd2dmm(lon, 'LN').encode(),
+        index + 3: b'E' if lon > 0 else b'W',
+    }
 
-def nmeachecksum(payload):
-    # assert payload[0] == '$' and payload[-3] == '*'
-    cksum = 0
-    for by in payload[1:-3]:  # Ignore leading $ and trailing checksum.
-        cksum = cksum ^ ord(by)
-    return cksum
+def replace_fields(fields, cksum, changes):
+    """Apply field changes and return the sentence with an updated checksum.
 
-def send_sentences(sentences):
-    for server in handler.servers:
-        if server["protocol"] == 'tcp':
-            my_server = socket.socket()
-            try:
-                my_server.connect((server["hostname"], server["port"]))
-                for sentence in sentences:
-                    my_server.sendall(sentence.encode())
-                    debug_log(f'Sent TCP to {server["hostname"]}:{server["port"]} - {sentence}')
-                    time.sleep(0.05)
-            except Exception as e:
-                cp.logger.exception(f'Failed to send to server {server["hostname"]} {server["port"]} - {e}')
-        elif server["protocol"] == 'udp':
-            my_server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    cksum is the sentence's original hex checksum; it is adjusted by XOR-ing
+    out the old field bytes and XOR-ing in the new ones. Without one the
+    checksum is computed over the whole sentence.
+    """
+    try:
+        cksum = int(cksum, 16)
+    except (TypeError, ValueError):
+        cksum = None
+    for index, value in changes.items():
+        if index >= len(fields) or fields[index] == value:
+            continue
+        if cksum is not None:
+            cksum ^= reduce(xor, fields[index], 0) ^ reduce(xor, value, 0)
+        fields[index] = value
+    body = b','.join(fields)
+    if cksum is None:
+        cksum = nmeachecksum(body)
+    return b'%s*%02X' % (body, cksum)
+
+def nmeachecksum(body):
+    """XOR of everything after the leading $ (body excludes *HH)."""
+    return reduce(xor, body[1:], 0)
+
+class BroadcastRing:
+    """Fixed-size ring of sentence batches, written by the handler and read by every subscriber.
+
+    Each subscriber keeps its own cursor. A subscriber that falls more than
+    `size` batches behind skips ahead and loses its oldest batches, so a slow
+    or unreachable server never holds up the handler or the other servers.
+    """
+
+    def __init__(self, size=64):
+        self.size = size
+        self.slots = [None] * size
+        self.seq = 0
+        self.cond = threading.Condition()
+
+    def publish(self, batch):
+        with self.cond:
+            self.slots[self.seq % self.size] = batch
+            self.seq += 1
+            self.cond.notify_all()
+
+    def read(self, cursor, timeout=None):
+        """Wait for batches after cursor and return (cursor, batches, dropped)."""
+        with self.cond:
+            if cursor == self.seq:
+                self.cond.wait(timeout)
+            dropped = max(0, self.seq - self.size - cursor)
+            cursor += dropped
+            batches = [self.slots[i % self.size] for i in range(cursor, self.seq)]
+            return self.seq, batches, dropped
+
+class Subscriber(threading.Thread):
+    """Sends every batch in the ring to one configured server over a persistent connection."""
+    send_timeout = 5
+    reconnect_interval = 10
+
+    def __init__(self, server, ring):
+        super().__init__(daemon=True)
+        self.server = server
+        self.ring = ring
+        self.cursor = ring.seq
+        self.conn = None
+        self.next_connect = 0
+        self.name = f'{server["protocol"]}:{server.get("hostname")}:{server.get("port")}'
+
+    def run(self):
+        while True:
+            self.cursor, batches, dropped = self.ring.read(self.cursor)
+            if dropped:
+                debug_log(f'{self.name} fell behind, dropped {dropped} batches')
+            if not batches:
+                continue
             try:
-                my_server.connect((server["hostname"], server["port"]))
-                for sentence in sentences:
-                    my_server.send(sentence.encode())
-                    debug_log(f'Sent UDP to {server["hostname"]}:{server["port"]} - {sentence}')
-                    time.sleep(0.05)
+                if self.conn is None:
+                    if time.time() < self.next_connect:
+                        continue
+                    self.conn = self.connect()
+                self.send([sentence for batch in batches for sentence in batch])
+                debug_log(f'Sent {sum(len(b) for b in batches)} sentences to {self.name}')
             except Exception as e:
-                cp.logger.exception(f'Failed to send to server {server["hostname"]} {server["port"]} - {e}')
-        elif server["protocol"] == 'serial':
+                cp.logger.exception(f'Failed to send to {self.name} - {e}')
+                self.close()
+                self.next_connect = time.time() + self.reconnect_interval
+
+    def connect(self):
+        protocol = self.server["protocol"]
+        if protocol == 'serial':
+            import serial
+            conn = serial.Serial('/dev/ttyS1', 9600, timeout=1, write_timeout=self.send_timeout)
+            cp.log("Open /dev/ttyS1: %s" % conn)
+            return conn
+        if protocol == 'udp':
+            conn = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        else:
+            conn = socket.socket()
+        conn.settimeout(self.send_timeout)
+        conn.connect((self.server["hostname"], self.server["port"]))
+        return conn
+
+    def send(self, sentences):
+        if self.server["protocol"] == 'udp':
+            for sentence in sentences:
+                self.conn.send(sentence)
+        elif self.server["protocol"] == 'serial':
+            self.conn.write(b''.join(sentences))
+        else:
+            self.conn.sendall(b''.join(sentences))
+
+    def close(self):
+        if self.conn is not None:
             try:
-                with serial.Serial('/dev/ttyS1', 9600, timeout=1) as ser:
-                    cp.log("Open /dev/ttyS1: %s" % ser)
-                    for sentence in sentences:
-                        ser.write(sentence.encode())
-                    time.sleep(0.1)
-            except Exception as e:
-                cp.logger.exception(f'Failed to send to serial: {e}')
+                self.conn.close()
+            except Exception:
+                pass
+            self.conn = None
+
+def start_subscribers(servers):
+    """Create the broadcast ring and one subscriber thread per server."""
+    ring = BroadcastRing()
+    for server in servers:
+        if server.get("protocol") not in ('tcp', 'udp', 'serial'):
+            cp.log(f'Unsupported protocol for server {server}')
+            continue
+        Subscriber(server, ring).start()
+    return ring
 
 def get_appdata(name):
     try:
@@ -249,6 +334,7 @@ if __name__ == '__main__':
     cp.log(f'Starting...')
     enable_GPS_send_to_server()
     get_config('dead_reckoning')
+    handler.ring = start_subscribers(handler.servers)
     cp.log(f'Binding to port {handler.listen_port}')
     server = socketserver.TCPServer(('', handler.listen_port), handler, bind_and_activate=False)
     server.allow_reuse_address = True
@@ -1,3 +1,4 @@
+import hashlib
 import requests
 
 def download_file(url, session=None, timeout=15):
@@ -14,6 +15,42 @@ def download_file(url, session=None, timeout=15):
                 f.write(chunk)
     return local_filename
 
+def open_download(url, session=None, etag=None, timeout=15):
+    """Start a streaming GET. Returns None if the server answers 304 Not
+    Modified for the given etag, otherwise the response with .raw ready to
+    be read as the decoded file body."""
+    req = session or requests
+    headers = {'If-None-Match': etag} if etag else {}
+    r = req.get(url, stream=True, timeout=timeout, headers=headers)
+    if r.status_code == 304:
+        r.close()
+        return None
+    r.raise_for_status()
+    r.raw.decode_content = True
+    return r
+
+class HashingReader:
+    """File-like wrapper that hashes everything read through it."""
+
+    def __init__(self, fileobj, hash_func=hashlib.sha256):
+        self.fileobj = fileobj
+        self.hash = hash_func()
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        self.hash.update(data)
+        self.size += len(data)
+        return data
+
+    def drain(self, chunk_size=65536):
+        """Read to EOF so the digest covers the whole stream."""
+        while self.read(chunk_size):
+            pass
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
 if __name__ == "__main__":
     import sys
     url = sys.argv[1]
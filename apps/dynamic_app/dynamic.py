@@ -1,11 +1,15 @@
+import json
 import os
 import time
 import requests
 from csclient import EventingCSClient
-from download import download_file
-from untar import extract
+from download import open_download, HashingReader
+from untar import extract_stream
 import shutil
 
+# Remembers the last installed download (url, ETag, sha256) in app_holder
+STATE_FILE = '.dynamic_state.json'
+
 
 class DynamicApp:
 
@@ -49,26 +53,151 @@ class DynamicApp:
         else:
             self.c.log(f"app_holder app uuid is {uuid}")
 
-        # try to stop the app cleanly
-        self.c.log("Stopping app_holder")
-        self.c.put("/control/system/sdk/action", "stop %s" % uuid)
+        holder = '/var/mnt/sdk/%s/app_holder' % uuid
+        app_dir = holder + '/app'
+        staging = holder + '/.staging'
+        state = self.load_state(holder) if os.path.isdir(app_dir) else {}
 
-        filename = name + '.tar.gz'
-        download = url + '/' + filename
-        self.c.log("downloading %s" % download)
-        download_file(download, self.session)
-        extract(filename, '/var/mnt/sdk/%s/app_holder' % uuid)
+        # Download into a staging directory while the current app keeps
+        # running, then swap it in.
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
         try:
-            shutil.rmtree('/var/mnt/sdk/%s/app_holder/app' % uuid)
-        except FileNotFoundError:
-            pass
-        shutil.move('/var/mnt/sdk/%s/app_holder/%s' % (uuid, name), '/var/mnt/sdk/%s/app_holder/app' % uuid)
+            if self.settings.get('delta') and os.path.isdir(app_dir):
+                new_state = self.stage_delta(url, name, app_dir, staging)
+            else:
+                new_state = self.stage_tarball(url, name, staging, state)
+            if new_state is None:
+                self.c.log('app %s unchanged, skipping install' % name)
+                return
+
+            # try to stop the app cleanly
+            self.c.log("Stopping app_holder")
+            self.c.put("/control/system/sdk/action", "stop %s" % uuid)
+            self.swap_dirs(os.path.join(staging, name), app_dir)
+            self.save_state(holder, new_state)
+        except Exception as e:
+            self.c.log('ERROR: install of %s failed: %s' % (name, e))
+            return
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
         self.c.log('app %s installed' % name)
 
         self.c.log("Wait 3 seconds before restarting")
         time.sleep(3)
         self.c.put('/control/system/sdk/action', "restart %s" % uuid)
 
+    def stage_tarball(self, url, name, staging, state):
+        """Stream the tar.gz through a sha256 hasher straight into tar
+        extraction. Returns the new state, or None if unchanged."""
+        download = url + '/' + name + '.tar.gz'
+        etag = state.get('etag') if state.get('url') == download else None
+        self.c.log("downloading %s" % download)
+        r = open_download(download, self.session, etag)
+        if r is None:
+            return None
+        with r:
+            reader = HashingReader(r.raw)
+            extract_stream(reader, staging)
+            reader.drain()
+        digest = reader.hexdigest()
+        self.c.log('downloaded %s bytes, sha256 %s' % (reader.size, digest))
+
+        expected = self.settings.get('sha256')
+        if expected and expected.lower() != digest:
+            raise ValueError('sha256 mismatch, expected %s' % expected)
+        if not os.path.isdir(os.path.join(staging, name)):
+            raise ValueError('%s.tar.gz has no %s folder' % (name, name))
+        if state.get('url') == download and state.get('sha256') == digest:
+            return None
+        return {'url': download, 'etag': r.headers.get('ETag'),
+                'sha256': digest}
+
+    def stage_delta(self, url, name, app_dir, staging):
+        """Fetch only the files whose hashes changed in the app's
+        METADATA/MANIFEST.json, served unpacked at url/name/. Unchanged
+        files are hard linked from the installed app. Returns the new
+        state, or None if unchanged."""
+        base = '%s/%s' % (url, name)
+        r = self.session.get(base + '/METADATA/MANIFEST.json', timeout=15)
+        r.raise_for_status()
+        manifest = r.content
+        files = json.loads(manifest)['app']['files']
+        try:
+            with open(os.path.join(app_dir, 'METADATA', 'MANIFEST.json')) as f:
+                installed = json.load(f)['app']['files']
+        except (OSError, ValueError, KeyError):
+            installed = {}
+
+        changed = [path for path, digest in files.items()
+                   if installed.get(path) != digest
+                   or not os.path.isfile(os.path.join(app_dir, path))]
+        if not changed and set(installed) == set(files):
+            return None
+        self.c.log('delta update: %s of %s files changed' % (len(changed), len(files)))
+
+        target = os.path.join(staging, name)
+        for path, digest in files.items():
+            dest = os.path.join(target, path)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            if path not in changed:
+                self.link_or_copy(os.path.join(app_dir, path), dest)
+                continue
+            with open_download(base + '/' + path, self.session) as fr, \
+                    open(dest, 'wb') as f:
+                reader = HashingReader(fr.raw)
+                shutil.copyfileobj(reader, f)
+            if reader.hexdigest() != digest:
+                raise ValueError('sha256 mismatch for %s' % path)
+            # HTTP does not carry file modes, keep the installed ones
+            if os.path.isfile(os.path.join(app_dir, path)):
+                shutil.copymode(os.path.join(app_dir, path), dest)
+            elif path.endswith('.sh'):
+                os.chmod(dest, 0o755)
+
+        os.makedirs(os.path.join(target, 'METADATA'), exist_ok=True)
+        with open(os.path.join(target, 'METADATA', 'MANIFEST.json'), 'wb') as f:
+            f.write(manifest)
+        r = self.session.get(base + '/METADATA/SIGNATURE.DS', timeout=15)
+        if r.ok:
+            with open(os.path.join(target, 'METADATA', 'SIGNATURE.DS'), 'wb') as f:
+                f.write(r.content)
+        return {'url': base, 'etag': None, 'sha256': None}
+
+    @staticmethod
+    def link_or_copy(src, dest):
+        """Hard link an unchanged file to avoid rewriting it to flash."""
+        try:
+            os.link(src, dest)
+        except OSError:
+            shutil.copy2(src, dest)
+
+    @staticmethod
+    def swap_dirs(new_dir, app_dir):
+        """Replace app_dir with new_dir using renames on the same
+        filesystem, so the app is never left half written."""
+        old_dir = app_dir + '.old'
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.isdir(app_dir):
+            os.rename(app_dir, old_dir)
+        os.rename(new_dir, app_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    @staticmethod
+    def load_state(holder):
+        try:
+            with open(os.path.join(holder, STATE_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def save_state(holder, state):
+        tmp = os.path.join(holder, STATE_FILE + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, os.path.join(holder, STATE_FILE))
+
     def get_app_holder_uuid(self):
         for root, dirs, files in os.walk("/var/mnt/sdk"):
             if "app_holder" in dirs:
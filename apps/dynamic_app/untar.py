@@ -4,7 +4,13 @@ def extract(filename, destination):
     with tarfile.open(filename) as gz:
         gz.extractall(destination)
 
+def extract_stream(fileobj, destination):
+    """Extract a (optionally compressed) tar stream in one sequential pass,
+    without seeking or writing the archive to disk first."""
+    with tarfile.open(fileobj=fileobj, mode='r|*') as gz:
+        gz.extractall(destination)
+
 if __name__ == "__main__":
     import sys
     filename, destination = sys.argv[1:]
-    extract(filename, destination)
\ No newline at end of file
+    extract(filename, destination)
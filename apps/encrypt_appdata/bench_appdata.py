@@ -0,0 +1,159 @@
+"""
+Per-call cost of encrypted appdata reads and writes, before and after caching.
+
+Runs AppDataCSClient against an in-memory appdata list with a throwaway
+ECC certificate and compares:
+
+- encrypt/decrypt: the ECDH exchange and HKDF on every call, as
+  ECCEncryptor used to do, against the key derived once per key pair
+- get_appdata: reading the appdata list and decrypting the value on every
+  call against the cached list and decrypted values
+- set_appdata: one read and one put per key against one batched put
+
+Usage:
+    python bench_appdata.py --keys 50 --calls 2000
+"""
+
+import argparse
+import datetime
+import os
+import tempfile
+import time
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+import csappdata
+from csappdata import AppDataCSClient
+from eccencryptor import ECCEncryptor
+
+
+class PerCallEncryptor(ECCEncryptor):
+    """Derives the AES key on every call, as before."""
+
+    @property
+    def aes_key(self):
+        return self.derive_aes_key(self.private_key, self.public_key)
+
+    @aes_key.setter
+    def aes_key(self, value):
+        pass
+
+
+class MemoryAppDataClient(AppDataCSClient):
+    """AppDataCSClient on an in-memory config store that counts requests.
+    Writes deliver a change event, as the config store does."""
+
+    def __init__(self, encryptor, events=True):
+        super().__init__('bench_appdata')
+        self.eccappdata = encryptor
+        self.events = events
+        self.store = []
+        self.gets = self.puts = 0
+
+    def get(self, base, query='', tree=0):
+        self.gets += 1
+        return [dict(item) for item in self.store]
+
+    def put(self, base, value='', query='', tree=0):
+        self.puts += 1
+        self.store = [dict(item) for item in value]
+        if self.watching:
+            self._on_appdata_event(base, value, None)
+
+    def register(self, action, path, callback, *args):
+        return {'status': 'ok'} if self.events else None
+
+    def log(self, value=''):
+        pass
+
+
+def make_cert():
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'ecc')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name)
+            .public_key(key.public_key()).serial_number(x509.random_serial_number())
+            .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+            .sign(key, hashes.SHA256()))
+    key_pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                serialization.NoEncryption()).decode()
+    return cert.public_bytes(serialization.Encoding.PEM).decode(), key_pem
+
+
+def per_call(func, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def legacy_get_appdata(client, key):
+    """get_appdata as it was: read the list and decrypt on every call."""
+    appdata = client.get(csappdata.APPDATA_PATH)
+    rval = next((j['value'] for j in appdata if j['name'] == key), None)
+    if rval and client.eccappdata.is_encrypted(rval):
+        rval = client.eccappdata.decrypt_json(rval)
+    return rval
+
+
+def bench_encryptor(before, after, calls):
+    data = {'username': 'admin', 'password': 'x' * 32}
+    token = after.encrypt_json(data)
+    print('{:<22} {:>12} {:>12}'.format('us per call', 'before', 'after'))
+    print('{:<22} {:>12.1f} {:>12.1f}'.format('encrypt_json', per_call(lambda i: before.encrypt_json(data), calls),
+                                              per_call(lambda i: after.encrypt_json(data), calls)))
+    print('{:<22} {:>12.1f} {:>12.1f}'.format('decrypt_json', per_call(lambda i: before.decrypt_json(token), calls),
+                                              per_call(lambda i: after.decrypt_json(token), calls)))
+
+
+def bench_client(before, after, keys, calls):
+    values = {'enc_key%03d' % i: {'secret': 'value%d' % i} for i in range(keys)}
+    results = []
+    for legacy in (True, False):
+        # The client is a singleton, so this re-initializes the same instance
+        client = MemoryAppDataClient(before if legacy else after, events=not legacy)
+        start = time.perf_counter()
+        if legacy:
+            for key, value in values.items():
+                client.set_appdata(key, value, encrypt=True)
+        else:
+            client.set_appdata(values, encrypt=True)
+        set_us = (time.perf_counter() - start) * 1e6
+        set_requests = (client.gets, client.puts)
+
+        client.gets = client.puts = 0
+        names = list(values)
+        if legacy:
+            get_us = per_call(lambda i: legacy_get_appdata(client, names[i % keys]), calls)
+        else:
+            get_us = per_call(lambda i: client.get_appdata(names[i % keys]), calls)
+        results.append((set_us, set_requests, get_us, client.gets))
+
+    (set_before, req_before, get_before, gets_before), (set_after, req_after, get_after, gets_after) = results
+    print('{:<22} {:>12.1f} {:>12.1f}'.format('set_appdata %d keys' % keys, set_before, set_after))
+    print('{:<22} {:>12} {:>12}'.format('  gets/puts', '%d/%d' % req_before, '%d/%d' % req_after))
+    print('{:<22} {:>12.1f} {:>12.1f}'.format('get_appdata', get_before, get_after))
+    print('{:<22} {:>12} {:>12}'.format('  gets for %d calls' % calls, gets_before, gets_after))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--keys', type=int, default=50, help='encrypted appdata values')
+    parser.add_argument('--calls', type=int, default=2000, help='calls per measurement')
+    args = parser.parse_args()
+
+    cert, key = make_cert()
+    os.chdir(tempfile.mkdtemp())  # ECCEncryptor writes a key pair to the working directory
+    before = PerCallEncryptor(cert_pem=cert, private_key_pem=key)
+    after = ECCEncryptor(cert_pem=cert, private_key_pem=key)
+    csappdata.APPDATA_DEBOUNCE = 3600  # no listeners, but keep timers out of the timings
+
+    bench_encryptor(before, after, args.calls)
+    bench_client(before, after, args.keys, args.calls)
+
+
+if __name__ == '__main__':
+    main()
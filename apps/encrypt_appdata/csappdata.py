@@ -1,8 +1,16 @@
+import copy
 import os
-import time
+import sys
+import threading
 from csclient import EventingCSClient
 from eccencryptor import ECCEncryptor
 
+APPDATA_PATH = "/config/system/sdk/appdata"
+
+# Seconds without another appdata event before listeners are called, so a
+# burst of writes is read back once
+APPDATA_DEBOUNCE = 0.5
+
 
 class AppDataCSClient(EventingCSClient):
     def __init__(self, *args, encrypt_cert_name=None, **kwargs):
@@ -17,23 +25,95 @@ class AppDataCSClient(EventingCSClient):
             cert, key = self.get_cert_and_private_key(uuid=encrypt_cert_uuid)
             self.eccappdata = ECCEncryptor(cert_pem=cert, private_key_pem=key)
         self.change_listeners = {}
+        self.update_listeners = []
+        self.last_values = {}  # key -> value last passed to its change listener
+
+        # The appdata list is cached while change events keep it current, and
+        # decrypted values are cached by key with the encrypted value they
+        # came from
+        self.appdata_lock = threading.RLock()
+        self.appdata = None
+        self.appdata_generation = 0  # bumped by every appdata event
+        self.decrypted = {}
+        self.watching = None  # whether appdata events arrive, None until tried
+        self.debounce_timer = None
 
     def on_appdata_change(self, key, callback):
-        if len(self.change_listeners) == 0:
-            self.on("put", "/config/system/sdk/appdata", self._on_appdata_change, key)
-            self.on("post", "/config/system/sdk/appdata", self._on_appdata_change, key)
-            self.on("delete", "/config/system/sdk/appdata", self._on_appdata_change, key)
+        """Call callback(key, value) when the (decrypted) value of key changes."""
+        self._watch_appdata()
+        self.last_values[key] = self._lookup(self.get_appdata_list(), key)
         self.change_listeners[key] = callback
 
-    def _on_appdata_change(self, path, value, args):
-        time.sleep(1) # debounce
-        key = args[0]
-        value = self.get("/config/system/sdk/appdata") # Get the latest appdata
-        if key in self.change_listeners:
-            value = next((j['value'] for j in value if j['name'] == key), None)
-            if self.eccappdata and self.eccappdata.is_encrypted(value):
-                value = self.eccappdata.decrypt_json(value)
-            self.change_listeners[key](key, value)
+    def on_appdata_update(self, callback):
+        """Call callback(appdata) with the appdata list after each burst of appdata changes."""
+        self._watch_appdata()
+        self.update_listeners.append(callback)
+
+    def _watch_appdata(self):
+        """Register for appdata changes once. Returns whether change events are available."""
+        with self.appdata_lock:
+            if self.watching is None:
+                self.watching = 'linux' in sys.platform
+                for action in ("put", "post", "delete"):
+                    if not self.watching:
+                        break
+                    result = self.on(action, APPDATA_PATH, self._on_appdata_event)
+                    if not result or result.get('status') == 'error':
+                        self.log('Appdata change events not available; appdata will not be cached')
+                        self.watching = False
+            return self.watching
+
+    def _on_appdata_event(self, path, value, args):
+        with self.appdata_lock:
+            self.appdata = None
+            self.appdata_generation += 1
+            if self.change_listeners or self.update_listeners:
+                # Restart the quiet period; listeners run once it passes
+                if self.debounce_timer:
+                    self.debounce_timer.cancel()
+                self.debounce_timer = threading.Timer(APPDATA_DEBOUNCE, self._on_appdata_change)
+                self.debounce_timer.daemon = True
+                self.debounce_timer.start()
+
+    def _on_appdata_change(self):
+        appdata = self.get_appdata_list()  # Get the latest appdata
+        if appdata is None:
+            return
+        for callback in list(self.update_listeners):
+            callback(appdata)
+        for key, callback in list(self.change_listeners.items()):
+            value = self._lookup(appdata, key)
+            if value != self.last_values.get(key):
+                self.last_values[key] = value
+                callback(key, value)
+
+    def get_appdata_list(self):
+        """Return the appdata list of {'name', 'value'} items. It is shared
+        with the cache, so treat it as read only."""
+        with self.appdata_lock:
+            if self.appdata is not None:
+                return self.appdata
+            generation = self.appdata_generation
+        watching = self._watch_appdata()
+        appdata = self.get(APPDATA_PATH)
+        with self.appdata_lock:
+            # Only cache it if no change event arrived while it was read
+            if watching and appdata is not None and generation == self.appdata_generation:
+                self.appdata = appdata
+        return appdata
+
+    def _lookup(self, appdata, key):
+        """Return the value of key in the appdata list, decrypted."""
+        rval = next((j['value'] for j in appdata or [] if j['name'] == key), None)
+        if not (rval and self.eccappdata and self.eccappdata.is_encrypted(rval)):
+            return rval
+        with self.appdata_lock:
+            cached = self.decrypted.get(key)
+        if cached is None or cached[0] != rval:
+            cached = (rval, self.eccappdata.decrypt_json(rval))
+            with self.appdata_lock:
+                self.decrypted[key] = cached
+        return copy.deepcopy(cached[1])
 
     def get_appdata(self, key):
         """Get an appdata value by key. Automatically checks environment variables too.
@@ -44,24 +124,37 @@ class AppDataCSClient(EventingCSClient):
         if env_value:
             rval = env_value
 
-        appdata = self.get("/config/system/sdk/appdata")
-        rval = next((j['value'] for j in appdata if j['name'] == key), None)
-        if rval and self.eccappdata and self.eccappdata.is_encrypted(rval):
-            rval = self.eccappdata.decrypt_json(rval)
+        rval = self._lookup(self.get_appdata_list(), key)
         return rval
 
-    def set_appdata(self, key, value, encrypt=False):
-        """Set an appdata value by key."""
+    def set_appdata(self, key, value=None, encrypt=False):
+        """Set an appdata value by key. key can also be a dict of key -> value
+        to set several values with one put."""
+        values = key if isinstance(key, dict) else {key: value}
+        plain = {}
         if self.eccappdata and encrypt:
-            value = self.eccappdata.encrypt_json(value)
-        appdata = self.get("/config/system/sdk/appdata")
+            plain = values
+            values = {k: self.eccappdata.encrypt_json(v) for k, v in values.items()}
+        # Read appdata rather than use the cache, so the put cannot revert a
+        # change whose event has not arrived yet
+        appdata = self.get(APPDATA_PATH)
+        if appdata is None:
+            self.log(f"Unable to read appdata, not setting {', '.join(values)}")
+            return
+        items = {}
         for item in appdata:
-            if item['name'] == key:
-                item['value'] = value
-                self.put("/config/system/sdk/appdata", appdata)
-                return
-        appdata.append({'name': key, 'value': value})
-        self.put("/config/system/sdk/appdata", appdata)
+            items.setdefault(item['name'], item)
+        for k, v in values.items():
+            if k in items:
+                items[k]['value'] = v
+            else:
+                appdata.append({'name': k, 'value': v})
+        self.put(APPDATA_PATH, appdata)
+        with self.appdata_lock:
+            self.appdata = None
+            self.appdata_generation += 1
+            for k, v in plain.items():
+                self.decrypted[k] = (values[k], copy.deepcopy(v))
 
     def find_cert_id_by_name(self, name):
         """Find a certificate by name."""
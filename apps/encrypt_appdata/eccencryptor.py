@@ -28,6 +28,11 @@ class ECCEncryptor:
         self.private_key = self.load_private_key(private_key_pem)
         self.public_key = self.load_public_key(cert_pem)
 
+        # The key pair is fixed, so the ECDH exchange and HKDF run once
+        self.aes_key = self.derive_aes_key(self.private_key, self.public_key)
+        self.header_bytes = self.header.encode()
+        self.base64_header = base64.b64encode(self.header_bytes).decode()
+
     def text_encode(self, data):
         return base64.b64encode(data).decode()
 
@@ -91,27 +96,25 @@ class ECCEncryptor:
 
     def encrypt_json(self, json_data):
         """Encrypt a JSON object using AES-GCM with an ECC-derived key."""
-        aes_key = self.derive_aes_key(self.private_key, self.public_key)
         iv = os.urandom(12)  # Smaller IV (12 bytes) for AES-GCM
-        cipher = Cipher(algorithms.AES(aes_key), modes.GCM(iv))
+        cipher = Cipher(algorithms.AES(self.aes_key), modes.GCM(iv))
         encryptor = cipher.encryptor()
 
         json_bytes = json.dumps(json_data).encode()
         ciphertext = encryptor.update(json_bytes) + encryptor.finalize()
 
-        return self.text_encode(self.header.encode() + iv + encryptor.tag + ciphertext)
+        return self.text_encode(self.header_bytes + iv + encryptor.tag + ciphertext)
 
     def decrypt_json(self, encrypted_base64):
         """Decrypt an AES-GCM encrypted JSON object using ECC-derived key."""
-        aes_key = self.derive_aes_key(self.private_key, self.public_key)
         encrypted_data = self.text_decode(encrypted_base64)
-        
-        header, encrypted_data = encrypted_data[:len(self.header.encode())], encrypted_data[len(self.header.encode()):]
-        if header != self.header.encode():
+
+        header, encrypted_data = encrypted_data[:len(self.header_bytes)], encrypted_data[len(self.header_bytes):]
+        if header != self.header_bytes:
             raise ValueError("Invalid header")
         iv, tag, ciphertext = encrypted_data[:12], encrypted_data[12:28], encrypted_data[28:]
 
-        cipher = Cipher(algorithms.AES(aes_key), modes.GCM(iv, tag))
+        cipher = Cipher(algorithms.AES(self.aes_key), modes.GCM(iv, tag))
         decryptor = cipher.decryptor()
 
         decrypted = decryptor.update(ciphertext) + decryptor.finalize()
@@ -121,13 +124,12 @@ class ECCEncryptor:
         """Check if the data is encrypted by looking for the header"""
         try:
             # Try direct base64 header comparison
-            base64_header = base64.b64encode(self.header.encode()).decode()
-            if base64_data.startswith(base64_header):
+            if base64_data.startswith(self.base64_header):
                 return True
             
             # Try decoding and check for raw header
             decoded_data = base64.b64decode(base64_data)
-            return decoded_data.startswith(self.header.encode())
+            return decoded_data.startswith(self.header_bytes)
         except:
             return False
     
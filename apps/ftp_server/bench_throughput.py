@@ -0,0 +1,126 @@
+"""
+Local throughput benchmark for the bundled pyftpdlib server.
+
+Starts the server on 127.0.0.1 in each server mode, with the listing
+cache on and off, and runs concurrent ftplib clients that repeatedly
+LIST and MLSD a large directory and RETR a large file.
+
+Usage:
+    python bench_throughput.py --clients 8 --files 2000 --rounds 5
+"""
+
+import argparse
+import ftplib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from pyftpdlib import servers
+from pyftpdlib.authorizers import DummyAuthorizer
+from pyftpdlib.filesystems import AbstractedFS
+from pyftpdlib.handlers import FTPHandler
+
+MODES = ['FTPServer', 'ThreadedFTPServer', 'MultiprocessFTPServer']
+
+
+def make_tree(root, files, big_size):
+    listing_dir = os.path.join(root, 'many')
+    os.mkdir(listing_dir)
+    for i in range(files):
+        with open(os.path.join(listing_dir, 'file%05d.txt' % i), 'wb') as f:
+            f.write(b'x' * (i % 4096))
+    with open(os.path.join(root, 'big.bin'), 'wb') as f:
+        chunk = os.urandom(1 << 20)
+        for _ in range(big_size):
+            f.write(chunk)
+
+
+def client(port, rounds, results):
+    ftp = ftplib.FTP()
+    ftp.connect('127.0.0.1', port)
+    ftp.login('user', '12345')
+    listed = received = 0
+    for _ in range(rounds):
+        lines = []
+        ftp.retrlines('LIST many', lines.append)
+        listed += len(lines)
+        lines = []
+        ftp.retrlines('MLSD many', lines.append)
+        listed += len(lines)
+        size = [0]
+
+        def count(data):
+            size[0] += len(data)
+        ftp.retrbinary('RETR big.bin', count, blocksize=65536)
+        received += size[0]
+    ftp.quit()
+    results.append((listed, received))
+
+
+def run(root, mode, cache, clients, rounds):
+    authorizer = DummyAuthorizer()
+    authorizer.add_user('user', '12345', root, perm='elradfmwM')
+    handler = type('BenchHandler', (FTPHandler,), {})
+    handler.authorizer = authorizer
+    AbstractedFS.listing_cache_ttl = 10 if cache else 0
+    AbstractedFS._listing_cache.clear()
+
+    server = getattr(servers, mode)(('127.0.0.1', 0), handler)
+    server.max_cons = 0
+    port = server.address[1]
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={'handle_exit': False})
+    thread.daemon = True
+    thread.start()
+
+    results = []
+    start = time.time()
+    workers = [threading.Thread(target=client, args=(port, rounds, results))
+               for _ in range(clients)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.time() - start
+    server.close_all()
+    thread.join(5)
+
+    listed = sum(r[0] for r in results)
+    received = sum(r[1] for r in results)
+    return elapsed, listed / elapsed, received / elapsed / (1 << 20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--files', type=int, default=2000,
+                        help='entries in the listed directory')
+    parser.add_argument('--big', type=int, default=32,
+                        help='size of the downloaded file in MiB')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    root = tempfile.mkdtemp(prefix='ftp-bench-')
+    try:
+        make_tree(root, args.files, args.big)
+        print('%d clients x %d rounds, %d-entry dir, %d MiB file, '
+              'sendfile=%s' % (args.clients, args.rounds, args.files,
+                               args.big, FTPHandler.use_sendfile))
+        for mode in MODES:
+            if not hasattr(servers, mode):
+                continue
+            for cache in (False, True):
+                elapsed, lines, mbps = run(root, mode, cache, args.clients,
+                                           args.rounds)
+                print('%-22s cache=%-5s %7.2f s %9.0f lines/s %8.1f MiB/s'
+                      % (mode, cache, elapsed, lines, mbps))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
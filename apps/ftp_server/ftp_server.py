@@ -10,7 +10,7 @@ import cp
 
 from pyftpdlib.authorizers import DummyAuthorizer
 from pyftpdlib.handlers import FTPHandler
-from pyftpdlib.servers import FTPServer
+from pyftpdlib import servers
 
 
 # This requires a USB compatible storage device plugged into
@@ -20,37 +20,66 @@ if sys.platform == 'linux2':
 else:
     FTP_DIR = os.getcwd()
 
-cp.log('Starting FTP server...')
-try:
-    authorizer = DummyAuthorizer()
-    # Define a new user having full r/w permissions and a read-only
-    # anonymous user
-    authorizer.add_user('user', '12345', FTP_DIR, perm='elradfmwM')
-    authorizer.add_anonymous(FTP_DIR)
+# Server classes selectable with the ftp_server_mode appdata field.
+# 'single' serves every connection from one ioloop; 'threaded' and
+# 'multiprocess' give each connection its own thread or process so
+# slow directory listings and transfers don't stall other clients.
+SERVER_MODES = {
+    'single': 'FTPServer',
+    'threaded': 'ThreadedFTPServer',
+    'multiprocess': 'MultiprocessFTPServer',
+}
 
-    # Instantiate FTP handler class
-    handler = FTPHandler
-    handler.authorizer = authorizer
 
-    # Define a customized banner (string returned when client connects)
-    handler.banner = "pyftpdlib based ftpd ready."
+def get_server_class():
+    """Return the pyftpdlib server class selected in appdata."""
+    mode = (cp.get_appdata('ftp_server_mode') or 'single').strip().lower()
+    server_class = getattr(servers, SERVER_MODES.get(mode, ''), None)
+    if server_class is None:
+        cp.log('Unsupported ftp_server_mode {}, using single'.format(mode))
+        mode, server_class = 'single', servers.FTPServer
+    return mode, server_class
 
-    # Instantiate FTP server class and listen on 0.0.0.0:2121.
-    # Application can only use ports higher that 1024 and the port
-    # will need to be allowed in the router firewall
-    address = ('', 2121)
-    server = FTPServer(address, handler)
 
-    # set a limit for connections
-    server.max_cons = 256
-    server.max_cons_per_ip = 5
-
-    # start ftp server
+def start_ftp_server():
     cp.log('Starting FTP server...')
-    server.serve_forever()
-    # This will run the server in another thread
-    # t = Thread(target=server.serve_forever())
-    # t.start()
+    try:
+        authorizer = DummyAuthorizer()
+        # Define a new user having full r/w permissions and a read-only
+        # anonymous user
+        authorizer.add_user('user', '12345', FTP_DIR, perm='elradfmwM')
+        authorizer.add_anonymous(FTP_DIR)
+
+        # Instantiate FTP handler class
+        handler = FTPHandler
+        handler.authorizer = authorizer
+
+        # Define a customized banner (string returned when client connects)
+        handler.banner = "pyftpdlib based ftpd ready."
+
+        # RETR uses os.sendfile() whenever it is available (it is on
+        # the router), which keeps file data out of Python entirely.
+        cp.log('sendfile() for downloads: {}'.format(
+            'enabled' if handler.use_sendfile else 'unavailable'))
+
+        # Instantiate FTP server class and listen on 0.0.0.0:2121.
+        # Application can only use ports higher that 1024 and the port
+        # will need to be allowed in the router firewall
+        address = ('', 2121)
+        mode, server_class = get_server_class()
+        server = server_class(address, handler)
+
+        # set a limit for connections
+        server.max_cons = 256
+        server.max_cons_per_ip = 5
+
+        # start ftp server
+        cp.log('Starting FTP server ({} mode)...'.format(mode))
+        server.serve_forever()
+
+    except Exception as e:
+        cp.log('Exception occurred! exception: {}'.format(e))
+
 
-except Exception as e:
-    cp.log('Exception occurred! exception: {}'.format(e))
+if __name__ == '__main__':
+    start_ftp_server()
@@ -5,7 +5,9 @@
 import os
 import stat
 import tempfile
+import threading
 import time
+from collections import OrderedDict
 try:
     from stat import filemode as _filemode  # PY 3.3
 except ImportError:
@@ -67,8 +69,22 @@ class AbstractedFS(object):
     FilesystemError exception can be raised from within any of
     the methods below in order to send a customized error string
     to the client.
+
+    Formatted LIST and MLSD output is kept in a cache shared by all
+    instances (and so by all connections of a threaded server). An
+    entry is reused only while the directory's mtime and entry names
+    are unchanged and it is younger than listing_cache_ttl seconds,
+    which bounds how long an in-place file change (size, mtime) can
+    go unnoticed. Set listing_cache_ttl to 0 to disable the cache.
     """
 
+    # max age in seconds of a cached directory listing (0 = disabled)
+    listing_cache_ttl = 10
+    # max number of cached directory listings
+    listing_cache_size = 128
+    _listing_cache = OrderedDict()
+    _listing_cache_lock = threading.Lock()
+
     def __init__(self, root, cmd_channel):
         """
          - (str) root: the user "real" home directory (e.g. '/home/user')
@@ -211,7 +227,10 @@ class AbstractedFS(object):
     def open(self, filename, mode):
         """Open a file returning its handler."""
         assert isinstance(filename, unicode), filename
-        return open(filename, mode)
+        fd = open(filename, mode)
+        if 'r' not in mode or '+' in mode:
+            self.invalidate_listing(filename)
+        return fd
 
     def mkstemp(self, suffix='', prefix='', dir=None, mode='wb'):
         """A wrap around tempfile.mkstemp creating a file with a unique
@@ -247,6 +266,7 @@ class AbstractedFS(object):
         """Create the specified directory."""
         assert isinstance(path, unicode), path
         os.mkdir(path)
+        self.invalidate_listing(path)
 
     def listdir(self, path):
         """List the content of a directory."""
@@ -262,17 +282,21 @@ class AbstractedFS(object):
         """Remove the specified directory."""
         assert isinstance(path, unicode), path
         os.rmdir(path)
+        self.invalidate_listing(path)
 
     def remove(self, path):
         """Remove the specified file."""
         assert isinstance(path, unicode), path
         os.remove(path)
+        self.invalidate_listing(path)
 
     def rename(self, src, dst):
         """Rename the specified src file to the dst filename."""
         assert isinstance(src, unicode), src
         assert isinstance(dst, unicode), dst
         os.rename(src, dst)
+        self.invalidate_listing(src)
+        self.invalidate_listing(dst)
 
     def chmod(self, path, mode):
         """Change file/directory mode."""
@@ -280,6 +304,7 @@ class AbstractedFS(object):
         if not hasattr(os, 'chmod'):
             raise NotImplementedError
         os.chmod(path, mode)
+        self.invalidate_listing(path)
 
     def stat(self, path):
         """Perform a stat() system call on the given path."""
@@ -375,9 +400,66 @@ class AbstractedFS(object):
         def get_group_by_gid(self, gid):
             return "group"
 
+    # --- Listing cache
+
+    def invalidate_listing(self, path):
+        """Drop cached listings of the directory containing path."""
+        if not self.listing_cache_ttl:
+            return
+        basedir = os.path.dirname(path)
+        with self._listing_cache_lock:
+            for key in [k for k in self._listing_cache if k[1] == basedir]:
+                del self._listing_cache[key]
+
+    def _cached_listing(self, key, formatter, basedir, listing, *args):
+        """Return cached formatted lines for basedir or an iterator
+        that formats them and stores the result once fully consumed.
+        """
+        listing = list(listing)
+        try:
+            st = os.stat(basedir)
+        except (OSError, TypeError, ValueError):
+            return formatter(basedir, listing, *args)
+        key += (len(listing),)
+        token = (getattr(st, 'st_mtime_ns', st.st_mtime), tuple(listing))
+        now = time.time()
+        with self._listing_cache_lock:
+            entry = self._listing_cache.get(key)
+            if entry is not None:
+                if entry[0] == token and now - entry[1] < \
+                        self.listing_cache_ttl:
+                    self._listing_cache[key] = self._listing_cache.pop(key)
+                    return iter(entry[2])
+                del self._listing_cache[key]
+        return self._fill_listing(key, token, now,
+                                  formatter(basedir, listing, *args))
+
+    def _fill_listing(self, key, token, now, iterator):
+        lines = []
+        for line in iterator:
+            lines.append(line)
+            yield line
+        with self._listing_cache_lock:
+            self._listing_cache[key] = (token, now, lines)
+            while len(self._listing_cache) > self.listing_cache_size:
+                self._listing_cache.popitem(last=False)
+
     # --- Listing utilities
 
     def format_list(self, basedir, listing, ignore_err=True):
+        """Return an iterator object that yields the entries of given
+        directory emulating the "/bin/ls -lA" UNIX command output.
+
+        Output is served from the listing cache when possible; see
+        _format_list() for the format.
+        """
+        if not self.listing_cache_ttl or not ignore_err:
+            return self._format_list(basedir, listing, ignore_err)
+        key = ('list', basedir, self.cmd_channel.use_gmt_times)
+        return self._cached_listing(key, self._format_list, basedir,
+                                    listing)
+
+    def _format_list(self, basedir, listing, ignore_err=True):
         """Return an iterator object that yields the entries of given
         directory emulating the "/bin/ls -lA" UNIX command output.
 
@@ -475,6 +557,22 @@ class AbstractedFS(object):
         directory or of a single file in a form suitable with MLSD and
         MLST commands.
 
+        Output is served from the listing cache when possible; see
+        _format_mlsx() for the format.
+        """
+        if not self.listing_cache_ttl or not ignore_err:
+            return self._format_mlsx(basedir, listing, perms, facts,
+                                     ignore_err)
+        key = ('mlsx', basedir, self.cmd_channel.use_gmt_times, perms,
+               tuple(sorted(facts)))
+        return self._cached_listing(key, self._format_mlsx, basedir,
+                                    listing, perms, facts)
+
+    def _format_mlsx(self, basedir, listing, perms, facts, ignore_err=True):
+        """Return an iterator object that yields the entries of a given
+        directory or of a single file in a form suitable with MLSD and
+        MLST commands.
+
         Every entry includes a list of "facts" referring the listed
         element.  See RFC-3659, chapter 7, to see what every single
         fact stands for.
@@ -889,6 +889,11 @@ class DTPHandler(AsyncChat):
                     completed=self.transfer_finished,
                     elapsed=elapsed_time,
                     bytes=self.get_transmitted_bytes())
+                invalidate = getattr(self.cmd_channel.fs,
+                                     'invalidate_listing', None)
+                if self.receive and invalidate is not None:
+                    # size/mtime of the uploaded file changed
+                    invalidate(filename)
                 if self.transfer_finished:
                     if self.receive:
                         self.cmd_channel.on_file_received(filename)
@@ -6,6 +6,7 @@
 
 import os
 import tempfile
+import time
 
 from pyftpdlib._compat import getcwdu
 from pyftpdlib._compat import u
@@ -202,6 +203,75 @@ class TestAbstractedFS(unittest.TestCase):
                     safe_remove(TESTFN)
 
 
+class TestListingCache(unittest.TestCase):
+    """Tests for the LIST/MLSD listing cache of AbstractedFS."""
+
+    class cmd_channel:
+        use_gmt_times = True
+        unicode_errors = 'replace'
+
+    def setUp(self):
+        AbstractedFS._listing_cache.clear()
+        self.tempdir = tempfile.mkdtemp(dir=HOME)
+        self.basedir = u(self.tempdir)
+        self.fs = AbstractedFS(self.basedir, self.cmd_channel)
+        self.fs.listing_cache_ttl = 10
+        touch(os.path.join(self.tempdir, 'a'))
+        touch(os.path.join(self.tempdir, 'b'))
+
+    def tearDown(self):
+        AbstractedFS._listing_cache.clear()
+        for name in os.listdir(self.tempdir):
+            safe_remove(os.path.join(self.tempdir, name))
+        os.rmdir(self.tempdir)
+
+    def list_dir(self):
+        listing = sorted(self.fs.listdir(self.basedir))
+        return b''.join(self.fs.format_list(self.basedir, listing))
+
+    def test_cached(self):
+        first = self.list_dir()
+        with open(os.path.join(self.tempdir, 'a'), 'wb') as f:
+            f.write(b'x' * 100)
+        # in-place change without touching the directory: cached
+        self.assertEqual(self.list_dir(), first)
+        self.assertEqual(len(AbstractedFS._listing_cache), 1)
+
+    def test_invalidated_by_listing_change(self):
+        self.list_dir()
+        touch(os.path.join(self.tempdir, 'c'))
+        self.assertIn(b' c\r\n', self.list_dir())
+
+    def test_invalidated_by_fs_write(self):
+        self.list_dir()
+        path = u(os.path.join(self.tempdir, 'a'))
+        with self.fs.open(path, 'wb') as f:
+            f.write(b'x' * 12345)
+        self.assertIn(b'12345', self.list_dir())
+        self.fs.remove(path)
+        self.assertNotIn(b' a\r\n', self.list_dir())
+
+    def test_ttl_expiry(self):
+        first = self.list_dir()
+        with open(os.path.join(self.tempdir, 'a'), 'wb') as f:
+            f.write(b'x' * 12345)
+        self.fs.listing_cache_ttl = 0.01
+        time.sleep(0.05)
+        self.assertNotEqual(self.list_dir(), first)
+
+    def test_mlsx_cached_per_facts(self):
+        listing = sorted(self.fs.listdir(self.basedir))
+        facts = ['type', 'size']
+        lines = list(self.fs.format_mlsx(self.basedir, listing, 'elr', facts))
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(
+            list(self.fs.format_mlsx(self.basedir, listing, 'elr', facts)),
+            lines)
+        self.assertNotEqual(
+            list(self.fs.format_mlsx(self.basedir, listing, 'elr', ['type'])),
+            lines)
+
+
 @unittest.skipUnless(POSIX, "UNIX only")
 class TestUnixFilesystem(unittest.TestCase):
 
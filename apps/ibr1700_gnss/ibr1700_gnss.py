@@ -4,50 +4,169 @@ See the readme.txt for more details.
 
 """
 
-import time
+import select
 import socket
+import time
 
-from inetline import ReadLine
+from inetline import BufferReadLine
 import cp
 
-try:
-    cp.log('Starting...')
+GNSS_ADDR = ("127.0.0.1", 17488)
+
+# Turns on ALL messages (only way to turn off is to close the socket) and
+# enables IMU messages
+GNSS_COMMANDS = (b'ALL\r\n', b'IMU yes\r\n')
+
+# Read as much as the socket has; gnssd with ALL and IMU can queue several
+# KB between wakeups
+RECV_SIZE = 65536
+
+# How often the latest sentence of each type is logged
+LOG_INTERVAL = 10
+
+# Delay before reconnecting after gnssd closes the socket or errors
+RECONNECT_DELAY = 5
+
+
+class GnssReader(object):
+    """Nonblocking, select driven reader for the gnssd socket.
+
+    Drains the socket whenever it is readable, frames the data with
+    BufferReadLine and passes every complete sentence to each consumer, so
+    the kernel buffers never back up and consumers always see current data.
+    Reconnects (and re-sends the commands) if gnssd closes the socket.
+
+    Args:
+        addr: gnssd (host, port).
+        commands: Byte strings sent after every connect.
+        consumers: Functions called with each sentence (str).
+        on_tick: Optional function called at least every tick seconds from
+            the reader loop, e.g. for periodic reporting.
+        tick: Maximum time select() waits.
+    """
 
-    # Connect to the GNSS daemon
-    gnssd_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    gnss_addr = ("127.0.0.1", 17488)
+    def __init__(self, addr=GNSS_ADDR, commands=GNSS_COMMANDS, consumers=(),
+                 on_tick=None, tick=1.0, log=cp.log):
+        self.addr = addr
+        self.commands = commands
+        self.consumers = list(consumers)
+        self.on_tick = on_tick
+        self.tick = tick
+        self.log = log
+        self.sock = None
+        self.framer = None
+        self.running = False
+        self.bytes_read = 0
+        self.sentences = 0
 
-    cp.log("Attempting sock.connect({})".format(gnss_addr))
-    gnssd_sock.connect(gnss_addr)
+    def add_consumer(self, consumer):
+        self.consumers.append(consumer)
 
-    # Turns on ALL messages. Only way to turn off is to close the socket.
-    cp.log("Attempting sock.send(b'ALL\\r\\n')")
-    gnssd_sock.sendall(b'ALL\r\n')
+    def connect(self):
+        self.log("Attempting sock.connect({})".format(self.addr))
+        sock = socket.create_connection(self.addr, timeout=10)
+        for command in self.commands:
+            self.log("Attempting sock.send({})".format(command))
+            sock.sendall(command)
+        sock.setblocking(False)
+        self.sock = sock
+        self.framer = BufferReadLine(taip=True)
 
-    # Enable IMU messages
-    cp.log("Attempting sock.send(b'IMU yes\\r\\n')")
-    gnssd_sock.sendall(b'IMU yes\n\r')
+    def close(self):
+        if self.sock:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.sock.close()
+            self.sock = None
 
-    receive_line = ReadLine()
+    def drain(self):
+        """Read until the socket would block and dispatch the sentences.
 
-    while True:
-        # read as much possible
-        buf = gnssd_sock.recv(1024)
-        # cp.log('buf: {}'.format(buf))
+        Returns False when gnssd closed the connection.
+        """
+        while True:
+            try:
+                buf = self.sock.recv(RECV_SIZE)
+            except (BlockingIOError, InterruptedError):
+                return True
+            if not buf:
+                return False
+            self.bytes_read += len(buf)
+            lines = self.framer.recv(buf)
+            self.sentences += len(lines)
+            for line in lines:
+                for consumer in self.consumers:
+                    try:
+                        consumer(line)
+                    except Exception as e:
+                        self.log('Consumer error: {}'.format(e))
+            if len(buf) < RECV_SIZE:
+                # Short read: the socket is empty, skip the EAGAIN round trip
+                return True
 
-        # push buffer into the state machine for parsing
-        for b in buf:
-            c = chr(b)
-            s = receive_line.recv(c)
-            if s is not None:
-                # received a full NMEA line!
-                cp.log(s)
+    def run(self):
+        """Read until stop() is called, reconnecting as needed."""
+        self.running = True
+        next_tick = time.monotonic() + self.tick
+        while self.running:
+            try:
+                if self.sock is None:
+                    self.connect()
+                readable, _, _ = select.select([self.sock], [], [], self.tick)
+                if readable and not self.drain():
+                    self.log('gnssd closed the connection')
+                    self.close()
+                    time.sleep(RECONNECT_DELAY)
+            except OSError as e:
+                self.log('Exception: {}'.format(e))
+                self.close()
+                time.sleep(RECONNECT_DELAY)
+
+            now = time.monotonic()
+            if self.on_tick and now >= next_tick:
+                next_tick = now + self.tick
+                self.on_tick()
+        self.close()
+
+    def stop(self):
+        self.running = False
+
+
+class LatestSentences(object):
+    """Consumer that keeps the latest sentence and a count per sentence type."""
+
+    def __init__(self):
+        self.latest = {}
+        self.counts = {}
+
+    def __call__(self, line):
+        # '$GPGGA,...', '$PCPTMIMU,...' or a TAIP '>RPV...<' message
+        key = line.split(',', 1)[0] if line.startswith('$') else line[:4]
+        self.latest[key] = line
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def report(self, log=cp.log):
+        for key in sorted(self.latest):
+            log('{} ({}): {}'.format(key, self.counts[key], self.latest[key]))
+        self.counts = dict.fromkeys(self.counts, 0)
+
+
+if __name__ == '__main__':
+    cp.log('Starting...')
+    latest = LatestSentences()
+    last_report = [time.monotonic()]
 
-        time.sleep(10)
+    def report():
+        if time.monotonic() - last_report[0] >= LOG_INTERVAL:
+            last_report[0] = time.monotonic()
+            latest.report()
 
-except Exception as e:
-    cp.log('Exception: {}'.format(e))
-finally:
-    if gnssd_sock:
-        gnssd_sock.shutdown(socket.SHUT_RDWR)
-        gnssd_sock.close()
+    reader = GnssReader(consumers=[latest], on_tick=report)
+    try:
+        reader.run()
+    except Exception as e:
+        cp.log('Exception: {}'.format(e))
+    finally:
+        reader.close()
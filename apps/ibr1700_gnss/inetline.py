@@ -11,6 +11,8 @@
     this file is subject to civil and criminal penalties.
 """
 
+import re
+
 STATE_RECV_LINE = 1
 STATE_WAIT_LF = 2
 STATE_WAIT_SOL = 3
@@ -18,6 +20,11 @@ STATE_WAIT_SOL = 3
 CR = '\x0d'
 LF = '\x0a'
 
+# Any run of CR/LF ends a line; with TAIP framing a '<' also ends one (the
+# zero-width match keeps the '<' on the message it closes).
+LINE_END = re.compile(rb'[\r\n]+')
+TAIP_LINE_END = re.compile(rb'[\r\n]+|(?<=<)')
+
 
 class ReadLine(object):
     """State machine to read CR/LF style line. Input controlled from outside. """
@@ -85,3 +92,57 @@ class ReadLine(object):
 
     def __len__(self):
         return self.len_s
+
+
+class BufferReadLine(object):
+    """Frame whole byte buffers into lines in one pass.
+
+    Equivalent to feeding every byte of the buffer through ReadLine.recv(),
+    but splits the buffer with a single regex instead of one state machine
+    step and one string concatenation per character. Only the unterminated
+    tail is carried over to the next buffer.
+
+    Differences from ReadLine: empty lines are not returned, which makes a
+    CRLF split across two buffers (or CRCR, LFLF, ...) need no extra state.
+    With taip=True, '<' also ends a line so TAIP messages (>...<) are
+    returned whole, delimiters included, even when they are not followed by
+    a line break.
+    """
+
+    def __init__(self, maxlen=256, taip=False):
+        self.maxlen = maxlen
+        self.pattern = TAIP_LINE_END if taip else LINE_END
+        self.pending = bytes()
+
+    def recv(self, buf):
+        """Consume a bytes buffer and return the list of complete lines (str)."""
+        assert isinstance(buf, (bytes, bytearray)), type(buf)
+
+        if self.pending:
+            buf = self.pending + buf
+        parts = self.pattern.split(buf)
+        # the last part is unterminated (empty if buf ended with a line end)
+        self.pending = self._clip(parts.pop())
+
+        maxlen = self.maxlen
+        lines = []
+        for part in parts:
+            if not part:
+                continue
+            if len(part) >= maxlen:
+                part = self._clip(part)
+                if not part:
+                    continue
+            # latin-1 maps each byte to the same character chr() gives
+            lines.append(part.decode('latin-1'))
+        return lines
+
+    def _clip(self, part):
+        # protection from evil input, as in ReadLine: every maxlen characters
+        # without a line end the input so far is thrown away
+        if len(part) >= self.maxlen:
+            return part[len(part) - len(part) % self.maxlen:]
+        return part
+
+    def __len__(self):
+        return len(self.pending)
@@ -0,0 +1,188 @@
+"""
+Replay recorded gnssd output through a local TCP socket.
+
+Serves a capture of the gnssd stream (or a synthetic ALL + IMU stream) on
+127.0.0.1 the way gnssd does, runs GnssReader against it and reports how
+many sentences arrived and how fast, then compares the per-character
+ReadLine with BufferReadLine on the same data.
+
+Usage:
+    python replay_gnssd.py --record gnssd.cap --seconds 60 --host 192.168.0.1
+    python replay_gnssd.py --file gnssd.cap --speed 10
+    python replay_gnssd.py --seconds 600 --speed 0
+"""
+
+import argparse
+import functools
+import operator
+import socket
+import threading
+import time
+
+import ibr1700_gnss
+from inetline import BufferReadLine, ReadLine
+
+
+def nmea(body):
+    checksum = functools.reduce(operator.xor, body.encode(), 0)
+    return '${}*{:02X}\r\n'.format(body, checksum)
+
+
+def synthetic(seconds):
+    """Return (timestamp, bytes) chunks for an ALL + IMU stream, 1 s of fixes
+    and 10 Hz IMU, as gnssd sends them."""
+    chunks = []
+    for sec in range(seconds):
+        utc = '{:02d}{:02d}{:02d}.00'.format(sec // 3600 % 24, sec // 60 % 60, sec % 60)
+        fix = ''.join([
+            nmea('GPGGA,{},4336.1819,N,11612.3452,W,1,09,0.9,873.5,M,-19.6,M,,'.format(utc)),
+            nmea('GPRMC,{},A,4336.1819,N,11612.3452,W,0.0,0.0,181026,,,A'.format(utc)),
+            nmea('GPGSA,A,3,02,05,12,13,15,18,25,29,31,,,,1.6,0.9,1.3'),
+            nmea('GPGSV,3,1,11,02,45,296,42,05,27,207,40,12,67,091,44,13,23,049,39'),
+            nmea('GPGSV,3,2,11,15,09,125,33,18,14,321,36,25,61,232,45,29,33,177,41'),
+            nmea('GPGSV,3,3,11,31,06,031,30,20,04,277,,26,02,186,'),
+            nmea('PCPTMINR,{},43.6196987,-116.2057534,873.53,0.00,0.00,-0.00,'
+                 '17.53,17.53,17.53,14.61,14.61,14.61,0,0,'.format(utc)),
+            '>RPV{:05d}+4360331-1162057500000012;ID=IBR1;*7F<\r\n'.format(sec % 86400),
+        ])
+        chunks.append((sec, fix.encode()))
+        for tenth in range(10):
+            imu = nmea('PCPTMIMU,{}{},0.04642,-0.08398,-9.67104,-2.34985,1.13220,-0.73242,'
+                       .format(utc[:-2], tenth * 10))
+            chunks.append((sec + tenth / 10, imu.encode()))
+    return chunks
+
+
+def record(host, port, seconds, path):
+    """Capture raw gnssd output, one timestamped chunk per recv."""
+    sock = socket.create_connection((host, port), timeout=10)
+    for command in ibr1700_gnss.GNSS_COMMANDS:
+        sock.sendall(command)
+    start = time.monotonic()
+    with open(path, 'wb') as f:
+        while time.monotonic() - start < seconds:
+            buf = sock.recv(65536)
+            if not buf:
+                break
+            f.write('{:.3f} {}\n'.format(time.monotonic() - start, len(buf)).encode())
+            f.write(buf)
+    sock.close()
+
+
+def load(path):
+    chunks = []
+    with open(path, 'rb') as f:
+        while True:
+            header = f.readline()
+            if not header:
+                break
+            stamp, size = header.split()
+            chunks.append((float(stamp), f.read(int(size))))
+    return chunks
+
+
+class Replay(threading.Thread):
+    """Serve chunks to one client at speed x the recorded rate (0 = flood)."""
+
+    def __init__(self, chunks, speed):
+        super().__init__(daemon=True)
+        self.chunks = chunks
+        self.speed = speed
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(1)
+        self.addr = self.listener.getsockname()
+        self.sent = 0
+
+    def run(self):
+        conn, _ = self.listener.accept()
+        conn.recv(1024)  # commands
+        start = time.monotonic()
+        for stamp, data in self.chunks:
+            if self.speed:
+                delay = start + stamp / self.speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            conn.sendall(data)
+            self.sent += len(data)
+        conn.close()
+        self.listener.close()
+
+
+def replay(chunks, speed):
+    expected = BufferReadLine(taip=True)
+    total = sum(len(expected.recv(data)) for _, data in chunks)
+
+    server = Replay(chunks, speed)
+    server.start()
+    received = []
+    last = [0]
+
+    def consume(line):
+        received.append(line)
+        last[0] = time.monotonic()
+    reader = ibr1700_gnss.GnssReader(addr=server.addr, consumers=[consume],
+                                     tick=0.1, log=lambda msg: None)
+
+    def stop_when_done():
+        if len(received) >= total or (not server.is_alive() and reader.sock is None):
+            reader.stop()
+    reader.on_tick = stop_when_done
+    start = time.monotonic()
+    reader.run()
+    elapsed = last[0] - start
+    print('replay x{}: {} of {} sentences, {} bytes in {:.2f} s ({:.0f} sentences/s)'.format(
+        speed or 'flood', len(received), total, reader.bytes_read, elapsed,
+        len(received) / elapsed))
+
+
+def compare_framing(chunks):
+    data = [d for _, d in chunks]
+
+    start = time.perf_counter()
+    legacy = []
+    receive_line = ReadLine()
+    for buf in data:
+        for b in buf:
+            s = receive_line.recv(chr(b))
+            if s is not None:
+                legacy.append(s)
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    framed = []
+    framer = BufferReadLine()
+    for buf in data:
+        framed.extend(framer.recv(buf))
+    framed_elapsed = time.perf_counter() - start
+
+    assert framed == [s for s in legacy if s], 'framers disagree'
+    size = sum(len(d) for d in data) / (1 << 20)
+    for name, elapsed in (('ReadLine', legacy_elapsed), ('BufferReadLine', framed_elapsed)):
+        print('{:<16} {:8.1f} ms {:8.1f} MiB/s'.format(name, elapsed * 1000, size / elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--file', help='capture made with --record')
+    parser.add_argument('--record', metavar='FILE', help='capture a live gnssd stream to FILE')
+    parser.add_argument('--host', default=ibr1700_gnss.GNSS_ADDR[0])
+    parser.add_argument('--port', type=int, default=ibr1700_gnss.GNSS_ADDR[1])
+    parser.add_argument('--seconds', type=int, default=60,
+                        help='length of the recording or synthetic stream')
+    parser.add_argument('--speed', type=float, default=0,
+                        help='replay speed factor, 0 sends as fast as possible')
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.host, args.port, args.seconds, args.record)
+        return
+
+    chunks = load(args.file) if args.file else synthetic(args.seconds)
+    print('{} chunks, {} bytes'.format(len(chunks), sum(len(d) for _, d in chunks)))
+    replay(chunks, args.speed)
+    compare_framing(chunks)
+
+
+if __name__ == '__main__':
+    main()
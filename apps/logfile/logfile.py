@@ -18,12 +18,66 @@ Or forward the LAN zone to the ROUTER zone for local access on http://{ROUTER IP
 import cp
 from subprocess import Popen, PIPE
 import datetime
+import threading
 import time
 import os
 
 max_file_size = 104857600
 backup_count = 10
 
+# Durability: lines are committed to flash (fsync on the log file only)
+# once sync_bytes are pending or sync_interval_ms has passed, whichever
+# comes first. Set both to 0 to commit every line.
+sync_interval_ms = 1000
+sync_bytes = 65536
+
+
+class GroupCommitWriter:
+    """Buffers log lines and commits them in groups with fsync on the one
+    file descriptor instead of os.sync() on every filesystem."""
+
+    def __init__(self, path, sync_interval_ms=1000, sync_bytes=65536):
+        self.f = open(path, 'ab')
+        self.size = self.f.tell()
+        self.sync_interval = sync_interval_ms / 1000
+        self.sync_bytes = sync_bytes
+        self.pending = []
+        self.pending_bytes = 0
+        self.lock = threading.Lock()
+        self.closed = threading.Event()
+        if self.sync_interval:
+            threading.Thread(target=self._timer, daemon=True).start()
+
+    def write(self, data):
+        with self.lock:
+            self.pending.append(data)
+            self.pending_bytes += len(data)
+            self.size += len(data)
+            if (not self.sync_interval and not self.sync_bytes) or \
+                    (self.sync_bytes and self.pending_bytes >= self.sync_bytes):
+                self._commit()
+
+    def _commit(self):
+        if not self.pending:
+            return
+        self.f.write(b''.join(self.pending))
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.pending = []
+        self.pending_bytes = 0
+
+    def _timer(self):
+        while not self.closed.wait(self.sync_interval):
+            with self.lock:
+                self._commit()
+
+    def close(self):
+        self.closed.set()
+        with self.lock:
+            self._commit()
+            self.f.close()
+
+
 def write_logs():
     timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     logfile = f'logs/Log - {mac} {timestamp}'
@@ -40,37 +94,46 @@ def write_logs():
                 i += 1
     else:
         logfile += '.txt'
-    f = open(logfile, 'wt')
+    f = GroupCommitWriter(logfile, sync_interval_ms, sync_bytes)
+    logfiles.append(logfile)
     try:
         cmd = ['/usr/bin/tail', '/var/log/messages', '-n1', '-F']
         tail = Popen(cmd, stdout=PIPE, stderr=PIPE)
-        for line in iter(tail.stdout.readline, ''):
+        for line in iter(tail.stdout.readline, b''):
             if tail.returncode:
                 break
-            line = line.decode('utf-8').split(' ')
+            line = line.split(b' ')
             try:
-                line[0] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(float(line[0])))
+                line[0] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(float(line[0]))).encode()
             except:
                 pass
-            line = ' '.join(line)
-            f.write(line)
-            f.flush()
-            os.sync()
-            if f.tell() > max_file_size:
-                f.close()
-                time.sleep(1)
-                return
+            f.write(b' '.join(line))
+            if f.size > max_file_size:
+                tail.kill()
+                break
     except Exception as e:
         cp.log(f'Exception! {e}')
+    finally:
+        f.close()
+    time.sleep(1)
+
+def load_logfiles():
+    """Existing log files, oldest first. Only read at startup; after that
+    the list is kept up to date as files are created and removed."""
+    files = [os.path.join('logs', f) for f in os.listdir('logs') if os.path.isfile(os.path.join('logs', f))]
+    return sorted(files, key=os.path.getmtime)
 
 def rotate_files():
-    logfiles = [f for f in os.listdir('logs') if os.path.isfile(os.path.join('logs', f))]
-    logfiles = sorted(logfiles, key=lambda f: os.path.getmtime(os.path.join('logs', f)), reverse=True)
     while len(logfiles) >= backup_count:
-        os.remove(f'logs/{logfiles.pop()}')
+        try:
+            os.remove(logfiles.pop(0))
+        except FileNotFoundError:
+            pass
 
 cp.log(f'Download logs via NCM LAN Manager - HTTP 127.0.0.1 port 8000')
 mac = cp.get('status/product_info/mac0').replace(':', '').upper()
+os.makedirs('logs', exist_ok=True)
+logfiles = load_logfiles()
 
 while True:
     rotate_files()
@@ -5,7 +5,9 @@ Reference: https://www.eclipse.org/paho/clients/python/docs/
 This app does the following:
 - Connects to MQTT test server defined in settings.py.
 - Subscribes to topics as defined in settings.py.
-- Runs a background thread which publishes data to the topics defined in settings.py at the interval defined
+- Runs a background thread which publishes data to the topics defined in settings.py over the same
+  long-lived connection, when values change or at the interval defined.
+- Spools messages the client cannot queue while the broker is unreachable and replays them in order on reconnect.
 - Generates a log when the MQTT server sends the published information for topics subscribed.
 """
 import os
@@ -13,16 +15,21 @@ import json
 import time
 import settings
 import paho.mqtt.client as mqtt
-import paho.mqtt.publish as publish
 
-from threading import Thread
+from threading import Event, Lock, Thread
+from spool import Spool
 import cp
 
 mqtt_client = None
+value_changed = Event()
+publish_lock = Lock()
+spool = Spool(settings.SPOOL_FILE, settings.SPOOL_MAX_MESSAGES)
 
 # Called when the broker responds to our connection request.
 def on_connect(client, userdata, flags, rc):
     cp.log('MQTT Client connection results: {}'.format(mqtt.connack_string(rc)))
+    if rc != mqtt.CONNACK_ACCEPTED:
+        return
 
     # Subscribing in on_connect() means that if we lose the connection and
     # reconnect then subscriptions will be renewed.
@@ -39,6 +46,15 @@ def on_connect(client, userdata, flags, rc):
     except Exception as ex:
         cp.log('Client Subscribe exception. ex={}'.format(ex))
 
+    # Send anything spooled while the broker was unreachable
+    Thread(target=replay_spool, daemon=True).start()
+
+
+# Called when the connection to the broker is lost. loop_forever() reconnects
+# using the backoff set with reconnect_delay_set().
+def on_disconnect(client, userdata, rc):
+    cp.log('MQTT Client disconnected: {}'.format(mqtt.error_string(rc)))
+
 
 # Called when a message has been received on a topic that the client subscribes
 # to and the message does not match an existing topic filter callback. Use
@@ -88,27 +104,120 @@ def publish_file(file_name, file_path):
         cp.log('Exception in publish_file(). ex: {}'.format(ex))
 
 
-# This function will periodically publish device data to the MQTT Broker
+def _try_publish(msg):
+    """Publish one (topic, payload, qos, retain) message on the long-lived
+    client. Returns False if the client did not take it.
+
+    While disconnected, paho keeps QoS 1/2 messages in its own queue (up to
+    MAX_QUEUED_MESSAGES) and sends them after reconnecting, so those are
+    not spooled as well; that would deliver them twice.
+    """
+    if mqtt_client is None:
+        return False
+    topic, payload, qos, retain = msg
+    rc = mqtt_client.publish(topic, payload, qos, retain).rc
+    if rc == mqtt.MQTT_ERR_SUCCESS:
+        return True
+    return qos > 0 and rc == mqtt.MQTT_ERR_NO_CONN
+
+
+def replay_spool():
+    with publish_lock:
+        sent = spool.replay(_try_publish)
+    if sent:
+        cp.log('Replayed {} spooled messages, {} remaining'.format(sent, len(spool)))
+
+
+def publish_messages(msgs):
+    """Publish in order, spooling whatever the client does not take. New
+    messages are spooled behind older ones so ordering is kept."""
+    with publish_lock:
+        if len(spool):
+            spool.replay(_try_publish)
+        for i, msg in enumerate(msgs):
+            if len(spool) or not _try_publish(msg):
+                spool.append(msgs[i:])
+                cp.log('MQTT queue full, spooled {} messages'.format(len(msgs) - i))
+                break
+
+
+def build_value_groups():
+    """Group configured paths so small sibling values (e.g. status/gps/fix/*)
+    are read with a single cp.get of their parent."""
+    parents = {}
+    for values in settings.topics.values():
+        for path in values.values():
+            parent, _, leaf = path.strip('/').rpartition('/')
+            parents.setdefault(parent, set()).add(path)
+    groups = {}
+    for parent, paths in parents.items():
+        # Only group below top level trees like status/wan or config/system,
+        # which are too large to fetch for a couple of values.
+        if len(paths) > 1 and parent.count('/') >= 2:
+            groups[parent] = paths
+        else:
+            for path in paths:
+                groups[path] = {path}
+    return groups
+
+
+def read_values(groups):
+    values = {}
+    for base, paths in groups.items():
+        data = cp.get(base)
+        for path in paths:
+            if path == base:
+                values[path] = data
+            else:
+                leaf = path.strip('/').rpartition('/')[2]
+                values[path] = data.get(leaf) if isinstance(data, dict) else None
+    return values
+
+
+def on_value_change(path, value, args):
+    value_changed.set()
+
+
+# This function publishes device data to the MQTT Broker when values change,
+# and at least every PUBLISH_INTERVAL seconds.
 def publish_thread():
     cp.log('Start publish_thread()')
+    groups = build_value_groups()
+    for base in groups:
+        cp.register('put', base, on_value_change)
+    last_payloads = {}
+    last_full = 0
     while True:
         try:
+            started = time.time()
             #
             # Using tuples to define multiple messages,
             # the form must be: ("<topic>", "<payload>", qos, retain)
             # QOS 1: The client will deliver the message at least once, with confirmation required.
             # QOS 2: The client will deliver the message exactly once by using a four step handshake.
-
-
+            values = read_values(groups)
+            full = not settings.CHANGED_ONLY or started - last_full >= settings.PUBLISH_INTERVAL
+            if full:
+                last_full = started
             msgs = []
-            for topic, values in settings.topics.items():
-                for value, path in values.items():
-                    payload = cp.get(path)
-                    msgs.append((topic, f'{value}: {payload}', 1, False))
-            publish.multiple(msgs=msgs, hostname=settings.MQTT_SERVER, port=settings.MQTT_PORT)
-            time.sleep(settings.PUBLISH_INTERVAL)
+            for topic, names in settings.topics.items():
+                for value, path in names.items():
+                    payload = f'{value}: {values.get(path)}'
+                    if not full and last_payloads.get((topic, value)) == payload:
+                        continue
+                    last_payloads[(topic, value)] = payload
+                    msgs.append((topic, payload, 1, False))
+            if msgs:
+                publish_messages(msgs)
+
+            # Wake early on a value change, but never more often than
+            # MIN_PUBLISH_INTERVAL
+            value_changed.wait(max(0, last_full + settings.PUBLISH_INTERVAL - time.time()))
+            value_changed.clear()
+            time.sleep(max(0, started + settings.MIN_PUBLISH_INTERVAL - time.time()))
         except Exception as ex:
             cp.log('Exception in publish_thread(). ex: {}'.format(ex))
+            time.sleep(settings.MIN_PUBLISH_INTERVAL)
 
 
 def start_mqtt():
@@ -121,20 +230,25 @@ def start_mqtt():
 
         # Assign callback functions
         mqtt_client.on_connect = on_connect
+        mqtt_client.on_disconnect = on_disconnect
         mqtt_client.on_message = on_message
         mqtt_client.on_publish = on_publish
         mqtt_client.on_subscribe = on_subscribe
 
+        # Bound unacknowledged and queued QoS 1/2 messages and back off
+        # between reconnects
+        mqtt_client.max_inflight_messages_set(settings.MAX_INFLIGHT)
+        mqtt_client.max_queued_messages_set(settings.MAX_QUEUED_MESSAGES)
+        mqtt_client.reconnect_delay_set(min_delay=1, max_delay=settings.RECONNECT_MAX_DELAY)
+
         # Set a Will to be sent by the broker in case the client disconnects unexpectedly.
         # QOS 2: The broker will deliver the message exactly once by using a four step handshake.
         mqtt_client.will_set('/will/oops', payload='{} has vanished!'.format(system_id), qos=2)
 
-        connack_code = mqtt_client.connect(settings.MQTT_SERVER, settings.MQTT_PORT)
-        cp.log('MQTT connect reply to {}, {}: {}'.format(settings.MQTT_SERVER, settings.MQTT_PORT,
-                                                         mqtt.connack_string(connack_code)))
+        mqtt_client.connect_async(settings.MQTT_SERVER, settings.MQTT_PORT)
         # Blocking call that processes network traffic, dispatches callbacks and
-        # handles reconnecting.
-        mqtt_client.loop_forever()
+        # handles reconnecting, including when the first connection fails.
+        mqtt_client.loop_forever(retry_first_connection=True)
 
     except Exception as ex:
         cp.log('Exception in start_mqtt()! exception: {}'.format(ex))
@@ -35,3 +35,24 @@ topics = {
         'usb_state': 'status/usb/connection/state'
     }
 }
+
+# Publish only values that changed since the last message, plus a full
+# refresh every PUBLISH_INTERVAL. Value changes wake the publisher early,
+# but it never publishes more often than MIN_PUBLISH_INTERVAL seconds.
+CHANGED_ONLY = True
+MIN_PUBLISH_INTERVAL = 1
+
+# Maximum unacknowledged QoS 1/2 messages in flight on the connection
+MAX_INFLIGHT = 20
+
+# Maximum QoS 1/2 messages paho holds in memory, including while the broker
+# is unreachable. Messages beyond this go to the spool.
+MAX_QUEUED_MESSAGES = 1000
+
+# Maximum seconds between reconnect attempts (backoff starts at 1 second)
+RECONNECT_MAX_DELAY = 120
+
+# Messages the client cannot queue are spooled here and replayed in order
+# on reconnect. The oldest are dropped beyond SPOOL_MAX_MESSAGES.
+SPOOL_FILE = 'mqtt_spool.jsonl'
+SPOOL_MAX_MESSAGES = 5000
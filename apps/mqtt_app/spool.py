@@ -0,0 +1,71 @@
+"""
+Bounded on-disk spool for MQTT messages.
+
+Messages that cannot be published while the broker is unreachable are
+appended to a JSON lines file and replayed in order once the client
+reconnects. When the spool is full the oldest messages are dropped.
+"""
+import json
+import os
+import threading
+
+
+class Spool:
+    def __init__(self, path, max_messages=1000):
+        self.path = path
+        self.max_messages = max_messages
+        self.lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.count = sum(1 for _ in f)
+        except FileNotFoundError:
+            self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, msgs):
+        """Spool a list of (topic, payload, qos, retain) tuples."""
+        with self.lock:
+            with open(self.path, 'a') as f:
+                for msg in msgs:
+                    f.write(json.dumps(list(msg)) + '\n')
+            self.count += len(msgs)
+            if self.count > self.max_messages:
+                self._write(self._read()[-self.max_messages:])
+
+    def replay(self, publish):
+        """Publish spooled messages in order until publish(msg) returns
+        False. Returns the number of messages sent; the rest stay spooled."""
+        with self.lock:
+            if not self.count:
+                return 0
+            msgs = self._read()
+            sent = 0
+            for msg in msgs:
+                if not publish(msg):
+                    break
+                sent += 1
+            self._write(msgs[sent:])
+            return sent
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return [tuple(json.loads(line)) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _write(self, msgs):
+        if not msgs:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+        else:
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w') as f:
+                for msg in msgs:
+                    f.write(json.dumps(list(msg)) + '\n')
+            os.replace(tmp, self.path)
+        self.count = len(msgs)
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from spool import Spool
+
+
+class TestSpool(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        os.remove(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_replay_in_order(self):
+        spool = Spool(self.path)
+        spool.append([('gps', 'latitude: 1', 1, False), ('gps', 'longitude: 2', 1, False)])
+        spool.append([('status', 'temperature: 40', 1, False)])
+
+        sent = []
+        self.assertEqual(spool.replay(lambda msg: sent.append(msg) or True), 3)
+        self.assertEqual([m[1] for m in sent], ['latitude: 1', 'longitude: 2', 'temperature: 40'])
+        self.assertEqual(len(spool), 0)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_replay_stops_on_failure(self):
+        spool = Spool(self.path)
+        spool.append([('t', str(i), 1, False) for i in range(5)])
+
+        sent = []
+
+        def publish(msg):
+            if len(sent) == 2:
+                return False
+            sent.append(msg)
+            return True
+
+        self.assertEqual(spool.replay(publish), 2)
+        self.assertEqual(len(spool), 3)
+
+        # survives a restart
+        spool = Spool(self.path)
+        self.assertEqual(len(spool), 3)
+        rest = []
+        spool.replay(lambda msg: rest.append(msg) or True)
+        self.assertEqual([m[1] for m in rest], ['2', '3', '4'])
+
+    def test_bounded(self):
+        spool = Spool(self.path, max_messages=3)
+        spool.append([('t', str(i), 1, False) for i in range(5)])
+        self.assertEqual(len(spool), 3)
+
+        sent = []
+        spool.replay(lambda msg: sent.append(msg) or True)
+        self.assertEqual([m[1] for m in sent], ['2', '3', '4'])
@@ -0,0 +1,197 @@
+"""
+Bulk configuration CSV lookup and template rendering benchmark.
+
+Writes a synthetic router grid (quoted fields with commas, doubled quotes
+and line breaks included) and compares the original read-everything-then-
+scan lookup with the streaming scan and the offset index, then compares the
+original placeholder substitution with replace_placeholders().
+
+Usage:
+    python bench_bulk_csv.py --rows 100000 --lookups 20
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import bulk_csv
+
+HEADER = ['id', 'name', 'desc', 'custom1', 'custom2', 'primary_lan_ip',
+          'site_tags', 'lan_resource_tags', 'extra_ip_resources', 'ssid', 'psk']
+
+
+def legacy_parse_csv_line(line):
+    fields = []
+    current_field = ''
+    in_quotes = False
+    for char in line:
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ',' and not in_quotes:
+            fields.append(current_field)
+            current_field = ''
+        else:
+            current_field += char
+    fields.append(current_field)
+    return fields
+
+
+def legacy_read_csv(filename):
+    rows = []
+    with open(filename, 'r') as f:
+        content = f.read()
+        if content.startswith('﻿'):
+            content = content[1:]
+        lines = content.strip().split('\n')
+        headers = legacy_parse_csv_line(lines[0])
+        for line in lines[1:]:
+            if line.strip():
+                values = legacy_parse_csv_line(line)
+                rows.append({h: values[i] if i < len(values) else ''
+                             for i, h in enumerate(headers)})
+    return rows
+
+
+def legacy_find(filename, router_id):
+    for row in legacy_read_csv(filename):
+        try:
+            if int(row['id']) == router_id:
+                return row
+        except (ValueError, KeyError):
+            continue
+    return None
+
+
+def legacy_replace_placeholders(obj, row_data):
+    if isinstance(obj, dict):
+        return {k: legacy_replace_placeholders(v, row_data) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [legacy_replace_placeholders(item, row_data) for item in obj]
+    elif isinstance(obj, str):
+        result = obj
+        for match in re.findall(r'\{\{([^}]+)\}\}', obj):
+            result = result.replace(f'{{{{{match}}}}}', str(row_data.get(match, '')))
+        return result
+    return obj
+
+
+def make_grid(path, rows, multiline):
+    rng = random.Random(1)
+    ids = rng.sample(range(1000000, 9999999), rows)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('﻿' + ','.join(HEADER) + '\r\n')
+        for i, router_id in enumerate(ids):
+            desc = f'Store {i}, aisle {i % 40}'
+            if multiline and i % 50 == 0:
+                desc += '\nsecond line with ""quotes""'
+            f.write(f'{router_id},site-{i},"{desc}",value {i},,'
+                    f'10.{i // 65536 % 256}.{i // 256 % 256}.1,branch;retail,lan,'
+                    f'name=servers;ip=10.0.1.0/24|name=iot;ip=10.0.2.0/24,'
+                    f'ssid-{i},psk{i:08d}\r\n')
+    return ids
+
+
+def make_template(fields):
+    template = [{'system': {'system_id': '{{name}}', 'desc': ''},
+                 'lan': {'00000000-0d93-319d-8220-4a1fb0372b51': {
+                     'ip_address': '{{primary_lan_ip}}', 'netmask': '255.255.255.0',
+                     'dhcpd': {'options': [], 'lease6_time': 3600}}},
+                 'wlan': {'radio': [{'bss': [{'ssid': 'corp-{{ssid}}', 'wpapsk': '{{psk}}'}]}]}}]
+    # Pad with constant settings, like a full exported config
+    extra = template[0].setdefault('firewall', {})
+    for i in range(fields):
+        extra[f'rule{i}'] = {'enabled': True, 'name': f'rule {i}', 'ports': [80, 443]}
+    return template
+
+
+def timed(func, *args, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def peak_memory(func, *args):
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / (1 << 20)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--lookups', type=int, default=20,
+                        help='random router IDs looked up per method')
+    parser.add_argument('--renders', type=int, default=2000)
+    parser.add_argument('--template-fields', type=int, default=200)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='bulk-csv-bench-')
+    try:
+        grid = os.path.join(root, 'router_grid.csv')
+        flat = os.path.join(root, 'router_grid_flat.csv')
+        ids = make_grid(grid, args.rows, multiline=True)
+        make_grid(flat, args.rows, multiline=False)
+        size = os.path.getsize(grid) / (1 << 20)
+        print(f'{args.rows} rows, {size:.1f} MiB')
+
+        elapsed, count = timed(bulk_csv.build_csv_index, grid)
+        print(f'{"build index":<28} {elapsed * 1000:9.1f} ms ({count} keys)')
+
+        rng = random.Random(2)
+        sample = rng.sample(ids, args.lookups)
+        targets = [('first row', [ids[0]]), ('middle row', [ids[len(ids) // 2]]),
+                   ('last row', [ids[-1]]), ('missing id', [42]),
+                   (f'{args.lookups} random ids', sample)]
+
+        # The original parser splits on every newline, so it only gets the
+        # flat grid; the streaming reader handles both
+        methods = [
+            ('legacy read+scan', legacy_find, flat),
+            ('streaming scan', lambda f, k: bulk_csv.find_csv_row(f, k, index_file='-'), grid),
+            ('offset index', bulk_csv.find_csv_row, grid),
+        ]
+        for label, keys in targets:
+            for name, func, path in methods:
+                elapsed = 0
+                for key in keys:
+                    t, row = timed(func, path, key)
+                    elapsed += t
+                    expected = None if key == 42 else str(key)
+                    assert (row and row['id']) == expected, (name, key, row)
+                print(f'{label:<18} {name:<18} {elapsed / len(keys) * 1000:9.2f} ms/lookup')
+
+        for name, func, path in methods:
+            mem = peak_memory(func, path, ids[-1])
+            print(f'{"peak memory":<18} {name:<18} {mem:9.2f} MiB')
+
+        # Multi-line quoted fields parse correctly
+        row = bulk_csv.find_csv_row(grid, ids[0])
+        assert row['desc'] == 'Store 0, aisle 0\nsecond line with "quotes"', row['desc']
+        assert row['psk'] == 'psk00000000'
+
+        template = make_template(args.template_fields)
+        rows = [r for r, _ in zip(bulk_csv.iter_csv(flat), range(args.renders))]
+        for r in rows[:10]:
+            assert bulk_csv.replace_placeholders(template, r) == legacy_replace_placeholders(template, r)
+        placeholders = len(re.findall(r'\{\{', json.dumps(template)))
+        print(f'template with {placeholders} placeholders, '
+              f'{len(json.dumps(template)) // 1024} KiB')
+        elapsed, _ = timed(lambda: [legacy_replace_placeholders(template, r) for r in rows])
+        print(f'{"legacy replace":<28} {elapsed / len(rows) * 1e6:9.1f} us/row')
+        elapsed, _ = timed(lambda: [bulk_csv.replace_placeholders(template, r) for r in rows])
+        print(f'{"replace_placeholders":<28} {elapsed / len(rows) * 1e6:9.1f} us/row')
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
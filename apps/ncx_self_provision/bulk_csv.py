@@ -0,0 +1,380 @@
+"""Streaming CSV lookup and template rendering for bulk configuration.
+
+router_grid.csv can hold a row for every router in a fleet, but each router
+only needs its own. find_csv_row() streams the file one record at a time
+and stops at the first matching row instead of loading the whole grid.
+
+The csv module's C implementation isn't available on cppython, so records
+are split by a small RFC 4180 parser: quoted fields may hold commas,
+doubled quotes and line breaks. A record ends at a line break outside
+quotes, so each record is parsed whole.
+
+For very large grids an offset index can be built ahead of time:
+
+    python bulk_csv.py router_grid.csv
+
+This writes router_grid.csv.idx, a sorted "id<TAB>byte offset" file. When
+it is packaged next to the CSV, the lookup binary searches the index and
+reads a single record. A stale index (the CSV changed after it was built) is
+detected and the lookup falls back to scanning.
+
+replace_placeholders() fills a config template's {{column_name}}
+placeholders in one pass with a precompiled pattern.
+
+Only the standard library is used, so this module also runs off-router
+(index building, benchmarks).
+"""
+
+import io
+import os
+import re
+import sys
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+KEY_COLUMN = 'id'
+INDEX_SUFFIX = '.idx'
+INDEX_HEADER = '#bulk_csv index v1'
+
+_PLACEHOLDER = re.compile(r'\{\{([^}]+)\}\}')
+# A quoted field, plus any text between its closing quote and the next comma
+_QUOTED_FIELD = re.compile(r'"((?:[^"]|"")*)"?([^,]*)')
+
+
+def normalize_key(value: str) -> str:
+    """Normalize a key so ' 0042 ' and '42' match, as int() comparison did.
+
+    Args:
+        value: Raw key value.
+
+    Returns:
+        str: Integer keys in canonical form, other keys stripped.
+
+    """
+    value = value.strip()
+    try:
+        return str(int(value))
+    except ValueError:
+        return value
+
+
+def parse_csv_line(line: str) -> List[str]:
+    """Parse a single CSV line handling quoted fields.
+
+    Args:
+        line: CSV line to parse.
+
+    Returns:
+        List[str]: List of field values.
+
+    """
+    return _split_record(line)
+
+
+def _split_record(record: str) -> List[str]:
+    """Split one whole CSV record into fields.
+
+    The record may span several lines when quoted fields contain line
+    breaks. Its trailing line break is ignored.
+    """
+    record = record.rstrip('\r\n')
+    if '"' not in record:
+        return record.split(',')
+    fields = []
+    pos = 0
+    while True:
+        if record.startswith('"', pos):
+            match = _QUOTED_FIELD.match(record, pos)
+            fields.append(match.group(1).replace('""', '"') + match.group(2))
+            pos = match.end()
+        else:
+            end = record.find(',', pos)
+            if end < 0:
+                fields.append(record[pos:])
+                return fields
+            fields.append(record[pos:end])
+            pos = end
+        if pos >= len(record):
+            return fields
+        pos += 1  # Skip the comma
+
+
+def _make_row(headers: List[str], values: List[str]) -> Dict[str, str]:
+    if len(values) < len(headers):
+        values = values + [''] * (len(headers) - len(values))
+    return dict(zip(headers, values))
+
+
+def _is_blank(values: List[str]) -> bool:
+    return not values or (len(values) == 1 and not values[0].strip())
+
+
+def iter_csv(filename: str) -> Iterator[Dict[str, str]]:
+    """Stream CSV rows as dictionaries keyed by the header row.
+
+    A UTF-8 BOM is removed, blank lines are skipped and short rows are
+    padded with empty strings.
+
+    Args:
+        filename: Path to CSV file.
+
+    Yields:
+        Dict[str, str]: One dictionary per row.
+
+    """
+    with open(filename, 'r', encoding='utf-8-sig', newline='') as f:
+        records = _iter_records(f)
+        first = next(records, None)
+        if first is None:
+            return
+        headers = _split_record(first[1])
+        for _, record in records:
+            values = _split_record(record)
+            if not _is_blank(values):
+                yield _make_row(headers, values)
+
+
+def read_csv(filename: str) -> List[Dict[str, str]]:
+    """Read CSV file and return list of dictionaries.
+
+    Args:
+        filename: Path to CSV file.
+
+    Returns:
+        List[Dict[str, str]]: List of row dictionaries.
+
+    """
+    return list(iter_csv(filename))
+
+
+def find_csv_row(filename: str, key: Any, column: str = KEY_COLUMN,
+                 index_file: Optional[str] = None,
+                 log: Optional[Callable[[str], None]] = None) -> Optional[Dict[str, str]]:
+    """Return the first row whose column matches key, or None.
+
+    Uses the offset index (filename + '.idx' unless index_file is given)
+    when it exists and is up to date, otherwise scans the CSV until the
+    first match.
+
+    Args:
+        filename: Path to CSV file.
+        key: Value to look for, e.g. a router ID.
+        column: Column to match.
+        index_file: Path to the offset index.
+        log: Optional function used to report a stale index.
+
+    Returns:
+        Optional[Dict[str, str]]: Matching row, or None if not found.
+
+    Raises:
+        ValueError: If the CSV has no such column.
+
+    """
+    target = normalize_key(str(key))
+    index_file = index_file or filename + INDEX_SUFFIX
+    if os.path.exists(index_file):
+        found, row = _lookup_index(filename, index_file, target, column)
+        if found:
+            return row
+        if log:
+            log(f'Index {index_file} is out of date, scanning {filename}')
+    return _scan(filename, target, column)
+
+
+def _scan(filename: str, target: str, column: str) -> Optional[Dict[str, str]]:
+    with open(filename, 'r', encoding='utf-8-sig', newline='') as f:
+        records = _iter_records(f)
+        first = next(records, None)
+        if first is None:
+            return None
+        headers = _split_record(first[1])
+        if column not in headers:
+            raise ValueError(f"CSV file missing required '{column}' column")
+        col = headers.index(column)
+        for _, record in records:
+            # Substring test first; splitting every record is much slower
+            if target not in record:
+                continue
+            values = _split_record(record)
+            if len(values) > col and normalize_key(values[col]) == target:
+                return _make_row(headers, values)
+    return None
+
+
+# =============================================================================
+# OFFSET INDEX
+# =============================================================================
+
+def _iter_records(f: Any) -> Iterator[tuple]:
+    """Yield (offset, record) for each CSV record of a file.
+
+    A record ends at a line break outside quotes, i.e. when the number of
+    quote characters seen so far is even. Binary files yield bytes and byte
+    offsets, text files yield str and character offsets.
+    """
+    offset = 0
+    start = 0
+    record = []
+    quotes = 0
+    quote = None
+    for line in f:
+        if quote is None:
+            quote = b'"' if isinstance(line, bytes) else '"'
+        if not record:
+            start = offset
+        record.append(line)
+        quotes += line.count(quote)
+        offset += len(line)
+        if quotes % 2 == 0:
+            yield start, line[:0].join(record)
+            record = []
+            quotes = 0
+    if record:
+        yield start, record[0][:0].join(record)
+
+
+def _parse_record(data: bytes, encoding: str = 'utf-8') -> List[str]:
+    return _split_record(data.decode(encoding))
+
+
+def _read_record(f: io.BufferedReader, offset: int, encoding: str = 'utf-8') -> List[str]:
+    f.seek(offset)
+    for _, data in _iter_records(f):
+        return _parse_record(data, encoding)
+    return []
+
+
+def build_csv_index(filename: str, column: str = KEY_COLUMN,
+                    index_file: Optional[str] = None) -> int:
+    """Write a sorted key to byte offset index for a CSV file.
+
+    The first row for each key is indexed, matching find_csv_row().
+
+    Args:
+        filename: Path to CSV file.
+        column: Column to index.
+        index_file: Path of the index to write (default filename + '.idx').
+
+    Returns:
+        int: Number of keys indexed.
+
+    Raises:
+        ValueError: If the CSV has no such column.
+
+    """
+    offsets = {}
+    with open(filename, 'rb') as f:
+        records = _iter_records(f)
+        first = next(records, None)
+        if first is None:
+            raise ValueError(f'{filename} is empty')
+        headers = _parse_record(first[1], 'utf-8-sig')
+        if column not in headers:
+            raise ValueError(f"CSV file missing required '{column}' column")
+        col = headers.index(column)
+        for offset, data in records:
+            values = _parse_record(data)
+            if len(values) <= col:
+                continue
+            key = normalize_key(values[col])
+            if key and '\t' not in key and '\n' not in key and key not in offsets:
+                offsets[key] = offset
+
+    index_file = index_file or filename + INDEX_SUFFIX
+    size = os.path.getsize(filename)
+    entries = sorted((key.encode('utf-8'), offset) for key, offset in offsets.items())
+    with open(index_file, 'wb') as f:
+        f.write(f'{INDEX_HEADER} size={size} column={column}\n'.encode('utf-8'))
+        f.writelines(b'%s\t%d\n' % entry for entry in entries)
+    return len(entries)
+
+
+def _search_index(f: io.BufferedReader, start: int, end: int, target: bytes) -> Optional[int]:
+    """Binary search a sorted "key<TAB>offset" file for target's offset."""
+    lo, hi = start, end
+    while hi - lo > 4096:
+        mid = (lo + hi) // 2
+        f.seek(mid)
+        f.readline()  # Move to the next line start
+        pos = f.tell()
+        line = f.readline()
+        if line and line.split(b'\t', 1)[0] < target:
+            lo = pos + len(line)
+        else:
+            hi = mid
+    f.seek(lo)
+    for line in f:
+        key, _, offset = line.rstrip(b'\n').partition(b'\t')
+        if key == target:
+            return int(offset)
+        if key > target:
+            break
+    return None
+
+
+def _lookup_index(filename: str, index_file: str, target: str, column: str) -> tuple:
+    """Look target up through the index.
+
+    Returns:
+        tuple: (True, row or None) if the index answered, (False, None) if
+            the index is stale or unreadable and the CSV must be scanned.
+
+    """
+    try:
+        with open(index_file, 'rb') as f:
+            header = f.readline().decode('utf-8').split()
+            fields = dict(part.split('=', 1) for part in header if '=' in part)
+            if ' '.join(header[:3]) != INDEX_HEADER \
+                    or fields.get('column') != column \
+                    or int(fields.get('size', -1)) != os.path.getsize(filename):
+                return False, None
+            offset = _search_index(f, f.tell(), os.path.getsize(index_file),
+                                   target.encode('utf-8'))
+        if offset is None:
+            return True, None
+        with open(filename, 'rb') as f:
+            headers = _read_record(f, 0, 'utf-8-sig')
+            values = _read_record(f, offset)
+        col = headers.index(column)
+        if len(values) <= col or normalize_key(values[col]) != target:
+            return False, None
+        return True, _make_row(headers, values)
+    except (OSError, ValueError, UnicodeDecodeError):
+        return False, None
+
+
+# =============================================================================
+# TEMPLATE RENDERING
+# =============================================================================
+
+def replace_placeholders(obj: Any, row_data: Dict[str, str]) -> Any:
+    """Recursively replace placeholder strings with CSV values.
+
+    Placeholders in the template use {{column_name}} syntax.
+    Example: {{primary_lan_ip}} will be replaced with the value from
+    the 'primary_lan_ip' column in the CSV.
+
+    Args:
+        obj: Object to process (dict, list, str, or other).
+        row_data: CSV row data with column names as keys.
+
+    Returns:
+        Any: Object with placeholders replaced.
+
+    """
+    if isinstance(obj, dict):
+        return {k: replace_placeholders(v, row_data) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [replace_placeholders(item, row_data) for item in obj]
+    elif isinstance(obj, str) and '{{' in obj:
+        return _PLACEHOLDER.sub(lambda m: str(row_data.get(m.group(1), '')), obj)
+    else:
+        return obj
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3):
+        print(f'Usage: python {os.path.basename(__file__)} <csv file> [column]')
+        sys.exit(1)
+    csv_file = sys.argv[1]
+    count = build_csv_index(csv_file, *sys.argv[2:])
+    print(f'Indexed {count} keys in {csv_file}{INDEX_SUFFIX}')
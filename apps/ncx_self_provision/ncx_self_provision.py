@@ -17,6 +17,15 @@ Provisioning Steps:
     9. DNS Force Redirect - Disable force DNS if configured (optional)
     10. Production Group Assignment - Move device to production group and cleanup
 
+Step Execution:
+    Steps 3-10 run as a dependency graph. Each step starts as soon as the
+    steps it depends on are complete, so independent steps run concurrently:
+    licenses are applied while bulk configuration syncs, the LAN, CP host,
+    wildcard and additional resources are created at the same time, and DNS
+    force redirect waits only for the site. Instead of fixed delays, steps
+    that depend on NCM catching up poll a readiness check with a backoff
+    that starts at one second.
+
 Key Features:
     - Persistent state tracking enables recovery after failures/reboots
     - Automatic retry with exponential backoff for transient API failures
@@ -44,6 +53,9 @@ State Management:
     - prov_state_site: Exchange site created
     - prov_state_del_auto_res: Auto-created resources deleted or skipped
     - prov_state_resources: Exchange resources provisioned
+    - prov_state_res_lan, prov_state_res_cp_host, prov_state_res_wildcard,
+      prov_state_res_extra_ip, prov_state_res_extra_fqdn: Individual
+      exchange resources provisioned
     - prov_state_vpn_tunnel: VPN tunnel up
     - prov_state_dns_force: DNS force redirect configured
 
@@ -117,8 +129,10 @@ Files Deployed to Devices:
     - ncx_self_provision.py (this file)
     - cp.py (router library)
     - ncm.py (NCM API library)
+    - bulk_csv.py (CSV lookup and template rendering)
     - config_template.json (if bulk config enabled)
     - router_grid.csv (if bulk config enabled)
+    - router_grid.csv.idx (optional offset index, see bulk_csv.py)
     - start.sh, package.ini (SDK metadata)
 
 Files Never Deployed (Local Use Only):
@@ -126,97 +140,31 @@ Files Never Deployed (Local Use Only):
     - index.html (wizard web interface)
     - static/ (wizard CSS/JS/assets)
     - README.md (documentation)
+    - bench_bulk_csv.py (CSV lookup benchmark)
 """
 
 import ipaddress
 import json
 import os
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import cp
 import ncm
-
-
-def parse_csv_line(line: str) -> List[str]:
-    """Parse a single CSV line handling quoted fields.
-
-    Args:
-        line: CSV line to parse.
-
-    Returns:
-        List[str]: List of field values.
-
-    """
-    fields = []
-    current_field = ''
-    in_quotes = False
-
-    for char in line:
-        if char == '"':
-            in_quotes = not in_quotes
-        elif char == ',' and not in_quotes:
-            fields.append(current_field)
-            current_field = ''
-        else:
-            current_field += char
-
-    fields.append(current_field)
-    return fields
-
-
-def read_csv(filename: str) -> List[Dict[str, str]]:
-    """Read CSV file and return list of dictionaries.
-
-    Args:
-        filename: Path to CSV file.
-
-    Returns:
-        List[Dict[str, str]]: List of row dictionaries.
-
-    """
-    rows = []
-    with open(filename, 'r') as f:
-        content = f.read()
-
-        # Remove UTF-8 BOM if present
-        if content.startswith('\ufeff'):
-            content = content[1:]
-        elif content.startswith('\xef\xbb\xbf'):
-            content = content[3:]
-
-        lines = content.strip().split('\n')
-        if not lines:
-            return rows
-
-        headers = parse_csv_line(lines[0])
-
-        for line in lines[1:]:
-            if line.strip():
-                values = parse_csv_line(line)
-                row = {}
-                for i, header in enumerate(headers):
-                    if i < len(values):
-                        row[header] = values[i]
-                    else:
-                        row[header] = ''
-                rows.append(row)
-
-    return rows
+from bulk_csv import find_csv_row, replace_placeholders
 
 
 # Configuration Constants
 UPTIME_WAIT_SECONDS = 120
 FIRMWARE_CHECK_INTERVAL = 15
 FIRMWARE_CHECK_TIMEOUT = 3600
-STEP_DELAY_SECONDS = 5
 COMPLETION_WAIT_SECONDS = 600
 DEFAULT_CSV_FILE = 'router_grid.csv'
 DEFAULT_CONFIG_TEMPLATE = 'config_template.json'
-LICENSE_APPLY_DELAY = 1
 MAX_RETRIES = 3
 RETRY_DELAY = 5
-CONFIG_SYNC_CHECK_INTERVAL = 10  # Seconds between sync status checks
+CONFIG_SYNC_CHECK_INTERVAL = 10  # Max seconds between sync status checks
 CONFIG_SYNC_CHECK_TIMEOUT = 300  # 5 minutes total timeout for config sync
 
 # State tracking keys
@@ -226,17 +174,31 @@ STATE_LICENSE = 'prov_state_license'
 STATE_SITE = 'prov_state_site'
 STATE_DELETE_AUTO_RES = 'prov_state_del_auto_res'
 STATE_RESOURCES = 'prov_state_resources'
+STATE_RES_LAN = 'prov_state_res_lan'
+STATE_RES_CP_HOST = 'prov_state_res_cp_host'
+STATE_RES_WILDCARD = 'prov_state_res_wildcard'
+STATE_RES_EXTRA_IP = 'prov_state_res_extra_ip'
+STATE_RES_EXTRA_FQDN = 'prov_state_res_extra_fqdn'
+RESOURCE_STATES = [STATE_RES_LAN, STATE_RES_CP_HOST, STATE_RES_WILDCARD,
+                   STATE_RES_EXTRA_IP, STATE_RES_EXTRA_FQDN]
 STATE_VPN_TUNNEL = 'prov_state_vpn_tunnel'
 STATE_DNS_FORCE = 'prov_state_dns_force'
 
 # Auto-created resource deletion settings
-AUTO_RESOURCE_WAIT_INTERVAL = 5  # Seconds between resource lookup attempts
+AUTO_RESOURCE_WAIT_INTERVAL = 5  # Max seconds between resource lookup attempts
 AUTO_RESOURCE_WAIT_TIMEOUT = 30  # Max wait for auto-created resources to appear
 
 # VPN tunnel check settings
-VPN_TUNNEL_CHECK_INTERVAL = 10  # Check every 10 seconds
+VPN_TUNNEL_CHECK_INTERVAL = 10  # Check at most 10 seconds apart
 VPN_TUNNEL_CHECK_TIMEOUT = 300  # 5 minutes total timeout
-VPN_TUNNEL_MAX_ATTEMPTS = VPN_TUNNEL_CHECK_TIMEOUT // VPN_TUNNEL_CHECK_INTERVAL
+
+# Step graph execution
+TOTAL_STEPS = 10
+STEP_MAX_WORKERS = 4  # Steps (and resource deletions) run at the same time
+READY_POLL_INITIAL = 1  # First readiness poll interval in seconds
+READY_POLL_MAX = 15  # Poll interval grows up to this many seconds
+READY_POLL_BACKOFF = 2  # Poll interval multiplier after each miss
+READY_TIMEOUT = 120  # Continue with a warning if the site doesn't accept resources by then
 
 
 def sanitize_log(message: str) -> str:
@@ -526,6 +488,39 @@ def retry_on_failure(func, *args, max_retries: int = MAX_RETRIES,
             time.sleep(wait_time)
 
 
+def poll_until(predicate: Callable[[], Any], timeout: float,
+               initial: float = READY_POLL_INITIAL,
+               maximum: float = READY_POLL_MAX) -> Any:
+    """Poll a readiness predicate with adaptive backoff.
+
+    The first check is immediate. The interval between checks starts at
+    initial and doubles after every miss up to maximum, so fast responses
+    are noticed within a second while slow ones are not polled heavily.
+
+    Args:
+        predicate: Function returning a truthy value when ready. Exceptions
+            propagate to the caller.
+        timeout: Maximum seconds to wait.
+        initial: First interval between checks in seconds.
+        maximum: Largest interval between checks in seconds.
+
+    Returns:
+        Any: The predicate's truthy result, or None if the timeout expired.
+
+    """
+    deadline = time.monotonic() + timeout
+    interval = initial
+    while True:
+        result = predicate()
+        if result:
+            return result
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        time.sleep(min(interval, remaining))
+        interval = min(interval * READY_POLL_BACKOFF, maximum)
+
+
 def wait_for_config_sync(n2_client: 'ncm.NcmClientv2', router_id: str,
                          timeout: int = CONFIG_SYNC_CHECK_TIMEOUT,
                          interval: int = CONFIG_SYNC_CHECK_INTERVAL) -> None:
@@ -533,13 +528,14 @@ def wait_for_config_sync(n2_client: 'ncm.NcmClientv2', router_id: str,
 
     Polls the configuration manager for the given router until the device
     reports synched=True and suspended=False, or until the timeout expires.
+    Checks start one second apart and back off to the given interval.
 
     Args:
         n2_client: NCM v2 API client.
         router_id: Router ID to check sync status for.
         timeout: Maximum seconds to wait for sync. Defaults to
             CONFIG_SYNC_CHECK_TIMEOUT.
-        interval: Seconds between status checks. Defaults to
+        interval: Longest interval between status checks. Defaults to
             CONFIG_SYNC_CHECK_INTERVAL.
 
     Raises:
@@ -548,36 +544,34 @@ def wait_for_config_sync(n2_client: 'ncm.NcmClientv2', router_id: str,
 
     """
     cp.log(f"Waiting for configuration sync (timeout: {timeout}s)")
-    elapsed = 0
+    start_time = time.monotonic()
 
-    while elapsed < timeout:
+    def is_synched() -> bool:
         try:
             config_managers = n2_client.get_configuration_managers(
                 router=router_id,
                 fields='id,synched,suspended'
             )
-            if config_managers:
-                cm = config_managers[0]
-                synched = cm.get('synched', False)
-                suspended = cm.get('suspended', False)
-
-                if suspended:
-                    cp.log("WARNING: Configuration sync is suspended")
-                    raise RuntimeError(
-                        "Configuration sync suspended for router "
-                        f"{router_id}. Manual intervention may be required."
-                    )
-
-                if synched:
-                    cp.log(f"Configuration sync complete ({elapsed}s elapsed)")
-                    return
+            if not config_managers:
+                return False
+            cm = config_managers[0]
+            if cm.get('suspended', False):
+                cp.log("WARNING: Configuration sync is suspended")
+                raise RuntimeError(
+                    "Configuration sync suspended for router "
+                    f"{router_id}. Manual intervention may be required."
+                )
+            return cm.get('synched', False)
         except RuntimeError:
             raise
         except Exception as e:
             cp.log(f"Warning: Error checking sync status: {e}")
+            return False
 
-        time.sleep(interval)
-        elapsed += interval
+    if poll_until(is_synched, timeout, maximum=interval):
+        elapsed = time.monotonic() - start_time
+        cp.log(f"Configuration sync complete ({elapsed:.0f}s elapsed)")
+        return
 
     raise RuntimeError(
         f"Configuration sync did not complete within {timeout}s "
@@ -715,41 +709,6 @@ def load_config_template(template_file: str) -> List[Any]:
     return template
 
 
-def replace_placeholders(obj: Any, row_data: Dict[str, str]) -> Any:
-    """Recursively replace placeholder strings with CSV values.
-
-    Placeholders in the template use {{column_name}} syntax.
-    Example: {{primary_lan_ip}} will be replaced with the value from
-    the 'primary_lan_ip' column in the CSV.
-
-    Args:
-        obj: Object to process (dict, list, str, or other).
-        row_data: CSV row data with column names as keys.
-
-    Returns:
-        Any: Object with placeholders replaced.
-
-    """
-    import re
-
-    if isinstance(obj, dict):
-        return {k: replace_placeholders(v, row_data) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [replace_placeholders(item, row_data) for item in obj]
-    elif isinstance(obj, str):
-        # Replace {{column_name}} with value from CSV
-        pattern = r'\{\{([^}]+)\}\}'
-        matches = re.findall(pattern, obj)
-        result = obj
-        for match in matches:
-            placeholder = f'{{{{{match}}}}}'
-            value = row_data.get(match, '')
-            result = result.replace(placeholder, str(value))
-        return result
-    else:
-        return obj
-
-
 def apply_csv_values(template: List[Any], row_data: Dict[str, str]) -> List[Any]:
     """Apply CSV values to configuration template.
 
@@ -804,70 +763,64 @@ def self_bulk_config(n2_client: ncm.NcmClientv2) -> Optional[Dict[str, str]]:
 
         template = load_config_template(config_template_file)
 
-        rows = read_csv(bulk_config_file)
+        # Stops at the first match; uses the prebuilt offset index if present
+        row = find_csv_row(bulk_config_file, router_id, log=cp.log)
+        if row is not None:
+            try:
+                cp.log(f'Found router {router_id} in {bulk_config_file}')
 
-        # Check for required 'id' column
-        if rows and 'id' not in rows[0]:
-            raise ValueError("CSV file missing required 'id' column")
+                if not bulk_config_already_complete:
+                    config_data = apply_csv_values(template, row)
+                    config = {'configuration': config_data}
 
-        for row in rows:
-            try:
-                if int(row['id']) == router_id:
-                    cp.log(f'Found router {router_id} in {bulk_config_file}')
+                    desc_value = row.get('desc')
+                    if desc_value and desc_value != '':
+                        config['configuration'][0]['system']['desc'] = desc_value
 
-                    if not bulk_config_already_complete:
-                        config_data = apply_csv_values(template, row)
-                        config = {'configuration': config_data}
+                    retry_on_failure(
+                        n2_client.patch_configuration_managers,
+                        router_id=router_id,
+                        config_man_json=config
+                    )
+                    cp.log(f'Successfully patched config to router: {router_id}')
+
+                    # Wait for config to sync to device before continuing
+                    wait_for_config_sync(n2_client, str(router_id))
 
-                        desc_value = row.get('desc')
-                        if desc_value and desc_value != '':
-                            config['configuration'][0]['system']['desc'] = desc_value
+                    custom1_value = row.get('custom1')
+                    if custom1_value and custom1_value != '':
+                        retry_on_failure(
+                            n2_client.set_custom1,
+                            router_id=router_id,
+                            text=custom1_value
+                        )
+                        cp.log(f'Set custom1 to: {custom1_value}')
 
+                    custom2_value = row.get('custom2')
+                    if custom2_value and custom2_value != '':
                         retry_on_failure(
-                            n2_client.patch_configuration_managers,
+                            n2_client.set_custom2,
                             router_id=router_id,
-                            config_man_json=config
+                            text=custom2_value
                         )
-                        cp.log(f'Successfully patched config to router: {router_id}')
-
-                        # Wait for config to sync to device before continuing
-                        wait_for_config_sync(n2_client, str(router_id))
-
-                        custom1_value = row.get('custom1')
-                        if custom1_value and custom1_value != '':
-                            retry_on_failure(
-                                n2_client.set_custom1,
-                                router_id=router_id,
-                                text=custom1_value
-                            )
-                            cp.log(f'Set custom1 to: {custom1_value}')
-
-                        custom2_value = row.get('custom2')
-                        if custom2_value and custom2_value != '':
-                            retry_on_failure(
-                                n2_client.set_custom2,
-                                router_id=router_id,
-                                text=custom2_value
-                            )
-                            cp.log(f'Set custom2 to: {custom2_value}')
-
-                        set_state(STATE_BULK_CONFIG, 'complete')
-
-                    # Cache system_id and LAN IP in appdata for recovery across restarts
-                    system_id = row.get('name')
-                    if system_id:
-                        cp.put_appdata('bulk_config_system_id', system_id)
-                        cp.log(f'Stored system_id for site creation: {system_id}')
-
-                    lan_ip = row.get('primary_lan_ip')
-                    if lan_ip:
-                        cp.put_appdata('bulk_config_lan_ip', lan_ip)
-                        cp.log(f'Stored LAN IP for site creation: {lan_ip}')
-
-                    return row
+                        cp.log(f'Set custom2 to: {custom2_value}')
+
+                    set_state(STATE_BULK_CONFIG, 'complete')
+
+                # Cache system_id and LAN IP in appdata for recovery across restarts
+                system_id = row.get('name')
+                if system_id:
+                    cp.put_appdata('bulk_config_system_id', system_id)
+                    cp.log(f'Stored system_id for site creation: {system_id}')
+
+                lan_ip = row.get('primary_lan_ip')
+                if lan_ip:
+                    cp.put_appdata('bulk_config_lan_ip', lan_ip)
+                    cp.log(f'Stored LAN IP for site creation: {lan_ip}')
+
+                return row
             except (ValueError, KeyError) as e:
                 cp.log(f'Error processing row: {e}')
-                continue
 
         cp.log(f'Router {router_id} not found in {bulk_config_file}')
         if not bulk_config_already_complete:
@@ -904,19 +857,16 @@ def apply_license(n3_client: ncm.NcmClientv3) -> None:
         cp.log(msg)
         retry_on_failure(n3_client.regrade, mac=mac, subscription_id=secure_connect_lic)
 
-        time.sleep(LICENSE_APPLY_DELAY)
         sdwan_lic = cp.get_appdata('sdwan_lic')
         if sdwan_lic:
             cp.log(f"Applying SD-WAN license {sdwan_lic} to {mac}")
             retry_on_failure(n3_client.regrade, mac=mac, subscription_id=sdwan_lic)
 
-        time.sleep(LICENSE_APPLY_DELAY)
         hmf_lic = cp.get_appdata('hmf_lic')
         if hmf_lic:
             cp.log(f"Applying HMF license {hmf_lic} to {mac}")
             retry_on_failure(n3_client.regrade, mac=mac, subscription_id=hmf_lic)
 
-        time.sleep(LICENSE_APPLY_DELAY)
         ai_lic = cp.get_appdata('ai_lic')
         if ai_lic:
             cp.log(f"Applying AI license {ai_lic} to {mac}")
@@ -1092,8 +1042,8 @@ def get_site_resources(n3_client: ncm.NcmClientv3,
     """Retrieve resources attached to an exchange site.
 
     Auto-created resources may not be queryable immediately after site
-    creation, so the lookup is retried until resources are returned or the
-    timeout is reached.
+    creation, so the lookup is retried with backoff until resources are
+    returned or the timeout is reached.
 
     Args:
         n3_client: NCM v3 API client.
@@ -1106,10 +1056,10 @@ def get_site_resources(n3_client: ncm.NcmClientv3,
             no resources.
 
     """
-    attempts = max(1, AUTO_RESOURCE_WAIT_TIMEOUT // AUTO_RESOURCE_WAIT_INTERVAL)
     last_error = None
 
-    for attempt in range(1, attempts + 1):
+    def lookup() -> Optional[List[Dict[str, Any]]]:
+        nonlocal last_error
         last_error = None
         try:
             resources = n3_client.get_exchange_resources(site_id=str(site_id))
@@ -1124,16 +1074,14 @@ def get_site_resources(n3_client: ncm.NcmClientv3,
         if last_error:
             cp.log(f"WARNING: Error retrieving resources for site "
                    f"{site_id}: {last_error}")
-        elif resources:
-            return resources, None
-
-        if attempt < attempts:
-            if not last_error:
-                cp.log(f"No resources found for site {site_id} yet "
-                       f"(attempt {attempt}/{attempts}), waiting "
-                       f"{AUTO_RESOURCE_WAIT_INTERVAL}s")
-            time.sleep(AUTO_RESOURCE_WAIT_INTERVAL)
-
+        elif not resources:
+            cp.log(f"No resources found for site {site_id} yet")
+        return resources
+
+    resources = poll_until(lookup, AUTO_RESOURCE_WAIT_TIMEOUT,
+                           maximum=AUTO_RESOURCE_WAIT_INTERVAL)
+    if resources:
+        return resources, None
     return [], last_error
 
 
@@ -1147,8 +1095,9 @@ def delete_auto_created_resources(n3_client: ncm.NcmClientv3,
 
     It runs immediately after site creation and before any configured
     resources are provisioned, so only the auto-created resources are
-    removed. The step is skipped if resource provisioning already completed,
-    which prevents configured resources from being deleted on a re-run.
+    removed. The step is skipped if any resource provisioning step already
+    completed, which prevents configured resources from being deleted on a
+    re-run.
 
     Failures are logged but do not stop provisioning, since this is an
     optional cleanup step.
@@ -1170,7 +1119,7 @@ def delete_auto_created_resources(n3_client: ncm.NcmClientv3,
         set_state(STATE_DELETE_AUTO_RES, 'skipped')
         return
 
-    if get_state(STATE_RESOURCES) == 'complete':
+    if resources_started():
         cp.log("Exchange resources already provisioned - skipping "
                "auto-created resource deletion to avoid deleting "
                "configured resources")
@@ -1198,16 +1147,14 @@ def delete_auto_created_resources(n3_client: ncm.NcmClientv3,
             return
 
         cp.log(f"Found {len(resources)} auto-created resource(s) to delete")
-        failures = 0
 
-        for resource in resources:
+        def delete_resource(resource: Dict[str, Any]) -> bool:
             resource_id = resource.get('id')
             label = get_resource_label(resource)
 
             if not resource_id:
                 cp.log(f"WARNING: Skipping resource without ID: {label}")
-                failures += 1
-                continue
+                return False
 
             try:
                 cp.log(f"  Deleting auto-created resource: {label}")
@@ -1225,13 +1172,15 @@ def delete_auto_created_resources(n3_client: ncm.NcmClientv3,
                 if deleted:
                     cp.log(f"  Successfully deleted resource: {label}")
                 else:
-                    failures += 1
                     cp.log(f"  ERROR deleting resource '{label}': {result}")
+                return deleted
             except Exception as e:
-                failures += 1
                 cp.log(f"  ERROR deleting resource '{label}': {e}")
+                return False
 
-            time.sleep(2)
+        # Deletions are independent, so they run concurrently
+        with ThreadPoolExecutor(max_workers=STEP_MAX_WORKERS) as pool:
+            failures = list(pool.map(delete_resource, resources)).count(False)
 
         if failures:
             cp.log(f"ERROR: Failed to delete {failures} of "
@@ -1245,126 +1194,292 @@ def delete_auto_created_resources(n3_client: ncm.NcmClientv3,
         cp.log(f"ERROR deleting auto-created resources: {e}")
 
 
-def create_exchange_site_resources(n3_client: ncm.NcmClientv3,
-                                   site_info: Dict[str, Any],
-                                   csv_row: Optional[Dict[str, str]] = None) -> None:
-    """Create exchange site resources.
+def resources_started() -> bool:
+    """Check whether any exchange resource provisioning step has completed.
+
+    Returns:
+        bool: True if all resources or any single resource were provisioned.
+
+    """
+    if get_state(STATE_RESOURCES) == 'complete':
+        return True
+    return any(get_state(key) == 'complete' for key in RESOURCE_STATES)
+
+
+def get_resource_site(site_info: Dict[str, Any]) -> Tuple[str, str]:
+    """Get the site ID and site name used for resource creation.
 
     Args:
-        n3_client: NCM v3 API client.
         site_info: Site information dictionary.
+
+    Returns:
+        Tuple[str, str]: Site ID and site name.
+
+    Raises:
+        ValueError: If the site ID is not available.
+
+    """
+    site_id = site_info.get('id') or cp.get_appdata('exchange_site_id')
+    if not site_id:
+        raise ValueError("Site ID not available for resource creation")
+    site_name = cp.get_appdata('bulk_config_system_id') or cp.get('config/system/system_id')
+    return site_id, site_name
+
+
+def get_resource_domain(site_name: str) -> str:
+    """Build the local domain used by the CP host and wildcard resources.
+
+    Args:
+        site_name: Exchange site name.
+
+    Returns:
+        str: Site name followed by the local domain suffix, if any.
+
+    """
+    local_domain_suffix = cp.get_appdata('local_domain') or cp.get('config/system/local_domain') or ''
+    return f'{site_name}.{local_domain_suffix}' if local_domain_suffix else site_name
+
+
+def get_resource_tags(appdata_key: str, csv_column: str,
+                      csv_row: Optional[Dict[str, str]], label: str) -> List[str]:
+    """Merge global and CSV tags for one resource type.
+
+    Args:
+        appdata_key: Appdata key holding the global tags.
+        csv_column: CSV column holding the per-device tags.
         csv_row: Matched CSV row from bulk config (optional).
+        label: Resource type used in the log message.
+
+    Returns:
+        List[str]: Merged tags.
+
+    """
+    global_tags = cp.get_appdata(appdata_key) or ''
+    csv_tags = csv_row.get(csv_column, '') if csv_row else ''
+    cp.log(f"{label} resource tags - global: '{global_tags}', csv: '{csv_tags}'")
+    tags_str = merge_tags(global_tags, csv_tags)
+    return tags_str.split(',') if tags_str else []
+
+
+def create_resource_step(state_key: str, enabled_key: str, label: str,
+                         create: Callable[[], None],
+                         ready: Optional[Callable[[], bool]] = None) -> None:
+    """Run one exchange resource creation step with state tracking.
+
+    Readiness is only polled for a resource that is enabled and not yet
+    created, so skipped resources don't wait for the site.
+
+    Args:
+        state_key: State key marking this resource as created.
+        enabled_key: Appdata key enabling this resource, or None to always run.
+        label: Resource description for log messages.
+        create: Function creating the resource.
+        ready: Optional predicate polled with backoff before create runs.
 
     Raises:
         Exception: If resource creation fails.
 
     """
-    if get_state(STATE_RESOURCES) == 'complete':
-        cp.log("Exchange site resources already created, skipping")
+    if get_state(STATE_RESOURCES) == 'complete' or get_state(state_key) == 'complete':
+        cp.log(f"{label} resource already handled, skipping")
         return
-
+    if enabled_key and cp.get_appdata(enabled_key) != 'True':
+        set_state(state_key, 'complete')
+        return
+    if ready and not poll_until(ready, READY_TIMEOUT):
+        cp.log(f"WARNING: site not ready for {label} resource after "
+               f"{READY_TIMEOUT}s, continuing")
     try:
-        site_id = site_info.get('id') or cp.get_appdata('exchange_site_id')
-        if not site_id:
-            raise ValueError("Site ID not available for resource creation")
+        create()
+        set_state(state_key, 'complete')
+    except Exception as e:
+        cp.log(f"ERROR creating {label} resource: {e}")
+        raise
 
-        site_name = cp.get_appdata('bulk_config_system_id') or cp.get('config/system/system_id')
-        create_lan_resource = (
-            cp.get_appdata('create_lan_resource') == 'True'
-        )
-        create_cp_host_resource = (
-            cp.get_appdata('create_cp_host_resource') == 'True'
-        )
-        create_wildcard_resource = (
-            cp.get_appdata('create_wildcard_resource') == 'True'
-        )
+
+def create_lan_resource(n3_client: ncm.NcmClientv3,
+                        site_info: Dict[str, Any],
+                        csv_row: Optional[Dict[str, str]] = None) -> None:
+    """Create the LAN subnet exchange resource if enabled.
+
+    Args:
+        n3_client: NCM v3 API client.
+        site_info: Site information dictionary.
+        csv_row: Matched CSV row from bulk config (optional).
+
+    Raises:
+        Exception: If resource creation fails.
+
+    """
+    def create() -> None:
+        site_id, site_name = get_resource_site(site_info)
         # Use cached LAN IP from bulk config if available, otherwise from device config
         lan_ip = cp.get_appdata('bulk_config_lan_ip') or cp.get('config/lan/0/ip_address')
         lan_netmask = cp.get('config/lan/0/netmask')
         lan_cidr = str(
             ipaddress.ip_network(f'{lan_ip}/{lan_netmask}', strict=False)
         )
-        local_domain_suffix = cp.get_appdata('local_domain') or cp.get('config/system/local_domain') or ''
-        local_domain = f'{site_name}.{local_domain_suffix}' if local_domain_suffix else site_name
-
-        # Merge global and CSV tags for each resource type
-        global_lan_tags = cp.get_appdata('lan_resource_tags') or ''
-        csv_lan_tags = csv_row.get('lan_resource_tags', '') if csv_row else ''
-        cp.log(f"LAN resource tags - global: '{global_lan_tags}', csv: '{csv_lan_tags}'")
-        lan_resource_tags_str = merge_tags(global_lan_tags, csv_lan_tags)
-        lan_resource_tags = lan_resource_tags_str.split(',') if lan_resource_tags_str else []
-
-        global_cp_tags = cp.get_appdata('cp_host_tags') or ''
-        csv_cp_tags = csv_row.get('cp_host_tags', '') if csv_row else ''
-        cp.log(f"CP host resource tags - global: '{global_cp_tags}', csv: '{csv_cp_tags}'")
-        cp_host_tags_str = merge_tags(global_cp_tags, csv_cp_tags)
-        cp_host_tags = cp_host_tags_str.split(',') if cp_host_tags_str else []
-
-        global_wildcard_tags = cp.get_appdata('wildcard_tags') or ''
-        csv_wildcard_tags = csv_row.get('wildcard_resource_tags', '') if csv_row else ''
-        cp.log(f"Wildcard resource tags - global: '{global_wildcard_tags}', csv: '{csv_wildcard_tags}'")
-        wildcard_tags_str = merge_tags(global_wildcard_tags, csv_wildcard_tags)
-        wildcard_tags = wildcard_tags_str.split(',') if wildcard_tags_str else []
-
-        if create_lan_resource:
-            cp.log(f"Creating LAN resource for {lan_cidr}")
-            if lan_resource_tags:
-                cp.log(f"LAN resource tags: {lan_resource_tags}")
-            result = retry_on_failure(
-                n3_client.create_exchange_resource,
-                resource_name=f'{site_name}-lan',
-                resource_type='exchange_ipsubnet_resources',
-                site_id=site_id,
-                ip=lan_cidr,
-                **(({'tags': lan_resource_tags}) if lan_resource_tags else {})
-            )
-            if isinstance(result, str) and result.startswith('ERROR'):
-                cp.log(f"ERROR creating LAN resource: {result}")
-            time.sleep(2)
+        lan_resource_tags = get_resource_tags(
+            'lan_resource_tags', 'lan_resource_tags', csv_row, 'LAN')
+
+        cp.log(f"Creating LAN resource for {lan_cidr}")
+        if lan_resource_tags:
+            cp.log(f"LAN resource tags: {lan_resource_tags}")
+        result = retry_on_failure(
+            n3_client.create_exchange_resource,
+            resource_name=f'{site_name}-lan',
+            resource_type='exchange_ipsubnet_resources',
+            site_id=site_id,
+            ip=lan_cidr,
+            **(({'tags': lan_resource_tags}) if lan_resource_tags else {})
+        )
+        if isinstance(result, str) and result.startswith('ERROR'):
+            cp.log(f"ERROR creating LAN resource: {result}")
 
-        if create_cp_host_resource:
-            cp.log(f"Creating FQDN resource for router hostname: cp.{local_domain}")
-            if cp_host_tags:
-                cp.log(f"CP host resource tags: {cp_host_tags}")
-            result = retry_on_failure(
-                n3_client.create_exchange_resource,
-                resource_name=f'{site_name}-cp',
-                resource_type='exchange_fqdn_resources',
-                site_id=site_id,
-                domain=f'cp.{local_domain}',
-                **(({'tags': cp_host_tags}) if cp_host_tags else {})
-            )
-            if isinstance(result, str) and result.startswith('ERROR'):
-                cp.log(f"ERROR creating CP host resource: {result}")
-            time.sleep(2)
+    create_resource_step(STATE_RES_LAN, 'create_lan_resource', 'LAN', create,
+                         lambda: site_resources_ready(n3_client, site_info))
 
-        if create_wildcard_resource:
-            cp.log(f"Creating wildcard FQDN resource: *.{local_domain}")
-            if wildcard_tags:
-                cp.log(f"Wildcard resource tags: {wildcard_tags}")
-            result = retry_on_failure(
-                n3_client.create_exchange_resource,
-                resource_name=f'{site_name}-wildcard',
-                resource_type='exchange_wildcard_fqdn_resources',
-                site_id=site_id,
-                domain=f'*.{local_domain}',
-                **(({'tags': wildcard_tags}) if wildcard_tags else {})
-            )
-            if isinstance(result, str) and result.startswith('ERROR'):
-                cp.log(f"ERROR creating wildcard resource: {result}")
 
-        # Create additional IP subnet resources from CSV (optional)
-        if csv_row and csv_row.get('extra_ip_resources'):
-            create_additional_ip_subnet_resources(n3_client, site_id, csv_row)
+def create_cp_host_resource(n3_client: ncm.NcmClientv3,
+                            site_info: Dict[str, Any],
+                            csv_row: Optional[Dict[str, str]] = None) -> None:
+    """Create the router hostname FQDN exchange resource if enabled.
 
-        # Create additional FQDN resources from CSV (optional)
-        if csv_row and csv_row.get('extra_fqdn_resources'):
-            create_additional_fqdn_resources(n3_client, site_id, csv_row)
+    Args:
+        n3_client: NCM v3 API client.
+        site_info: Site information dictionary.
+        csv_row: Matched CSV row from bulk config (optional).
 
-        set_state(STATE_RESOURCES, 'complete')
+    Raises:
+        Exception: If resource creation fails.
+
+    """
+    def create() -> None:
+        site_id, site_name = get_resource_site(site_info)
+        local_domain = get_resource_domain(site_name)
+        cp_host_tags = get_resource_tags(
+            'cp_host_tags', 'cp_host_tags', csv_row, 'CP host')
+
+        cp.log(f"Creating FQDN resource for router hostname: cp.{local_domain}")
+        if cp_host_tags:
+            cp.log(f"CP host resource tags: {cp_host_tags}")
+        result = retry_on_failure(
+            n3_client.create_exchange_resource,
+            resource_name=f'{site_name}-cp',
+            resource_type='exchange_fqdn_resources',
+            site_id=site_id,
+            domain=f'cp.{local_domain}',
+            **(({'tags': cp_host_tags}) if cp_host_tags else {})
+        )
+        if isinstance(result, str) and result.startswith('ERROR'):
+            cp.log(f"ERROR creating CP host resource: {result}")
+
+    create_resource_step(STATE_RES_CP_HOST, 'create_cp_host_resource', 'CP host', create,
+                         lambda: site_resources_ready(n3_client, site_info))
+
+
+def create_wildcard_resource(n3_client: ncm.NcmClientv3,
+                             site_info: Dict[str, Any],
+                             csv_row: Optional[Dict[str, str]] = None) -> None:
+    """Create the wildcard FQDN exchange resource if enabled.
+
+    Args:
+        n3_client: NCM v3 API client.
+        site_info: Site information dictionary.
+        csv_row: Matched CSV row from bulk config (optional).
+
+    Raises:
+        Exception: If resource creation fails.
+
+    """
+    def create() -> None:
+        site_id, site_name = get_resource_site(site_info)
+        local_domain = get_resource_domain(site_name)
+        wildcard_tags = get_resource_tags(
+            'wildcard_tags', 'wildcard_resource_tags', csv_row, 'Wildcard')
+
+        cp.log(f"Creating wildcard FQDN resource: *.{local_domain}")
+        if wildcard_tags:
+            cp.log(f"Wildcard resource tags: {wildcard_tags}")
+        result = retry_on_failure(
+            n3_client.create_exchange_resource,
+            resource_name=f'{site_name}-wildcard',
+            resource_type='exchange_wildcard_fqdn_resources',
+            site_id=site_id,
+            domain=f'*.{local_domain}',
+            **(({'tags': wildcard_tags}) if wildcard_tags else {})
+        )
+        if isinstance(result, str) and result.startswith('ERROR'):
+            cp.log(f"ERROR creating wildcard resource: {result}")
+
+    create_resource_step(STATE_RES_WILDCARD, 'create_wildcard_resource', 'Wildcard', create,
+                         lambda: site_resources_ready(n3_client, site_info))
+
+
+def create_extra_resources(n3_client: ncm.NcmClientv3,
+                           site_info: Dict[str, Any],
+                           csv_row: Optional[Dict[str, str]],
+                           field: str) -> None:
+    """Create the additional IP subnet or FQDN resources listed in the CSV row.
+
+    Args:
+        n3_client: NCM v3 API client.
+        site_info: Site information dictionary.
+        csv_row: Matched CSV row from bulk config (optional).
+        field: 'extra_ip_resources' or 'extra_fqdn_resources'.
+
+    Raises:
+        Exception: If the site ID is not available.
+
+    """
+    if field == 'extra_ip_resources':
+        state_key, label = STATE_RES_EXTRA_IP, 'Additional IP subnet'
+        create_func = create_additional_ip_subnet_resources
+    else:
+        state_key, label = STATE_RES_EXTRA_FQDN, 'Additional FQDN'
+        create_func = create_additional_fqdn_resources
+
+    listed = bool(csv_row and csv_row.get(field))
+
+    def create() -> None:
+        if listed:
+            site_id, _ = get_resource_site(site_info)
+            create_func(n3_client, site_id, csv_row)
+
+    ready = (lambda: site_resources_ready(n3_client, site_info)) if listed else None
+    create_resource_step(state_key, None, label, create, ready)
+
+
+def site_resources_ready(n3_client: ncm.NcmClientv3,
+                         site_info: Dict[str, Any]) -> bool:
+    """Check whether the new site accepts resource queries yet.
+
+    Args:
+        n3_client: NCM v3 API client.
+        site_info: Site information dictionary.
+
+    Returns:
+        bool: True if the site's resources can be listed.
+
+    """
+    if resources_started():
+        return True
+    site_id = site_info.get('id') or cp.get_appdata('exchange_site_id')
+    if not site_id:
+        # Let the resource steps report the missing site ID
+        return True
+    try:
+        resources = n3_client.get_exchange_resources(site_id=str(site_id))
     except Exception as e:
-        cp.log(f"ERROR creating exchange site resources: {e}")
-        raise
+        cp.log(f"Site {site_id} not ready for resources yet: {e}")
+        return False
+    return not isinstance(resources, str)
+
+
+def complete_exchange_site_resources() -> None:
+    """Mark exchange resource provisioning complete once every resource step ran."""
+    if get_state(STATE_RESOURCES) != 'complete':
+        set_state(STATE_RESOURCES, 'complete')
 
 
 def create_additional_ip_subnet_resources(
@@ -1440,7 +1555,6 @@ def create_additional_ip_subnet_resources(
                 cp.log(f"  ERROR creating IP subnet resource '{resource_name}': {result}")
             else:
                 cp.log(f"  Successfully created IP subnet resource: {resource_name}")
-            time.sleep(2)
         except Exception as e:
             cp.log(f"  ERROR creating IP subnet resource '{resource_name}': {e}")
 
@@ -1518,7 +1632,6 @@ def create_additional_fqdn_resources(
                 cp.log(f"  ERROR creating FQDN resource '{resource_name}': {result}")
             else:
                 cp.log(f"  Successfully created FQDN resource: {resource_name}")
-            time.sleep(2)
         except Exception as e:
             cp.log(f"  ERROR creating FQDN resource '{resource_name}': {e}")
 
@@ -1548,8 +1661,9 @@ def check_vpn_tunnel_status() -> bool:
 def wait_for_vpn_tunnel() -> None:
     """Wait for VPN tunnel to come up with retry logic.
     
-    Checks VPN tunnel status at regular intervals up to a maximum timeout.
-    Uses state tracking to enable recovery after failures.
+    Checks VPN tunnel status with backoff, at most VPN_TUNNEL_CHECK_INTERVAL
+    apart, up to a maximum timeout. Uses state tracking to enable recovery
+    after failures.
     
     Raises:
         RuntimeError: If VPN tunnel does not come up within timeout period.
@@ -1560,19 +1674,13 @@ def wait_for_vpn_tunnel() -> None:
     
     try:
         cp.log(f"Waiting for VPN tunnel to come up (timeout: {VPN_TUNNEL_CHECK_TIMEOUT}s)")
-        
-        for attempt in range(1, VPN_TUNNEL_MAX_ATTEMPTS + 1):
-            cp.log(f"VPN tunnel check attempt {attempt}/{VPN_TUNNEL_MAX_ATTEMPTS}")
-            
-            if check_vpn_tunnel_status():
-                cp.log("VPN tunnel is up")
-                set_state(STATE_VPN_TUNNEL, 'complete')
-                return
-            
-            if attempt < VPN_TUNNEL_MAX_ATTEMPTS:
-                cp.log(f"VPN tunnel not up yet, waiting {VPN_TUNNEL_CHECK_INTERVAL}s before retry")
-                time.sleep(VPN_TUNNEL_CHECK_INTERVAL)
-        
+
+        if poll_until(check_vpn_tunnel_status, VPN_TUNNEL_CHECK_TIMEOUT,
+                      maximum=VPN_TUNNEL_CHECK_INTERVAL):
+            cp.log("VPN tunnel is up")
+            set_state(STATE_VPN_TUNNEL, 'complete')
+            return
+
         # Timeout reached
         error_msg = f"VPN tunnel did not come up within {VPN_TUNNEL_CHECK_TIMEOUT}s timeout"
         cp.log(f"ERROR: {error_msg}")
@@ -1680,6 +1788,7 @@ def cleanup_state() -> None:
         STATE_SITE,
         STATE_DELETE_AUTO_RES,
         STATE_RESOURCES,
+        *RESOURCE_STATES,
         STATE_VPN_TUNNEL,
         STATE_DNS_FORCE,
         'bulk_config_system_id',
@@ -1696,18 +1805,181 @@ def cleanup_state() -> None:
     time.sleep(2)
 
 
-if __name__ == "__main__":
-    total_steps = 10
-    current_step = 0
+class ProvisioningStep:
+    """One step of the provisioning graph.
+
+    Args:
+        name: Unique step name, used by other steps' dependencies and as the
+            key of the step's result.
+        number: Step number shown in progress logs.
+        description: Progress message.
+        action: Function called with the results of completed steps, keyed
+            by step name. Its return value becomes this step's result.
+        depends_on: Names of steps that must complete first.
+
+    """
+
+    def __init__(self, name: str, number: int, description: str,
+                 action: Callable[[Dict[str, Any]], Any],
+                 depends_on: Tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.number = number
+        self.description = description
+        self.action = action
+        self.depends_on = depends_on
+
+    def run(self, results: Dict[str, Any]) -> Any:
+        """Log progress and run the action.
+
+        Args:
+            results: Results of completed steps.
+
+        Returns:
+            Any: Action return value.
+
+        """
+        log_progress(self.number, TOTAL_STEPS, self.description)
+        return self.action(results)
+
+
+def run_step_graph(steps: List[ProvisioningStep],
+                   max_workers: int = STEP_MAX_WORKERS) -> Dict[str, Any]:
+    """Run provisioning steps as soon as their dependencies complete.
+
+    Steps whose dependencies are all complete run concurrently, up to
+    max_workers at a time. Each step keeps its own persistent state, so
+    after a restart completed steps return immediately and the graph
+    resumes where it stopped. If a step fails, no new steps are started,
+    running steps are allowed to finish and the first error is raised.
+
+    Args:
+        steps: Steps to run.
+        max_workers: Maximum number of steps running at the same time.
 
+    Returns:
+        Dict[str, Any]: Result of each step, keyed by step name.
+
+    Raises:
+        ValueError: If a step depends on an unknown step.
+        RuntimeError: If the dependencies contain a cycle.
+        Exception: The first error raised by a step.
+
+    """
+    pending = {step.name: step for step in steps}
+    for step in steps:
+        unknown = [name for name in step.depends_on if name not in pending]
+        if unknown:
+            raise ValueError(f"Step '{step.name}' depends on unknown "
+                             f"step(s): {', '.join(unknown)}")
+
+    results = {}
+    running = {}
+    error = None
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while True:
+            if error is None:
+                for name, step in list(pending.items()):
+                    if all(dep in results for dep in step.depends_on):
+                        del pending[name]
+                        running[pool.submit(step.run, dict(results))] = step
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                try:
+                    results[step.name] = future.result()
+                except Exception as e:
+                    cp.log(f"ERROR in step '{step.name}': {e}")
+                    if error is None:
+                        error = e
+
+    if error is not None:
+        raise error
+    if pending:
+        raise RuntimeError(f"Step dependencies cannot be satisfied: "
+                           f"{', '.join(pending)}")
+    return results
+
+
+def build_provisioning_steps(n2_client: ncm.NcmClientv2,
+                             n3_client: ncm.NcmClientv3) -> List[ProvisioningStep]:
+    """Build the provisioning step graph for steps 3-10.
+
+    Licenses are applied while bulk configuration syncs, the exchange
+    resources are created concurrently (each one that will be created waits
+    for the site to accept it, see create_resource_step), and DNS force
+    redirect waits only for the site's VPN tunnel.
+
+    Args:
+        n2_client: NCM v2 API client.
+        n3_client: NCM v3 API client.
+
+    Returns:
+        List[ProvisioningStep]: Provisioning steps.
+
+    """
+    def validate(results: Dict[str, Any]) -> None:
+        if not validate_readiness(n2_client):
+            cp.log('ERROR: Readiness validation failed')
+            raise RuntimeError('Readiness validation failed')
+
+    def resource_step(name: str, description: str,
+                      create: Callable[..., None], *args: Any) -> ProvisioningStep:
+        return ProvisioningStep(
+            name, 8, description,
+            lambda r: create(n3_client, r['site'], r['bulk_config'], *args),
+            depends_on=('delete_auto_resources',))
+
+    resource_steps = [
+        resource_step('lan_resource', "Creating LAN resource",
+                      create_lan_resource),
+        resource_step('cp_host_resource', "Creating CP host resource",
+                      create_cp_host_resource),
+        resource_step('wildcard_resource', "Creating wildcard resource",
+                      create_wildcard_resource),
+        resource_step('extra_ip_resources', "Creating additional IP subnet resources",
+                      create_extra_resources, 'extra_ip_resources'),
+        resource_step('extra_fqdn_resources', "Creating additional FQDN resources",
+                      create_extra_resources, 'extra_fqdn_resources'),
+    ]
+    resource_names = tuple(step.name for step in resource_steps)
+
+    return [
+        ProvisioningStep('readiness', 3, "Validating readiness", validate),
+        ProvisioningStep('bulk_config', 4, "Applying bulk configuration",
+                         lambda r: self_bulk_config(n2_client),
+                         depends_on=('readiness',)),
+        ProvisioningStep('license', 5, "Applying licenses",
+                         lambda r: apply_license(n3_client),
+                         depends_on=('readiness',)),
+        ProvisioningStep('site', 6, "Creating exchange site",
+                         lambda r: create_exchange_site(n3_client, csv_row=r['bulk_config']),
+                         depends_on=('bulk_config', 'license')),
+        ProvisioningStep('delete_auto_resources', 7,
+                         "Deleting auto-created exchange resources",
+                         lambda r: delete_auto_created_resources(n3_client, site_info=r['site']),
+                         depends_on=('site',)),
+        *resource_steps,
+        ProvisioningStep('resources', 8, "Exchange resources created",
+                         lambda r: complete_exchange_site_resources(),
+                         depends_on=resource_names),
+        ProvisioningStep('dns_force', 9, "Configuring DNS force redirect",
+                         lambda r: configure_dns_force_redirect(csv_row=r['bulk_config']),
+                         depends_on=('site',)),
+        ProvisioningStep('prod_group', 10, "Moving to production group",
+                         lambda r: move_router_to_prod_group(n2_client),
+                         depends_on=('resources', 'dns_force')),
+    ]
+
+
+if __name__ == "__main__":
     try:
-        current_step += 1
-        log_progress(current_step, total_steps, "Waiting for system readiness")
+        log_progress(1, TOTAL_STEPS, "Waiting for system readiness")
         cp.wait_for_uptime(UPTIME_WAIT_SECONDS)
         cp.wait_for_wan_connection()
 
-        current_step += 1
-        log_progress(current_step, total_steps, "Building API keys")
+        log_progress(2, TOTAL_STEPS, "Building API keys")
         api_keys = build_keys()
         n2 = ncm.NcmClientv2(api_keys=api_keys)
         n3 = ncm.NcmClientv3(api_key=api_keys['Bearer Token'])
@@ -1724,48 +1996,8 @@ if __name__ == "__main__":
             validate_appdata('local_domain')
         cp.log("Configuration validation passed")
 
-        current_step += 1
-        log_progress(current_step, total_steps, "Validating readiness")
-        if not validate_readiness(n2):
-            cp.log('ERROR: Readiness validation failed')
-            raise RuntimeError('Readiness validation failed')
-
-        time.sleep(STEP_DELAY_SECONDS)
-
-        current_step += 1
-        log_progress(current_step, total_steps, "Applying bulk configuration")
-        csv_row = self_bulk_config(n2)
-        time.sleep(STEP_DELAY_SECONDS)
-
-        current_step += 1
-        log_progress(current_step, total_steps, "Applying licenses")
-        apply_license(n3)
-
-        current_step += 1
-        log_progress(current_step, total_steps, "Creating exchange site")
-        site_info = create_exchange_site(n3, csv_row=csv_row)
-        time.sleep(STEP_DELAY_SECONDS)
-
-        current_step += 1
-        log_progress(current_step, total_steps,
-                     "Deleting auto-created exchange resources")
-        delete_auto_created_resources(n3, site_info=site_info)
-        time.sleep(STEP_DELAY_SECONDS)
-
-        current_step += 1
-        log_progress(current_step, total_steps, "Creating exchange resources")
-        create_exchange_site_resources(n3, site_info=site_info, csv_row=csv_row)
-        time.sleep(STEP_DELAY_SECONDS)
-
-        current_step += 1
-        log_progress(current_step, total_steps,
-                     "Configuring DNS force redirect")
-        configure_dns_force_redirect(csv_row=csv_row)
-
-        current_step += 1
-        log_progress(current_step, total_steps, "Moving to production group")
+        run_step_graph(build_provisioning_steps(n2, n3))
         cp.log('NCX Self Provisioning Complete - All steps successful')
-        move_router_to_prod_group(n2)
 
         time.sleep(COMPLETION_WAIT_SECONDS)
 
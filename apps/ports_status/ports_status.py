@@ -6,14 +6,18 @@
     This application will set the device description to visually show
     the LAN/WAN/WWAN/Modem/IP Verify status
 
-    Description is updated every 5 seconds, but only synced to NCM
-    if there is a change from the current description
+    Port state is kept in memory, fed by one status snapshot per cycle and
+    by change events on each WAN summary, LAN link and IP Verify result.
+    The description is only rendered when a port state changes, and only
+    written once it has been stable for WRITE_DEBOUNCE seconds (a config
+    write is persisted and synced to NCM)
 
     Sample Description Output
     ===================
     WAN: 🟢 LAN: 🟢 ⚫️ ⚫️ ⚫️ ⚫️ 🟢 ⚫️ ⚫️ ⚫️ MDM: 🟡 MDM: ⚫️ IPV: 🟢
 """
 
+import threading
 import time
 import cp
 
@@ -21,142 +25,231 @@ APP_NAME = 'PORTS_STATUS'
 DEBUG = False
 MODELS_WITHOUT_WAN = ['CBA', 'W18', 'W200', 'W400', 'L950', 'IBR200', '4250']
 
-cp.log('Starting...')
-
-if DEBUG:
-    cp.log("DEBUG ENABLED")
-
-if DEBUG:
-    cp.log("Getting Model")
-
-"""Get model number, since some models don't have ethernet WAN"""
-model = ''
-model = cp.get('/status/product_info/product_name')
-if DEBUG:
-    cp.log(model)
-
-while True:
-    try:
-        ports_status = ""
-        is_available_modem = 0
-        is_available_wan = 0
-        is_available_wwan = 0
-        is_configured_wwan = 0
-
-        wans = cp.get('/status/wan/devices')
-        mdm_present = False
-        for wan in wans:
-            if 'mdm' in wan:
-                mdm_present = True
-        ports = cp.get('/status/ethernet')
-
-        if wans and ports and mdm_present:
-            """Get status of ethernet WANs"""
-            for wan in (wan for wan in wans if 'ethernet' in wan):
-
-                summary = cp.get('/status/wan/devices/{}/status/summary'.format(wan))
-                if summary:
-                    if 'connected' in summary:
-                        is_available_wan = 1
-                        ports_status += "WAN: 🟢 "
-
-                    elif 'available' in summary or 'standby' in summary:
-                        is_available_wan = 2
-                        ports_status += "WAN: 🟡 "
-
-                    elif 'error' in summary:
-                        continue
-
-            """If no active/standby WANs are found, show offline"""
-            if is_available_wan == 0 and not any(x in model for x in MODELS_WITHOUT_WAN):
-                ports_status += "WAN: ⚫️ "
-
-            ports_status += "LAN:"
-
-            """Get status of all ethernet ports"""
-            for port in ports:
-                """Ignore ethernet0 (treat as WAN) except for IBR200/CBA"""
-                if (port['port'] == 0 and any(x in model for x in MODELS_WITHOUT_WAN)) or (port['port'] >= 1):
-                    if port['link'] == "up":
-                        ports_status += " 🟢 "
+# Snapshot interval without change events
+POLL_INTERVAL = 5
+# Snapshot interval with change events, to pick up added WANs, ports and tests
+RESYNC_INTERVAL = 60
+# Write the description once it has not changed for this long...
+WRITE_DEBOUNCE = 5
+# ...but never hold a changed description back longer than this
+WRITE_MAX_DELAY = 30
+
+STANDBY_STATES = ('available', 'standby', 'suspended', 'connecting', 'transitioning',
+                  'unready', 'unconfigured', 'operation failed', 'switch')
+
+
+class PortModel:
+    """In-memory port state. version changes whenever a state changes."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.version = 0
+        self.wans = {}  # uid -> status summary
+        self.ports = []  # [port number, link] in status/ethernet order
+        self.ipverify = {}  # test name -> pass
+        self.subscribed = set()
+
+    def load(self, wans, ports, ipverifys):
+        """Replace the state from a snapshot."""
+        wans = {uid: ((dev or {}).get('status') or {}).get('summary')
+                for uid, dev in (wans or {}).items()}
+        ports = [[port['port'], port['link']] for port in ports or []]
+        ipverify = {name: (test or {}).get('pass') for name, test in (ipverifys or {}).items()}
+        with self.lock:
+            if (wans, ports, ipverify) != (self.wans, self.ports, self.ipverify):
+                self.wans, self.ports, self.ipverify = wans, ports, ipverify
+                self.version += 1
+
+    def set(self, path, value):
+        """Apply a change event for one of the subscribed paths."""
+        parts = path.strip('/').split('/')
+        with self.lock:
+            if parts[1] == 'wan' and parts[3] in self.wans:
+                old, self.wans[parts[3]] = self.wans[parts[3]], value
+            elif parts[1] == 'ethernet' and int(parts[2]) < len(self.ports):
+                old, self.ports[int(parts[2])][1] = self.ports[int(parts[2])][1], value
+            elif parts[1] == 'ipverify' and parts[2] in self.ipverify:
+                old, self.ipverify[parts[2]] = self.ipverify[parts[2]], value
+            else:
+                return
+            if old != value:
+                self.version += 1
+                self.wake.set()
+
+    def paths(self):
+        """Status paths whose changes the model follows."""
+        with self.lock:
+            return (['status/wan/devices/{}/status/summary'.format(uid) for uid in self.wans] +
+                    ['status/ethernet/{}/link'.format(i) for i in range(len(self.ports))] +
+                    ['status/ipverify/{}/pass'.format(name) for name in self.ipverify])
+
+    def render(self, model):
+        """Return the description string, or None if there is nothing to show."""
+        with self.lock:
+            return render(model, dict(self.wans), [list(p) for p in self.ports], dict(self.ipverify))
+
+
+def render(model, wans, ports, ipverify):
+    ports_status = ""
+    is_available_wan = 0
+    is_available_wwan = 0
+    is_configured_wwan = 0
+
+    mdm_present = any('mdm' in wan for wan in wans)
+    if not (wans and ports and mdm_present):
+        return None
+
+    """Get status of ethernet WANs"""
+    for wan in (wan for wan in wans if 'ethernet' in wan):
+        summary = wans[wan]
+        if summary:
+            if 'connected' in summary:
+                is_available_wan = 1
+                ports_status += "WAN: 🟢 "
+
+            elif 'available' in summary or 'standby' in summary:
+                is_available_wan = 2
+                ports_status += "WAN: 🟡 "
+
+    """If no active/standby WANs are found, show offline"""
+    if is_available_wan == 0 and not any(x in model for x in MODELS_WITHOUT_WAN):
+        ports_status += "WAN: ⚫️ "
+
+    ports_status += "LAN:"
+
+    """Get status of all ethernet ports"""
+    for port, link in ports:
+        """Ignore ethernet0 (treat as WAN) except for IBR200/CBA"""
+        if (port == 0 and any(x in model for x in MODELS_WITHOUT_WAN)) or (port >= 1):
+            if link == "up":
+                ports_status += " 🟢 "
+            else:
+                ports_status += " ⚫️ "
+
+    """Get status of all modems. Each modem gets its own indicator"""
+    for wan in (wan for wan in wans if 'mdm' in wan):
+        summary = wans[wan]
+        if summary:
+            if 'connected' in summary:
+                ports_status += "MDM: 🟢 "
+            elif any(state in summary for state in STANDBY_STATES):
+                ports_status += "MDM: 🟡 "
+            else:
+                ports_status += "MDM: ⚫️ "
+
+    for wan in (wan for wan in wans if 'wwan' in wan):
+        is_configured_wwan = 1
+        summary = wans[wan]
+        if summary:
+            if 'connected' in summary:
+                is_available_wwan = 1
+                ports_status += "WWAN: 🟢 "
+                """Stop checking if active WWAN is found"""
+                break
+
+            elif any(state in summary for state in STANDBY_STATES):
+                is_available_wwan = 2
+                ports_status += "WWAN: 🟡 "
+                """If standby WWAN found, keep checking for an active one"""
+
+    """If no active/standby WANs are found, show offline"""
+    if is_available_wwan == 0 and is_configured_wwan == 1:
+        ports_status += "WWAN: ⚫️ "
+
+    if ipverify:
+        ports_status += "IPV:"
+        for testpass in ipverify.values():
+            if testpass:
+                ports_status += " 🟢 "
+            else:
+                ports_status += " ⚫️ "
+
+    return ports_status
+
+
+def take_snapshot(port_model):
+    """Load the model with one request per status tree."""
+    port_model.load(cp.get('/status/wan/devices'), cp.get('/status/ethernet'),
+                    cp.get('/status/ipverify'))
+
+
+def subscribe(port_model):
+    """Register for changes of any newly seen path. Returns False if change
+    events are not available."""
+    for path in port_model.paths():
+        if path in port_model.subscribed:
+            continue
+        result = cp.register('put', path, lambda path, value, args: port_model.set(path, value))
+        if not result or result.get('status') == 'error':
+            return False
+        port_model.subscribed.add(path)
+    return True
+
+
+if __name__ == '__main__':
+    cp.log('Starting...')
+
+    if DEBUG:
+        cp.log("DEBUG ENABLED")
+
+    if DEBUG:
+        cp.log("Getting Model")
+
+    """Get model number, since some models don't have ethernet WAN"""
+    model = cp.get('/status/product_info/product_name') or ''
+    if DEBUG:
+        cp.log(model)
+
+    port_model = PortModel()
+    events = True
+    written = cp.get('config/system/desc')
+    rendered_version = None
+    pending = None
+    changed_at = first_changed_at = 0
+    next_snapshot = 0
+
+    while True:
+        try:
+            now = time.monotonic()
+            if now >= next_snapshot:
+                next_snapshot = now + POLL_INTERVAL
+                take_snapshot(port_model)
+                if events and not subscribe(port_model):
+                    events = False
+                    cp.log('Change events not available; polling every {}s'.format(POLL_INTERVAL))
+                if events:
+                    next_snapshot = now + RESYNC_INTERVAL
+
+            if port_model.version != rendered_version:
+                rendered_version = port_model.version
+                ports_status = port_model.render(model)
+                if ports_status is not None and ports_status != pending:
+                    if ports_status == written:
+                        """Changed back before it was written"""
+                        pending = None
                     else:
-                        ports_status += " ⚫️ "
-
-            """Get status of all modems"""
-            for wan in (wan for wan in wans if 'mdm' in wan):
-
-                """Filter to only track modems. Will show green if at least one modem is active"""
-                if 'mdm' in wan:
-
-                    """Get modem status for each modem"""
-                    summary = cp.get('/status/wan/devices/{}/status/summary'.format(wan))
-
-                    if summary:
-                        #cp.log("Modem {} Summary: {}".format(wan, summary))
-                        if 'connected' in summary:
-                            is_available_modem = 1
-                            ports_status += "MDM: 🟢 "
-
-                        elif 'available' in summary or 'standby' in summary or \
-                                'suspended' in summary or 'connecting' in summary or \
-                                'transitioning' in summary or 'unready' in summary or \
-                                'unconfigured' in summary or 'operation failed' in summary or \
-                                'switch' in summary:
-                            is_available_modem = 2
-                            ports_status += "MDM: 🟡 "
-
-                        else:
-                            ports_status += "MDM: ⚫️ "
-
-            for wan in (wan for wan in wans if 'wwan' in wan):
-                is_configured_wwan = 1
-                summary = cp.get('/status/wan/devices/{}/status/summary'.format(wan))
-
-                if summary:
-
-                    if 'connected' in summary:
-                        is_available_wwan = 1
-                        ports_status += "WWAN: 🟢 "
-                        """Stop checking if active WWAN is found"""
-                        break
-
-                    elif 'available' in summary or 'standby' in summary or \
-                            'suspended' in summary or 'connecting' in summary or \
-                            'transitioning' in summary or 'unready' in summary or \
-                            'unconfigured' in summary or 'operation failed' in summary or \
-                            'switch' in summary:
-                        is_available_wwan = 2
-                        ports_status += "WWAN: 🟡 "
-                        """If standby WWAN found, keep checking for an active one"""
-                        continue
-
-                    elif 'error' in summary:
-                        continue
-
-            """If no active/standby WANs are found, show offline"""
-            if is_available_wwan == 0 and is_configured_wwan == 1:
-                ports_status += "WWAN: ⚫️ "
-
-            ipverifys = cp.get('/status/ipverify')
-            if ipverifys:
-                ports_status += "IPV:"
-
-                for ipverify in ipverifys:
-                    testpass = cp.get('/status/ipverify/{}/pass'.format(ipverify))
-                    if testpass:
-                        ports_status += " 🟢 "
-                    else:
-                        ports_status += " ⚫️ "
-
+                        if pending is None:
+                            first_changed_at = now
+                        pending = ports_status
+                        changed_at = now
 
             """Write string to description field"""
-            if DEBUG:
-                cp.log("WRITING DESCRIPTION")
-                cp.log(ports_status)
-            cp.put('config/system/desc', ports_status)
-
-    except Exception as err:
-        cp.log("Failed with exception={} err={}".format(type(err), str(err)))
-
-    """Wait 5 seconds before checking again"""
-    time.sleep(5)
+            if pending is not None and (now - changed_at >= WRITE_DEBOUNCE or
+                                        now - first_changed_at >= WRITE_MAX_DELAY):
+                if DEBUG:
+                    cp.log("WRITING DESCRIPTION")
+                    cp.log(pending)
+                cp.put('config/system/desc', pending)
+                written, pending = pending, None
+
+        except Exception as err:
+            cp.log("Failed with exception={} err={}".format(type(err), str(err)))
+
+        """Sleep until the next snapshot or write, or a change event"""
+        timeout = next_snapshot - time.monotonic()
+        if pending is not None:
+            timeout = min(timeout, changed_at + WRITE_DEBOUNCE - time.monotonic(),
+                          first_changed_at + WRITE_MAX_DELAY - time.monotonic())
+        port_model.wake.wait(max(0, timeout))
+        port_model.wake.clear()
@@ -11,6 +11,9 @@ import threading
 import os
 import signal
 import sys
+import gzip
+import hashlib
+import html as html_lib
 from datetime import datetime
 import http.server
 import socketserver
@@ -19,6 +22,15 @@ import socketserver
 power_data = []
 data_lock = threading.Lock()
 
+# Bumped under data_lock whenever power_data or the min/max stats change,
+# so /api/power-data can reuse its serialized response between changes
+data_version = 0
+power_data_cache = None  # (version, body, gzip_body, etag)
+
+# Page shell compiled once at web server start: (body, gzip_body, etag)
+compiled_page = None
+device_name = ''
+
 # Global web server reference for cleanup
 web_server = None
 shutdown_requested = False
@@ -396,28 +408,27 @@ def save_data_to_file(data, filename):
             if not os.path.exists(directory):
                 raise Exception(f"Directory {directory} does not exist and could not be created")
         
+        # Serialize in memory first; json.dumps raises on anything that
+        # can't be written as valid JSON, so no read-back is needed
+        try:
+            payload = json.dumps(data, separators=(',', ':')).encode()
+        except (TypeError, ValueError) as e:
+            cp.log(f"Generated invalid JSON for {filename}: {e}")
+            return False
+        
         # Create temporary file for atomic write
         temp_filename = filename + '.tmp'
         
-        # Write to temporary file first
-        with open(temp_filename, 'w') as f:
-            json.dump(data, f, indent=2)
-        
-        # Validate the written JSON by reading it back
-        try:
-            with open(temp_filename, 'r') as f:
-                json.load(f)  # This will raise an exception if JSON is invalid
-        except json.JSONDecodeError as e:
-            cp.log(f"Generated invalid JSON for {filename}: {e}")
-            # Clean up temp file
-            if os.path.exists(temp_filename):
-                os.remove(temp_filename)
+        # Write to temporary file first and check the full payload landed
+        with open(temp_filename, 'wb') as f:
+            written = f.write(payload)
+        if written != len(payload):
+            cp.log(f"Short write for {filename}: {written} of {len(payload)} bytes")
+            os.remove(temp_filename)
             return False
         
-        # Atomic move: rename temp file to final file
-        if os.path.exists(filename):
-            os.remove(filename)
-        os.rename(temp_filename, filename)
+        # Atomic move: rename temp file over the final file
+        os.replace(temp_filename, filename)
         return True
         
     except Exception as e:
@@ -557,6 +568,7 @@ def power_monitor():
     global min_voltage, max_voltage, min_voltage_timestamp, max_voltage_timestamp
     global power_data, last_lights_update, shutdown_requested
     global previous_threshold_state
+    global data_version
     
     # Ensure data directory exists
     ensure_data_directory()
@@ -599,6 +611,8 @@ def power_monitor():
             clear_corrupted_data()
         else:
             load_stats_from_file()
+    with data_lock:
+        data_version += 1
     
     # Save the current interval
     save_interval_to_file(interval)
@@ -721,6 +735,8 @@ def power_monitor():
                         last_lights_update = current_time
 
                 with data_lock:
+                    data_version += 1
+                    
                     # Store power data immediately
                     power_data.append(power_info)
                     
@@ -782,7 +798,6 @@ def power_monitor():
 
 def create_html_page():
     """Create the HTML page for the web interface"""
-    device_name = cp.get_name()
     html = """
 <!DOCTYPE html>
 <html>
@@ -1057,7 +1072,7 @@ def create_html_page():
     <div class="container">
         <div class="header">
             <h1>Power Dashboard</h1>
-            <div class="device-name" id="device-name">""" + device_name + """</div>
+            <div class="device-name" id="device-name">""" + html_lib.escape(device_name or '') + """</div>
         </div>
         
         <div class="main-content">
@@ -1686,6 +1701,9 @@ def create_html_page():
         function updateAllData() {
             fetchData().then(data => {
                 console.log('Fetched data:', data);
+                if (data.device_name) {
+                    document.getElementById('device-name').textContent = data.device_name;
+                }
                 if (data.power_data && data.power_data.length > 0) {
                     // Get current time range selection
                     const timeRange = document.getElementById('timeRange').value;
@@ -1766,42 +1784,78 @@ def create_html_page():
     return html
 
 
+def compile_response(body):
+    """Return (body, gzip_body, etag) for a response served from memory"""
+    return body, gzip.compress(body, 6), '"' + hashlib.md5(body).hexdigest() + '"'
+
+def compile_page():
+    """Render the page shell once; data is fetched from /api/power-data"""
+    global compiled_page, device_name
+    device_name = cp.get_name() or ''
+    compiled_page = compile_response(create_html_page().encode())
+
+def get_power_data_response():
+    """Return the cached /api/power-data response, rebuilding it after data changes"""
+    global power_data_cache
+    with data_lock:
+        if power_data_cache and power_data_cache[0] == data_version:
+            return power_data_cache[1:]
+        data = {
+            'device_name': device_name,
+            'power_data': power_data,
+            'min_current': min_current,
+            'max_current': max_current,
+            'min_current_timestamp': min_current_timestamp,
+            'max_current_timestamp': max_current_timestamp,
+            'min_total': min_total,
+            'max_total': max_total,
+            'min_total_timestamp': min_total_timestamp,
+            'max_total_timestamp': max_total_timestamp,
+            'min_voltage': min_voltage,
+            'max_voltage': max_voltage,
+            'min_voltage_timestamp': min_voltage_timestamp,
+            'max_voltage_timestamp': max_voltage_timestamp,
+            'is_loading': False
+        }
+        power_data_cache = (data_version,) + compile_response(
+            json.dumps(data, separators=(',', ':')).encode())
+        return power_data_cache[1:]
+
 def start_web_server():
     """Start a simple HTTP server on configured port (default 8000)"""
     global web_server, shutdown_requested
     
     # Get port from appdata, default to 8000
     preferred_port = get_web_server_port()
+    compile_page()
     
     class PowerTrackerHandler(http.server.SimpleHTTPRequestHandler):
+        def send_compiled(self, content_type, compiled):
+            """Send a precompiled response with ETag revalidation and gzip"""
+            body, gzip_body, etag = compiled
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                body = gzip_body
+            self.send_response(200)
+            self.send_header('Content-type', content_type)
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('ETag', etag)
+            self.send_header('Vary', 'Accept-Encoding')
+            if body is gzip_body:
+                self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
         def do_GET(self):
             if self.path == '/':
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html')
-                self.end_headers()
-                self.wfile.write(create_html_page().encode())
+                self.send_compiled('text/html', compiled_page)
             elif self.path == '/api/power-data':
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                with data_lock:
-                    data = {
-                        'power_data': power_data,
-                        'min_current': min_current,
-                        'max_current': max_current,
-                        'min_current_timestamp': min_current_timestamp,
-                        'max_current_timestamp': max_current_timestamp,
-                        'min_total': min_total,
-                        'max_total': max_total,
-                        'min_total_timestamp': min_total_timestamp,
-                        'max_total_timestamp': max_total_timestamp,
-                        'min_voltage': min_voltage,
-                        'max_voltage': max_voltage,
-                        'min_voltage_timestamp': min_voltage_timestamp,
-                        'max_voltage_timestamp': max_voltage_timestamp,
-                        'is_loading': False
-                    }
-                self.wfile.write(json.dumps(data).encode())
+                self.send_compiled('application/json', get_power_data_response())
             elif self.path == '/api/live-power-data':
                 self.send_response(200)
                 self.send_header('Content-type', 'application/json')
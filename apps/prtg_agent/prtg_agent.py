@@ -70,48 +70,118 @@ def save_config(config):
         cp.put_appdata(key, value)
 
 
-def resolve_wildcard_path(path):
+# Compiled path patterns, keyed by the configured path string. Paths rarely
+# change between cycles so the split/root computation is done once per path.
+_path_patterns = {}
+
+
+def compile_path(path):
+    """
+    Split a path into segments and find its snapshot root.
+    Returns (segments, root_depth) where root_depth is the number of leading
+    segments before the first wildcard (len(segments) if there is none).
+    """
+    pattern = _path_patterns.get(path)
+    if pattern is None:
+        segments = tuple(part for part in path.strip('/').split('/') if part)
+        root_depth = segments.index('*') if '*' in segments else len(segments)
+        pattern = _path_patterns[path] = (segments, root_depth)
+    return pattern
+
+
+class PathSnapshot(object):
+    """
+    In-memory view of the router tree for one collection cycle.
+    Every wildcard path is rooted at the segments before its first '*'. Roots
+    that sit under another root are folded into it, so each distinct subtree
+    is fetched with a single cp.get and all wildcards (and any plain paths
+    under the same subtree) are expanded from memory.
+    """
+
+    def __init__(self, paths=()):
+        self.trees = {}
+        roots = set()
+        for path in paths:
+            segments, root_depth = compile_path(path)
+            if root_depth < len(segments):
+                roots.add(segments[:root_depth])
+        for root in sorted(roots, key=len):
+            if not any(root[:len(r)] == r for r in self.trees):
+                self.trees[root] = cp.get('/'.join(root))
+
+    def _find_tree(self, segments):
+        """Return (root, tree) for the snapshot subtree covering segments."""
+        for root, tree in self.trees.items():
+            if segments[:len(root)] == root:
+                return root, tree
+        return None, None
+
+    def get(self, path):
+        """Get a plain path, from the snapshot if it covers it, else cp.get."""
+        segments = compile_path(path)[0]
+        root, node = self._find_tree(segments)
+        if root is None:
+            return cp.get(path)
+        for part in segments[len(root):]:
+            node = _child(node, part)
+            if node is None:
+                return None
+        return node
+
+    def resolve(self, path):
+        """
+        Resolve a path with wildcards into actual path/value pairs.
+        Supports * as a wildcard for one path segment.
+        Returns list of (resolved_path, value) tuples.
+        """
+        segments, root_depth = compile_path(path)
+        if root_depth == len(segments):
+            value = self.get(path)
+            return [(path, value)] if value is not None else []
+
+        root, node = self._find_tree(segments)
+        if root is None:
+            return []
+        results = []
+        self._expand(node, list(root), segments[len(root):], results)
+        return results
+
+    def _expand(self, node, prefix, remaining, results):
+        """Walk node along remaining segments, branching on each '*'."""
+        for i, part in enumerate(remaining):
+            if part == '*':
+                if not isinstance(node, dict):
+                    return
+                for key, child in node.items():
+                    self._expand(child, prefix + [key], remaining[i + 1:], results)
+                return
+            node = _child(node, part)
+            if node is None:
+                return
+            prefix.append(part)
+        if node is not None:
+            results.append(('/'.join(prefix), node))
+
+
+def _child(node, part):
+    """Step one segment into a dict (by key) or list (by index)."""
+    if isinstance(node, dict):
+        return node.get(part)
+    if isinstance(node, list) and part.isdigit() and int(part) < len(node):
+        return node[int(part)]
+    return None
+
+
+def resolve_wildcard_path(path, snapshot=None):
     """
     Resolve a path with wildcards into actual path/value pairs.
     Supports * as a wildcard for one path segment.
     Returns list of (resolved_path, value) tuples.
+    Pass a PathSnapshot to share fetched subtrees between paths in a cycle.
     """
-    parts = path.split('/')
-    wildcard_idx = None
-    for i, part in enumerate(parts):
-        if part == '*':
-            wildcard_idx = i
-            break
-
-    if wildcard_idx is None:
-        # No wildcard, just get the value directly
-        value = cp.get(path)
-        if value is not None:
-            return [(path, value)]
-        return []
-
-    # Get the parent path up to the wildcard
-    parent_path = '/'.join(parts[:wildcard_idx])
-    parent_data = cp.get(parent_path)
-    if not parent_data or not isinstance(parent_data, dict):
-        return []
-
-    results = []
-    remaining_parts = parts[wildcard_idx + 1:]
-    remaining_path = '/'.join(remaining_parts)
-
-    for key in parent_data:
-        if remaining_path:
-            full_path = '{}/{}/{}'.format(parent_path, key, remaining_path)
-            # Recurse in case there are more wildcards
-            results.extend(resolve_wildcard_path(full_path))
-        else:
-            full_path = '{}/{}'.format(parent_path, key)
-            value = parent_data[key]
-            if value is not None:
-                results.append((full_path, value))
-
-    return results
+    if snapshot is None:
+        snapshot = PathSnapshot([path])
+    return snapshot.resolve(path)
 
 
 def collect_data(paths):
@@ -125,12 +195,17 @@ def collect_data(paths):
     """
     channels = []
     skipped = []
+    try:
+        snapshot = PathSnapshot(paths)
+    except Exception as e:
+        cp.log('Error fetching snapshot: {}'.format(e))
+        snapshot = PathSnapshot()
     # Cache device friendly names to avoid repeated lookups
-    device_names = _get_device_names()
+    device_names = _get_device_names(snapshot)
 
     for path in paths:
         try:
-            resolved = resolve_wildcard_path(path)
+            resolved = snapshot.resolve(path)
             if not resolved:
                 skipped.append((path, None))
                 continue
@@ -268,17 +343,20 @@ def _stringify_skip(value):
     return text if len(text) <= 200 else text[:200] + '...'
 
 
-def _get_device_names():
+def _get_device_names(snapshot=None):
     """
     Build a map of device_id -> friendly name using info/product or info fields.
     e.g. 'ethernet-wan' -> 'Multi Gigabit Ethernet Switch'
          'mdm-abcd1234' -> 'int1 sim1' or product name
+    Reads from the cycle's snapshot when it already holds status/wan/devices.
     """
     names = {}
+    if snapshot is None:
+        snapshot = PathSnapshot()
     try:
-        devices = cp.get('status/wan/devices') or {}
-        for dev_id in devices:
-            info = cp.get('status/wan/devices/{}/info'.format(dev_id))
+        devices = snapshot.get('status/wan/devices') or {}
+        for dev_id, device in devices.items():
+            info = device.get('info') if isinstance(device, dict) else None
             if not info:
                 continue
             # Try product field first (user-confirmed it exists)
@@ -113,6 +113,80 @@ if _is_ncos and _enable_logging:
 logging.getLogger('urllib3.connectionpool').setLevel(logging.WARNING)
 
 
+# =============================================================================
+# INTERNAL: Call Instrumentation
+# =============================================================================
+
+# Upper bounds (ms) of the latency histogram buckets; slower calls land in
+# a final overflow bucket.
+_STATS_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+_STATS_MAX_PATHS = 1000
+_PATH_COMMANDS = ('get', 'put', 'post', 'delete', 'decrypt')
+
+_stats_enabled = False
+_stats = {}  # type: Dict[Tuple[str, str], _PathStats]
+_stats_lock = threading.Lock()
+_stats_dump_thread = None
+_stats_dump_interval = 0.0
+
+
+class _PathStats:
+    """Counters for one (method, path) pair."""
+
+    __slots__ = ('calls', 'errors', 'bytes_sent', 'bytes_received',
+                 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(_STATS_BUCKETS_MS) + 1)
+
+
+def _record_call(method: str, path: str, sent: int, received: int,
+                 elapsed: float, ok: bool) -> None:
+    """Add one config store or HTTP call to the per-path statistics."""
+    key = (method, path.strip('/'))
+    ms = elapsed * 1000
+    bucket = 0
+    while bucket < len(_STATS_BUCKETS_MS) and ms > _STATS_BUCKETS_MS[bucket]:
+        bucket += 1
+    with _stats_lock:
+        stats = _stats.get(key)
+        if stats is None:
+            if len(_stats) >= _STATS_MAX_PATHS:
+                key = (method, '<other>')
+                stats = _stats.get(key)
+            if stats is None:
+                stats = _stats[key] = _PathStats()
+        stats.calls += 1
+        stats.errors += not ok
+        stats.bytes_sent += sent
+        stats.bytes_received += received
+        stats.total += elapsed
+        stats.max = max(stats.max, elapsed)
+        stats.buckets[bucket] += 1
+
+
+def _http_request(method: str, path: str, url: str, sent: int = 0, **kwargs: Any):
+    """Issue a requests call, recording it when instrumentation is enabled."""
+    if not _stats_enabled:
+        return requests.request(method, url, **kwargs)
+    resp = None
+    start = time.monotonic()
+    try:
+        resp = requests.request(method, url, **kwargs)
+        return resp
+    finally:
+        _record_call(method.lower(), path, sent,
+                     len(resp.content) if resp is not None else 0,
+                     time.monotonic() - start,
+                     resp is not None and resp.status_code < 400)
+
+
 # =============================================================================
 # INTERNAL: Socket Communication (Router)
 # =============================================================================
@@ -132,6 +206,11 @@ def _sock_receive(sock: socket.socket) -> Optional[Dict[str, Any]]:
             - status (str): Response status ('ok', 'error', 'timeout').
             - data (Any): Parsed JSON body or stripped string.
     """
+    return _sock_receive_sized(sock)[0]
+
+
+def _sock_receive_sized(sock: socket.socket) -> Tuple[Dict[str, Any], int]:
+    """Like _sock_receive, but also return the number of bytes received."""
     sock.settimeout(_RECV_TIMEOUT)
     data = b""
     eoh = -1
@@ -140,20 +219,20 @@ def _sock_receive(sock: socket.socket) -> Optional[Dict[str, Any]]:
         try:
             buf = sock.recv(_MAX_PACKET_SIZE)
         except socket.timeout:
-            return {"status": "timeout", "data": None}
+            return {"status": "timeout", "data": None}, len(data)
         if not buf:
             break
         data += buf
         eoh = data.find(_END_OF_HEADER)
 
     if eoh < 0:
-        return {"status": "error", "data": None}
+        return {"status": "error", "data": None}, len(data)
 
     status_match = _STATUS_HEADER_RE.search(data)
     content_len_match = _CONTENT_LENGTH_HEADER_RE.search(data)
 
     if not status_match or not content_len_match:
-        return {"status": "error", "data": None}
+        return {"status": "error", "data": None}, len(data)
 
     status_hdr = status_match.group(0)[8:]
     content_len = int(content_len_match.group(0)[16:])
@@ -172,7 +251,7 @@ def _sock_receive(sock: socket.socket) -> Optional[Dict[str, Any]]:
     except (json.JSONDecodeError, ValueError):
         result = body.strip()
 
-    return {"status": status_hdr.decode(), "data": result}
+    return {"status": status_hdr.decode(), "data": result}, len(data)
 
 
 def _dispatch(cmd: str) -> Optional[Dict[str, Any]]:
@@ -184,6 +263,8 @@ def _dispatch(cmd: str) -> Optional[Dict[str, Any]]:
             - data (Any): Parsed response body.
         Returns None on socket/connection failure.
     """
+    if _stats_enabled:
+        return _dispatch_recorded(cmd)
     try:
         with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
             sock.connect('/var/tmp/cs.sock')
@@ -194,6 +275,28 @@ def _dispatch(cmd: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+def _dispatch_recorded(cmd: str) -> Optional[Dict[str, Any]]:
+    """_dispatch with per-path call statistics."""
+    method, _, rest = cmd.partition('\n')
+    path = rest.partition('\n')[0] if method in _PATH_COMMANDS else ''
+    payload = cmd.encode('ascii')
+    result, received = None, 0
+    start = time.monotonic()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect('/var/tmp/cs.sock')
+            sock.sendall(payload)
+            result, received = _sock_receive_sized(sock)
+            return result
+    except Exception as e:
+        log(f"Dispatch error: {e}")
+        return None
+    finally:
+        _record_call(method, path, len(payload), received,
+                     time.monotonic() - start,
+                     result is not None and result.get('status') == 'ok')
+
+
 # =============================================================================
 # INTERNAL: Remote HTTP Communication (Development)
 # =============================================================================
@@ -340,7 +443,7 @@ def get(base: str, query: str = '', tree: int = 0) -> Any:
         device_ip, _, _ = _get_credentials()
         url = f'https://{device_ip}/api/{base}/{query}'
         try:
-            resp = requests.get(url, auth=_get_auth(), verify=False)
+            resp = _http_request('GET', base, url, auth=_get_auth(), verify=False)
             return json.loads(resp.text).get('data')
         except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
             log(f"Timeout: device at {device_ip} did not respond.")
@@ -375,8 +478,8 @@ def put(base: str, value: Any = '', query: str = '', tree: int = 0) -> Optional[
         device_ip, _, _ = _get_credentials()
         url = f'https://{device_ip}/api/{base}/{query}'
         try:
-            resp = requests.put(
-                url,
+            resp = _http_request(
+                'PUT', base, url, sent=len(value_json),
                 headers={"Content-Type": "application/x-www-form-urlencoded"},
                 auth=_get_auth(),
                 data={"data": value_json},
@@ -415,8 +518,8 @@ def post(base: str, value: Any = '', query: str = '') -> Optional[Dict[str, Any]
         device_ip, _, _ = _get_credentials()
         url = f'https://{device_ip}/api/{base}/{query}'
         try:
-            resp = requests.post(
-                url,
+            resp = _http_request(
+                'POST', base, url, sent=len(value_json),
                 headers={"Content-Type": "application/x-www-form-urlencoded"},
                 auth=_get_auth(),
                 data={"data": value_json},
@@ -458,11 +561,12 @@ def patch(value: List[Any]) -> Optional[Dict[str, Any]]:
         device_ip, _, _ = _get_credentials()
         url = f'https://{device_ip}/api/'
         try:
-            resp = requests.patch(
-                url,
+            value_json = json.dumps(value)
+            resp = _http_request(
+                'PATCH', '', url, sent=len(value_json),
                 headers={"Content-Type": "application/x-www-form-urlencoded"},
                 auth=_get_auth(),
-                data={"data": json.dumps(value)},
+                data={"data": value_json},
                 verify=False
             )
             return json.loads(resp.text)
@@ -496,8 +600,8 @@ def delete(base: str, query: str = '') -> Optional[Dict[str, Any]]:
         device_ip, _, _ = _get_credentials()
         url = f'https://{device_ip}/api/{base}/{query}'
         try:
-            resp = requests.delete(
-                url,
+            resp = _http_request(
+                'DELETE', base, url,
                 headers={"Content-Type": "application/x-www-form-urlencoded"},
                 auth=_get_auth(),
                 data={"data": base},
@@ -534,6 +638,119 @@ def decrypt(base: str, query: str = '', tree: int = 0) -> Any:
         return None
 
 
+# =============================================================================
+# CORE API: Call Statistics
+# =============================================================================
+
+def enable_stats(dump_interval: float = 0) -> None:
+    """Start recording per-path statistics for config store and HTTP calls.
+
+    Every get/put/post/patch/delete/decrypt (and other config store command)
+    is counted by method and path with its bytes sent and received, total and
+    maximum latency, and a latency histogram. Recording is off by default;
+    while off, the only cost per call is a flag check.
+
+    Args:
+        dump_interval: If > 0, log the busiest paths every dump_interval
+            seconds from a background thread.
+    """
+    global _stats_enabled, _stats_dump_thread, _stats_dump_interval
+    _stats_enabled = True
+    _stats_dump_interval = dump_interval
+    if dump_interval > 0 and _stats_dump_thread is None:
+        _stats_dump_thread = threading.Thread(target=_stats_dump_loop, daemon=True)
+        _stats_dump_thread.start()
+
+
+def disable_stats() -> None:
+    """Stop recording call statistics and stop the periodic log dump.
+
+    Statistics recorded so far are kept until reset_stats() is called.
+    """
+    global _stats_enabled, _stats_dump_interval
+    _stats_enabled = False
+    _stats_dump_interval = 0.0
+
+
+def reset_stats() -> None:
+    """Discard all recorded call statistics."""
+    with _stats_lock:
+        _stats.clear()
+
+
+def get_stats(reset: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Return recorded call statistics keyed by 'METHOD path'.
+
+    Args:
+        reset: Clear the statistics after reading them.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: For each method and path, a dict with keys:
+            - calls (int): Number of calls.
+            - errors (int): Calls that failed or returned a non-ok status.
+            - bytes_sent (int): Request bytes.
+            - bytes_received (int): Response bytes.
+            - total_ms (float): Summed latency.
+            - avg_ms (float): Mean latency.
+            - max_ms (float): Slowest call.
+            - histogram (Dict[str, int]): Calls per latency bucket, keyed
+              '<=1ms' ... '<=5000ms' and '>5000ms'.
+    """
+    with _stats_lock:
+        items = [(key, stats.calls, stats.errors, stats.bytes_sent,
+                  stats.bytes_received, stats.total, stats.max,
+                  list(stats.buckets)) for key, stats in _stats.items()]
+        if reset:
+            _stats.clear()
+    labels = [f'<={ms}ms' for ms in _STATS_BUCKETS_MS] + [f'>{_STATS_BUCKETS_MS[-1]}ms']
+    result = {}
+    for (method, path), calls, errors, sent, received, total, slowest, buckets in items:
+        result[f'{method.upper()} {path}'] = {
+            'calls': calls,
+            'errors': errors,
+            'bytes_sent': sent,
+            'bytes_received': received,
+            'total_ms': round(total * 1000, 3),
+            'avg_ms': round(total * 1000 / calls, 3) if calls else 0.0,
+            'max_ms': round(slowest * 1000, 3),
+            'histogram': dict(zip(labels, buckets)),
+        }
+    return result
+
+
+def log_stats(top: int = 20, sort_by: str = 'total_ms') -> None:
+    """Log the recorded call statistics, busiest paths first.
+
+    Args:
+        top: Number of paths to log.
+        sort_by: Statistic to sort by (e.g. 'total_ms', 'calls', 'max_ms',
+            'bytes_received').
+    """
+    stats = get_stats()
+    if not stats:
+        log('cp stats: no calls recorded')
+        return
+    rows = sorted(stats.items(), key=lambda item: item[1].get(sort_by, 0), reverse=True)
+    log(f'cp stats: {len(stats)} paths, {sum(s["calls"] for s in stats.values())} calls')
+    for name, s in rows[:top]:
+        log(f'cp stats: {name} calls={s["calls"]} errors={s["errors"]} '
+            f'total={s["total_ms"]:.1f}ms avg={s["avg_ms"]:.1f}ms max={s["max_ms"]:.1f}ms '
+            f'sent={s["bytes_sent"]}B received={s["bytes_received"]}B')
+
+
+def _stats_dump_loop() -> None:
+    """Log statistics every _stats_dump_interval seconds until disabled."""
+    global _stats_dump_thread
+    while _stats_dump_interval > 0:
+        time.sleep(_stats_dump_interval)
+        if _stats_enabled and _stats_dump_interval > 0:
+            try:
+                log_stats()
+            except Exception as e:
+                log(f"Error logging cp stats: {e}")
+    _stats_dump_thread = None
+
+
 # =============================================================================
 # CORE API: Event Registration & Callbacks
 # =============================================================================
@@ -3,26 +3,56 @@
 Appdata (SDK app settings):
   signal_metrics - Comma-separated metric names, default "RSRP,RSRQ". Only these are monitored.
   For each metric, appdata field of the same name (e.g. RSRP) is the threshold. If missing, that metric is not monitored.
+  signal_hysteresis, signal_below_dwell, signal_recover_dwell - Hysteresis band and dwell times, either one
+  number for all metrics or per metric, e.g. "RSRP:3,RSRQ:1".
+  signal_alert_interval - Minimum seconds between alerts for one modem metric (0 = no limit).
 
-Checks all connected modems. Sends one below alert per metric when it crosses below; sends one recovery alert per metric when it recovers (above threshold for 60s).
+Checks all connected modems. Sends one below alert per metric when it crosses below; sends one recovery alert per metric
+when it recovers (at or above threshold + hysteresis for the recover dwell, 60s by default).
+
+Diagnostics and appdata changes are received as change events; modems and appdata are also re-read every
+RESYNC_INTERVAL seconds.
 """
 
-import cp
+import threading
 import time
 
-stable_threshold = 60.0  # seconds before considering "recovered"
-modems = {}  # uid -> {'below': set of metric names, 'stabletime': {metric: timestamp}}
+import cp
+from threshold_engine import ThresholdEngine, Rule, ALERT_BELOW, DEFAULT_RECOVER_DWELL
+
 DEFAULT_SIGNAL_METRICS = 'RSRP,RSRQ'
 DEFAULT_THRESHOLDS = {'RSRP': -111, 'RSRQ': -12}
 
+# Modem discovery, appdata reload and a full diagnostics refresh (which also
+# covers any missed change events)
+RESYNC_INTERVAL = 60
+
+# Diagnostics poll interval when change events are not available
+POLL_INTERVAL = 1
+
+engine = ThresholdEngine()
+modems = set()  # uids of monitored modems
+subscribed = set()  # uids with a registered diagnostics callback
+events_available = True
+wakeup = threading.Event()  # set by change events to recompute deadlines
+appdata_changed = threading.Event()  # set by appdata change events to resync now
+
+
+def get_appdata_fields():
+    """Return all appdata as a name -> value dict, with one request."""
+    appdata = cp.get('config/system/sdk/appdata')
+    if appdata is None:
+        return None
+    return {x['name']: x['value'] for x in appdata}
+
 
-def get_monitored_metrics():
+def get_monitored_metrics(appdata):
     """Build dict of metric_name -> threshold from appdata. RSRP/RSRQ use defaults -111/-12 if not set."""
-    raw = (cp.get_appdata('signal_metrics') or DEFAULT_SIGNAL_METRICS).strip()
+    raw = (appdata.get('signal_metrics') or DEFAULT_SIGNAL_METRICS).strip()
     names = [s.strip() for s in raw.split(',') if s.strip()]
     monitored = {}
     for name in names:
-        thr_val = cp.get_appdata(name)
+        thr_val = appdata.get(name)
         if thr_val is None or str(thr_val).strip() == '':
             if name in DEFAULT_THRESHOLDS:
                 monitored[name] = DEFAULT_THRESHOLDS[name]
@@ -36,86 +66,159 @@ def get_monitored_metrics():
     return monitored
 
 
-def find_modems(metric_names):
-    """Update modems dict with connected modem UIDs that have any of the given diagnostics."""
-    global modems
-    if not metric_names:
-        return
-    wan_devs = cp.get('status/wan/devices')
-    if not wan_devs:
-        return
-    new_modems = {}
-    for dev_uid, dev_status in wan_devs.items():
+def get_per_metric(appdata, field, metrics, default):
+    """Parse a setting that is one number ("5") or per metric ("RSRP:3,RSRQ:1")."""
+    raw = str(appdata.get(field) or '').strip()
+    values = dict.fromkeys(metrics, default)
+    if not raw:
+        return values
+    try:
+        if ':' not in raw:
+            return dict.fromkeys(metrics, float(raw))
+        for part in raw.split(','):
+            name, _, value = part.partition(':')
+            if name.strip() in values:
+                values[name.strip()] = float(value)
+    except ValueError:
+        cp.log('Invalid %s (%s), using %s' % (field, raw, default))
+        return dict.fromkeys(metrics, default)
+    return values
+
+
+def build_rules(appdata):
+    """Return (rules, alert_interval) from appdata."""
+    monitored = get_monitored_metrics(appdata)
+    hysteresis = get_per_metric(appdata, 'signal_hysteresis', monitored, 0)
+    below_dwell = get_per_metric(appdata, 'signal_below_dwell', monitored, 0)
+    recover_dwell = get_per_metric(appdata, 'signal_recover_dwell', monitored, DEFAULT_RECOVER_DWELL)
+    rules = []
+    for name, thr in monitored.items():
+        try:
+            rules.append(Rule(name, thr, hysteresis[name], below_dwell[name], recover_dwell[name]))
+        except ValueError as e:
+            cp.log('%s, skipping' % e)
+    try:
+        interval = max(float(appdata.get('signal_alert_interval') or 0), 0)
+    except ValueError:
+        cp.log('Invalid signal_alert_interval (%s), using 0' % appdata.get('signal_alert_interval'))
+        interval = 0
+    return rules, interval
+
+
+def find_modems(metric_names, wan_devs):
+    """Return {uid: diagnostics} of connected modems that have any of the given diagnostics."""
+    found = {}
+    for dev_uid, dev_status in (wan_devs or {}).items():
         if 'mdm-' not in dev_uid:
             continue
         diag = dev_status.get('diagnostics') or {}
         if any(m in diag for m in metric_names):
-            if dev_uid in modems:
-                new_modems[dev_uid] = modems[dev_uid]
-            else:
-                new_modems[dev_uid] = {'below': set(), 'stabletime': {}}
-    if set(new_modems.keys()) != set(modems.keys()):
-        cp.log('Found modems: %s' % list(new_modems.keys()))
-    modems.clear()
-    modems.update(new_modems)
+            found[dev_uid] = diag
+    return found
 
 
-def main_loop(monitored_metrics):
-    """monitored_metrics: dict of metric_name -> threshold (int)."""
-    if not monitored_metrics:
+def send_alerts(events):
+    if not events:
         return
     lat, long_val = cp.get_lat_long()
     loc = ''
     if lat is not None and long_val is not None:
         loc = ' Lat/long: %.5f, %.5f' % (lat, long_val)
+    for event in events:
+        carrier = engine.diagnostics.get(event.uid, {}).get('CARRID') or 'Modem'
+        if event.kind == ALERT_BELOW:
+            msg = '%s %s %s is below threshold of %s.%s' % (carrier, event.metric, event.value, event.threshold, loc)
+        else:
+            msg = '%s %s recovered: %s (above threshold of %s).%s' % (carrier, event.metric, event.value, event.threshold, loc)
+        if event.suppressed:
+            msg += ' (%d alerts suppressed)' % event.suppressed
+        cp.log(msg)
+        cp.alert(msg)
 
-    for uid, state in list(modems.items()):
-        diag = cp.get('status/wan/devices/%s/diagnostics' % uid)
-        if not diag:
-            continue
-        carrier = diag.get('CARRID') or 'Modem'
-        now = time.time()
 
-        for metric, thr in monitored_metrics.items():
-            val = diag.get(metric)
-            if val is None:
-                continue
-            try:
-                v = int(val)
-            except (TypeError, ValueError):
-                continue
-            is_below = v < thr
-
-            if metric in state['below']:
-                if is_below:
-                    modems[uid]['stabletime'].pop(metric, None)
-                else:
-                    if metric not in state['stabletime']:
-                        modems[uid]['stabletime'][metric] = now
-                        cp.log('%s %s %s recovered above threshold; monitoring for %.0fs' % (uid, carrier, metric, stable_threshold))
-                    elif now - state['stabletime'][metric] > stable_threshold:
-                        msg = '%s %s recovered: %s (above threshold of %s).%s' % (carrier, metric, v, thr, loc)
-                        cp.log(msg)
-                        cp.alert(msg)
-                        modems[uid]['below'].discard(metric)
-                        modems[uid]['stabletime'].pop(metric, None)
-            else:
-                if is_below:
-                    modems[uid]['below'].add(metric)
-                    msg = '%s %s %s is below threshold of %s.%s' % (carrier, metric, v, thr, loc)
-                    cp.log(msg)
-                    cp.alert(msg)
+def on_diagnostics(path, value, args):
+    """Change event for status/wan/devices/<uid>/diagnostics or one of its keys."""
+    uid = args[0]
+    if uid not in modems:
+        return
+    if not isinstance(value, dict):
+        value = {path.rstrip('/').rpartition('/')[2]: value}
+    send_alerts(engine.update(uid, value))
+    wakeup.set()
+
+
+def subscribe(uid):
+    global events_available
+    result = cp.register('put', 'status/wan/devices/%s/diagnostics' % uid, on_diagnostics, uid)
+    if not result or result.get('status') == 'error':
+        cp.log('Diagnostics change events not available; polling every %ss' % POLL_INTERVAL)
+        events_available = False
+        return
+    subscribed.add(uid)
+
+
+def on_appdata(path, value, args):
+    """Change event for config/system/sdk/appdata; the main loop resyncs."""
+    appdata_changed.set()
+    wakeup.set()
+
+
+def subscribe_appdata():
+    result = cp.register('put', 'config/system/sdk/appdata', on_appdata)
+    if not result or result.get('status') == 'error':
+        cp.log('Appdata change events not available; reloading every %ss' % RESYNC_INTERVAL)
+
+
+def resync(prev_rules):
+    """Reload appdata, rediscover modems and feed their full diagnostics."""
+    appdata = get_appdata_fields()
+    rules = prev_rules
+    if appdata is not None:
+        rules, alert_interval = build_rules(appdata)
+        if prev_rules is not None and rules != prev_rules:
+            cp.log('Metrics/thresholds changed: %s' % rules)
+        engine.set_rules(rules, alert_interval)
+    refresh(rules or [])
+    return rules
+
+
+def refresh(rules):
+    """Feed the diagnostics of every monitored modem, from one request."""
+    found = find_modems([r.metric for r in rules], cp.get('status/wan/devices'))
+    if set(found) != modems:
+        cp.log('Found modems: %s' % list(found))
+        for uid in modems - set(found):
+            engine.remove(uid)
+        modems.clear()
+        modems.update(found)
+    events = []
+    for uid, diag in found.items():
+        if events_available and uid not in subscribed:
+            subscribe(uid)
+        events.extend(engine.update(uid, diag))
+    send_alerts(events)
 
 
 if __name__ == '__main__':
     cp.log('Starting...')
     cp.wait_for_wan_connection()
-    prev_monitored = None
+    subscribe_appdata()
+    rules = None
+    next_resync = 0
     while True:
-        monitored = get_monitored_metrics()
-        if prev_monitored is not None and monitored != prev_monitored:
-            cp.log('Metrics/thresholds changed: %s' % monitored)
-        prev_monitored = monitored
-        find_modems(monitored.keys() if monitored else [])
-        main_loop(monitored)
-        time.sleep(1)
+        now = time.time()
+        if now >= next_resync or appdata_changed.is_set():
+            appdata_changed.clear()
+            rules = resync(rules)
+            next_resync = now + RESYNC_INTERVAL
+        elif not events_available:
+            refresh(rules or [])
+        send_alerts(engine.tick())
+
+        deadlines = [next_resync]
+        if not events_available:
+            deadlines.append(time.time() + POLL_INTERVAL)
+        if engine.next_deadline() is not None:
+            deadlines.append(engine.next_deadline())
+        wakeup.wait(max(0, min(deadlines) - time.time()))
+        wakeup.clear()
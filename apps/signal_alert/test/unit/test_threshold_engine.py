@@ -0,0 +1,130 @@
+import unittest
+
+from threshold_engine import (ThresholdEngine, Rule, ALERT_BELOW, ALERT_RECOVERED,
+                              BELOW, NORMAL, PENDING_BELOW, PENDING_RECOVER)
+
+
+class FakeClock:
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestThresholdEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def engine(self, *rules, alert_interval=0):
+        return ThresholdEngine(rules, alert_interval=alert_interval, clock=self.clock)
+
+    def replay(self, engine, stream, uid='mdm-1', metric='RSRP'):
+        """Feed (seconds from start, value) samples, ticking in between, and
+        return (seconds, kind, value) for every alert."""
+        start = self.clock.now
+        alerts = []
+        for offset, value in stream:
+            deadline = engine.next_deadline()
+            if deadline is not None and deadline <= start + offset:
+                self.clock.now = deadline
+                alerts += engine.tick()
+            self.clock.now = start + offset
+            alerts += engine.update(uid, {metric: value})
+        return [(e.time - start, e.kind, e.value) for e in alerts]
+
+    def test_below_and_recover(self):
+        # Same behavior as before the engine: immediate below, 60s recovery
+        engine = self.engine(Rule('RSRP', -111))
+        alerts = self.replay(engine, [(0, '-100'), (1, '-115'), (2, '-118'), (3, '-105'),
+                                      (30, '-112'), (31, '-100'), (91, '-100'), (100, '-99')])
+        self.assertEqual(alerts, [(1, ALERT_BELOW, -115), (91, ALERT_RECOVERED, -100)])
+        self.assertEqual(engine.state('mdm-1', 'RSRP'), NORMAL)
+
+    def test_recovery_completes_on_tick(self):
+        # The value stops changing, so only tick() can finish the dwell
+        engine = self.engine(Rule('RSRP', -111))
+        self.replay(engine, [(0, -115), (10, -100)])
+        self.assertEqual(engine.state('mdm-1', 'RSRP'), PENDING_RECOVER)
+        self.assertEqual(engine.next_deadline(), self.clock.now + 60)
+        self.clock.now += 59
+        self.assertEqual(engine.tick(), [])
+        self.clock.now += 1
+        self.assertEqual([e.kind for e in engine.tick()], [ALERT_RECOVERED])
+        self.assertIsNone(engine.next_deadline())
+
+    def test_hysteresis_band(self):
+        engine = self.engine(Rule('RSRP', -111, hysteresis=5, recover_dwell=0))
+        alerts = self.replay(engine, [(0, -112), (1, -110), (2, -107), (3, -112), (4, -106), (5, -120)])
+        # -110 and -107 are in the band (below -106): still below, no flapping
+        self.assertEqual(alerts, [(0, ALERT_BELOW, -112), (4, ALERT_RECOVERED, -106),
+                                  (5, ALERT_BELOW, -120)])
+
+    def test_below_dwell(self):
+        engine = self.engine(Rule('RSRQ', -12, below_dwell=10))
+        alerts = self.replay(engine, [(0, -13), (5, -11), (6, -14), (10, -15), (15, -15)],
+                             metric='RSRQ')
+        # The dip at 0-5 is too short; the one from 6 alerts at 16 on tick
+        self.assertEqual(alerts, [])
+        self.assertEqual(engine.state('mdm-1', 'RSRQ'), PENDING_BELOW)
+        self.clock.now += 1
+        events = engine.tick()
+        self.assertEqual([(e.kind, e.value) for e in events], [(ALERT_BELOW, -15)])
+
+    def test_rate_limit_reports_settled_state(self):
+        engine = self.engine(Rule('RSRP', -111, recover_dwell=0), alert_interval=300)
+        alerts = self.replay(engine, [(0, -115), (10, -100), (20, -115), (30, -100)])
+        self.assertEqual(alerts, [(0, ALERT_BELOW, -115)])
+        self.assertEqual(engine.next_deadline(), self.clock.now - 30 + 300)
+        self.clock.now += 270
+        events = engine.tick()
+        # Recovered at the end of the interval; 3 transitions were held back
+        self.assertEqual([(e.kind, e.suppressed) for e in events], [(ALERT_RECOVERED, 3)])
+        self.assertIsNone(engine.next_deadline())
+
+    def test_rate_limit_drops_flap_back_to_reported_state(self):
+        engine = self.engine(Rule('RSRP', -111, recover_dwell=0), alert_interval=300)
+        self.replay(engine, [(0, -115), (10, -100), (20, -115)])
+        self.clock.now += 280
+        self.assertEqual(engine.tick(), [])
+        self.assertIsNone(engine.next_deadline())
+
+    def test_modems_and_metrics_are_independent(self):
+        engine = self.engine(Rule('RSRP', -111), Rule('RSRQ', -12), alert_interval=300)
+        events = engine.update('mdm-1', {'RSRP': -115, 'RSRQ': -10, 'CARRID': 'AT&T'})
+        events += engine.update('mdm-2', {'RSRP': -115})
+        events += engine.update('mdm-1', {'RSRQ': -13})
+        self.assertEqual([(e.uid, e.metric) for e in events],
+                         [('mdm-1', 'RSRP'), ('mdm-2', 'RSRP'), ('mdm-1', 'RSRQ')])
+        self.assertEqual(engine.diagnostics['mdm-1'],
+                         {'RSRP': -115, 'RSRQ': -13, 'CARRID': 'AT&T'})
+
+    def test_ignores_unmonitored_and_invalid_values(self):
+        engine = self.engine(Rule('RSRP', -111))
+        self.assertEqual(engine.update('mdm-1', {'SINR': -20, 'RSRP': ''}), [])
+        self.assertEqual(engine.update('mdm-1', {'RSRP': '-111.5'})[0].value, -111.5)
+
+    def test_set_rules_keeps_state(self):
+        engine = self.engine(Rule('RSRP', -111), Rule('RSRQ', -12))
+        engine.update('mdm-1', {'RSRP': -115, 'RSRQ': -13})
+        engine.set_rules([Rule('RSRP', -110)])
+        self.assertEqual(engine.state('mdm-1', 'RSRP'), BELOW)
+        self.assertEqual(engine.update('mdm-1', {'RSRP': -116}), [])
+        self.assertNotIn(('mdm-1', 'RSRQ'), engine.tracks)
+
+    def test_remove_modem(self):
+        engine = self.engine(Rule('RSRP', -111))
+        engine.update('mdm-1', {'RSRP': -115})
+        engine.remove('mdm-1')
+        self.assertEqual(engine.state('mdm-1', 'RSRP'), NORMAL)
+        self.assertNotIn('mdm-1', engine.diagnostics)
+
+    def test_invalid_rule(self):
+        with self.assertRaises(ValueError):
+            Rule('RSRP', -111, hysteresis=-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+# threshold_engine - Threshold, hysteresis and dwell evaluation for signal_alert
+#
+# ThresholdEngine tracks one state machine per (modem, metric). A metric goes
+# "below" after staying under its threshold for the below dwell, and recovers
+# after staying at or above threshold + hysteresis for the recover dwell.
+# Values inside the hysteresis band change nothing. Alerts are rate-limited
+# per modem and metric: transitions inside the alert interval are held back
+# and, if the state still differs from the last alert when the interval ends,
+# reported once with a count of the suppressed alerts.
+#
+# The engine does no I/O. Callers feed it diagnostics as they change and
+# call tick() at next_deadline() so dwell timers complete even when a value
+# stops changing. The clock is injectable so streams can be replayed in tests.
+
+import threading
+import time
+from collections import namedtuple
+
+NORMAL = 'normal'
+PENDING_BELOW = 'pending_below'
+BELOW = 'below'
+PENDING_RECOVER = 'pending_recover'
+
+# Alert kinds
+ALERT_BELOW = 'below'
+ALERT_RECOVERED = 'recovered'
+
+DEFAULT_RECOVER_DWELL = 60.0
+
+Event = namedtuple('Event', 'kind uid metric value threshold time suppressed')
+
+
+class Rule:
+    """Threshold settings for one metric.
+
+    Args:
+        metric: Diagnostics key, e.g. "RSRP".
+        threshold: The metric is low when its value is below this.
+        hysteresis: Margin above the threshold a low metric must reach to
+            count as recovering.
+        below_dwell: Seconds the metric must stay low before it is below.
+        recover_dwell: Seconds the metric must stay at or above threshold +
+            hysteresis before it has recovered.
+    """
+
+    def __init__(self, metric, threshold, hysteresis=0, below_dwell=0,
+                 recover_dwell=DEFAULT_RECOVER_DWELL):
+        if hysteresis < 0 or below_dwell < 0 or recover_dwell < 0:
+            raise ValueError(f'Negative hysteresis or dwell for {metric}')
+        self.metric = metric
+        self.threshold = threshold
+        self.hysteresis = hysteresis
+        self.below_dwell = below_dwell
+        self.recover_dwell = recover_dwell
+
+    def __eq__(self, other):
+        return isinstance(other, Rule) and vars(self) == vars(other)
+
+    def __repr__(self):
+        return ('Rule({metric!r}, {threshold}, hysteresis={hysteresis}, below_dwell='
+                '{below_dwell}, recover_dwell={recover_dwell})'.format(**vars(self)))
+
+
+class _Track:
+    """State of one modem metric."""
+
+    __slots__ = ('state', 'since', 'value', 'alerted', 'last_alert', 'suppressed')
+
+    def __init__(self):
+        self.state = NORMAL
+        self.since = None  # start of the pending dwell
+        self.value = None
+        self.alerted = NORMAL  # state reported by the last alert
+        self.last_alert = None
+        self.suppressed = 0
+
+
+def to_number(value):
+    """Return a diagnostics value as an int or float, or None."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+
+class ThresholdEngine:
+    """Evaluates modem diagnostics against metric rules.
+
+    Args:
+        rules: Iterable of Rule.
+        alert_interval: Minimum seconds between alerts for one modem metric;
+            0 disables rate limiting.
+        clock: Function returning the current time in epoch seconds.
+    """
+
+    def __init__(self, rules=(), alert_interval=0, clock=time.time):
+        self.clock = clock
+        self.alert_interval = alert_interval
+        self.rules = {}
+        self.tracks = {}  # (uid, metric) -> _Track
+        self.diagnostics = {}  # uid -> latest diagnostics seen
+        self.lock = threading.RLock()
+        self.set_rules(rules)
+
+    def set_rules(self, rules, alert_interval=None):
+        """Replace the rules. State is kept for metrics that are still monitored."""
+        with self.lock:
+            self.rules = {rule.metric: rule for rule in rules}
+            if alert_interval is not None:
+                self.alert_interval = alert_interval
+            for key in [k for k in self.tracks if k[1] not in self.rules]:
+                del self.tracks[key]
+
+    def update(self, uid, diagnostics, now=None):
+        """Evaluate changed diagnostics of a modem and return the alert Events.
+
+        diagnostics may hold only the keys that changed; it is merged into
+        the latest diagnostics of the modem.
+        """
+        now = self.clock() if now is None else now
+        events = []
+        with self.lock:
+            self.diagnostics.setdefault(uid, {}).update(diagnostics)
+            for metric, raw in diagnostics.items():
+                rule = self.rules.get(metric)
+                if rule is None:
+                    continue
+                value = to_number(raw)
+                if value is None:
+                    continue
+                track = self.tracks.get((uid, metric))
+                if track is None:
+                    track = self.tracks[(uid, metric)] = _Track()
+                track.value = value
+                self._evaluate(uid, rule, track, now, events)
+        return events
+
+    def remove(self, uid):
+        """Forget a modem that is no longer connected."""
+        with self.lock:
+            self.diagnostics.pop(uid, None)
+            for key in [k for k in self.tracks if k[0] == uid]:
+                del self.tracks[key]
+
+    def tick(self, now=None):
+        """Complete dwell timers and release held back alerts that are due."""
+        now = self.clock() if now is None else now
+        events = []
+        with self.lock:
+            for (uid, metric), track in self.tracks.items():
+                if track.state in (PENDING_BELOW, PENDING_RECOVER):
+                    self._evaluate(uid, self.rules[metric], track, now, events)
+                if track.suppressed:
+                    self._flush(uid, self.rules[metric], track, now, events)
+        return events
+
+    def next_deadline(self):
+        """Epoch time tick() next has work to do, or None."""
+        deadlines = []
+        with self.lock:
+            for (uid, metric), track in self.tracks.items():
+                rule = self.rules[metric]
+                if track.state == PENDING_BELOW:
+                    deadlines.append(track.since + rule.below_dwell)
+                elif track.state == PENDING_RECOVER:
+                    deadlines.append(track.since + rule.recover_dwell)
+                if track.suppressed:
+                    deadlines.append(track.last_alert + self.alert_interval)
+        return min(deadlines) if deadlines else None
+
+    def state(self, uid, metric):
+        with self.lock:
+            track = self.tracks.get((uid, metric))
+            return track.state if track else NORMAL
+
+    def _evaluate(self, uid, rule, track, now, events):
+        value = track.value
+        if track.state in (NORMAL, PENDING_BELOW):
+            if value >= rule.threshold:
+                track.state = NORMAL
+                return
+            if track.state == NORMAL:
+                track.state, track.since = PENDING_BELOW, now
+            if now - track.since >= rule.below_dwell:
+                track.state = BELOW
+                self._transition(uid, rule, track, now, events)
+        else:
+            if value < rule.threshold + rule.hysteresis:
+                # Still low, or inside the hysteresis band
+                track.state = BELOW
+                return
+            if track.state == BELOW:
+                track.state, track.since = PENDING_RECOVER, now
+            if now - track.since >= rule.recover_dwell:
+                track.state = NORMAL
+                self._transition(uid, rule, track, now, events)
+
+    def _transition(self, uid, rule, track, now, events):
+        if (self.alert_interval and track.last_alert is not None
+                and now - track.last_alert < self.alert_interval):
+            track.suppressed += 1
+            return
+        self._emit(uid, rule, track, now, events)
+
+    def _flush(self, uid, rule, track, now, events):
+        if now - track.last_alert < self.alert_interval:
+            return
+        settled = BELOW if track.state in (BELOW, PENDING_RECOVER) else NORMAL
+        if settled != track.alerted:
+            self._emit(uid, rule, track, now, events)
+        else:
+            # It went back to the state last reported; nothing to say
+            track.suppressed = 0
+
+    def _emit(self, uid, rule, track, now, events):
+        below = track.state in (BELOW, PENDING_RECOVER)
+        events.append(Event(ALERT_BELOW if below else ALERT_RECOVERED, uid, rule.metric,
+                            track.value, rule.threshold, now, track.suppressed))
+        track.alerted = BELOW if below else NORMAL
+        track.last_alert = now
+        track.suppressed = 0
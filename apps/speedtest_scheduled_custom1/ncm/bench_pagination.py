@@ -0,0 +1,114 @@
+"""
+Pagination benchmark for the ncm module against a local mock NCM v2 server.
+
+The mock server serves a synthetic /routers/ collection with a fixed
+per-request latency so the effect of concurrent page and __in chunk
+fetching can be measured without touching the real API.
+
+Usage (from the app directory that contains the ncm package):
+    python -m ncm.bench_pagination --records 50000 --latency 0.05
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .ncm import NcmClientv2
+
+API_KEYS = {
+    'X-CP-API-ID': 'bench',
+    'X-CP-API-KEY': 'bench',
+    'X-ECM-API-ID': 'bench',
+    'X-ECM-API-KEY': 'bench'
+}
+PAGE_MAX = 500
+
+
+def make_handler(records, latency, total_count):
+    class MockNcmHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            time.sleep(latency)
+
+            rows = records
+            if 'id__in' in query:
+                wanted = set(query['id__in'].split(','))
+                rows = [r for r in records if r['id'] in wanted]
+            limit = min(int(query.get('limit', 20)), PAGE_MAX)
+            offset = int(query.get('offset', 0))
+            page = rows[offset:offset + limit]
+
+            next_url = None
+            if offset + limit < len(rows):
+                query.update({'limit': limit, 'offset': offset + limit})
+                next_url = 'http://{0}:{1}{2}?{3}'.format(
+                    *self.server.server_address, url.path,
+                    '&'.join(f'{k}={v}' for k, v in query.items()))
+            meta = {'limit': limit, 'offset': offset, 'next': next_url}
+            if total_count:
+                meta['total_count'] = len(rows)
+
+            body = json.dumps({'data': page, 'meta': meta}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return MockNcmHandler
+
+
+def run(records, latency, total_count, max_workers, **kwargs):
+    server = ThreadingHTTPServer(
+        ('127.0.0.1', 0), make_handler(records, latency, total_count))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = NcmClientv2(
+            api_keys=API_KEYS, log_events=False, max_workers=max_workers,
+            base_url='http://{0}:{1}'.format(*server.server_address))
+        start = time.perf_counter()
+        count = sum(1 for _ in client.iter_routers(**kwargs))
+        return count, time.perf_counter() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='seconds of server latency per request')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    records = [{'id': str(i), 'name': f'router-{i}'}
+               for i in range(args.records)]
+    ids = [r['id'] for r in records[::max(1, args.records // 2000)]]
+
+    cases = [
+        ('limit=all, follow next', dict(total_count=False, limit='all')),
+        ('limit=all, offset fan-out', dict(total_count=True, limit='all')),
+        (f'id__in x{len(ids)}', dict(total_count=True, id__in=ids,
+                                     limit='all')),
+    ]
+    print(f'{args.records} records, {args.latency * 1000:.0f} ms latency')
+    for name, kwargs in cases:
+        total_count = kwargs.pop('total_count')
+        for workers in (1, args.workers):
+            count, elapsed = run(records, args.latency, total_count,
+                                 workers, **dict(kwargs))
+            print(f'{name:<28} workers={workers:<3} '
+                  f'{count:>7} records {elapsed:7.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+# cron_scheduler - Cron expressions and a next-fire scheduler for speedtest_web
+#
+# CronExpression compiles a 5-field cron string (minute hour dom month dow)
+# once and computes the next fire time directly instead of testing every
+# minute. Scheduler runs several independent schedules from one thread,
+# sleeping until the earliest fire, and applies a catch-up policy to fires
+# that were missed while the app was stopped or the router was rebooting.
+# The clock is injectable so schedules can be tested without waiting.
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+# Catch-up policies for fires missed by more than the grace period:
+#   skip - drop them
+#   once - run once for all of them
+#   all  - run each of them (at most MAX_CATCH_UP times)
+CATCH_UP_POLICIES = ('skip', 'once', 'all')
+DEFAULT_CATCH_UP = 'once'
+MAX_CATCH_UP = 10
+
+# A fire that is at most this late (busy wakeup, long test) is on time
+GRACE_SECONDS = 60
+
+# Upper bound on any sleep, so wall clock changes (NTP sync after boot)
+# are noticed
+MAX_SLEEP = 60
+
+# Give up looking for a next fire after this many years (e.g. "0 0 30 2 *")
+MAX_LOOKAHEAD_YEARS = 5
+
+_FIELDS = (
+    ('minute', 0, 59),
+    ('hour', 0, 23),
+    ('day of month', 1, 31),
+    ('month', 1, 12),
+    ('day of week', 0, 7),
+)
+
+
+def _parse_field(field, name, min_val, max_val):
+    """Return the sorted values allowed by one cron field."""
+    values = set()
+    for part in field.split(','):
+        part = part.strip()
+        step = 1
+        if '/' in part:
+            part, step = part.split('/', 1)
+            step = int(step)
+            if step < 1:
+                raise ValueError(f'Invalid step in {name} field: {field}')
+        if part == '*':
+            start, end = min_val, max_val
+        elif '-' in part:
+            start, end = (int(x) for x in part.split('-', 1))
+        else:
+            start = int(part)
+            # "5/15" means from 5 to the end of the range in steps of 15
+            end = max_val if step > 1 else start
+        if not min_val <= start <= end <= max_val:
+            raise ValueError(f'Value out of range in {name} field: {field}')
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+class CronExpression:
+    """A compiled cron expression: minute hour day-of-month month day-of-week.
+
+    Fields accept *, numbers, ranges (1-5), steps (*/15, 0-30/10, 5/15) and
+    comma separated lists. Day of week is 0-7 with both 0 and 7 meaning
+    Sunday. As in standard cron, when both day of month and day of week are
+    restricted a day matches if either does. Times are naive UTC datetimes.
+    """
+
+    def __init__(self, expr):
+        self.expr = expr.strip()
+        fields = self.expr.split()
+        if len(fields) != 5:
+            raise ValueError(f'Cron expression needs 5 fields: "{expr}"')
+        try:
+            parsed = [_parse_field(f, *spec) for f, spec in zip(fields, _FIELDS)]
+        except ValueError as e:
+            raise ValueError(f'Invalid cron expression "{expr}": {e}')
+        self.minutes, self.hours, self.days, self.months, dows = parsed
+        # cron dow 0/7 = Sunday, Python weekday() 6 = Sunday
+        self.weekdays = {(d - 1) % 7 for d in dows}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    def __repr__(self):
+        return f'CronExpression({self.expr!r})'
+
+    def _day_matches(self, dt):
+        in_month = dt.day in self.days
+        in_week = dt.weekday() in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, dt):
+        """Return the first fire time strictly after dt, or None if there is none."""
+        dt = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt.year + MAX_LOOKAHEAD_YEARS
+        while dt.year <= limit:
+            if dt.month not in self.months:
+                # First day of the next month
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            hour = next((h for h in self.hours if h >= dt.hour), None)
+            if hour is None:
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if hour != dt.hour:
+                dt = dt.replace(hour=hour, minute=0)
+            minute = next((m for m in self.minutes if m >= dt.minute), None)
+            if minute is None:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+                continue
+            return dt.replace(minute=minute)
+        return None
+
+
+class Schedule:
+    """One named cron schedule and its fire state."""
+
+    def __init__(self, name, cron, callback, catch_up=DEFAULT_CATCH_UP, last_fired=None):
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f'Unknown catch-up policy "{catch_up}"')
+        self.name = name
+        self.cron = CronExpression(cron) if isinstance(cron, str) else cron
+        self.callback = callback
+        self.catch_up = catch_up
+        self.last_fired = last_fired
+        self.next_fire = None
+
+    def plan(self, now):
+        """Compute next_fire from last_fired, or from now for a new schedule."""
+        base = self.last_fired if self.last_fired is not None else now
+        self.next_fire = _next_epoch(self.cron, min(base, now))
+
+
+class Scheduler:
+    """Runs callbacks for several cron schedules at their exact fire times.
+
+    Args:
+        log: Function used to report callback errors, e.g. cp.log.
+        clock: Function returning the current time in epoch seconds.
+        on_fired: Optional function(name, fire_time) called after a schedule
+            fires, e.g. to persist last fire times across restarts.
+    """
+
+    def __init__(self, log, clock=time.time, on_fired=None):
+        self.clock = clock
+        self.on_fired = on_fired
+        self.log = log
+        self.schedules = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.last_check = None
+
+    def add(self, name, cron, callback, catch_up=DEFAULT_CATCH_UP, last_fired=None):
+        """Add or replace a schedule. Raises ValueError for a bad expression."""
+        schedule = Schedule(name, cron, callback, catch_up, last_fired)
+        schedule.plan(self.clock())
+        with self.lock:
+            self.schedules[name] = schedule
+        self.wakeup.set()
+        return schedule
+
+    def remove(self, name):
+        with self.lock:
+            self.schedules.pop(name, None)
+        self.wakeup.set()
+
+    def clear(self):
+        with self.lock:
+            self.schedules.clear()
+        self.wakeup.set()
+
+    def next_fire(self, name=None):
+        """Return the next fire time (epoch) of a schedule, or of the earliest one."""
+        with self.lock:
+            if name is not None:
+                schedule = self.schedules.get(name)
+                return schedule.next_fire if schedule else None
+            fires = [s.next_fire for s in self.schedules.values() if s.next_fire is not None]
+        return min(fires) if fires else None
+
+    def run_pending(self):
+        """Fire every schedule that is due and return the names that ran."""
+        now = self.clock()
+        if self.last_check is not None and now < self.last_check - GRACE_SECONDS:
+            # The clock went backwards; fire times planned from the old clock
+            # could be far in the future.
+            with self.lock:
+                for schedule in self.schedules.values():
+                    schedule.last_fired = None
+                    schedule.plan(now)
+        self.last_check = now
+
+        with self.lock:
+            due = [s for s in self.schedules.values()
+                   if s.next_fire is not None and s.next_fire <= now]
+        fired = []
+        for schedule in due:
+            missed = self._due_fires(schedule, now)
+            on_time = now - missed[-1] <= GRACE_SECONDS
+            if schedule.last_fired is None:
+                # Nothing on record was missed (e.g. the clock was set after
+                # the schedule was added), so only fire if this one is on time
+                runs = 1 if on_time else 0
+            elif schedule.catch_up == 'all':
+                runs = len(missed)
+            elif schedule.catch_up == 'once':
+                runs = 1
+            else:
+                runs = 1 if on_time else 0
+            for _ in range(runs):
+                try:
+                    schedule.callback()
+                except Exception as e:
+                    self.log(f'Schedule {schedule.name} failed: {e}')
+            if runs:
+                fired.append(schedule.name)
+            schedule.last_fired = missed[-1]
+            schedule.next_fire = _next_epoch(schedule.cron, now)
+            if self.on_fired:
+                self.on_fired(schedule.name, schedule.last_fired)
+        return fired
+
+    @staticmethod
+    def _due_fires(schedule, now):
+        """Return the fire times from next_fire up to now, at most MAX_CATCH_UP."""
+        fires = [schedule.next_fire]
+        while len(fires) < MAX_CATCH_UP:
+            fire = _next_epoch(schedule.cron, fires[-1])
+            if fire is None or fire > now:
+                break
+            fires.append(fire)
+        else:
+            # Too many to list; make sure the last entry is the latest one
+            latest = _previous_epoch(schedule.cron, now)
+            if latest is not None:
+                fires[-1] = latest
+        return fires
+
+    def seconds_until_next(self):
+        """Seconds to sleep before the next fire, capped at MAX_SLEEP."""
+        fire = self.next_fire()
+        if fire is None:
+            return MAX_SLEEP
+        return max(0, min(MAX_SLEEP, fire - self.clock()))
+
+    def run(self):
+        """Fire schedules forever. Adding or removing a schedule wakes the loop."""
+        while True:
+            try:
+                self.run_pending()
+            except Exception as e:
+                self.log(f'Scheduler error: {e}')
+            self.wakeup.wait(self.seconds_until_next())
+            self.wakeup.clear()
+
+
+def _next_epoch(cron, epoch):
+    fire = cron.next_after(datetime.utcfromtimestamp(epoch))
+    if fire is None:
+        return None
+    return (fire - datetime(1970, 1, 1)).total_seconds()
+
+
+def _previous_epoch(cron, epoch):
+    """Latest fire time <= epoch, searching back at most a day."""
+    fire = None
+    candidate = _next_epoch(cron, epoch - 86400)
+    while candidate is not None and candidate <= epoch:
+        fire = candidate
+        candidate = _next_epoch(cron, candidate)
+    return fire
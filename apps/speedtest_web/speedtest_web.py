@@ -12,11 +12,17 @@ import threading
 from http.server import HTTPServer, SimpleHTTPRequestHandler
 from datetime import datetime
 from threading import Thread
+from cron_scheduler import CronExpression, Scheduler, CATCH_UP_POLICIES, DEFAULT_CATCH_UP
 
 # Constants
 DEFAULT_PORT = 8000
 HISTORY_FILE = 'tmp/speedtest_history.json'
 MAX_HISTORY = 100
+# Interfaces tested at once by a multi-WAN comparison
+MAX_PARALLEL = 3
+NETPERF_POLL_INTERVAL = 0.5
+# Seconds between netperf stages on one interface, to let the link settle
+NETPERF_STAGE_SETTLE = 3
 
 
 def get_web_port():
@@ -41,6 +47,11 @@ current_test = {
     'error': None
 }
 test_lock = threading.Lock()
+history_lock = threading.Lock()
+# The router runs one netperf test at a time through control/netperf, so each
+# netperf stage holds this lock
+netperf_lock = threading.Lock()
+iperf3_download_lock = threading.Lock()
 
 # Schedule state
 schedule_config = {
@@ -48,9 +59,13 @@ schedule_config = {
     'autostart': False,
     'cron': '',
     'engine': 'netperf',
-    'params': {}
+    'params': {},
+    'catch_up': DEFAULT_CATCH_UP,
+    'schedules': []
 }
 schedule_lock = threading.Lock()
+# Last fire time (epoch) per schedule name, persisted for catch-up after reboot
+schedule_state = {}
 
 
 OOKLA_BINARIES = ('ookla', 'speedtest', 'speedtest-cli')
@@ -179,17 +194,48 @@ def save_history(history):
 
 def add_result(result):
     """Add a test result to history."""
-    history = load_history()
-    history.append(result)
-    save_history(history)
+    with history_lock:
+        history = load_history()
+        history.append(result)
+        save_history(history)
+
+
+def set_progress(progress, data):
+    """Report test progress to a per-interface callback, or as the current test's progress."""
+    if progress:
+        progress(data)
+    else:
+        with test_lock:
+            current_test['progress'] = data
+
+
+def wait_while_running(seconds):
+    """Sleep for seconds, returning early (False) if the test is stopped."""
+    deadline = time.time() + seconds
+    while current_test['running']:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return True
+        time.sleep(min(remaining, 0.5))
+    return False
 
 
 # =============================================================================
 # NETPERF ENGINE
 # =============================================================================
 
-def run_netperf(interface='', duration=10, direction='both', include_latency=False, host='', size=0):
-    """Run a speed test using the router's built-in netperf service."""
+def run_netperf(interface='', duration=10, direction='both', include_latency=False, host='', size=0,
+                progress=None):
+    """Run a speed test using the router's built-in netperf service.
+
+    The router runs one netperf test at a time, so concurrent callers (e.g.
+    a multi-WAN comparison) take turns on netperf_lock for each stage. The
+    settle time between the stages of one test is left to other callers.
+    """
+    return _run_netperf(interface, duration, direction, include_latency, host, size, progress)
+
+
+def _run_netperf(interface, duration, direction, include_latency, host, size, progress):
     global current_test
     try:
         if not interface:
@@ -228,45 +274,45 @@ def run_netperf(interface='', duration=10, direction='both', include_latency=Fal
                 },
                 "run": 1
             }
-            # Reset state and clear previous output
-            cp.put('/state/system/netperf', {"run_count": 0})
-            time.sleep(1)
+            with netperf_lock:
+                # Reset state and clear previous output
+                cp.put('/state/system/netperf', {"run_count": 0})
+                time.sleep(1)
 
-            # Start the test
-            cp.put('control/netperf', params)
-            cp.log(f'Netperf started: recv={recv} send={send} iface={interface}')
+                # Start the test
+                cp.put('control/netperf', params)
+                cp.log(f'Netperf started: recv={recv} send={send} iface={interface}')
 
-            # Poll for progress/completion
-            deadline = time.time() + duration + 30
-            while time.time() < deadline:
-                if not current_test['running']:
-                    cp.put('control/netperf/stop', '')
-                    return None
-                out = cp.get('control/netperf/output')
-                if out:
-                    progress = out.get('progress', '')
-                    status = out.get('status', '')
-                    if status == 'error' or out.get('error'):
-                        cp.log(f'Netperf error: {out.get("error", status)}')
-                        return None
-                    if status == 'complete' or progress == 'done':
-                        results_path = out.get('results_path', '')
-                        if results_path:
-                            result = cp.get(results_path.lstrip('/'))
-                            cp.log(f'Netperf result keys: {list(result.keys()) if result else None}')
-                            return result
+                # A time-limited test can't finish early, so only poll once it
+                # is due, then poll quickly
+                deadline = time.time() + duration + 30
+                if size == 0:
+                    wait_while_running(duration)
+                while time.time() < deadline:
+                    if not current_test['running']:
+                        cp.put('control/netperf/stop', '')
                         return None
-                time.sleep(1)
-            cp.log('Netperf poll timed out')
-            return None
+                    out = cp.get('control/netperf/output')
+                    if out:
+                        progress = out.get('progress', '')
+                        status = out.get('status', '')
+                        if status == 'error' or out.get('error'):
+                            cp.log(f'Netperf error: {out.get("error", status)}')
+                            return None
+                        if status == 'complete' or progress == 'done':
+                            results_path = out.get('results_path', '')
+                            if results_path:
+                                result = cp.get(results_path.lstrip('/'))
+                                cp.log(f'Netperf result keys: {list(result.keys()) if result else None}')
+                                return result
+                            return None
+                    time.sleep(NETPERF_POLL_INTERVAL)
+                cp.log('Netperf poll timed out')
+                return None
 
         # Download test
         if direction in ('recv', 'both'):
-            with test_lock:
-                current_test['progress'] = {
-                    'stage': 'download',
-                    'percent': 0
-                }
+            set_progress(progress, {'stage': 'download', 'percent': 0})
             dl = _run_netperf_direction(recv=True, send=False)
             if dl and 'tcp_down' in dl:
                 tp = dl['tcp_down']
@@ -277,15 +323,11 @@ def run_netperf(interface='', duration=10, direction='both', include_latency=Fal
                     cp.log(f'Download: {tp["THROUGHPUT"]} {tp.get("THROUGHPUT_UNITS", "")}')
 
             if direction == 'both':
-                time.sleep(3)
+                time.sleep(NETPERF_STAGE_SETTLE)
 
         # Upload test
         if direction in ('send', 'both'):
-            with test_lock:
-                current_test['progress'] = {
-                    'stage': 'upload',
-                    'percent': 0
-                }
+            set_progress(progress, {'stage': 'upload', 'percent': 0})
             ul = _run_netperf_direction(recv=False, send=True)
             if ul and 'tcp_up' in ul:
                 tp = ul['tcp_up']
@@ -300,12 +342,8 @@ def run_netperf(interface='', duration=10, direction='both', include_latency=Fal
         # TCP RR Latency/Jitter test (optional)
         if include_latency:
             if direction == 'both':
-                time.sleep(3)
-            with test_lock:
-                current_test['progress'] = {
-                    'stage': 'latency',
-                    'percent': 0
-                }
+                time.sleep(NETPERF_STAGE_SETTLE)
+            set_progress(progress, {'stage': 'latency', 'percent': 0})
             rr_params = {
                 "input": {
                     "options": {
@@ -324,57 +362,60 @@ def run_netperf(interface='', duration=10, direction='both', include_latency=Fal
                 },
                 "run": 1
             }
-            # Reset state
-            cp.put('/state/system/netperf', {"run_count": 0})
-            time.sleep(1)
-            cp.put('control/netperf', rr_params)
-            cp.log(f'Netperf TCP_RR started: iface={interface}')
+            with netperf_lock:
+                # Reset state
+                cp.put('/state/system/netperf', {"run_count": 0})
+                time.sleep(1)
+                cp.put('control/netperf', rr_params)
+                cp.log(f'Netperf TCP_RR started: iface={interface}')
 
-            deadline = time.time() + duration + 30
-            while time.time() < deadline:
-                if not current_test['running']:
-                    cp.put('control/netperf/stop', '')
-                    break
-                out = cp.get('control/netperf/output')
-                if out:
-                    status = out.get('status', '')
-                    progress = out.get('progress', '')
-                    if status == 'error' or out.get('error'):
-                        cp.log(f'Netperf RR error: {out.get("error", status)}')
-                        break
-                    if status == 'complete' or progress == 'done':
-                        results_path = out.get('results_path', '')
-                        if results_path:
-                            rr_data = cp.get(results_path.lstrip('/'))
-                            cp.log(f'TCP_RR result: {json.dumps(rr_data)}')
-                            if rr_data and 'tcp_rr' in rr_data:
-                                rr = rr_data['tcp_rr']
-                                # Latency is in microseconds, convert to ms
-                                if 'MEAN_LATENCY' in rr:
-                                    results['latency_ms'] = float(
-                                        rr['MEAN_LATENCY']) / 1000.0
-                                elif 'RT_LATENCY' in rr:
-                                    results['latency_ms'] = float(
-                                        rr['RT_LATENCY']) / 1000.0
-                                if 'P50_LATENCY' in rr:
-                                    results['p50_latency_ms'] = float(
-                                        rr['P50_LATENCY']) / 1000.0
-                                if 'P99_LATENCY' in rr:
-                                    results['p99_latency_ms'] = float(
-                                        rr['P99_LATENCY']) / 1000.0
-                                if 'STDDEV_LATENCY' in rr:
-                                    results['jitter_ms'] = float(
-                                        rr['STDDEV_LATENCY']) / 1000.0
-                                elif 'MIN_LATENCY' in rr and 'MAX_LATENCY' in rr:
-                                    # Approximate jitter as (max - min) / 2
-                                    min_lat = float(rr['MIN_LATENCY'])
-                                    max_lat = float(rr['MAX_LATENCY'])
-                                    results['jitter_ms'] = (
-                                        max_lat - min_lat) / 2000.0
-                                cp.log(f'Latency: {results.get("latency_ms", 0):.2f}ms '
-                                       f'Jitter: {results.get("jitter_ms", 0):.2f}ms')
+                deadline = time.time() + duration + 30
+                if size == 0:
+                    wait_while_running(duration)
+                while time.time() < deadline:
+                    if not current_test['running']:
+                        cp.put('control/netperf/stop', '')
                         break
-                time.sleep(1)
+                    out = cp.get('control/netperf/output')
+                    if out:
+                        status = out.get('status', '')
+                        progress = out.get('progress', '')
+                        if status == 'error' or out.get('error'):
+                            cp.log(f'Netperf RR error: {out.get("error", status)}')
+                            break
+                        if status == 'complete' or progress == 'done':
+                            results_path = out.get('results_path', '')
+                            if results_path:
+                                rr_data = cp.get(results_path.lstrip('/'))
+                                cp.log(f'TCP_RR result: {json.dumps(rr_data)}')
+                                if rr_data and 'tcp_rr' in rr_data:
+                                    rr = rr_data['tcp_rr']
+                                    # Latency is in microseconds, convert to ms
+                                    if 'MEAN_LATENCY' in rr:
+                                        results['latency_ms'] = float(
+                                            rr['MEAN_LATENCY']) / 1000.0
+                                    elif 'RT_LATENCY' in rr:
+                                        results['latency_ms'] = float(
+                                            rr['RT_LATENCY']) / 1000.0
+                                    if 'P50_LATENCY' in rr:
+                                        results['p50_latency_ms'] = float(
+                                            rr['P50_LATENCY']) / 1000.0
+                                    if 'P99_LATENCY' in rr:
+                                        results['p99_latency_ms'] = float(
+                                            rr['P99_LATENCY']) / 1000.0
+                                    if 'STDDEV_LATENCY' in rr:
+                                        results['jitter_ms'] = float(
+                                            rr['STDDEV_LATENCY']) / 1000.0
+                                    elif 'MIN_LATENCY' in rr and 'MAX_LATENCY' in rr:
+                                        # Approximate jitter as (max - min) / 2
+                                        min_lat = float(rr['MIN_LATENCY'])
+                                        max_lat = float(rr['MAX_LATENCY'])
+                                        results['jitter_ms'] = (
+                                            max_lat - min_lat) / 2000.0
+                                    cp.log(f'Latency: {results.get("latency_ms", 0):.2f}ms '
+                                           f'Jitter: {results.get("jitter_ms", 0):.2f}ms')
+                            break
+                    time.sleep(NETPERF_POLL_INTERVAL)
 
         return results
     except Exception as e:
@@ -386,43 +427,78 @@ def run_netperf(interface='', duration=10, direction='both', include_latency=Fal
 # IPERF3 ENGINE
 # =============================================================================
 
-def run_iperf3(server, duration=10, interface='', port=5201):
+class PortPool:
+    """iPerf3 server ports shared by concurrent tests.
+
+    An iPerf3 server serves one test at a time, so each running test holds
+    its own port from the range until it finishes.
+    """
+
+    def __init__(self, port):
+        port_str = str(port)
+        if '-' in port_str:
+            try:
+                start, end = port_str.split('-', 1)
+                self.ports = list(range(int(start), int(end) + 1))
+            except ValueError:
+                self.ports = [int(port_str.split('-')[0])]
+        else:
+            self.ports = [int(port_str)]
+        self.busy = set()
+        self.cond = threading.Condition()
+
+    def acquire(self, tried):
+        """Wait for a free port not in tried; None once every port has been tried."""
+        with self.cond:
+            while True:
+                candidates = [p for p in self.ports if p not in tried]
+                if not candidates:
+                    return None
+                for candidate in candidates:
+                    if candidate not in self.busy:
+                        self.busy.add(candidate)
+                        return candidate
+                self.cond.wait(1)
+                if not current_test['running']:
+                    return None
+
+    def release(self, port):
+        with self.cond:
+            self.busy.discard(port)
+            self.cond.notify_all()
+
+
+def run_iperf3(server, duration=10, interface='', port=5201, progress=None, port_pool=None):
     """Run a speed test using iperf3 binary with port range retry support.
     
     port can be an int (single port) or string with range like "5201-5210".
-    If a port fails, retries on the next port in range.
+    If a port fails, retries on the next port in range. Concurrent tests
+    against the same server share a port_pool so they never use the same port.
     """
     global current_test
 
-    # Parse port range
-    ports = []
-    port_str = str(port)
-    if '-' in port_str:
-        try:
-            start, end = port_str.split('-', 1)
-            ports = list(range(int(start), int(end) + 1))
-        except ValueError:
-            ports = [int(port_str.split('-')[0])]
-    else:
-        ports = [int(port_str)]
+    pool = port_pool or PortPool(port)
+    ports = pool.ports
 
-    if not has_iperf3():
-        try:
-            cp.log('Downloading iperf3 binary...')
-            import requests
-            url = "https://github.com/userdocs/iperf3-static/releases/download/3.17.1%2B/iperf3-arm64v8"
-            response = requests.get(url)
-            if response.status_code == 200:
-                with open('iperf3-arm64v8', 'wb') as f:
-                    f.write(response.content)
-                os.chmod('iperf3-arm64v8', 0o755)
-                cp.log('iperf3 downloaded successfully')
-            else:
-                cp.log(f'Failed to download iperf3: {response.status_code}')
+    # Concurrent tests must not download the binary at the same time
+    with iperf3_download_lock:
+        if not has_iperf3():
+            try:
+                cp.log('Downloading iperf3 binary...')
+                import requests
+                url = "https://github.com/userdocs/iperf3-static/releases/download/3.17.1%2B/iperf3-arm64v8"
+                response = requests.get(url)
+                if response.status_code == 200:
+                    with open('iperf3-arm64v8', 'wb') as f:
+                        f.write(response.content)
+                    os.chmod('iperf3-arm64v8', 0o755)
+                    cp.log('iperf3 downloaded successfully')
+                else:
+                    cp.log(f'Failed to download iperf3: {response.status_code}')
+                    return None
+            except Exception as e:
+                cp.log(f'Error downloading iperf3: {e}')
                 return None
-        except Exception as e:
-            cp.log(f'Error downloading iperf3: {e}')
-            return None
 
     # Resolve interface name to IP for iperf3 -B flag
     bind_ip = ''
@@ -448,20 +524,29 @@ def run_iperf3(server, duration=10, interface='', port=5201):
 
     iperf3_bin = get_iperf3_binary()
 
-    # Try ports in order until one works
-    for attempt_port in ports:
+    # Try free ports in order until one works
+    results = None
+    tried = set()
+    while True:
         if not current_test['running']:
             return {'download_bps': 0, 'upload_bps': 0, 'test_duration': duration,
                     'error': 'Test cancelled'}
 
-        results = _run_iperf3_on_port(
-            iperf3_bin, server, attempt_port, duration, bind_ip, bind_dev)
+        attempt_port = pool.acquire(tried)
+        if attempt_port is None:
+            break
+        tried.add(attempt_port)
+        try:
+            results = _run_iperf3_on_port(
+                iperf3_bin, server, attempt_port, duration, bind_ip, bind_dev, progress)
+        finally:
+            pool.release(attempt_port)
 
         if results and (results['download_bps'] > 0 or results['upload_bps'] > 0):
             return results
 
         # Failed on this port — retry on next if available
-        if attempt_port != ports[-1]:
+        if len(tried) < len(ports):
             cp.log(f'iPerf3 failed on port {attempt_port}, retrying on next port...')
             time.sleep(1)
 
@@ -471,15 +556,14 @@ def run_iperf3(server, duration=10, interface='', port=5201):
                        'error': f'iPerf3 failed on all ports ({ports[0]}-{ports[-1]})'}
 
 
-def _run_iperf3_on_port(iperf3_bin, server, port, duration, bind_ip, bind_dev=''):
+def _run_iperf3_on_port(iperf3_bin, server, port, duration, bind_ip, bind_dev='', progress=None):
     """Run iperf3 download+upload on a specific port. Returns results dict."""
     global current_test
     results = {'download_bps': 0, 'upload_bps': 0, 'test_duration': duration}
 
     try:
         # Download test (reverse mode)
-        with test_lock:
-            current_test['progress'] = {'stage': 'download', 'percent': 0}
+        set_progress(progress, {'stage': 'download', 'percent': 0})
         cmd = [iperf3_bin, '-c', server, '-p', str(port),
                '-t', str(duration), '-R', '-J', '-4']
         if bind_ip:
@@ -545,8 +629,7 @@ def _run_iperf3_on_port(iperf3_bin, server, port, duration, bind_ip, bind_dev=''
         time.sleep(2)
 
         # Upload test
-        with test_lock:
-            current_test['progress'] = {'stage': 'upload', 'percent': 0}
+        set_progress(progress, {'stage': 'upload', 'percent': 0})
         cmd = [iperf3_bin, '-c', server, '-p', str(port),
                '-t', str(duration), '-J', '-4']
         if bind_ip:
@@ -775,6 +858,71 @@ def write_outputs(entry):
         cp.log(f'Error in write_outputs: {e}')
 
 
+def run_engine(engine, params, interface, progress=None, port_pool=None):
+    """Run one test with the selected engine. Returns the engine's result dict or None."""
+    duration = params.get('duration', 10)
+    if engine == 'ookla':
+        return run_ookla(interface)
+    elif engine == 'netperf':
+        return run_netperf(interface, duration,
+                           include_latency=params.get('include_latency', False),
+                           host=params.get('host', ''), size=params.get('size', 0),
+                           progress=progress)
+    elif engine == 'iperf3':
+        return run_iperf3(params.get('server', ''), duration, interface,
+                          params.get('port', 5201), progress=progress, port_pool=port_pool)
+    return None
+
+
+def make_entry(engine, params, interface, result, error=None):
+    """Build a history entry from an engine result (None for a failed test)."""
+    duration = params.get('duration', 10)
+    if not result:
+        return {
+            'timestamp': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'engine': engine,
+            'download_mbps': 0,
+            'upload_mbps': 0,
+            'ping_ms': None,
+            'latency_ms': None,
+            'jitter_ms': None,
+            'interface': interface or 'auto',
+            'duration': duration,
+            'server': params.get('server', ''),
+            'status': 'failed',
+            'error': error or 'No results'
+        }
+    # Detect failed test (all zeros = failed)
+    dl = result.get('download_bps', 0)
+    ul = result.get('upload_bps', 0)
+    is_failed = (dl == 0 and ul == 0)
+
+    entry = {
+        'timestamp': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'engine': engine,
+        'download_mbps': round(dl / 1000000, 2),
+        'upload_mbps': round(ul / 1000000, 2),
+        'ping_ms': round(result.get('ping_ms', 0), 1) if result.get('ping_ms') else None,
+        'latency_ms': round(result.get('latency_ms', 0), 2) if result.get('latency_ms') else None,
+        'jitter_ms': round(result.get('jitter_ms', 0), 2) if result.get('jitter_ms') else None,
+        'interface': interface or 'auto',
+        'duration': duration,
+        'size': params.get('size', 0),
+        'host': params.get('host', ''),
+        'server': result.get('server', ''),
+        'port': params.get('port', ''),
+        'isp': result.get('isp', ''),
+        'include_latency': params.get('include_latency', False),
+        'status': 'failed' if is_failed else 'complete'
+    }
+    if engine == 'iperf3':
+        entry['server'] = params.get('server', '')
+        entry['port'] = params.get('port', '5201')
+    if is_failed:
+        entry['error'] = result.get('error', 'Test returned zero results')
+    return entry
+
+
 def run_test_thread(engine, params):
     """Run a speed test in a background thread."""
     global current_test
@@ -785,59 +933,22 @@ def run_test_thread(engine, params):
             current_test['progress'] = {'stage': 'starting', 'percent': 0}
             current_test['error'] = None
 
-        result = None
+        if engine == 'iperf3' and not params.get('server', ''):
+            with test_lock:
+                current_test['error'] = 'No iPerf3 server specified'
+            return
+
+        if params.get('interfaces'):
+            run_comparison(engine, params)
+            return
+
         interface = params.get('interface', '')
-        duration = params.get('duration', 10)
-
-        if engine == 'ookla':
-            result = run_ookla(interface)
-        elif engine == 'netperf':
-            include_latency = params.get('include_latency', False)
-            host = params.get('host', '')
-            size = params.get('size', 0)
-            result = run_netperf(interface, duration,
-                                include_latency=include_latency, host=host,
-                                size=size)
-        elif engine == 'iperf3':
-            server = params.get('server', '')
-            if not server:
-                with test_lock:
-                    current_test['error'] = 'No iPerf3 server specified'
-                    current_test['running'] = False
-                return
-            port = params.get('port', 5201)
-            result = run_iperf3(server, duration, interface, port)
+        result = run_engine(engine, params, interface)
 
         if result:
-            # Detect failed test (all zeros = failed)
-            dl = result.get('download_bps', 0)
-            ul = result.get('upload_bps', 0)
-            is_failed = (dl == 0 and ul == 0)
-
-            # Build history entry
-            entry = {
-                'timestamp': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
-                'engine': engine,
-                'download_mbps': round(dl / 1000000, 2),
-                'upload_mbps': round(ul / 1000000, 2),
-                'ping_ms': round(result.get('ping_ms', 0), 1) if result.get('ping_ms') else None,
-                'latency_ms': round(result.get('latency_ms', 0), 2) if result.get('latency_ms') else None,
-                'jitter_ms': round(result.get('jitter_ms', 0), 2) if result.get('jitter_ms') else None,
-                'interface': interface or 'auto',
-                'duration': duration,
-                'size': params.get('size', 0),
-                'host': params.get('host', ''),
-                'server': result.get('server', ''),
-                'port': params.get('port', ''),
-                'isp': result.get('isp', ''),
-                'include_latency': params.get('include_latency', False),
-                'status': 'failed' if is_failed else 'complete'
-            }
-            if engine == 'iperf3':
-                entry['server'] = params.get('server', '')
-                entry['port'] = params.get('port', '5201')
+            entry = make_entry(engine, params, interface, result)
+            is_failed = entry['status'] == 'failed'
             if is_failed:
-                entry['error'] = result.get('error', 'Test returned zero results')
                 cp.log(f'Test FAILED: {entry["error"]}')
             add_result(entry)
             # Write to configured outputs (only for successful tests)
@@ -855,21 +966,7 @@ def run_test_thread(engine, params):
                 err_msg = current_test.get('error') or 'Test failed'
                 current_test['error'] = err_msg
             # Save failed entry to history
-            entry = {
-                'timestamp': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
-                'engine': engine,
-                'download_mbps': 0,
-                'upload_mbps': 0,
-                'ping_ms': None,
-                'latency_ms': None,
-                'jitter_ms': None,
-                'interface': interface or 'auto',
-                'duration': duration,
-                'server': params.get('server', ''),
-                'status': 'failed',
-                'error': current_test.get('error') or 'No results'
-            }
-            add_result(entry)
+            add_result(make_entry(engine, params, interface, None, current_test.get('error')))
     except Exception as e:
         cp.log(f'Test thread error: {e}')
         with test_lock:
@@ -879,6 +976,133 @@ def run_test_thread(engine, params):
             current_test['running'] = False
 
 
+# =============================================================================
+# MULTI-WAN COMPARISON
+# =============================================================================
+
+def resolve_interfaces(selection):
+    """Return [(iface, name)] for 'all' or a list of interface names, keeping connected ones."""
+    connected = get_wan_interfaces()
+    if selection == 'all':
+        return [(i['iface'], i['name']) for i in connected]
+    names = {i['iface']: i['name'] for i in connected}
+    selected = []
+    for iface in selection:
+        if iface in names:
+            selected.append((iface, names[iface]))
+        else:
+            cp.log(f'Comparison: interface {iface} is not a connected WAN, skipping')
+    return selected
+
+
+def run_comparison(engine, params):
+    """Run the same test on several WAN interfaces and store them as one comparison.
+
+    Up to max_parallel interfaces are tested at once. Each interface has
+    its own progress and error, and a failure on one does not affect the
+    others. iPerf3 tests share the server's port range so concurrent tests
+    get different ports. Netperf stages take turns, because the router runs
+    one netperf test at a time, so a netperf comparison takes about as long
+    as testing the interfaces one after another. Every interface's result is
+    added to history with the same run_id, and get_comparison() turns them
+    into a report.
+    """
+    if engine not in ('netperf', 'iperf3'):
+        with test_lock:
+            current_test['error'] = 'Multi-WAN comparison supports netperf and iperf3'
+        return
+    interfaces = resolve_interfaces(params.get('interfaces'))
+    if not interfaces:
+        with test_lock:
+            current_test['error'] = 'No connected WAN interfaces to compare'
+        return
+
+    run_id = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    max_parallel = max(1, min(int(params.get('max_parallel', MAX_PARALLEL)), len(interfaces)))
+    port_pool = PortPool(params.get('port', 5201)) if engine == 'iperf3' else None
+    states = {iface: {'name': name, 'stage': 'queued'} for iface, name in interfaces}
+    cp.log(f'Comparison {run_id}: {engine} on {", ".join(states)} ({max_parallel} at a time)')
+
+    def update(iface, data):
+        with test_lock:
+            states[iface].update(data)
+            done = sum(1 for st in states.values() if st['stage'] in ('complete', 'failed'))
+            current_test['progress'] = {
+                'stage': 'compare',
+                'run_id': run_id,
+                'percent': int(done * 100 / len(states)),
+                'interfaces': {name: dict(st) for name, st in states.items()}
+            }
+
+    def run_one(iface):
+        def progress(data):
+            update(iface, data)
+        try:
+            result = run_engine(engine, params, iface, progress, port_pool)
+            entry = make_entry(engine, params, iface, result,
+                               None if result else 'Test failed')
+        except Exception as e:
+            cp.log(f'Comparison {run_id}: {iface} error: {e}')
+            entry = make_entry(engine, params, iface, None, str(e))
+        entry['run_id'] = run_id
+        entry['name'] = states[iface]['name']
+        add_result(entry)
+        if entry['status'] == 'complete':
+            write_outputs(entry)
+        update(iface, {'stage': entry['status'], 'result': entry})
+
+    start = time.time()
+    pending = [iface for iface, _ in interfaces]
+    update(pending[0], {})
+    workers = []
+
+    def worker():
+        while current_test['running']:
+            with test_lock:
+                if not pending:
+                    return
+                iface = pending.pop(0)
+            run_one(iface)
+
+    for _ in range(max_parallel):
+        thread = Thread(target=worker, daemon=True)
+        thread.start()
+        workers.append(thread)
+    for thread in workers:
+        thread.join()
+
+    report = get_comparison(run_id)
+    cp.log(f'Comparison {run_id} finished in {time.time() - start:.0f}s: '
+           + ', '.join(f'{r["interface"]} {r["download_mbps"]}/{r["upload_mbps"]}Mbps'
+                       for r in report['results']))
+    with test_lock:
+        current_test['progress'] = {'stage': 'complete', 'run_id': run_id, 'report': report}
+
+
+def get_comparison(run_id=None):
+    """Build a comparison report from the history entries of one run (default: latest)."""
+    history = load_history()
+    if run_id is None:
+        run_id = next((e['run_id'] for e in reversed(history) if e.get('run_id')), None)
+    entries = [e for e in history if run_id and e.get('run_id') == run_id]
+    if not entries:
+        return None
+    results = sorted(entries, key=lambda e: e.get('download_mbps', 0), reverse=True)
+    ok = [e for e in results if e.get('status') == 'complete']
+    report = {
+        'run_id': run_id,
+        'engine': entries[0].get('engine'),
+        'results': [],
+        'best_download': max(ok, key=lambda e: e['download_mbps'])['interface'] if ok else None,
+        'best_upload': max(ok, key=lambda e: e['upload_mbps'])['interface'] if ok else None,
+    }
+    for e in results:
+        report['results'].append({key: e.get(key) for key in (
+            'interface', 'name', 'timestamp', 'status', 'error', 'download_mbps', 'upload_mbps',
+            'latency_ms', 'jitter_ms', 'server', 'port')})
+    return report
+
+
 # =============================================================================
 # HTTP SERVER
 # =============================================================================
@@ -901,6 +1125,8 @@ class SpeedtestHandler(SimpleHTTPRequestHandler):
             self.send_json(self.get_status())
         elif self.path == '/api/history':
             self.send_json(load_history())
+        elif self.path == '/api/compare':
+            self.send_json(get_comparison() or {})
         elif self.path == '/api/interfaces':
             self.send_json(get_wan_interfaces())
         elif self.path == '/api/engines':
@@ -910,9 +1136,13 @@ class SpeedtestHandler(SimpleHTTPRequestHandler):
         elif self.path == '/api/schedule':
             with schedule_lock:
                 data = dict(schedule_config)
-            # Compute seconds until next cron match
-            if data.get('enabled') and data.get('cron'):
-                data['next_run_seconds'] = self._seconds_to_next_cron(data['cron'])
+            now = time.time()
+            next_fire = scheduler.next_fire()
+            if next_fire is not None:
+                data['next_run_seconds'] = int(next_fire - now)
+            data['next_runs'] = {name: int(fire - now) for name, fire in
+                                 ((name, scheduler.next_fire(name)) for name in schedule_names())
+                                 if fire is not None}
             self.send_json(data)
         elif self.path == '/api/outputs':
             self.send_json(self.get_outputs())
@@ -975,29 +1205,6 @@ class SpeedtestHandler(SimpleHTTPRequestHandler):
         except Exception:
             return {'hostname': 'router'}
 
-    def _seconds_to_next_cron(self, cron_expr):
-        """Estimate seconds until next cron match (max 24h lookahead)."""
-        try:
-            now = datetime.utcnow()
-            for i in range(1, 1441):  # Check next 24 hours, minute by minute
-                candidate = datetime(now.year, now.month, now.day,
-                                     now.hour, now.minute) 
-                # Add i minutes
-                import calendar
-                total_minutes = now.hour * 60 + now.minute + i
-                days_ahead = total_minutes // 1440
-                remaining = total_minutes % 1440
-                candidate = now.replace(hour=remaining // 60,
-                                        minute=remaining % 60, second=0)
-                if days_ahead > 0:
-                    # Simple next-day approximation
-                    pass
-                if cron_matches(cron_expr, candidate):
-                    return i * 60 - now.second
-            return None
-        except Exception:
-            return None
-
     def get_engines(self):
         """Get available speedtest engines."""
         engines = []
@@ -1228,14 +1435,23 @@ class SpeedtestHandler(SimpleHTTPRequestHandler):
         except json.JSONDecodeError:
             self.send_json({'error': 'Invalid JSON'}, 400)
             return
+        with schedule_lock:
+            current = dict(schedule_config)
         config = {
             'enabled': bool(data.get('enabled', False)),
             'autostart': bool(data.get('autostart', False)),
             'cron': data.get('cron', ''),
             'engine': data.get('engine', 'netperf'),
-            'params': data.get('params', {})
+            'params': data.get('params', {}),
+            'catch_up': data.get('catch_up', current.get('catch_up', DEFAULT_CATCH_UP)),
+            'schedules': data.get('schedules', current.get('schedules', []))
         }
+        error = validate_schedule(config)
+        if error:
+            self.send_json({'error': error}, 400)
+            return
         save_schedule(config)
+        apply_schedule()
         status = 'enabled' if config['enabled'] else 'disabled'
         cp.log(f'Schedule {status}: {config["cron"]}')
         self.send_json({'status': status, 'schedule': config})
@@ -1324,44 +1540,6 @@ class SpeedtestHandler(SimpleHTTPRequestHandler):
 # MAIN
 # =============================================================================
 
-def cron_matches(cron_expr, dt):
-    """Check if a datetime matches a cron expression (minute hour dom month dow)."""
-    try:
-        fields = cron_expr.strip().split()
-        if len(fields) != 5:
-            return False
-
-        def match_field(field, value, min_val, max_val):
-            for part in field.split(','):
-                part = part.strip()
-                if '/' in part:
-                    base, step = part.split('/', 1)
-                    step = int(step)
-                    start = min_val if base == '*' else int(base.split('-')[0] if '-' in base else base)
-                    if value >= start and (value - start) % step == 0:
-                        return True
-                elif part == '*':
-                    return True
-                elif '-' in part:
-                    a, b = part.split('-', 1)
-                    if int(a) <= value <= int(b):
-                        return True
-                else:
-                    if int(part) == value:
-                        return True
-            return False
-
-        # dow: 0=Sunday in cron, Python weekday: 0=Monday
-        cron_dow = (dt.weekday() + 1) % 7
-        return (match_field(fields[0], dt.minute, 0, 59) and
-                match_field(fields[1], dt.hour, 0, 23) and
-                match_field(fields[2], dt.day, 1, 31) and
-                match_field(fields[3], dt.month, 1, 12) and
-                match_field(fields[4], cron_dow, 0, 7))
-    except Exception:
-        return False
-
-
 def load_schedule():
     """Load schedule from appdata. If autostart is set, enable on boot."""
     global schedule_config
@@ -1376,6 +1554,12 @@ def load_schedule():
                     schedule_config['enabled'] = True
     except Exception:
         pass
+    try:
+        val = cp.get_appdata('speedtest_schedule_state')
+        if val:
+            schedule_state.update(json.loads(val))
+    except Exception:
+        pass
 
 
 def save_schedule(config):
@@ -1386,32 +1570,112 @@ def save_schedule(config):
     cp.put_appdata('speedtest_schedule', json.dumps(config))
 
 
-def scheduler_thread():
-    """Background thread that checks cron schedule and runs tests."""
-    last_fired = None
-    while True:
+def schedule_entries(config):
+    """Return the schedules in a config: the main one plus any in 'schedules'.
+
+    Each extra schedule is {name, cron, engine, params, enabled, catch_up};
+    missing fields fall back to the main schedule's.
+    """
+    entries = []
+    if config.get('cron'):
+        entries.append({'name': 'default', 'enabled': config.get('enabled', False),
+                        'cron': config['cron'], 'engine': config.get('engine', 'netperf'),
+                        'params': config.get('params', {}),
+                        'catch_up': config.get('catch_up', DEFAULT_CATCH_UP)})
+    for i, extra in enumerate(config.get('schedules') or []):
+        entries.append({'name': extra.get('name') or f'schedule{i + 1}',
+                        'enabled': extra.get('enabled', True),
+                        'cron': extra.get('cron', ''),
+                        'engine': extra.get('engine', config.get('engine', 'netperf')),
+                        'params': extra.get('params', config.get('params', {})),
+                        'catch_up': extra.get('catch_up', config.get('catch_up', DEFAULT_CATCH_UP))})
+    return entries
+
+
+def validate_schedule(config):
+    """Return an error message for an invalid schedule config, or None."""
+    names = set()
+    for entry in schedule_entries(config):
+        if entry['name'] in names:
+            return f'Duplicate schedule name: {entry["name"]}'
+        names.add(entry['name'])
+        if entry['catch_up'] not in CATCH_UP_POLICIES:
+            return f'catch_up must be one of {", ".join(CATCH_UP_POLICIES)}'
+        if entry['enabled']:
+            try:
+                CronExpression(entry['cron'])
+            except ValueError as e:
+                return str(e)
+    return None
+
+
+def schedule_names():
+    with scheduler.lock:
+        return list(scheduler.schedules)
+
+
+def scheduled_test(name, engine, params):
+    """Return the callback that starts a scheduled test."""
+    def callback():
+        if current_test['running']:
+            cp.log(f'Scheduled test {name} skipped: a test is already running')
+            return
+        cp.log(f'Scheduled test triggered: {name}')
+        params_copy = dict(params)
+        params_copy['engine'] = engine
+        Thread(target=run_test_thread, args=(engine, params_copy), daemon=True).start()
+    return callback
+
+
+def save_schedule_state():
+    try:
+        cp.put_appdata('speedtest_schedule_state', json.dumps(schedule_state))
+    except Exception as e:
+        cp.log(f'Error saving schedule state: {e}')
+
+
+def record_schedule_fire(name, fire_time):
+    """Persist the last fire time so missed fires can be caught up after a reboot."""
+    schedule_state[name] = fire_time
+    save_schedule_state()
+
+
+def apply_schedule(startup=False):
+    """Replace the scheduler's schedules with the enabled ones in schedule_config.
+
+    Missed fires are only caught up for the schedules loaded at startup. When
+    a schedule is edited, one that is new, re-enabled or has a new cron
+    expression forgets its last fire time and starts from now, so saving it
+    does not run a catch-up test at once.
+    """
+    with schedule_lock:
+        config = dict(schedule_config)
+    with scheduler.lock:
+        previous = {name: s.cron.expr for name, s in scheduler.schedules.items()}
+    scheduler.clear()
+    reset = False
+    for entry in schedule_entries(config):
+        if not entry['enabled'] or not entry['cron']:
+            continue
+        if not startup and previous.get(entry['name']) != entry['cron'].strip():
+            reset |= schedule_state.pop(entry['name'], None) is not None
         try:
-            with schedule_lock:
-                enabled = schedule_config.get('enabled', False)
-                cron = schedule_config.get('cron', '')
-                engine = schedule_config.get('engine', 'netperf')
-                params = schedule_config.get('params', {})
-
-            if enabled and cron:
-                now = datetime.utcnow()
-                current_minute = (now.year, now.month, now.day, now.hour, now.minute)
-                if current_minute != last_fired and cron_matches(cron, now):
-                    last_fired = current_minute
-                    if not current_test['running']:
-                        cp.log(f'Scheduled test triggered: {cron}')
-                        params_copy = dict(params)
-                        params_copy['engine'] = engine
-                        thread = Thread(target=run_test_thread,
-                                        args=(engine, params_copy), daemon=True)
-                        thread.start()
-        except Exception as e:
-            cp.log(f'Scheduler error: {e}')
-        time.sleep(15)
+            scheduler.add(entry['name'], entry['cron'],
+                          scheduled_test(entry['name'], entry['engine'], entry['params']),
+                          catch_up=entry['catch_up'],
+                          last_fired=schedule_state.get(entry['name']))
+        except ValueError as e:
+            cp.log(f'Schedule {entry["name"]} not loaded: {e}')
+    if not startup:
+        # Disabled and removed schedules start from scratch when re-enabled
+        for name in [name for name in schedule_state if name not in scheduler.schedules]:
+            del schedule_state[name]
+            reset = True
+        if reset:
+            save_schedule_state()
+
+
+scheduler = Scheduler(on_fired=record_schedule_fire, log=cp.log)
 
 
 cp.log('Starting...')
@@ -1425,11 +1689,12 @@ else:
 
 # Load saved schedule
 load_schedule()
-if schedule_config.get('enabled'):
-    cp.log(f'Schedule active: {schedule_config.get("cron", "")}')
+apply_schedule(startup=True)
+for name in schedule_names():
+    cp.log(f'Schedule active: {name} {scheduler.schedules[name].cron.expr}')
 
 # Start scheduler thread
-sched_thread = Thread(target=scheduler_thread, daemon=True)
+sched_thread = Thread(target=scheduler.run, daemon=True)
 sched_thread.start()
 
 # Start web server
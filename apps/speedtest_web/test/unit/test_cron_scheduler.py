@@ -0,0 +1,146 @@
+import unittest
+from datetime import datetime
+
+from cron_scheduler import CronExpression, Scheduler, GRACE_SECONDS
+
+
+def epoch(*args):
+    return (datetime(*args) - datetime(1970, 1, 1)).total_seconds()
+
+
+class FakeClock:
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestCronExpression(unittest.TestCase):
+
+    def test_next_after(self):
+        cases = [
+            ('*/15 * * * *', datetime(2026, 3, 1, 10, 14, 59), datetime(2026, 3, 1, 10, 15)),
+            ('*/15 * * * *', datetime(2026, 3, 1, 10, 15), datetime(2026, 3, 1, 10, 30)),
+            ('0 2 * * *', datetime(2026, 3, 1, 2, 0), datetime(2026, 3, 2, 2, 0)),
+            ('30 8 * * 1-5', datetime(2026, 3, 6, 9, 0), datetime(2026, 3, 9, 8, 30)),  # Fri -> Mon
+            ('0 0 * * 7', datetime(2026, 3, 1, 0, 0), datetime(2026, 3, 8, 0, 0)),  # 7 is Sunday
+            ('0 0 29 2 *', datetime(2026, 3, 1), datetime(2028, 2, 29)),
+            ('59 23 31 12 *', datetime(2026, 12, 31, 23, 59), datetime(2027, 12, 31, 23, 59)),
+            ('5/20 * * * *', datetime(2026, 3, 1, 10, 46), datetime(2026, 3, 1, 11, 5)),
+        ]
+        for expr, after, expected in cases:
+            self.assertEqual(CronExpression(expr).next_after(after), expected, expr)
+
+    def test_day_of_month_or_day_of_week(self):
+        # Both restricted: the 1st of the month or any Monday
+        cron = CronExpression('0 0 1 * 1')
+        self.assertEqual(cron.next_after(datetime(2026, 3, 1)), datetime(2026, 3, 2))
+        self.assertEqual(cron.next_after(datetime(2026, 3, 30)), datetime(2026, 4, 1))
+
+    def test_impossible_date(self):
+        self.assertIsNone(CronExpression('0 0 30 2 *').next_after(datetime(2026, 1, 1)))
+
+    def test_invalid(self):
+        for expr in ('', '* * * *', '60 * * * *', '* 24 * * *', '*/0 * * * *', 'a * * * *', '5-1 * * * *'):
+            with self.assertRaises(ValueError, msg=expr):
+                CronExpression(expr)
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock(epoch(2026, 3, 1, 10, 0, 30))
+        self.fired = []
+        self.recorded = {}
+        self.scheduler = Scheduler(clock=self.clock, log=lambda msg: None,
+                                   on_fired=lambda name, t: self.recorded.__setitem__(name, t))
+
+    def callback(self, name):
+        return lambda: self.fired.append(name)
+
+    def test_sleeps_until_next_fire(self):
+        self.scheduler.add('a', '5 * * * *', self.callback('a'))
+        self.assertEqual(self.scheduler.next_fire(), epoch(2026, 3, 1, 10, 5))
+        self.assertEqual(self.scheduler.seconds_until_next(), 60)  # capped at MAX_SLEEP
+        self.clock.now = epoch(2026, 3, 1, 10, 4, 30)
+        self.assertEqual(self.scheduler.seconds_until_next(), 30)
+        self.assertEqual(self.scheduler.run_pending(), [])
+
+    def test_late_wakeup_still_fires(self):
+        self.scheduler.add('a', '* * * * *', self.callback('a'))
+        self.clock.now = epoch(2026, 3, 1, 10, 1, 40)
+        self.assertEqual(self.scheduler.run_pending(), ['a'])
+        self.assertEqual(self.fired, ['a'])
+        self.assertEqual(self.recorded['a'], epoch(2026, 3, 1, 10, 1))
+        self.assertEqual(self.scheduler.next_fire('a'), epoch(2026, 3, 1, 10, 2))
+
+    def test_independent_schedules(self):
+        self.scheduler.add('quarter', '*/15 * * * *', self.callback('quarter'))
+        self.scheduler.add('hourly', '0 * * * *', self.callback('hourly'))
+        for minute in range(1, 61):
+            self.clock.now = epoch(2026, 3, 1, 10, 0) + minute * 60
+            self.scheduler.run_pending()
+        self.assertEqual(self.fired.count('quarter'), 4)
+        self.assertEqual(self.fired.count('hourly'), 1)
+
+    def test_catch_up_policies(self):
+        # Fires at 7:00, 8:00, 9:00 and 10:00 were missed
+        self.clock.now = epoch(2026, 3, 1, 10, 30)
+        last = epoch(2026, 3, 1, 6, 0)
+        for policy, runs in (('skip', 0), ('once', 1), ('all', 4)):
+            self.fired = []
+            self.scheduler.add(policy, '0 * * * *', self.callback(policy),
+                               catch_up=policy, last_fired=last)
+            self.scheduler.run_pending()
+            self.assertEqual(len(self.fired), runs, policy)
+            self.assertEqual(self.recorded[policy], epoch(2026, 3, 1, 10, 0))
+            self.scheduler.remove(policy)
+
+    def test_catch_up_all_is_bounded(self):
+        self.scheduler.add('a', '* * * * *', self.callback('a'), catch_up='all',
+                           last_fired=epoch(2026, 2, 1))
+        self.scheduler.run_pending()
+        self.assertEqual(len(self.fired), 10)
+        self.assertEqual(self.scheduler.next_fire('a'), epoch(2026, 3, 1, 10, 1))
+        self.assertEqual(self.recorded['a'], epoch(2026, 3, 1, 10, 0))
+
+    def test_no_catch_up_without_history(self):
+        # Added before the clock was set, e.g. prior to NTP sync at boot
+        self.clock.now = epoch(1970, 1, 1)
+        self.scheduler.add('a', '0 * * * *', self.callback('a'))
+        self.clock.now = epoch(2026, 3, 1, 10, 30)
+        self.scheduler.run_pending()
+        self.assertEqual(self.fired, [])
+        self.assertEqual(self.scheduler.next_fire('a'), epoch(2026, 3, 1, 11, 0))
+
+    def test_clock_backwards(self):
+        self.scheduler.add('a', '0 * * * *', self.callback('a'))
+        self.scheduler.run_pending()
+        self.clock.now = epoch(2026, 3, 1, 8, 30)
+        self.scheduler.run_pending()
+        self.assertEqual(self.scheduler.next_fire('a'), epoch(2026, 3, 1, 9, 0))
+
+    def test_grace(self):
+        self.scheduler.add('a', '0 * * * *', self.callback('a'), catch_up='skip',
+                           last_fired=epoch(2026, 3, 1, 10, 0))
+        self.clock.now = epoch(2026, 3, 1, 11, 0) + GRACE_SECONDS
+        self.scheduler.run_pending()
+        self.assertEqual(self.fired, ['a'])
+        self.clock.now = epoch(2026, 3, 1, 12, 0) + GRACE_SECONDS + 1
+        self.scheduler.run_pending()
+        self.assertEqual(self.fired, ['a'])
+
+    def test_callback_error_does_not_stop_others(self):
+        def broken():
+            raise RuntimeError('boom')
+        self.scheduler.add('broken', '* * * * *', broken)
+        self.scheduler.add('ok', '* * * * *', self.callback('ok'))
+        self.clock.now += 60
+        self.assertEqual(sorted(self.scheduler.run_pending()), ['broken', 'ok'])
+        self.assertEqual(self.fired, ['ok'])
+
+
+if __name__ == '__main__':
+    unittest.main()